@@ -22,16 +22,16 @@ echo ""
 echo "2. Output Files Created:"
 PLOTS_DIR="/store/shuvam/solvent_effects/6ns_sim/6ns_sim_v2/analysis/plots"
 
-json_count=$(ls "$PLOTS_DIR"/water_structure_*.json 2>/dev/null | wc -l)
+json_count=$(ls "$PLOTS_DIR"/water_structure_*.manifest.json 2>/dev/null | wc -l)
 csv_count=$(ls "$PLOTS_DIR"/water_structure_*.csv 2>/dev/null | wc -l)
 
-echo "  JSON files: $json_count / 6"
+echo "  Columnar results: $json_count / 6"
 echo "  CSV files: $csv_count / 6"
 
 if [ $json_count -gt 0 ]; then
     echo ""
     echo "  File sizes:"
-    ls -lh "$PLOTS_DIR"/water_structure_*.json 2>/dev/null | awk '{print "    "$9": "$5}'
+    ls -lh "$PLOTS_DIR"/water_structure_*.npz 2>/dev/null | awk '{print "    "$9": "$5}'
 fi
 echo ""
 
@@ -47,10 +47,10 @@ fi
 echo "3. Estimated Progress: $progress"
 echo ""
 
-# Check file integrity (JSON should be >1KB when complete)
+# Check file integrity (manifest is written last, after the .npz)
 if [ $json_count -gt 0 ]; then
     echo "4. File Integrity Check:"
-    for f in "$PLOTS_DIR"/water_structure_*.json; do
+    for f in "$PLOTS_DIR"/water_structure_*.npz; do
         size=$(stat -f%z "$f" 2>/dev/null || stat -c%s "$f" 2>/dev/null)
         if [ "$size" -lt 1000 ]; then
             echo "  ⏳ $(basename $f): $size bytes (still writing...)"
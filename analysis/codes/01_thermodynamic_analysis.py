@@ -13,6 +13,15 @@ System Details:
 - Atom types: 1=C (carbon), 2=O (oxygen), 3=H (hydrogen)
 - Epsilon range: 0.0 to 0.25 kcal/mol
 
+Follow mode (--follow) tails production_detailed_thermo.dat of running
+simulations and refreshes statistics and plots as new rows arrive.
+
+Statistics are computed on a ThermoCube (thermo_cube.py): the production
+series of all epsilons as one aligned epsilon x time x observable array, so
+means, stds, drifts, block errors and correlation times are single
+vectorized reductions across the runs, and every mean gets a 95%
+moving-block bootstrap confidence interval (block_bootstrap.py).
+
 Author: Scientific Analysis Suite
 Date: November 2025
 """
@@ -23,6 +32,7 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 import json
+import argparse
 from scipy import stats
 from matplotlib.gridspec import GridSpec
 
@@ -43,6 +53,14 @@ plt.rcParams['figure.titlesize'] = 16
 import matplotlib.cm as cm
 from matplotlib.colors import Normalize
 
+from module_host import read_table
+from live_follow import ThermoFollower, RunningStats, follow_loop
+from instrumentation import instrumented
+from epsilon_registry import get_registry, base_dir_default
+from results_warehouse import store_results
+from thermo_cube import ThermoCube
+from block_bootstrap import attach_interval
+
 def get_epsilon_colormap(epsilon_values):
     """Generate a perceptually uniform colormap for epsilon values"""
     norm = Normalize(vmin=min(epsilon_values), vmax=max(epsilon_values))
@@ -50,22 +68,7 @@ def get_epsilon_colormap(epsilon_values):
     return {eps: cmap(norm(eps)) for eps in epsilon_values}
 
 # Define paths
-BASE_DIR = Path("/store/shuvam/learning_solvent_effects")
-
-# Setup epsilon directories (handle epsilon_0.0 and format differences)
-epsilon_values_list = [
-    0.0, 0.05, 0.10, 0.15, 0.20, 0.25, 0.30, 0.35, 0.40, 0.45, 0.50,
-    0.55, 0.60, 0.65, 0.70, 0.75, 0.80, 0.85, 0.90, 0.95, 1.0, 1.05, 1.10
-]
-EPSILON_DIRS = []
-for eps in epsilon_values_list:
-    if eps == 0.0:
-        EPSILON_DIRS.append(BASE_DIR / "solvent_effects" / "epsilon_0.0")
-    elif eps == 1.0:
-        EPSILON_DIRS.append(BASE_DIR / "solvent_effects" / "epsilon_1.0")
-    else:
-        EPSILON_DIRS.append(BASE_DIR / "solvent_effects" / f"epsilon_{eps:.2f}")
-
+BASE_DIR = base_dir_default()  # epsilon runs: epsilon_registry.get_registry(BASE_DIR)
 PLOTS_DIR = BASE_DIR / "analysis" / "plots"
 PLOTS_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -79,6 +82,14 @@ TARGET_PRESS = 1.0  # atm
 PRODUCTION_START = 600000  # step where production begins
 TOTAL_STEPS = 2600000  # total simulation steps (maximum)
 
+PRODUCTION_COLUMNS = ['TimeStep', 'Temp', 'Press', 'PE', 'KE', 'Vol', 'Dens']
+STAT_PROPERTIES = ['Temp', 'Press', 'Dens', 'PE', 'Vol']
+
+# Follow-mode warnings: flag runs worth aborting early
+TEMP_ALERT_K = 5.0          # |running mean T - target| above this
+DENSITY_ALERT_MIN = 0.90    # running mean density below this (g/cm³)
+ALERT_MIN_SAMPLES = 100
+
 class ThermodynamicAnalyzer:
     """Analyzer for thermodynamic properties across epsilon values"""
     
@@ -86,7 +97,10 @@ class ThermodynamicAnalyzer:
         self.epsilon_dirs = epsilon_dirs
         self.epsilon_values = epsilon_values
         self.data = {}
+        self.equilibration_data = {}
+        self.cube = None
         
+    @instrumented()
     def load_production_data(self):
         """Load production run thermodynamic data for all epsilon values"""
         print("Loading production thermodynamic data...")
@@ -99,8 +113,7 @@ class ThermodynamicAnalyzer:
                 continue
                 
             # Read thermodynamic data
-            df = pd.read_csv(thermo_file, sep=r'\s+', comment='#',
-                           names=['TimeStep', 'Temp', 'Press', 'PE', 'KE', 'Vol', 'Dens'])
+            df = read_table(thermo_file, sep=r'\s+', comment='#', names=PRODUCTION_COLUMNS)
             
             # Convert timestep to time in ns
             df['Time_ns'] = (df['TimeStep'] + PRODUCTION_START) * TIMESTEP / 1e6
@@ -108,8 +121,10 @@ class ThermodynamicAnalyzer:
             self.data[eps] = df
             print(f"  Loaded ε={eps}: {len(df)} data points")
             
+        self.cube = None
         return self
     
+    @instrumented()
     def load_equilibration_data(self):
         """Load NPT equilibration data"""
         print("Loading equilibration thermodynamic data...")
@@ -120,47 +135,32 @@ class ThermodynamicAnalyzer:
             if not thermo_file.exists():
                 continue
                 
-            df = pd.read_csv(thermo_file, sep=r'\s+', comment='#',
+            df = read_table(thermo_file, sep=r'\s+', comment='#',
                            names=['TimeStep', 'Epsilon', 'Temp', 'Press', 'Vol', 'PE', 'KE', 'Etotal', 'Dens'])
             
             df['Time_ns'] = df['TimeStep'] * TIMESTEP / 1e6
             
-            if eps not in self.data:
-                self.data[eps] = {}
-            self.data[eps]['equilibration'] = df
+            self.equilibration_data[eps] = df
             print(f"  Loaded equilibration for ε={eps}: {len(df)} points")
             
         return self
     
+    def statistics_cube(self):
+        """Production data of all epsilons as one aligned ThermoCube (rebuilt after new data)"""
+        if self.cube is None:
+            self.cube = ThermoCube.from_frames(self.data, self.epsilon_values, STAT_PROPERTIES)
+        return self.cube
+    
+    @instrumented()
     def compute_statistics(self):
-        """Compute statistical properties for each epsilon"""
-        stats_data = []
+        """Means, stds, drifts, block errors and correlation times of all epsilons at once"""
+        cube = self.statistics_cube()
+        self.stats_df = cube.statistics()
         
-        for eps in self.epsilon_values:
-            if eps not in self.data:
-                continue
-                
-            df = self.data[eps]
-            
-            # Compute averages and standard deviations
-            stats_entry = {
-                'Epsilon': eps,
-                'Temp_mean': df['Temp'].mean(),
-                'Temp_std': df['Temp'].std(),
-                'Press_mean': df['Press'].mean(),
-                'Press_std': df['Press'].std(),
-                'Dens_mean': df['Dens'].mean(),
-                'Dens_std': df['Dens'].std(),
-                'PE_mean': df['PE'].mean(),
-                'PE_std': df['PE'].std(),
-                'Vol_mean': df['Vol'].mean(),
-                'Vol_std': df['Vol'].std(),
-                'N_samples': len(df)
-            }
-            
-            stats_data.append(stats_entry)
-            
-        self.stats_df = pd.DataFrame(stats_data)
+        # 95% block-bootstrap intervals of every mean (all epsilons, observables together)
+        low, high = cube.mean_interval()
+        for k, prop in enumerate(cube.observables):
+            attach_interval(self.stats_df, f'{prop}_mean', low[:, k], high[:, k])
         
         # Save statistics to CSV
         stats_file = PLOTS_DIR / "thermodynamic_statistics.csv"
@@ -169,6 +169,7 @@ class ThermodynamicAnalyzer:
         
         return self
     
+    @instrumented()
     def plot_temperature_evolution(self):
         """Plot temperature evolution with improved aesthetics for 23 epsilon values"""
         color_map = get_epsilon_colormap(self.epsilon_values)
@@ -226,6 +227,7 @@ class ThermodynamicAnalyzer:
         plt.close()
         print("  Saved: 01b_temperature_summary.png")
         
+    @instrumented()
     def plot_pressure_evolution(self):
         """Plot pressure evolution and distribution"""
         fig = plt.figure(figsize=(20, 12))
@@ -294,6 +296,7 @@ class ThermodynamicAnalyzer:
         plt.close()
         print("  Saved: 02_pressure_analysis.png")
         
+    @instrumented()
     def plot_density_analysis(self):
         """Plot density evolution and epsilon dependence"""
         fig, axes = plt.subplots(2, 2, figsize=(18, 12))
@@ -378,6 +381,7 @@ class ThermodynamicAnalyzer:
         plt.close()
         print("  Saved: 03_density_analysis.png")
         
+    @instrumented()
     def plot_energy_analysis(self):
         """Plot potential energy analysis"""
         fig, axes = plt.subplots(2, 2, figsize=(18, 12))
@@ -457,6 +461,7 @@ class ThermodynamicAnalyzer:
         plt.close()
         print("  Saved: 04_energy_analysis.png")
         
+    @instrumented()
     def plot_comparison_matrix(self):
         """Create comprehensive comparison matrix"""
         fig = plt.figure(figsize=(18, 12))
@@ -466,16 +471,22 @@ class ThermodynamicAnalyzer:
         titles = ['Temperature (K)', 'Pressure (atm)', 'Density (g/cm³)', 
                  'Potential Energy (kcal/mol)', 'Volume (Å³)']
         
+        # All epsilons and observables in one reduction each
+        cube = self.statistics_cube()
+        valid_eps = cube.epsilons
+        columns = [cube.index(prop) for prop in properties]
+        all_means = cube.mean()[:, columns]
+        all_stds = cube.std()[:, columns]
+        x_pos = np.arange(len(valid_eps))
+        
         for idx, (prop, title) in enumerate(zip(properties, titles)):
             row = idx // 3
             col = idx % 3
             ax = fig.add_subplot(gs[row, col])
             
             # Plot mean ± std
-            valid_eps = self.stats_df['Epsilon'].values
-            means = self.stats_df[f'{prop}_mean'].values
-            stds = self.stats_df[f'{prop}_std'].values
-            x_pos = np.arange(len(valid_eps))
+            means = all_means[:, idx]
+            stds = all_stds[:, idx]
             
             ax.errorbar(x_pos, means, yerr=stds, fmt='o-', capsize=5, 
                        linewidth=2, markersize=8, color=f'C{idx}')
@@ -492,14 +503,13 @@ class ThermodynamicAnalyzer:
         ax_table.axis('off')
         
         table_data = []
-        for eps in self.epsilon_values:
-            row = self.stats_df[self.stats_df['Epsilon'] == eps].iloc[0]
+        for eps, m, sd in zip(valid_eps, all_means, all_stds):
             table_data.append([
                 f"{eps:.2f}",
-                f"{row['Temp_mean']:.2f}±{row['Temp_std']:.2f}",
-                f"{row['Press_mean']:.1f}±{row['Press_std']:.1f}",
-                f"{row['Dens_mean']:.4f}±{row['Dens_std']:.4f}",
-                f"{row['PE_mean']:.1f}±{row['PE_std']:.1f}"
+                f"{m[0]:.2f}±{sd[0]:.2f}",
+                f"{m[1]:.1f}±{sd[1]:.1f}",
+                f"{m[2]:.4f}±{sd[2]:.4f}",
+                f"{m[3]:.1f}±{sd[3]:.1f}"
             ])
         
         table = ax_table.table(cellText=table_data,
@@ -525,6 +535,91 @@ class ThermodynamicAnalyzer:
         plt.close()
         print("  Saved: 05_comparison_matrix.png")
         
+    def follow_production(self, interval=60.0, max_idle=None, plot_every=1):
+        """
+        Tail production thermo files of running simulations
+        
+        Each poll appends only the new complete rows, updates running
+        statistics incrementally and (every plot_every updates) redraws the
+        plots; stops when all followed runs are finished or go idle.
+        """
+        print(f"Following production thermo files (poll every {interval:g} s)...")
+        followers = {}
+        for eps, eps_dir in zip(self.epsilon_values, self.epsilon_dirs):
+            if eps_dir.exists():
+                followers[eps] = ThermoFollower(eps_dir / "production_detailed_thermo.dat",
+                                                PRODUCTION_COLUMNS)
+        if not followers:
+            print("  ✗ No epsilon directories to follow")
+            return self
+        
+        self.running = {eps: RunningStats(len(STAT_PROPERTIES)) for eps in followers}
+        updates = [0]
+        
+        def poll():
+            n_new = 0
+            for eps, follower in followers.items():
+                new = follower.poll()
+                if new.empty:
+                    continue
+                new['Time_ns'] = (new['TimeStep'] + PRODUCTION_START) * TIMESTEP / 1e6
+                self.data[eps] = pd.concat([self.data[eps], new], ignore_index=True) \
+                    if eps in self.data else new
+                self.running[eps].update(new[STAT_PROPERTIES].values)
+                self.cube = None
+                n_new += len(new)
+            
+            if n_new:
+                updates[0] += 1
+                print(f"\n[{pd.Timestamp.now():%H:%M:%S}] +{n_new} rows")
+                self.running_statistics()
+                self.check_live_alerts()
+                if updates[0] % plot_every == 0:
+                    self.plot_temperature_evolution()
+                    self.plot_pressure_evolution()
+                    self.plot_density_analysis()
+                    self.plot_energy_analysis()
+            return n_new
+        
+        follow_loop(poll, interval=interval, max_idle=max_idle,
+                    run_dirs=[d for eps, d in zip(self.epsilon_values, self.epsilon_dirs)
+                              if eps in followers])
+        return self
+    
+    def running_statistics(self):
+        """Statistics table from the running accumulators (same columns as compute_statistics)"""
+        stats_data = []
+        for eps in self.epsilon_values:
+            if eps not in getattr(self, 'running', {}) or self.running[eps].n == 0:
+                continue
+            rs = self.running[eps]
+            std = rs.std(ddof=1)
+            stats_entry = {'Epsilon': eps}
+            for i, prop in enumerate(STAT_PROPERTIES):
+                stats_entry[f'{prop}_mean'] = rs.mean[i]
+                stats_entry[f'{prop}_std'] = std[i]
+            stats_entry['N_samples'] = rs.n
+            stats_data.append(stats_entry)
+        
+        self.stats_df = pd.DataFrame(stats_data)
+        stats_file = PLOTS_DIR / "thermodynamic_statistics.csv"
+        self.stats_df.to_csv(stats_file, index=False, float_format='%.6f')
+        return self
+    
+    def check_live_alerts(self):
+        """Print warnings for runs drifting away from the target state"""
+        for _, row in self.stats_df.iterrows():
+            if row['N_samples'] < ALERT_MIN_SAMPLES:
+                continue
+            eps = row['Epsilon']
+            if abs(row['Temp_mean'] - TARGET_TEMP) > TEMP_ALERT_K:
+                print(f"  ⚠ ε={eps:.2f}: running mean T = {row['Temp_mean']:.1f} K "
+                      f"(target {TARGET_TEMP:.0f} K)")
+            if row['Dens_mean'] < DENSITY_ALERT_MIN:
+                print(f"  ⚠ ε={eps:.2f}: running mean density = {row['Dens_mean']:.3f} g/cm³")
+        return self
+    
+    @instrumented()
     def export_summary_json(self):
         """Export summary statistics to JSON"""
         summary = {
@@ -574,9 +669,11 @@ class ThermodynamicAnalyzer:
         print(f"\nSummary JSON saved to {json_file}")
 
 
+    @instrumented()
     def export_comprehensive_csv(self):
         """Export detailed CSV data for module 1"""
         import pandas as pd
+        tables = {}
         
         # Export time series if available
         if hasattr(self, 'data') and self.data:
@@ -592,26 +689,45 @@ class ThermodynamicAnalyzer:
                 csv_file = PLOTS_DIR / f"module01_timeseries_data.csv"
                 combined.to_csv(csv_file, index=False, float_format='%.6f')
                 print(f"  Exported CSV: {csv_file.name}")
+                tables['timeseries'] = combined
         
         # Export summary statistics if available
         if hasattr(self, 'stats_df'):
             summary_file = PLOTS_DIR / f"module01_summary_stats.csv"
             self.stats_df.to_csv(summary_file, index=False, float_format='%.6f')
             print(f"  Exported summary: {summary_file.name}")
+            tables['summary'] = self.stats_df
 
-def main():
+        # Same tables into the indexed results warehouse; block errors are the errors of the means
+        means = [c for c in getattr(self, 'stats_df', ()) if c.endswith('_mean')]
+        store_results('module01', tables, errors={c: c[:-len('_mean')] + '_block_err' for c in means})
+
+def main(argv=None):
     """Main analysis workflow"""
+    parser = argparse.ArgumentParser(description='Thermodynamic analysis across epsilon values')
+    parser.add_argument('--follow', action='store_true',
+                        help='Tail running simulations and update statistics/plots incrementally')
+    parser.add_argument('--interval', type=float, default=60.0, help='Follow-mode poll interval (s)')
+    parser.add_argument('--max-idle', type=float, default=None,
+                        help='Leave follow mode after this many seconds without new data')
+    parser.add_argument('--plot-every', type=int, default=1, help='Redraw plots every N updates')
+    args = parser.parse_args(argv)
+    
     print("="*70)
     print("THERMODYNAMIC ANALYSIS - C60 NANOPARTICLE SOLVATION STUDY")
     print("="*70)
     
-    epsilon_values = epsilon_values_list  # Use the global list defined at top
+    registry = get_registry(BASE_DIR)
+    epsilon_values = registry.epsilons()
     
-    analyzer = ThermodynamicAnalyzer(EPSILON_DIRS, epsilon_values)
+    analyzer = ThermodynamicAnalyzer([registry.directory(eps) for eps in epsilon_values], epsilon_values)
     
     # Load data
-    analyzer.load_production_data()
-    analyzer.compute_statistics()
+    if args.follow:
+        analyzer.follow_production(args.interval, args.max_idle, args.plot_every)
+    else:
+        analyzer.load_production_data()
+        analyzer.compute_statistics()
     
     print("\n" + "="*70)
     print("GENERATING PLOTS")
@@ -633,5 +749,11 @@ def main():
     print(f"All plots saved to: {PLOTS_DIR}")
     print("="*70)
 
+
+def run(context):
+    """Entry point for the in-process module host (module_host.py)"""
+    main([])
+
+
 if __name__ == "__main__":
     main()
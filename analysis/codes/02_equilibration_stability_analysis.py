@@ -12,6 +12,10 @@ Key analyses:
 3. Convergence assessment for all thermodynamic properties
 4. Stability metrics (drift, variance)
 
+Running averages/standard deviations are accumulated incrementally, so
+--follow can tail the production thermo files of running simulations and
+refresh the metrics and plots as new rows arrive.
+
 Author: Scientific Analysis Suite
 Date: November 2025
 """
@@ -27,6 +31,14 @@ import json
 from scipy import stats, signal
 from matplotlib.gridspec import GridSpec
 import warnings
+import argparse
+
+from module_host import read_table
+from live_follow import ThermoFollower, RunningStats, follow_loop
+from instrumentation import instrumented
+from epsilon_registry import get_registry, base_dir_default
+from results_warehouse import store_results
+
 warnings.filterwarnings('ignore')
 
 # Set publication-quality plot style
@@ -37,28 +49,17 @@ plt.rcParams['savefig.dpi'] = 600
 plt.rcParams['font.size'] = 10
 
 # Define paths
-BASE_DIR = Path("/store/shuvam/learning_solvent_effects")
-
-# Setup epsilon directories (handle epsilon_0.0 and format differences)
-epsilon_values_list = [
-    0.0, 0.05, 0.10, 0.15, 0.20, 0.25, 0.30, 0.35, 0.40, 0.45, 0.50,
-    0.55, 0.60, 0.65, 0.70, 0.75, 0.80, 0.85, 0.90, 0.95, 1.0, 1.05, 1.10
-]
-EPSILON_DIRS = []
-for eps in epsilon_values_list:
-    if eps == 0.0:
-        EPSILON_DIRS.append(BASE_DIR / "solvent_effects" / "epsilon_0.0")
-    elif eps == 1.0:
-        EPSILON_DIRS.append(BASE_DIR / "solvent_effects" / "epsilon_1.0")
-    else:
-        EPSILON_DIRS.append(BASE_DIR / "solvent_effects" / f"epsilon_{eps:.2f}")
-
+BASE_DIR = base_dir_default()  # epsilon runs: epsilon_registry.get_registry(BASE_DIR)
 PLOTS_DIR = BASE_DIR / "analysis" / "plots"
 PLOTS_DIR.mkdir(parents=True, exist_ok=True)
 
 TIMESTEP = 2.0  # fs
 TARGET_TEMP = 300.0  # K
 TARGET_PRESS = 1.0  # atm
+PRODUCTION_START = 600000
+
+PRODUCTION_COLUMNS = ['TimeStep', 'Temp', 'Press', 'PE', 'KE', 'Vol', 'Dens']
+RUNNING_PROPERTIES = ['Temp', 'Press', 'Dens']
 
 
 def get_epsilon_colormap(epsilon_values):
@@ -74,7 +75,9 @@ class EquilibrationAnalyzer:
         self.epsilon_values = epsilon_values
         self.data = {}
         self.equilibration_metrics = {}
+        self.running = {}
         
+    @instrumented()
     def load_all_stages(self):
         """Load data from all simulation stages"""
         print("Loading simulation data from all stages...")
@@ -85,7 +88,7 @@ class EquilibrationAnalyzer:
             # Load NPT equilibration data
             npt_file = eps_dir / "npt_equilibration_thermo.dat"
             if npt_file.exists():
-                df = pd.read_csv(npt_file, sep=r'\s+', comment='#',
+                df = read_table(npt_file, sep=r'\s+', comment='#',
                                names=['TimeStep', 'Epsilon', 'Temp', 'Press', 'Vol', 'PE', 'KE', 'Etotal', 'Dens'])
                 df['Time_ns'] = df['TimeStep'] * TIMESTEP / 1e6
                 df['Stage'] = 'NPT_Equilibration'
@@ -95,15 +98,70 @@ class EquilibrationAnalyzer:
             # Load production data
             prod_file = eps_dir / "production_detailed_thermo.dat"
             if prod_file.exists():
-                df = pd.read_csv(prod_file, sep=r'\s+', comment='#',
-                               names=['TimeStep', 'Temp', 'Press', 'PE', 'KE', 'Vol', 'Dens'])
-                df['Time_ns'] = (df['TimeStep'] + 600000) * TIMESTEP / 1e6
-                df['Stage'] = 'Production'
-                self.data[eps]['production'] = df
+                df = read_table(prod_file, sep=r'\s+', comment='#', names=PRODUCTION_COLUMNS)
+                self.running.pop(eps, None)
+                self.data[eps]['production'] = self._with_running_columns(eps, df)
                 print(f"  ε={eps}: Loaded production ({len(df)} points)")
                 
         return self
     
+    def _with_running_columns(self, eps, df):
+        """
+        Add Time_ns/Stage and cumulative {prop}_run_mean / {prop}_run_std columns
+        to new production rows, continuing the accumulator of this epsilon
+        """
+        df = df.copy()
+        df['Time_ns'] = (df['TimeStep'] + PRODUCTION_START) * TIMESTEP / 1e6
+        df['Stage'] = 'Production'
+        if eps not in self.running:
+            self.running[eps] = RunningStats(len(RUNNING_PROPERTIES))
+        means, stds = self.running[eps].update(df[RUNNING_PROPERTIES].values)
+        for i, prop in enumerate(RUNNING_PROPERTIES):
+            df[f'{prop}_run_mean'] = means[:, i]
+            df[f'{prop}_run_std'] = stds[:, i]
+        return df
+    
+    def follow_production(self, interval=60.0, max_idle=None, plot_every=1):
+        """
+        Tail production thermo files of running simulations
+        
+        New complete rows extend the running averages incrementally; the
+        equilibration metrics and plots are refreshed every plot_every updates.
+        """
+        print(f"Following production thermo files (poll every {interval:g} s)...")
+        followers = {eps: ThermoFollower(eps_dir / "production_detailed_thermo.dat", PRODUCTION_COLUMNS)
+                     for eps, eps_dir in zip(self.epsilon_values, self.epsilon_dirs) if eps_dir.exists()}
+        if not followers:
+            print("  ✗ No epsilon directories to follow")
+            return self
+        updates = [0]
+        
+        def poll():
+            n_new = 0
+            for eps, follower in followers.items():
+                new = follower.poll()
+                if new.empty:
+                    continue
+                new = self._with_running_columns(eps, new)
+                stages = self.data.setdefault(eps, {})
+                stages['production'] = pd.concat([stages['production'], new], ignore_index=True) \
+                    if 'production' in stages else new
+                n_new += len(new)
+            
+            if n_new:
+                updates[0] += 1
+                print(f"\n[{pd.Timestamp.now():%H:%M:%S}] +{n_new} rows")
+                self.analyze_equilibration_quality()
+                if updates[0] % plot_every == 0:
+                    self.plot_running_averages()
+                    self.plot_stability_metrics()
+            return n_new
+        
+        follow_loop(poll, interval=interval, max_idle=max_idle,
+                    run_dirs=[d for eps, d in zip(self.epsilon_values, self.epsilon_dirs)
+                              if eps in followers])
+        return self
+    
     def compute_autocorrelation(self, data, max_lag=1000):
         """Compute autocorrelation function"""
         mean = np.mean(data)
@@ -157,6 +215,7 @@ class EquilibrationAnalyzer:
         
         return block_sizes[:len(means)], means, stds
     
+    @instrumented()
     def analyze_equilibration_quality(self):
         """Analyze equilibration quality for each epsilon"""
         print("\nAnalyzing equilibration quality...")
@@ -213,9 +272,11 @@ class EquilibrationAnalyzer:
         metrics_file = PLOTS_DIR / "equilibration_metrics.csv"
         self.metrics_df.to_csv(metrics_file, index=False, float_format='%.6f')
         print(f"  Metrics saved to {metrics_file}")
+        store_results('module02', {'equilibration_metrics': self.metrics_df})
         
         return self
     
+    @instrumented()
     def plot_autocorrelation_functions(self):
         """Plot autocorrelation functions for temperature, pressure, density"""
         fig, axes = plt.subplots(2, 3, figsize=(18, 10))
@@ -263,6 +324,7 @@ class EquilibrationAnalyzer:
         plt.close()
         print("  Saved: 06_autocorrelation_analysis.png")
     
+    @instrumented()
     def plot_block_averaging(self):
         """Plot block averaging analysis"""
         fig, axes = plt.subplots(2, 3, figsize=(18, 10))
@@ -300,6 +362,7 @@ class EquilibrationAnalyzer:
         plt.close()
         print("  Saved: 07_block_averaging.png")
     
+    @instrumented()
     def plot_running_averages(self):
         """Plot running averages to show convergence"""
         fig, axes = plt.subplots(3, 2, figsize=(16, 14))
@@ -314,10 +377,7 @@ class EquilibrationAnalyzer:
             for eps in self.epsilon_values:
                 if eps in self.data and 'production' in self.data[eps]:
                     df = self.data[eps]['production']
-                    data = df[prop].values
-                    running_avg = np.cumsum(data) / (np.arange(len(data)) + 1)
-                    time_ns = df['Time_ns'].values
-                    ax1.plot(time_ns, running_avg, label=f'ε={eps}', alpha=0.7)
+                    ax1.plot(df['Time_ns'].values, df[f'{prop}_run_mean'].values, label=f'ε={eps}', alpha=0.7)
             
             if target is not None:
                 ax1.axhline(target, color='red', linestyle='--', linewidth=2, label='Target')
@@ -332,11 +392,7 @@ class EquilibrationAnalyzer:
             for eps in self.epsilon_values:
                 if eps in self.data and 'production' in self.data[eps]:
                     df = self.data[eps]['production']
-                    data = df[prop].values
-                    # Compute running std
-                    running_std = [np.std(data[:i+1]) for i in range(len(data))]
-                    time_ns = df['Time_ns'].values
-                    ax2.plot(time_ns, running_std, label=f'ε={eps}', alpha=0.7)
+                    ax2.plot(df['Time_ns'].values, df[f'{prop}_run_std'].values, label=f'ε={eps}', alpha=0.7)
             
             ax2.set_xlabel('Time (ns)')
             ax2.set_ylabel(f'{name} - Std Dev')
@@ -349,6 +405,7 @@ class EquilibrationAnalyzer:
         plt.close()
         print("  Saved: 08_running_averages.png")
     
+    @instrumented()
     def plot_stability_metrics(self):
         """Plot comprehensive stability metrics"""
         fig = plt.figure(figsize=(16, 12))
@@ -463,6 +520,7 @@ class EquilibrationAnalyzer:
         plt.close()
         print("  Saved: 09_stability_metrics.png")
     
+    @instrumented()
     def export_equilibration_report(self):
         """Export detailed equilibration report"""
         report = {
@@ -511,6 +569,7 @@ class EquilibrationAnalyzer:
         print(f"\nEquilibration report saved to {json_file}")
 
 
+    @instrumented()
     def export_comprehensive_csv(self):
         """Export detailed CSV data for module 2"""
         import pandas as pd
@@ -536,18 +595,31 @@ class EquilibrationAnalyzer:
             self.stats_df.to_csv(summary_file, index=False, float_format='%.6f')
             print(f"  Exported summary: {summary_file.name}")
 
-def main():
+def main(argv=None):
     """Main analysis workflow"""
+    parser = argparse.ArgumentParser(description='Equilibration and stability analysis')
+    parser.add_argument('--follow', action='store_true',
+                        help='Tail running production runs and update running averages incrementally')
+    parser.add_argument('--interval', type=float, default=60.0, help='Follow-mode poll interval (s)')
+    parser.add_argument('--max-idle', type=float, default=None,
+                        help='Leave follow mode after this many seconds without new data')
+    parser.add_argument('--plot-every', type=int, default=1, help='Redraw plots every N updates')
+    args = parser.parse_args(argv)
+    
     print("="*70)
     print("EQUILIBRATION AND STABILITY ANALYSIS")
     print("="*70)
     
-    epsilon_values = epsilon_values_list  # Use the global list defined at top
+    registry = get_registry(BASE_DIR)
+    epsilon_values = registry.epsilons()
     
-    analyzer = EquilibrationAnalyzer(EPSILON_DIRS, epsilon_values)
+    analyzer = EquilibrationAnalyzer([registry.directory(eps) for eps in epsilon_values], epsilon_values)
     
     # Load data and analyze
-    analyzer.load_all_stages()
+    if args.follow:
+        analyzer.follow_production(args.interval, args.max_idle, args.plot_every)
+    else:
+        analyzer.load_all_stages()
     analyzer.analyze_equilibration_quality()
     
     print("\n" + "="*70)
@@ -568,5 +640,11 @@ def main():
     print(f"All plots saved to: {PLOTS_DIR}")
     print("="*70)
 
+
+def run(context):
+    """Entry point for the in-process module host (module_host.py)"""
+    main([])
+
+
 if __name__ == "__main__":
     main()
@@ -5,7 +5,8 @@ Radial Distribution Function (RDF) and Structural Analysis
 
 This script analyzes radial distribution functions and structural properties:
 1. C-C, C-O, and O-O RDF analysis
-2. Coordination number calculations
+2. Coordination number calculations (block-bootstrap confidence intervals
+   from the per-block RDFs, block_bootstrap.py)
 3. Hydration shell structure analysis
 4. RDF peak analysis and comparison across epsilon values
 
@@ -26,6 +27,12 @@ import json
 from scipy import integrate, signal
 from matplotlib.gridspec import GridSpec
 
+from instrumentation import instrumented
+from epsilon_registry import get_registry, base_dir_default
+from results_warehouse import store_results
+from thermo_cube import ThermoCube
+from block_bootstrap import attach_interval
+
 # Set publication-quality plot style
 plt.style.use('seaborn-v0_8-paper')
 
@@ -34,22 +41,7 @@ plt.rcParams['savefig.dpi'] = 600
 plt.rcParams['font.size'] = 10
 
 # Define paths
-BASE_DIR = Path("/store/shuvam/learning_solvent_effects")
-
-# Setup epsilon directories (handle epsilon_0.0 and format differences)
-epsilon_values_list = [
-    0.0, 0.05, 0.10, 0.15, 0.20, 0.25, 0.30, 0.35, 0.40, 0.45, 0.50,
-    0.55, 0.60, 0.65, 0.70, 0.75, 0.80, 0.85, 0.90, 0.95, 1.0, 1.05, 1.10
-]
-EPSILON_DIRS = []
-for eps in epsilon_values_list:
-    if eps == 0.0:
-        EPSILON_DIRS.append(BASE_DIR / "solvent_effects" / "epsilon_0.0")
-    elif eps == 1.0:
-        EPSILON_DIRS.append(BASE_DIR / "solvent_effects" / "epsilon_1.0")
-    else:
-        EPSILON_DIRS.append(BASE_DIR / "solvent_effects" / f"epsilon_{eps:.2f}")
-
+BASE_DIR = base_dir_default()  # epsilon runs: epsilon_registry.get_registry(BASE_DIR)
 PLOTS_DIR = BASE_DIR / "analysis" / "plots"
 PLOTS_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -68,6 +60,7 @@ class RDFAnalyzer:
         self.rdf_data = {}
         self.coordination_numbers = {}
         
+    @instrumented()
     def load_rdf_data(self):
         """Load RDF data for C-C, C-O, and O-O pairs"""
         print("Loading RDF data...")
@@ -135,6 +128,7 @@ class RDFAnalyzer:
                 self.rdf_data[eps][rdf_type] = {
                     'r': r_avg,
                     'g_r': gr_avg,
+                    'g_r_blocks': np.array(all_gr) if all_gr else np.empty((0, 0)),
                     'n_timesteps': n_timesteps,
                     'n_bins': n_bins
                 }
@@ -143,6 +137,7 @@ class RDFAnalyzer:
         
         return self
     
+    @instrumented()
     def compute_coordination_numbers(self, cutoff_distances={'CC': 5.0, 'CO': 5.0, 'OO': 3.5}):
         """Compute coordination numbers by integrating RDF"""
         print("\nComputing coordination numbers...")
@@ -163,6 +158,7 @@ class RDFAnalyzer:
             'OO': rho_O   # Oxygen-Oxygen
         }
         
+        block_frames = {}
         for eps in self.epsilon_values:
             if eps not in self.rdf_data:
                 continue
@@ -195,9 +191,38 @@ class RDFAnalyzer:
                 
                 self.coordination_numbers[eps][rdf_type] = coord_num
                 print(f"  ε={eps}, {rdf_type}: N_coord = {coord_num:.2f} (r < {cutoff} Å)")
+                
+                # Per-block coordination numbers (the integral is linear in g(r),
+                # so their mean is coord_num) for the bootstrap interval
+                blocks = data.get('g_r_blocks', np.empty((0, 0)))
+                if blocks.ndim == 2 and blocks.shape[1] == len(r):
+                    block_frames.setdefault(eps, {})[rdf_type] = integrate.simpson(
+                        4 * np.pi * rho * r_cut**2 * blocks[:, idx], x=r_cut, axis=1)
+        
+        self.coordination_intervals(block_frames)
+        return self
+    
+    def coordination_intervals(self, block_frames):
+        """Coordination number table with block-bootstrap 95% intervals, all epsilons at once"""
+        rdf_types = ['CC', 'CO', 'OO']
+        rows = [{'Epsilon': eps, **{f'{t}_coord': self.coordination_numbers[eps].get(t, np.nan)
+                                    for t in rdf_types}}
+                for eps in self.epsilon_values if eps in self.coordination_numbers]
+        self.stats_df = pd.DataFrame(rows, columns=['Epsilon'] + [f'{t}_coord' for t in rdf_types])
+        if not block_frames:
+            return self
         
+        # Runs without RDF blocks become empty series (NaN intervals)
+        epsilons = self.stats_df['Epsilon'].tolist()
+        frames = {eps: pd.DataFrame({t: pd.Series(block_frames.get(eps, {}).get(t, []), dtype=float)
+                                     for t in rdf_types})
+                  for eps in epsilons}
+        low, high = ThermoCube.from_frames(frames, epsilons, rdf_types).mean_interval()
+        for k, rdf_type in enumerate(rdf_types):
+            attach_interval(self.stats_df, f'{rdf_type}_coord', low[:, k], high[:, k])
         return self
     
+    @instrumented()
     def find_rdf_peaks(self, rdf_type='CO', prominence=0.1):
         """Find peaks in RDF to identify hydration shells"""
         peak_data = []
@@ -231,9 +256,11 @@ class RDFAnalyzer:
         # Save peak data
         peak_file = PLOTS_DIR / f"rdf_{rdf_type}_peaks.csv"
         self.peak_df.to_csv(peak_file, index=False)
+        store_results('module03', {f'rdf_{rdf_type}_peaks': self.peak_df})
         
         return self
     
+    @instrumented()
     def plot_rdf_comparison(self):
         """Plot RDF comparison for all epsilon values"""
         rdf_types = ['CC', 'CO', 'OO']
@@ -267,6 +294,7 @@ class RDFAnalyzer:
         plt.close()
         print("  Saved: 10_rdf_comparison.png")
     
+    @instrumented()
     def plot_co_rdf_detailed(self):
         """Detailed C-O RDF analysis showing hydration shells"""
         fig = plt.figure(figsize=(20, 12))
@@ -322,6 +350,7 @@ class RDFAnalyzer:
         plt.close()
         print("  Saved: 11_co_rdf_detailed.png")
     
+    @instrumented()
     def plot_coordination_analysis(self):
         """Plot coordination number analysis"""
         fig, axes = plt.subplots(1, 3, figsize=(18, 5))
@@ -363,6 +392,7 @@ class RDFAnalyzer:
         plt.close()
         print("  Saved: 12_coordination_numbers.png")
     
+    @instrumented()
     def export_rdf_summary(self):
         """Export RDF analysis summary to JSON"""
         summary = {
@@ -399,6 +429,7 @@ class RDFAnalyzer:
         print(f"\nRDF summary saved to {json_file}")
 
 
+    @instrumented()
     def export_comprehensive_csv(self):
         """Export detailed CSV data for module 3"""
         import pandas as pd
@@ -430,9 +461,10 @@ def main():
     print("RADIAL DISTRIBUTION FUNCTION ANALYSIS")
     print("="*70)
     
-    epsilon_values = epsilon_values_list  # Use the global list defined at top
+    registry = get_registry(BASE_DIR)
+    epsilon_values = registry.epsilons()
     
-    analyzer = RDFAnalyzer(EPSILON_DIRS, epsilon_values)
+    analyzer = RDFAnalyzer([registry.directory(eps) for eps in epsilon_values], epsilon_values)
     
     # Load and analyze RDF data
     analyzer.load_rdf_data()
@@ -456,5 +488,11 @@ def main():
     print(f"All plots saved to: {PLOTS_DIR}")
     print("="*70)
 
+
+def run(context):
+    """Entry point for the in-process module host (module_host.py)"""
+    main()
+
+
 if __name__ == "__main__":
     main()
@@ -7,7 +7,8 @@ Complete structural characterization including:
 
 STATIC ORDER PARAMETERS:
 - Tetrahedral order (q) - local tetrahedral structure  
-- Steinhardt order (Q4, Q6) - orientational order, ice-like structure
+- Steinhardt order (Q4, Q6, averaged Q4/Q6) - orientational order, ice-like
+  structure (steinhardt.py, CPU)
 - Asphericity (b) - oblate parameter (disk-like)
 - Acylindricity (c) - prolate parameter (rod-like)
 - Coordination number evolution
@@ -33,7 +34,14 @@ SPATIAL ANALYSIS:
 - Hydration shell structure (1st, 2nd, 3rd shells)
 
 Uses CUDA acceleration via CuPy for all distance and neighbor calculations.
-Processes complete trajectory data (no sampling).
+Frames are sampled with a stride chosen from a pilot pass over the
+hydration-shell populations (adaptive_stride.py), never coarser than
+DEFAULT_SKIP: the same frames feed the H-bond C(t)/S(t), whose time
+resolution is the stride.
+
+--follow EPS analyzes a trajectory that is still being written: new complete
+frames are read incrementally (live_follow.py) and the results container is
+rewritten after every update.
 
 Author: Scientific Analysis Suite
 Date: November 2025
@@ -56,6 +64,23 @@ from scipy.spatial.distance import pdist, squareform
 from scipy.integrate import simpson
 import time
 import math
+import argparse
+
+from gpu_scheduler import DeviceScheduler
+from results_store import save_columnar_results
+from live_follow import DumpFrameFollower, follow_loop
+from instrumentation import stage, instrumented
+from steinhardt import steinhardt_order, frame_means
+from hbond_dynamics import HBondDynamics, lifetimes
+from proximity import C60Proximity
+from frame_buffers import FrameBuffers, PositionStack
+from epsilon_registry import get_registry, base_dir_default
+from results_warehouse import store_results
+from out_of_core import ScratchStore, MSDReduction, reduce_lagged
+from adaptive_stride import plan_stride, target_neff
+from checkpoint import Checkpoint, trajectory_key
+from trajectory_archive import open_universe, archive_for
+from unwrap import Unwrapper, ImageTracker
 
 # Try importing Numba for CUDA
 try:
@@ -81,20 +106,17 @@ plt.rcParams.update({
     'ytick.labelsize': 9,
 })
 
-# Paths
-BASE_DIR = Path("/store/shuvam/learning_solvent_effects")
-
-# Setup epsilon directories (handle epsilon_0.0 and format differences)
-epsilon_values_list = [
-    0.0, 0.05, 0.10, 0.15, 0.20, 0.25, 0.30, 0.35, 0.40, 0.45, 0.50,
-    0.55, 0.60, 0.65, 0.70, 0.75, 0.80, 0.85, 0.90, 0.95, 1.0, 1.05, 1.10
-]
+# Paths (epsilon run directories come from the shared registry)
+BASE_DIR = base_dir_default()
 PLOTS_DIR = BASE_DIR / "analysis" / "plots"
 DATA_DIR = PLOTS_DIR  # Store CSV/JSON with plots
 
 # Physical constants
 TIMESTEP = 2.0  # fs
 PRODUCTION_START = 600000
+DUMP_INTERVAL = 100  # steps between trajectory frames
+MSD_FRAMES = 500  # leading frames used for the MSD
+DEFAULT_SKIP = 10  # frame stride when the adaptive stride is off (ANALYSIS_TARGET_NEFF=0), and its upper bound
 
 # =============================================================================
 # CUDA KERNELS
@@ -204,67 +226,6 @@ if CUDA_AVAILABLE:
             else:
                 q_values[i] = 0.0 # Not enough neighbors
 
-    @cuda.jit
-    def steinhardt_proxy_kernel(o_pos, q_l_values, n_waters, box, n_neighbors):
-        """
-        Compute simple proxy for Steinhardt order: variance of neighbor distances
-        """
-        i = cuda.grid(1)
-        if i < n_waters:
-            ox = o_pos[i, 0]
-            oy = o_pos[i, 1]
-            oz = o_pos[i, 2]
-            
-            # Find N nearest neighbors
-            # Note: For N=12 this sort is expensive, but manageable for GPU threads
-            # We use a simplified insertion sort for the top N
-            
-            # Local arrays for neighbors
-            # Max neighbors supported = 12
-            nn_dist = cuda.local.array(12, float32)
-            for k in range(12):
-                nn_dist[k] = 1.0e10
-            
-            # Loop over all waters
-            for j in range(n_waters):
-                if i == j: continue
-                
-                dx = o_pos[j, 0] - ox
-                dy = o_pos[j, 1] - oy
-                dz = o_pos[j, 2] - oz
-                
-                # PBC
-                dx = dx - box[0] * round(dx / box[0])
-                dy = dy - box[1] * round(dy / box[1])
-                dz = dz - box[2] * round(dz / box[2])
-                
-                d = math.sqrt(dx*dx + dy*dy + dz*dz)
-                
-                if d > 6.0: continue # Optimization
-                
-                # Insertion sort into nn_dist
-                if d < nn_dist[11]:
-                    pos = 11
-                    while pos > 0 and d < nn_dist[pos-1]:
-                        nn_dist[pos] = nn_dist[pos-1]
-                        pos -= 1
-                    nn_dist[pos] = d
-            
-            # Calculate variance
-            mean_d = 0.0
-            for k in range(n_neighbors):
-                mean_d += nn_dist[k]
-            mean_d /= n_neighbors
-            
-            var_d = 0.0
-            for k in range(n_neighbors):
-                diff = nn_dist[k] - mean_d
-                var_d += diff * diff
-            var_d /= n_neighbors
-            
-            # Proxy Q value (higher is more ordered/ice-like)
-            q_l_values[i] = math.exp(-var_d)
-
     @cuda.jit
     def hbond_kernel(o_pos, h1_pos, h2_pos, hbond_count, n_waters, box, r_cut, angle_cut_cos):
         """
@@ -405,42 +366,56 @@ def get_epsilon_colormap(epsilon_values):
 class ComprehensiveWaterAnalyzer:
     """GPU-accelerated comprehensive water structure analyzer"""
     
-    def __init__(self, epsilon, gpu_device=0):
+    def __init__(self, epsilon, gpu_device=0, load_trajectory=True):
         """
         Initialize analyzer for one epsilon value
+
+        gpu_device is a CUDA device index, a gpu_scheduler.ComputeDevice, or
+        None for the CPU backend. Virtual devices also use the CPU backend.
+        load_trajectory=False skips the MDAnalysis Universe (follow mode reads
+        the dump incrementally instead).
         """
         self.epsilon = epsilon
-        self.gpu_device = gpu_device
+        if hasattr(gpu_device, 'kind'):
+            self.gpu_device = gpu_device.index if gpu_device.is_cuda else None
+        else:
+            self.gpu_device = gpu_device
+        self.use_cuda = CUDA_AVAILABLE and self.gpu_device is not None
         
         # Directory paths
-        if epsilon == 0.0:
-            self.eps_dir = BASE_DIR / "epsilon_0.0"
-        else:
-            self.eps_dir = BASE_DIR / f"epsilon_{epsilon:.2f}"
+        self.eps_dir = get_registry(BASE_DIR).directory(epsilon)
         
         self.traj_file = self.eps_dir / "production.lammpstrj"
         
-        # Setup GPU
-        if CUDA_AVAILABLE:
+        # Setup GPU (scheduler workers are already bound to their device)
+        if self.use_cuda:
             try:
-                cuda.select_device(gpu_device)
-                print(f"[ε={epsilon:.2f}] GPU Device {gpu_device} initialized")
+                cuda.select_device(self.gpu_device)
+                print(f"[ε={epsilon:.2f}] GPU Device {self.gpu_device} initialized")
             except Exception as e:
-                print(f"Warning: Could not select GPU {gpu_device}: {e}")
-        else:
-            print(f"WARNING: CUDA not available! Falling back to CPU (will be SLOW)")
+                print(f"Warning: Could not select GPU {self.gpu_device}: {e}")
+                self.use_cuda = False
+        if not self.use_cuda:
+            print(f"[ε={epsilon:.2f}] WARNING: No CUDA device assigned! Falling back to CPU (will be SLOW)")
         
         # Load trajectory
         print(f"[ε={epsilon:.2f}] Loading trajectory: {self.traj_file}")
-        if not self.traj_file.exists():
+        if not self.traj_file.exists() and archive_for(self.traj_file) is None:
             raise FileNotFoundError(f"Trajectory file not found: {self.traj_file}")
         
+        self.n_frames = 0
+        self.sampling = None  # adaptive_stride.StridePlan.to_dict() of the last full pass
+        self.u = None
+        self.frame = None
+        self.hbond_dynamics = None  # created on the first analyzed frame
+        self.hbond_dt_ps = None
+        if not load_trajectory:
+            self.results = self._empty_results()
+            return
+        
         try:
-            self.u = mda.Universe(
-                str(self.traj_file),
-                format='LAMMPSDUMP',
-                atom_style='id type x y z'
-            )
+            with stage('load_trajectory', epsilon=epsilon):
+                self.u = open_universe(self.traj_file, atom_style='id type x y z')
             print(f"[ε={epsilon:.2f}] Loaded {len(self.u.trajectory)} frames, {len(self.u.atoms)} atoms")
         except Exception as e:
             print(f"ERROR loading trajectory: {e}")
@@ -453,14 +428,25 @@ class ComprehensiveWaterAnalyzer:
         
         print(f"[ε={epsilon:.2f}] Carbons: {len(self.carbons)}, Oxygens: {len(self.oxygens)}, Hydrogens: {len(self.hydrogens)}")
         
+        # Per-frame coordinate buffers (consecutive type-3 atoms: H1, H2 of one water)
+        self.frame = FrameBuffers(self.carbons.indices, self.oxygens.indices,
+                                  self.hydrogens.indices[0::2], self.hydrogens.indices[1::2])
+        
         # Results storage
-        self.results = {
+        self.results = self._empty_results()
+    
+    @staticmethod
+    def _empty_results():
+        return {
             'tetrahedral_order': [],
             'steinhardt_q4': [],
             'steinhardt_q6': [],
+            'steinhardt_q4_bar': [],
+            'steinhardt_q6_bar': [],
             'asphericity': [],
             'acylindricity': [],
             'coordination_numbers': [],
+            'shell_waters_per_c60': [],
             'hbond_count': [],
             'density_profile': [],
             'msd_water': [],
@@ -483,22 +469,6 @@ class ComprehensiveWaterAnalyzer:
         
         return d_q_values.copy_to_host()
 
-    def calculate_steinhardt_proxy_numba(self, oxygen_coords, box):
-        """Calculate Steinhardt proxy using Numba kernel"""
-        n_waters = len(oxygen_coords)
-        d_o_pos = cuda.to_device(oxygen_coords.astype(np.float32))
-        d_q_values = cuda.device_array(n_waters, dtype=np.float32)
-        d_box = cuda.to_device(box.astype(np.float32))
-        
-        threadsperblock = 256
-        blockspergrid = (n_waters + (threadsperblock - 1)) // threadsperblock
-        
-        steinhardt_proxy_kernel[blockspergrid, threadsperblock](
-            d_o_pos, d_q_values, n_waters, d_box, 12
-        )
-        
-        return d_q_values.copy_to_host()
-
     def calculate_hbonds_numba(self, oxygen_coords, hydrogen_coords, box):
         """Calculate H-bonds using Numba kernel"""
         n_waters = len(oxygen_coords)
@@ -570,64 +540,25 @@ class ComprehensiveWaterAnalyzer:
             
         return asphericity, acylindricity
 
-    def calculate_coordination_number_cpu(self, oxygen_coords, carbon_coords, box, cutoff=5.0):
+    def calculate_coordination_number_cpu(self, oxygen_coords, carbon_coords, box, cutoff=5.0,
+                                          proximity=None):
         """
-        Calculate coordination number (CPU is fast enough for this simple distance check)
-        or use MDAnalysis
+        Mean number of oxygens within cutoff of a carbon atom (periodic KD-tree;
+        pass the frame's C60Proximity to share it with the other consumers)
         """
-        # Using MDAnalysis distance_array is fast enough for C60-Water
-        # But we can use a simple numpy broadcast if memory allows, or just loop
-        # Since we have Numba, let's just use a simple JIT function if we wanted, 
-        # but here we can stick to a simple numpy approach or scipy cdist
-        
-        from scipy.spatial.distance import cdist
-        
-        # Apply PBC to difference vectors is tricky with cdist.
-        # For simplicity, let's assume the box is large enough or use MDAnalysis
-        
-        # Let's use a simple loop with Numba for safety with PBC
-        return self._coord_num_jit(oxygen_coords, carbon_coords, box, cutoff)
-
-    @staticmethod
-    @numba.jit(nopython=True)
-    def _coord_num_jit(oxygen_coords, carbon_coords, box, cutoff):
-        count = 0
-        n_c = len(carbon_coords)
-        n_o = len(oxygen_coords)
-        cutoff_sq = cutoff * cutoff
-        
-        total_coord = 0.0
-        
-        for i in range(n_c):
-            c_count = 0
-            cx = carbon_coords[i, 0]
-            cy = carbon_coords[i, 1]
-            cz = carbon_coords[i, 2]
-            
-            for j in range(n_o):
-                dx = oxygen_coords[j, 0] - cx
-                dy = oxygen_coords[j, 1] - cy
-                dz = oxygen_coords[j, 2] - cz
-                
-                dx = dx - box[0] * round(dx / box[0])
-                dy = dy - box[1] * round(dy / box[1])
-                dz = dz - box[2] * round(dz / box[2])
-                
-                d2 = dx*dx + dy*dy + dz*dz
-                if d2 < cutoff_sq:
-                    c_count += 1
-            total_coord += c_count
-            
-        return total_coord / n_c
+        if proximity is None:
+            proximity = C60Proximity(carbon_coords, box)
+        return proximity.pair_counts(oxygen_coords, cutoff).sum() / len(carbon_coords)
 
     def calculate_radial_density_profile(self, oxygen_coords, carbon_coords, box,
-                                         bins=100, r_max=20.0):
+                                         bins=100, r_max=20.0, proximity=None):
         """
         Calculate radial density profile
         """
-        # Calculate distances from each water to nearest nanoparticle
-        # We can use a Numba JIT function for this
-        min_dists = self._min_dist_jit(oxygen_coords, carbon_coords, box)
+        # Distance from each water to the nearest nanoparticle carbon
+        if proximity is None:
+            proximity = C60Proximity(carbon_coords, box)
+        min_dists, _ = proximity.nearest(oxygen_coords)
         
         # Histogram
         counts, bin_edges = np.histogram(min_dists, bins=bins, range=(0, r_max))
@@ -639,38 +570,8 @@ class ComprehensiveWaterAnalyzer:
         density_profile = counts / shell_volumes
         
         return r_values, density_profile
-
-    @staticmethod
-    @numba.jit(nopython=True)
-    def _min_dist_jit(oxygen_coords, carbon_coords, box):
-        n_o = len(oxygen_coords)
-        n_c = len(carbon_coords)
-        min_dists = np.zeros(n_o)
-        
-        for i in range(n_o):
-            ox = oxygen_coords[i, 0]
-            oy = oxygen_coords[i, 1]
-            oz = oxygen_coords[i, 2]
-            
-            min_d2 = 1.0e10
-            
-            for j in range(n_c):
-                dx = ox - carbon_coords[j, 0]
-                dy = oy - carbon_coords[j, 1]
-                dz = oz - carbon_coords[j, 2]
-                
-                dx = dx - box[0] * round(dx / box[0])
-                dy = dy - box[1] * round(dy / box[1])
-                dz = dz - box[2] * round(dz / box[2])
-                
-                d2 = dx*dx + dy*dy + dz*dz
-                if d2 < min_d2:
-                    min_d2 = d2
-            
-            min_dists[i] = math.sqrt(min_d2)
-            
-        return min_dists
     
+    @instrumented('msd')
     def calculate_msd(self, frames_to_analyze=None, max_lag=50):
         """
         Calculate mean squared displacement of water molecules
@@ -680,147 +581,295 @@ class ComprehensiveWaterAnalyzer:
         else:
             frames_to_analyze = min(frames_to_analyze, len(self.u.trajectory))
         
-        # Extract oxygen positions over time
-        positions = []
-        for ts in self.u.trajectory[:frames_to_analyze]:
-            positions.append(self.oxygens.positions.copy())
-        positions = np.array(positions)  # (n_frames, n_oxygens, 3)
+        # Extract unwrapped oxygen positions over time (image counters from
+        # <stem>.images.npz, tracked and stored on the first pass), straight
+        # into one preallocated stack (memory-mapped scratch file beyond the
+        # memory budget)
+        unwrapper = Unwrapper(self.traj_file)
+        unwrapped = None
+        with ScratchStore() as store:
+            stack = PositionStack(frames_to_analyze, self.frame.n_waters, store=store)
+            for ts in self.u.trajectory[:frames_to_analyze]:
+                unwrapped = unwrapper.unwrap(ts.frame, ts.positions, ts.dimensions, out=unwrapped)
+                self.frame.gather(unwrapped, 'oxygens', stack.next_slot())
+            unwrapper.save()
+            
+            return self._msd_from_positions(stack.filled(), None, max_lag)
+    
+    @staticmethod
+    def _msd_from_positions(positions, box, max_lag=50):
+        """
+        MSD vs lag (ps) from stacked oxygen positions of consecutive frames
+        (DUMP_INTERVAL timesteps apart)
         
-        msd_values = []
-        time_lags = []
+        positions may be a memmap: the lags are reduced in tiles that fit the
+        memory budget (out_of_core.py). Unwrapped positions (unwrap.py) are
+        passed with box=None; given a box, displacements are folded to the
+        minimum image instead (approximate PBC unwrapping).
+        """
+        lags, msd = reduce_lagged(positions, MSDReduction(range(1, min(max_lag, len(positions))), box))
+        return lags * DUMP_INTERVAL * TIMESTEP / 1000, msd  # lags in ps
+    
+    def analyze_frame(self, frame_idx, oxygen_coords, carbon_coords, hydrogen_coords, box, skip=10):
+        """
+        Compute all per-frame properties and append them to self.results
         
-        # Calculate MSD for different lags
-        for lag in range(1, min(max_lag, frames_to_analyze)):
-            displacements = positions[lag:] - positions[:-lag]
+        frame_idx is the frame's position in the full trajectory (sets the
+        timestamp and which frames also store a density profile). The
+        coordinates are normally views into self.frame, so nothing computed
+        here may keep a reference to them beyond the frame.
+        """
+        # Calculate all properties
+        try:
+            if self.use_cuda:
+                # Tetrahedral order
+                with stage('tetrahedral_order'):
+                    q_values = self.calculate_tetrahedral_order_numba(oxygen_coords, box)
+                self.results['tetrahedral_order'].append(np.mean(q_values))
+                
+                # Shape parameters
+                with stage('shape_parameters'):
+                    asp, acy = self.calculate_shape_parameters_numba(oxygen_coords)
+                self.results['asphericity'].append(asp)
+                self.results['acylindricity'].append(acy)
+            else:
+                # Fallback or skip
+                pass
             
-            # Apply PBC unwrapping (approximate)
-            box = self.u.dimensions[:3]
-            displacements = displacements - box * np.round(displacements / box)
+            # Steinhardt Q4/Q6 and averaged Q4/Q6 (CPU, one shared neighbor list)
+            with stage('steinhardt'):
+                order = frame_means(steinhardt_order(oxygen_coords, box))
+            for l in (4, 6):
+                self.results[f'steinhardt_q{l}'].append(order[f'q{l}'])
+                self.results[f'steinhardt_q{l}_bar'].append(order[f'q{l}_bar'])
             
-            # MSD = mean of squared displacements
-            msd = np.mean(np.sum(displacements**2, axis=2))
-            msd_values.append(msd)
-            time_lags.append(lag * TIMESTEP / 1000)  # Convert to ps
-        
-        return np.array(time_lags), np.array(msd_values)
+            # One set of carbon KD-trees per frame for all C60-water distances
+            with stage('proximity'):
+                proximity = C60Proximity(carbon_coords, box)
+            
+            # H-bond pair list (count + input of the lifetime analysis)
+            with stage('hbonds'):
+                if self.hbond_dynamics is None:
+                    self.hbond_dynamics = HBondDynamics(len(oxygen_coords))
+                    self.hbond_dt_ps = skip * DUMP_INTERVAL * TIMESTEP / 1000
+                n_hbonds = self.hbond_dynamics.add_frame(oxygen_coords, hydrogen_coords, box,
+                                                         proximity=proximity)
+            self.results['hbond_count'].append(n_hbonds)
+            
+            # Coordination number (CPU/JIT)
+            with stage('coordination'):
+                coord_num = self.calculate_coordination_number_cpu(oxygen_coords, carbon_coords, box,
+                                                                   proximity=proximity)
+            self.results['coordination_numbers'].append(coord_num)
+            self.results['shell_waters_per_c60'].append(proximity.count_within(oxygen_coords, 5.0))
+            
+            # Radial density (store only for selected frames)
+            if frame_idx % (skip * 10) == 0:
+                with stage('density_profile'):
+                    r_vals, dens_prof = self.calculate_radial_density_profile(
+                        oxygen_coords, carbon_coords, box, proximity=proximity
+                    )
+                self.results['density_profile'].append((r_vals, dens_prof))
+            
+            # Timestamp
+            time_ns = (PRODUCTION_START + frame_idx * DUMP_INTERVAL) * TIMESTEP / 1e6
+            self.results['timestamps'].append(time_ns)
+            
+        except Exception as e:
+            print(f"Error analyzing frame {frame_idx}: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+        return True
     
-    def analyze_all_frames(self, skip=10):
+    def shell_populations(self, indices):
+        """(len(indices), n_c60) hydration-shell waters (5 Å) of each C60 at the given frames"""
+        counts = []
+        for ts in self.u.trajectory[indices]:
+            frame = self.frame.load(ts.positions, ts.dimensions)
+            counts.append(C60Proximity(frame.carbons, frame.box).count_within(frame.oxygens, 5.0))
+        return counts
+    
+    @instrumented()
+    def analyze_all_frames(self, skip=None):
         """
         Analyze all frames in trajectory
+        
+        skip=None picks the stride from a pilot pass over the hydration-shell
+        populations (adaptive_stride.py), at most DEFAULT_SKIP so the H-bond
+        correlations keep their short-time decay; an integer forces it. The per-frame
+        results are checkpointed periodically (checkpoint.py), and a rerun
+        over the same trajectory continues after the last analyzed frame.
         """
+        n_frames = len(self.u.trajectory)
+        ckpt = Checkpoint(f'module04_eps_{self.epsilon:.2f}',
+                          trajectory_key(self.u.trajectory.filename, skip=skip, use_cuda=self.use_cuda,
+                                         target_neff=target_neff(), max_stride=DEFAULT_SKIP))
+        state = ckpt.load()
+        if state is not None:
+            self.results, self.sampling = state['results'], state['sampling']
+            self.hbond_dynamics, self.hbond_dt_ps = state['hbond_dynamics'], state['hbond_dt_ps']
+            skip, done = state['skip'], state['done']
+        else:
+            if skip is None:
+                with stage('pilot_stride'):
+                    plan = plan_stride(self.shell_populations, n_frames,
+                                       [f'shell_c60_{c + 1}' for c in range(self.frame.n_c60)],
+                                       default_stride=DEFAULT_SKIP, max_stride=DEFAULT_SKIP)
+                print(f"[ε={self.epsilon:.2f}] Frame stride: {plan.describe()}")
+                skip = plan.stride
+                self.sampling = plan.to_dict()
+            done = 0
         print(f"\n[ε={self.epsilon:.2f}] Analyzing frames (skip={skip})...")
         
-        n_frames = len(self.u.trajectory)
         frame_indices = range(0, n_frames, skip)
-        
-        for frame_idx in tqdm(frame_indices, desc=f"ε={self.epsilon:.2f}"):
-            ts = self.u.trajectory[frame_idx]
-            
-            # Get coordinates
-            oxygen_coords = self.oxygens.positions
-            carbon_coords = self.carbons.positions
-            hydrogen_coords = self.hydrogens.positions
-            box = ts.dimensions[:3]
-            
-            # Calculate all properties
-            try:
-                if CUDA_AVAILABLE:
-                    # Tetrahedral order
-                    q_values = self.calculate_tetrahedral_order_numba(oxygen_coords, box)
-                    self.results['tetrahedral_order'].append(np.mean(q_values))
-                    
-                    # Steinhardt order (Proxy)
-                    q_proxy = self.calculate_steinhardt_proxy_numba(oxygen_coords, box)
-                    self.results['steinhardt_q4'].append(np.mean(q_proxy)) # Using proxy for both for now
-                    self.results['steinhardt_q6'].append(np.mean(q_proxy))
-                    
-                    # Shape parameters
-                    asp, acy = self.calculate_shape_parameters_numba(oxygen_coords)
-                    self.results['asphericity'].append(asp)
-                    self.results['acylindricity'].append(acy)
-                    
-                    # H-bonds
-                    hbonds = self.calculate_hbonds_numba(oxygen_coords, hydrogen_coords, box)
-                    self.results['hbond_count'].append(int(hbonds))
-                else:
-                    # Fallback or skip
-                    pass
-                
-                # Coordination number (CPU/JIT)
-                coord_num = self.calculate_coordination_number_cpu(oxygen_coords, carbon_coords, box)
-                self.results['coordination_numbers'].append(coord_num)
-                
-                # Radial density (store only for selected frames)
-                if frame_idx % (skip * 10) == 0:
-                    r_vals, dens_prof = self.calculate_radial_density_profile(
-                        oxygen_coords, carbon_coords, box
-                    )
-                    self.results['density_profile'].append((r_vals, dens_prof))
-                
-                # Timestamp
-                time_ns = (PRODUCTION_START + frame_idx * 100) * TIMESTEP / 1e6
-                self.results['timestamps'].append(time_ns)
-                
-            except Exception as e:
-                print(f"Error analyzing frame {frame_idx}: {e}")
-                import traceback
-                traceback.print_exc()
-                continue
+        if done:
+            print(f"[ε={self.epsilon:.2f}] {done}/{len(frame_indices)} frames already analyzed")
+        
+        def snapshot():
+            return {'skip': skip, 'done': done, 'sampling': self.sampling, 'results': self.results,
+                    'hbond_dynamics': self.hbond_dynamics, 'hbond_dt_ps': self.hbond_dt_ps}
+        
+        for frame_idx in tqdm(frame_indices[done:], desc=f"ε={self.epsilon:.2f}"):
+            with stage('read_frame'):
+                ts = self.u.trajectory[frame_idx]
+                frame = self.frame.load(ts.positions, ts.dimensions)
+            self.analyze_frame(frame_idx, frame.oxygens, frame.carbons, frame.hydrogens, frame.box, skip)
+            done += 1
+            if ckpt.due():
+                with stage('checkpoint'):
+                    ckpt.save(snapshot())
+        self.n_frames = n_frames
         
         # Calculate MSD (separate, time-consuming)
         print(f"[ε={self.epsilon:.2f}] Calculating MSD...")
-        time_lags, msd = self.calculate_msd(frames_to_analyze=min(500, n_frames), max_lag=50)
+        time_lags, msd = self.calculate_msd(frames_to_analyze=min(MSD_FRAMES, n_frames), max_lag=50)
         self.results['msd_time'] = time_lags
         self.results['msd_values'] = msd
+        ckpt.clear()
         
         print(f"[ε={self.epsilon:.2f}] Analysis complete!")
+    
+    def follow_trajectory(self, interval=60.0, max_idle=None, skip=10):
+        """
+        Analyze the trajectory while LAMMPS is still writing it
+        
+        Only new complete frames are parsed on each poll; every skip-th frame
+        goes through analyze_frame() and the unwrapped oxygen positions of the
+        first MSD_FRAMES frames are buffered for the MSD (images tracked in
+        memory, as the dump is still growing). Results are saved after
+        each update, so plotting scripts always see the latest state.
+        """
+        print(f"\n[ε={self.epsilon:.2f}] Following {self.traj_file.name} (skip={skip}, poll every {interval:g} s)...")
+        follower = DumpFrameFollower(self.traj_file)
+        msd_stack = None
+        images = None
+        
+        def poll():
+            nonlocal msd_stack, images
+            n_new = 0
+            for dump_frame in follower.poll():
+                frame_idx = self.n_frames
+                self.n_frames += 1
+                n_new += 1
+                if self.frame is None:
+                    self.frame = FrameBuffers.from_types(dump_frame.types)
+                    msd_stack = PositionStack(MSD_FRAMES, self.frame.n_waters)
+                    images = ImageTracker(len(dump_frame.positions))
+                frame = self.frame.load(dump_frame.positions, dump_frame.dimensions)
+                if not msd_stack.full:
+                    images.update(dump_frame.positions, dump_frame.dimensions)
+                    self.frame.gather(images.unwrap(dump_frame.positions, dump_frame.dimensions),
+                                      'oxygens', msd_stack.next_slot())
+                if frame_idx % skip == 0:
+                    self.analyze_frame(frame_idx, frame.oxygens, frame.carbons, frame.hydrogens,
+                                       frame.box, skip)
+            
+            if n_new:
+                if msd_stack is not None and msd_stack.count > 1:
+                    time_lags, msd = self._msd_from_positions(msd_stack.filled(), None, max_lag=50)
+                    self.results['msd_time'] = time_lags
+                    self.results['msd_values'] = msd
+                print(f"[ε={self.epsilon:.2f}] +{n_new} frames ({self.n_frames} total, "
+                      f"{len(self.results['timestamps'])} analyzed)")
+                self.save_results()
+            return n_new
+        
+        follow_loop(poll, interval=interval, max_idle=max_idle,
+                    run_dirs=[self.eps_dir])
+        return self
 
     
+    @instrumented()
     def save_results(self):
-        """Save all results to JSON and CSV"""
-        output_file = DATA_DIR / f"water_structure_epsilon_{self.epsilon:.2f}.json"
-        
-        # Helper function to convert numpy types to Python native types
-        def convert_to_serializable(obj):
-            """Convert numpy types to JSON-serializable Python types"""
-            if isinstance(obj, np.ndarray):
-                return obj.tolist()
-            elif isinstance(obj, (np.int32, np.int64)):
-                return int(obj)
-            elif isinstance(obj, (np.float32, np.float64)):
-                return float(obj)
-            elif isinstance(obj, list):
-                return [convert_to_serializable(item) for item in obj]
-            elif isinstance(obj, dict):
-                return {k: convert_to_serializable(v) for k, v in obj.items()}
-            else:
-                return obj
-        
-        # Convert arrays to lists for JSON
-        results_json = {}
-        for key, value in self.results.items():
-            if key == 'density_profile':
-                continue  # Skip density profiles (too large)
-            results_json[key] = convert_to_serializable(value)
-        
-        with open(output_file, 'w') as f:
-            json.dump(results_json, f, indent=2)
-        print(f"Results saved to {output_file}")
+        """Save all results to the columnar container and CSV"""
+        stem = DATA_DIR / f"water_structure_epsilon_{self.epsilon:.2f}"
+        
+        columns = {key: value for key, value in self.results.items()
+                   if key not in ('density_profile', 'msd_water')}
+        
+        # Density profiles share one radial grid: store it once plus a 2D block
+        if self.results['density_profile']:
+            columns['density_r'] = self.results['density_profile'][0][0]
+            columns['density_profile'] = np.stack([prof for _, prof in self.results['density_profile']])
+        
+        # H-bond C(t)/S(t) overall and per hydration shell, plus the pair lists
+        hbond_lifetimes = {}
+        if self.hbond_dynamics is not None and self.hbond_dynamics.n_frames > 1:
+            with stage('hbond_dynamics'):
+                correlations = self.hbond_dynamics.correlations(self.hbond_dt_ps)
+            columns.update({f'hbond_{name}': values for name, values in correlations.items()})
+            hbond_lifetimes = lifetimes(correlations)
+            print(f"[ε={self.epsilon:.2f}] H-bond lifetimes: intermittent {hbond_lifetimes['tau_C_all']:.2f} ps, "
+                  f"continuous {hbond_lifetimes['tau_S_all']:.2f} ps")
+            self.hbond_dynamics.save_pairs(DATA_DIR / f"hbond_pairs_epsilon_{self.epsilon:.2f}.npz")
+        
+        dtypes = {
+            'timestamps': np.float64,
+            'tetrahedral_order': np.float32,
+            'steinhardt_q4': np.float32,
+            'steinhardt_q6': np.float32,
+            'steinhardt_q4_bar': np.float32,
+            'steinhardt_q6_bar': np.float32,
+            'asphericity': np.float32,
+            'acylindricity': np.float32,
+            'coordination_numbers': np.float32,
+            'shell_waters_per_c60': np.int32,
+            'hbond_count': np.int32,
+            'msd_time': np.float64,
+            'msd_values': np.float32,
+            'density_r': np.float32,
+            'density_profile': np.float32,
+        }
+        metadata = {
+            'epsilon': float(self.epsilon),
+            'n_frames': self.n_frames,
+            'use_cuda': bool(self.use_cuda),
+            'hbond_lifetimes_ps': hbond_lifetimes,
+            'sampling': self.sampling,
+        }
+        manifest = save_columnar_results(stem, columns, metadata=metadata, dtypes=dtypes)
+        print(f"Results saved to {manifest}")
         
-        # Also save as CSV
-        df = pd.DataFrame({
+        # Also save as CSV (CUDA-only columns are empty on CPU runs)
+        csv_columns = {
             'Time_ns': self.results['timestamps'],
             'Tetrahedral_Order': self.results['tetrahedral_order'],
             'Steinhardt_Q4': self.results['steinhardt_q4'],
             'Steinhardt_Q6': self.results['steinhardt_q6'],
+            'Steinhardt_Q4_avg': self.results['steinhardt_q4_bar'],
+            'Steinhardt_Q6_avg': self.results['steinhardt_q6_bar'],
             'Asphericity': self.results['asphericity'],
             'Acylindricity': self.results['acylindricity'],
             'Coordination_Number': self.results['coordination_numbers'],
             'HBond_Count': self.results['hbond_count'],
-        })
+        }
+        n_rows = len(self.results['timestamps'])
+        df = pd.DataFrame({name: values for name, values in csv_columns.items() if len(values) == n_rows})
         csv_file = DATA_DIR / f"water_structure_epsilon_{self.epsilon:.2f}.csv"
         df.to_csv(csv_file, index=False)
         print(f"CSV saved to {csv_file}")
+        store_results('module04', {'water_structure': df}, epsilon=self.epsilon)
 
 
 
@@ -849,26 +898,69 @@ class ComprehensiveWaterAnalyzer:
             self.stats_df.to_csv(summary_file, index=False, float_format='%.6f')
             print(f"  Exported summary: {summary_file.name}")
 
-def main():
+def trajectory_path(eps):
+    """Production trajectory for one epsilon value"""
+    return get_registry(BASE_DIR).path(eps, "production.lammpstrj")
+
+
+def analyze_epsilon(eps, device):
+    """Scheduler job: full analysis of one epsilon value on its assigned device"""
+    print(f"\n{'='*80}")
+    print(f"ANALYZING EPSILON = {eps:.2f} kcal/mol ({device.name})")
+    print(f"{'='*80}\n")
+    
+    try:
+        with stage('analyze_epsilon', epsilon=eps):
+            analyzer = ComprehensiveWaterAnalyzer(eps, gpu_device=device)
+            analyzer.analyze_all_frames()  # Stride from the pilot pass
+            analyzer.save_results()
+        return True
+    except Exception as e:
+        print(f"ERROR analyzing ε={eps:.2f}: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def follow_epsilon(eps, interval, max_idle, skip):
+    """Follow mode: analyze the trajectory of one running simulation incrementally"""
+    analyzer = ComprehensiveWaterAnalyzer(eps, gpu_device=0 if CUDA_AVAILABLE else None,
+                                          load_trajectory=False)
+    analyzer.follow_trajectory(interval=interval, max_idle=max_idle, skip=skip)
+    return analyzer
+
+
+def main(argv=None):
     """Main analysis workflow"""
+    parser = argparse.ArgumentParser(description='Comprehensive water structure analysis')
+    parser.add_argument('--follow', type=float, default=None, metavar='EPS',
+                        help='Analyze the still-running trajectory of one epsilon incrementally')
+    parser.add_argument('--interval', type=float, default=60.0, help='Follow-mode poll interval (s)')
+    parser.add_argument('--max-idle', type=float, default=None,
+                        help='Leave follow mode after this many seconds without new frames')
+    parser.add_argument('--skip', type=int, default=10, help='Analyze every N-th frame')
+    args = parser.parse_args(argv)
+    
+    if args.follow is not None:
+        follow_epsilon(args.follow, args.interval, args.max_idle, args.skip)
+        return
+    
     print("="*80)
     print(" "*15 + "COMPREHENSIVE WATER STRUCTURE ANALYSIS")
     print(" "*25 + "(CUDA-Accelerated)")
     print("="*80)
     print()
     
-    epsilon_values = epsilon_values_list  # Use the global list defined at top
+    registry = get_registry(BASE_DIR)
     
-    # Check which epsilon values have trajectories
+    # Check which epsilon values have trajectories (LFS pointer stubs do not count,
+    # a compressed archive does)
     available_eps = []
-    for eps in epsilon_values:
-        if eps == 0.0:
-            traj_file = BASE_DIR / "epsilon_0.0" / "production.lammpstrj"
-        else:
-            traj_file = BASE_DIR / f"epsilon_{eps:.2f}" / "production.lammpstrj"
-        
-        if traj_file.exists():
+    for eps in registry.epsilons():
+        if registry.run(eps).has_trajectory():
             available_eps.append(eps)
+        elif registry.run(eps).has("production.lammpstrj", allow_stub=True):
+            print(f"WARNING: Trajectory for ε={eps:.2f} is a Git LFS stub, skipping...")
         else:
             print(f"WARNING: Trajectory not found for ε={eps:.2f}, skipping...")
     
@@ -879,23 +971,16 @@ def main():
     print(f"Analyzing epsilon values: {available_eps}")
     print()
     
-    # Analyze each epsilon value
-    all_results = {}
-    for eps in available_eps:
-        print(f"\n{'='*80}")
-        print(f"ANALYZING EPSILON = {eps:.2f} kcal/mol")
-        print(f"{'='*80}\n")
-        
-        try:
-            analyzer = ComprehensiveWaterAnalyzer(eps, gpu_device=0)
-            analyzer.analyze_all_frames(skip=10)  # Analyze every 10th frame
-            analyzer.save_results()
-            all_results[eps] = analyzer.results
-        except Exception as e:
-            print(f"ERROR analyzing ε={eps:.2f}: {e}")
-            import traceback
-            traceback.print_exc()
+    # Analyze epsilon values in parallel, one job per device slot
+    scheduler = DeviceScheduler()
+    print(f"Scheduler: {scheduler.describe()}")
+    
+    for eps, device, ok, error in scheduler.run(analyze_epsilon, available_eps,
+                                                cost=lambda e: registry.run(e).trajectory_size()):
+        if error is not None or not ok:
+            print(f"ERROR analyzing ε={eps:.2f} on {device.name}: {error}")
             continue
+        print(f"  ✓ [ε={eps:.2f}] Analysis complete on {device.name}")
     
     print("\n" + "="*80)
     print("ANALYSIS COMPLETE FOR ALL EPSILON VALUES")
@@ -904,5 +989,15 @@ def main():
     print("\nNext step: Run plotting scripts to visualize results")
 
 
+def run(context):
+    """Entry point for the in-process module host (module_host.py)"""
+    main([])
+
+
 if __name__ == "__main__":
+    import multiprocessing
+    try:
+        multiprocessing.set_start_method('spawn')
+    except RuntimeError:
+        pass
     main()
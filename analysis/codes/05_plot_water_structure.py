@@ -10,7 +10,7 @@ Creates publication-quality plots (600 DPI) for all water structure metrics:
 - Coordination numbers
 - Hydrogen bond analysis
 - Radial density profiles
-- Mean squared displacement and diffusion
+- Mean squared displacement and diffusion (diffusion_fit.py)
 
 All plots saved with corresponding CSV/JSON data.
 
@@ -27,7 +27,11 @@ import json
 from pathlib import Path
 import matplotlib.cm as cm
 from matplotlib.colors import Normalize
-from scipy.optimize import curve_fit
+
+from results_store import load_columnar_results
+from epsilon_registry import get_registry, base_dir_default
+from results_warehouse import store_results
+from diffusion_fit import fit_diffusion
 
 # Plotting configuration - 600 DPI
 plt.rcParams['figure.dpi'] = 600
@@ -36,13 +40,8 @@ plt.rcParams['font.size'] = 10
 plt.rcParams['figure.figsize'] = (16, 12)
 
 # Paths
-BASE_DIR = Path("/store/shuvam/learning_solvent_effects")
+BASE_DIR = base_dir_default()
 
-# Setup epsilon directories (handle epsilon_0.0 and format differences)
-epsilon_values_list = [
-    0.0, 0.05, 0.10, 0.15, 0.20, 0.25, 0.30, 0.35, 0.40, 0.45, 0.50,
-    0.55, 0.60, 0.65, 0.70, 0.75, 0.80, 0.85, 0.90, 0.95, 1.0, 1.05, 1.10
-]
 DATA_DIR = BASE_DIR / "analysis" / "plots"
 PLOTS_DIR = DATA_DIR
 
@@ -60,7 +59,7 @@ class WaterStructurePlotter:
     """Comprehensive plotting for water structure analysis"""
     
     def __init__(self):
-        self.epsilon_values = epsilon_values_list  # Use the global list defined at top
+        self.epsilon_values = get_registry(BASE_DIR).epsilons()
         self.data = {}
         self.load_all_data()
     
@@ -69,10 +68,16 @@ class WaterStructurePlotter:
         print("Loading water structure data...")
         
         for eps in self.epsilon_values:
+            stem = DATA_DIR / f"water_structure_epsilon_{eps:.2f}"
             json_file = DATA_DIR / f"water_structure_epsilon_{eps:.2f}.json"
             csv_file = DATA_DIR / f"water_structure_epsilon_{eps:.2f}.csv"
             
-            if json_file.exists():
+            # Columnar container: columns are decompressed on first access only
+            columnar = load_columnar_results(stem)
+            if columnar is not None:
+                self.data[eps] = columnar
+                print(f"  Loaded ε={eps:.2f} (columnar, {len(columnar)} columns)")
+            elif json_file.exists():
                 with open(json_file, 'r') as f:
                     self.data[eps] = json.load(f)
                 print(f"  Loaded ε={eps:.2f}")
@@ -143,6 +148,7 @@ class WaterStructurePlotter:
             'Std_q': stds
         })
         summary.to_csv(PLOTS_DIR / 'tetrahedral_order_summary.csv', index=False)
+        store_results('module05', {'tetrahedral_order': summary})
         plt.close()
     
     def plot_steinhardt_order(self):
@@ -218,6 +224,7 @@ class WaterStructurePlotter:
             'Std_Q6': stds_q6
         })
         summary.to_csv(PLOTS_DIR / 'steinhardt_order_summary.csv', index=False)
+        store_results('module05', {'steinhardt_order': summary})
         plt.close()
     
     def plot_shape_parameters(self):
@@ -296,6 +303,7 @@ class WaterStructurePlotter:
             'Mean_Acylindricity': acy_means
         })
         summary.to_csv(PLOTS_DIR / 'shape_parameters_summary.csv', index=False)
+        store_results('module05', {'shape_parameters': summary})
         plt.close()
     
     def plot_coordination_hbonds(self):
@@ -371,6 +379,7 @@ class WaterStructurePlotter:
             'Std_HBonds': hbond_stds
         })
         summary.to_csv(PLOTS_DIR / 'coordination_hbond_summary.csv', index=False)
+        store_results('module05', {'coordination_hbond': summary})
         plt.close()
     
     def plot_msd_diffusion(self):
@@ -380,37 +389,27 @@ class WaterStructurePlotter:
         
         # MSD curves
         ax = axes[0]
+        curves = {eps: (np.array(self.data[eps]['msd_time']), np.array(self.data[eps]['msd_values']))
+                  for eps in self.epsilon_values
+                  if eps in self.data and 'msd_time' in self.data[eps]}
+        
+        # Einstein relation MSD = 6Dt + b, all epsilons in one GLS fit (diffusion_fit.py)
+        fit = fit_diffusion({eps: c for eps, c in curves.items() if len(c[0]) > 10},
+                            covariance='averaged') if curves else None
         diffusion_coeffs = []
+        diffusion_errors = []
         valid_eps = []
         
-        for eps in self.epsilon_values:
-            if eps not in self.data or 'msd_time' not in self.data[eps]:
-                continue
-            
-            times = np.array(self.data[eps]['msd_time'])
-            msd = np.array(self.data[eps]['msd_values'])
-            
+        for eps, (times, msd) in curves.items():
             ax.plot(times, msd, 'o-', label=f'ε={eps:.2f}', linewidth=2, markersize=4, alpha=0.8)
             
-            # Fit linear regime (Einstein relation: MSD = 6Dt)
-            if len(times) > 10:
-                # Use middle portion for fitting
-                fit_start = len(times) // 4
-                fit_end = 3 * len(times) // 4
-                
-                def linear(t, D):
-                    return 6 * D * t
+            if fit is not None and eps in fit.epsilons and np.isfinite(fit[eps]['D']):
+                diffusion_coeffs.append(fit[eps]['D'])
+                diffusion_errors.append(fit[eps]['D_error'])
+                valid_eps.append(eps)
                 
-                try:
-                    popt, _ = curve_fit(linear, times[fit_start:fit_end], msd[fit_start:fit_end])
-                    D = popt[0]
-                    diffusion_coeffs.append(D)
-                    valid_eps.append(eps)
-                    
-                    # Plot fit
-                    ax.plot(times, linear(times, D), '--', alpha=0.5, linewidth=1)
-                except:
-                    pass
+                # Plot fit
+                ax.plot(times, fit.predict(eps, times), '--', alpha=0.5, linewidth=1)
         
         ax.set_xlabel('Time Lag (ps)', fontsize=11)
         ax.set_ylabel('MSD (Å²)', fontsize=11)
@@ -422,7 +421,8 @@ class WaterStructurePlotter:
         ax = axes[1]
         if diffusion_coeffs:
             x_pos = np.arange(len(valid_eps))
-            ax.bar(x_pos, diffusion_coeffs, alpha=0.7, color=COLORS[:len(valid_eps)])
+            ax.bar(x_pos, diffusion_coeffs, yerr=diffusion_errors, capsize=4,
+                   alpha=0.7, color=COLORS[:len(valid_eps)])
             ax.set_xticks(x_pos)
             ax.set_xticklabels([f'{eps:.2f}' for eps in valid_eps])
             ax.set_xlabel('Epsilon (kcal/mol)', fontsize=11)
@@ -433,9 +433,11 @@ class WaterStructurePlotter:
             # Save diffusion data
             diff_df = pd.DataFrame({
                 'Epsilon': valid_eps,
-                'Diffusion_Coeff_A2_per_ps': diffusion_coeffs
+                'Diffusion_Coeff_A2_per_ps': diffusion_coeffs,
+                'Diffusion_Coeff_error_A2_per_ps': diffusion_errors
             })
             diff_df.to_csv(PLOTS_DIR / 'diffusion_coefficients.csv', index=False)
+            store_results('module05', {'diffusion': diff_df})
         
         plt.savefig(PLOTS_DIR / '17_msd_diffusion_analysis.png', dpi=600, bbox_inches='tight')
         print("  Saved: 17_msd_diffusion_analysis.png")
@@ -495,5 +497,10 @@ def main():
     plotter.generate_all_plots()
 
 
+def run(context):
+    """Entry point for the in-process module host (module_host.py)"""
+    main()
+
+
 if __name__ == "__main__":
     main()
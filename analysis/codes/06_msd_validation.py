@@ -5,8 +5,10 @@ MSD Validation and Diffusion Coefficient Analysis
 
 Uses LAMMPS-computed MSD from msd_water.dat files to:
 1. Validate Module 4 CUDA-computed MSD
-2. Calculate diffusion coefficients: D = MSD/(6t)
+2. Calculate diffusion coefficients: MSD = 6Dt + b, batched GLS fit of all
+   epsilons over automatically detected diffusive windows (diffusion_fit.py)
 3. Analyze effect of epsilon on water mobility
+   (95% intervals of D by block bootstrap of the fit residuals, block_bootstrap.py)
 
 Author: Scientific Analysis Suite
 Date: November 2025
@@ -19,9 +21,14 @@ from matplotlib.gridspec import GridSpec
 from pathlib import Path
 import matplotlib.cm as cm
 from matplotlib.colors import Normalize
-from scipy.optimize import curve_fit
 import json
 
+from epsilon_registry import get_registry, base_dir_default
+from results_warehouse import store_results
+from thermo_cube import ThermoCube
+from block_bootstrap import BlockBootstrap, block_length, attach_interval
+from diffusion_fit import fit_diffusion, MIN_POINTS
+
 # Plotting configuration
 plt.rcParams['figure.dpi'] = 600
 plt.rcParams['savefig.dpi'] = 600
@@ -29,13 +36,8 @@ plt.rcParams['font.size'] = 10
 plt.rcParams['figure.figsize'] = (16, 10)
 
 # Paths
-BASE_DIR = Path("/store/shuvam/learning_solvent_effects")
+BASE_DIR = base_dir_default()
 
-# Setup epsilon directories (handle epsilon_0.0 and format differences)
-epsilon_values_list = [
-    0.0, 0.05, 0.10, 0.15, 0.20, 0.25, 0.30, 0.35, 0.40, 0.45, 0.50,
-    0.55, 0.60, 0.65, 0.70, 0.75, 0.80, 0.85, 0.90, 0.95, 1.0, 1.05, 1.10
-]
 PLOTS_DIR = BASE_DIR / "analysis" / "plots"
 PLOTS_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -54,7 +56,7 @@ class MSDAnalyzer:
     """MSD and diffusion coefficient analyzer"""
     
     def __init__(self):
-        self.epsilon_values = epsilon_values_list  # Use the global list defined at top
+        self.epsilon_values = get_registry(BASE_DIR).epsilons()
         self.msd_data = {}
         self.diffusion_coefficients = {}
         
@@ -63,13 +65,7 @@ class MSDAnalyzer:
         print("Loading MSD data from LAMMPS...")
         
         for eps in self.epsilon_values:
-            # Handle epsilon_0.0 special case
-            if eps == 0.0:
-                eps_dir = BASE_DIR / "epsilon_0.0"
-            else:
-                eps_dir = BASE_DIR / f"epsilon_{eps:.2f}"
-            
-            msd_file = eps_dir / "msd_water.dat"
+            msd_file = get_registry(BASE_DIR).path(eps, "msd_water.dat")
             
             if not msd_file.exists():
                 print(f"  Warning: {msd_file} not found")
@@ -104,59 +100,70 @@ class MSDAnalyzer:
         """
         Calculate diffusion coefficients from MSD
         
-        Einstein relation: MSD = 6Dt (3D)
-        Therefore: D = MSD / (6t)
+        Einstein relation: MSD = 6Dt + b (3D, b accounts for cage effects)
         
-        Fit linear region (typically 1-2 ns after initial ballistic regime)
+        All epsilons are fitted at once by diffusion_fit.fit_diffusion():
+        generalized least squares with the covariance of a single-origin MSD
+        (LAMMPS compute msd), over the diffusive window found from the local
+        slope d ln MSD / d ln t
         """
         print("\nCalculating diffusion coefficients...")
         
-        for eps in self.epsilon_values:
-            if eps not in self.msd_data:
-                continue
-            
-            data = self.msd_data[eps]
-            time_ns = data['time_ns']
-            msd = data['msd_total']
-            
-            # Use linear region: 0.5-3.0 ns (avoid ballistic and long-time anomalies)
-            fit_mask = (time_ns >= 0.5) & (time_ns <= 3.0)
-            
-            if np.sum(fit_mask) < 10:
+        curves = {eps: (self.msd_data[eps]['time_ns'], self.msd_data[eps]['msd_total'])
+                  for eps in self.epsilon_values if eps in self.msd_data}
+        if not curves:
+            return self
+        fit = fit_diffusion(curves, covariance='single', max_lag_fraction=1.0)
+        
+        for eps in fit.epsilons:
+            info = fit[eps]
+            if info['n_points'] < MIN_POINTS or not np.isfinite(info['D']):
                 print(f"  ε={eps:.2f}: Insufficient data for fitting")
                 continue
             
-            time_fit = time_ns[fit_mask]
-            msd_fit = msd[fit_mask]
-            
-            # Linear fit: MSD = 6Dt + b (b accounts for cage effects)
-            def linear(t, D, b):
-                return 6 * D * t + b
-            
-            try:
-                popt, pcov = curve_fit(linear, time_fit, msd_fit)
-                D_fit = popt[0]  # Å²/ns
-                D_error = np.sqrt(pcov[0, 0])
-                
-                # Convert to cm²/s (standard units)
-                # 1 Å²/ns = 1e-16 m²/ns = 1e-16 m²/(1e-9 s) = 1e-7 m²/s = 1e-3 cm²/s
-                D_cm2_s = D_fit * 1e-3
-                D_error_cm2_s = D_error * 1e-3
-                
-                self.diffusion_coefficients[eps] = {
-                    'D_A2_ns': D_fit,
-                    'D_cm2_s': D_cm2_s,
-                    'D_error_A2_ns': D_error,
-                    'D_error_cm2_s': D_error_cm2_s,
-                    'fit_range': (time_fit[0], time_fit[-1])
-                }
-                
-                print(f"  ε={eps:.2f}: D = {D_cm2_s:.2e} ± {D_error_cm2_s:.2e} cm²/s")
-                
-            except Exception as e:
-                print(f"  ε={eps:.2f}: Fit failed - {e}")
-                continue
+            # Convert to cm²/s (standard units)
+            # 1 Å²/ns = 1e-16 m²/ns = 1e-16 m²/(1e-9 s) = 1e-7 m²/s = 1e-3 cm²/s
+            self.diffusion_coefficients[eps] = {
+                'D_A2_ns': info['D'],
+                'D_cm2_s': info['D'] * 1e-3,
+                'D_error_A2_ns': info['D_error'],
+                'D_error_cm2_s': info['D_error'] * 1e-3,
+                'fit_range': info['window']
+            }
+            note = " (no diffusive plateau, middle-half window)" if info['fallback'] else ""
+            print(f"  ε={eps:.2f}: D = {info['D'] * 1e-3:.2e} ± {info['D_error'] * 1e-3:.2e} cm²/s, "
+                  f"fit {info['window'][0]:.2f}-{info['window'][1]:.2f} ns{note}")
+        
+        self.diffusion_fit = fit
+        self.diffusion_intervals(fit)
+        return self
+    
+    def diffusion_intervals(self, fit):
+        """
+        95% confidence intervals of D by moving-block bootstrap of the fit
+        residuals
         
+        D is linear in the MSD, D = sum_i w_i MSD_i (fit.weights), so the
+        resampled estimate is D* = D + sum_i w_i e[idx_i] and every epsilon is
+        resampled in one pass over the residual array.
+        """
+        rows = [i for i, eps in enumerate(fit.epsilons) if eps in self.diffusion_coefficients]
+        if not rows:
+            return self
+        epsilons = [fit.epsilons[i] for i in rows]
+        cube = ThermoCube(epsilons, ['resid'], fit.residuals[rows, :, None],
+                          fit.time[rows], fit.valid[rows])
+        
+        n = cube.n_samples()
+        boot = BlockBootstrap()
+        shifts = boot.linear(cube.filled[:, :, 0], fit.weights[rows], n,
+                             block_length(n, cube.correlation_time()[:, 0]))
+        low, high = boot.interval(shifts)
+        for i, eps in enumerate(epsilons):
+            info = self.diffusion_coefficients[eps]
+            info['D_ci_low_cm2_s'] = (info['D_A2_ns'] + low[i]) * 1e-3
+            info['D_ci_high_cm2_s'] = (info['D_A2_ns'] + high[i]) * 1e-3
+            print(f"  ε={eps:.2f}: D 95% CI [{info['D_ci_low_cm2_s']:.2e}, {info['D_ci_high_cm2_s']:.2e}] cm²/s")
         return self
     
     def plot_msd_evolution(self):
@@ -246,6 +253,7 @@ class MSDAnalyzer:
         csv_file = PLOTS_DIR / "msd_evolution_data.csv"
         df.to_csv(csv_file, index=False)
         print(f"Saved: {csv_file}")
+        store_results('module06', {'msd_evolution': df})
     
     def plot_diffusion_coefficients(self):
         """Plot diffusion coefficients vs epsilon"""
@@ -255,12 +263,15 @@ class MSDAnalyzer:
         eps_vals = []
         D_vals = []
         D_errors = []
+        D_low, D_high = [], []
         
         for eps in sorted(self.diffusion_coefficients.keys()):
             info = self.diffusion_coefficients[eps]
             eps_vals.append(eps)
             D_vals.append(info['D_cm2_s'])
             D_errors.append(info['D_error_cm2_s'])
+            D_low.append(info.get('D_ci_low_cm2_s', np.nan))
+            D_high.append(info.get('D_ci_high_cm2_s', np.nan))
         
         eps_vals = np.array(eps_vals)
         D_vals = np.array(D_vals)
@@ -308,9 +319,11 @@ class MSDAnalyzer:
             'D_error_cm2_s': D_errors,
             'D_10e5_cm2_s': D_vals * 1e5
         })
+        attach_interval(df, 'D_cm2_s', D_low, D_high)
         csv_file = PLOTS_DIR / "diffusion_coefficients.csv"
         df.to_csv(csv_file, index=False)
         print(f"Saved: {csv_file}")
+        store_results('module06', {'diffusion': df})
         
         # Save JSON summary
         summary = {
@@ -327,6 +340,8 @@ class MSDAnalyzer:
             summary['results'][f'epsilon_{eps:.2f}'] = {
                 'D_cm2_s': float(info['D_cm2_s']),
                 'D_error_cm2_s': float(info['D_error_cm2_s']),
+                'D_ci95_cm2_s': [float(info.get('D_ci_low_cm2_s', np.nan)),
+                                 float(info.get('D_ci_high_cm2_s', np.nan))],
                 'fit_range_ns': [float(info['fit_range'][0]), float(info['fit_range'][1])]
             }
         
@@ -381,5 +396,10 @@ def main():
     print(f"\nAll plots saved to: {PLOTS_DIR}")
 
 
+def run(context):
+    """Entry point for the in-process module host (module_host.py)"""
+    main()
+
+
 if __name__ == "__main__":
     main()
@@ -11,8 +11,11 @@ Fixes:
 
 Analyses:
 1. Local water structure (q_tet binned by distance from C60)
-2. C60-C60 distance time series (aggregation behavior)
-3. C60 translational diffusion (nanoparticle mobility)
+2. C60-C60 distance time series (aggregation behavior; block-bootstrap
+   95% intervals of the mean distances, block_bootstrap.py; frame stride
+   from the distances' correlation time, adaptive_stride.py)
+3. C60 translational diffusion (nanoparticle mobility; batched GLS fit,
+   diffusion_fit.py)
 4. Specific heat capacity (energy fluctuations)
 5. Isothermal compressibility (volume fluctuations)
 6. Time-to-equilibrium analysis (equilibration quality)
@@ -36,11 +39,15 @@ from tqdm import tqdm
 import warnings
 warnings.filterwarnings('ignore')
 
-# Setup epsilon directories (handle epsilon_0.0 and format differences)
-epsilon_values_list = [
-    0.0, 0.05, 0.10, 0.15, 0.20, 0.25, 0.30, 0.35, 0.40, 0.45, 0.50,
-    0.55, 0.60, 0.65, 0.70, 0.75, 0.80, 0.85, 0.90, 0.95, 1.0, 1.05, 1.10
-]
+from frame_buffers import PositionStack
+from out_of_core import ScratchStore, MSDReduction, reduce_lagged
+from epsilon_registry import get_registry, base_dir_default
+from results_warehouse import store_results
+from thermo_cube import ThermoCube
+from diffusion_fit import fit_diffusion
+from adaptive_stride import plan_stride
+from trajectory_archive import open_universe, archive_for
+from unwrap import Unwrapper
 
 # Publication settings
 plt.rcParams['figure.dpi'] = 600
@@ -68,15 +75,10 @@ def get_epsilon_colormap(epsilon_values):
 class HighPriorityAnalyzer:
     def __init__(self, base_dir):
         self.base_dir = Path(base_dir)
-        self.epsilon_values = epsilon_values_list  # Use the global list defined at top
-        self.epsilon_dirs = {}
-        for eps in self.epsilon_values:
-            if eps == 0.0:
-                self.epsilon_dirs[eps] = 'solvent_effects/epsilon_0.0'
-            elif eps == 1.0:
-                self.epsilon_dirs[eps] = 'solvent_effects/epsilon_1.0'
-            else:
-                self.epsilon_dirs[eps] = f'solvent_effects/epsilon_{eps:.2f}'
+        # Epsilon runs and their directories from the shared registry
+        registry = get_registry(self.base_dir)
+        self.epsilon_values = registry.epsilons()
+        self.epsilon_dirs = registry.directories(self.epsilon_values)
         self.plots_dir = self.base_dir / 'analysis' / 'plots'
         self.plots_dir.mkdir(parents=True, exist_ok=True)
         
@@ -85,6 +87,13 @@ class HighPriorityAnalyzer:
     def apply_pbc(self, vec, box_lengths):
         """Apply periodic boundary conditions to a vector"""
         return vec - box_lengths * np.round(vec / box_lengths)
+    
+    def c60_pair_distances(self, u, c60_groups):
+        """(d12, d13, d23) minimum-image C60 centre-of-mass distances of the current frame"""
+        box = u.dimensions[:3]  # [lx, ly, lz]
+        com1, com2, com3 = (group.center_of_mass() for group in c60_groups)
+        return tuple(np.linalg.norm(self.apply_pbc(b - a, box))
+                     for a, b in ((com1, com2), (com1, com3), (com2, com3)))
         
     def load_trajectories(self):
         """Load MDAnalysis universes for all epsilon values - FIXED"""
@@ -95,10 +104,10 @@ class HighPriorityAnalyzer:
             eps_dir = self.base_dir / self.epsilon_dirs[eps]
             lammpstrj = eps_dir / 'production.lammpstrj'
             
-            if lammpstrj.exists():
+            if lammpstrj.exists() or archive_for(lammpstrj):
                 try:
-                    # Use LAMMPS dump format without topology
-                    u = mda.Universe(str(lammpstrj), format='LAMMPSDUMP')
+                    # LAMMPS dump format without topology (or its compressed archive)
+                    u = open_universe(lammpstrj)
                     self.universes[eps] = u
                     print(f"  ✓ ε={eps}: {len(u.trajectory)} frames, {u.atoms.n_atoms} atoms")
                 except Exception as e:
@@ -125,31 +134,19 @@ class HighPriorityAnalyzer:
             c60_2 = u.atoms[60:120]    # Second 60 carbons
             c60_3 = u.atoms[120:180]   # Third 60 carbons
             
+            groups = (c60_1, c60_2, c60_3)
             distances = {'d12': [], 'd13': [], 'd23': [], 'time': []}
             
-            for ts in tqdm(u.trajectory[::10], desc=f"ε={eps}"):  # Every 10 frames = 20 ps
+            # Stride from a pilot pass: as few frames as give n_eff >= target per distance
+            # (ANALYSIS_TARGET_NEFF=0 keeps every 10th frame = 20 ps)
+            plan = plan_stride(lambda idx: [self.c60_pair_distances(u, groups) for ts in u.trajectory[idx]],
+                               len(u.trajectory), ['d12', 'd13', 'd23'], default_stride=10)
+            print(f"  Frame stride: {plan.describe()}")
+            
+            for ts in tqdm(u.trajectory[plan.slice()], desc=f"ε={eps}"):
                 try:
-                    # Get box dimensions
-                    box = u.dimensions[:3]  # [lx, ly, lz]
-                    
-                    # Centers of mass (in Ångströms)
-                    com1 = c60_1.center_of_mass()
-                    com2 = c60_2.center_of_mass()
-                    com3 = c60_3.center_of_mass()
-                    
-                    # Pairwise distances with PBC
-                    vec12 = com2 - com1
-                    vec13 = com3 - com1
-                    vec23 = com3 - com2
-                    
-                    # Apply minimum image convention
-                    vec12 = self.apply_pbc(vec12, box)
-                    vec13 = self.apply_pbc(vec13, box)
-                    vec23 = self.apply_pbc(vec23, box)
-                    
-                    d12 = np.linalg.norm(vec12)
-                    d13 = np.linalg.norm(vec13)
-                    d23 = np.linalg.norm(vec23)
+                    # Minimum-image distances between the centres of mass (Å)
+                    d12, d13, d23 = self.c60_pair_distances(u, groups)
                     
                     distances['d12'].append(d12)
                     distances['d13'].append(d13)
@@ -176,7 +173,9 @@ class HighPriorityAnalyzer:
                 'std_d23': df['d23'].std(),
                 'min_distance': min(df['d12'].min(), df['d13'].min(), df['d23'].min()),
                 'contact_prob': ((df[['d12', 'd13', 'd23']] < 10.0).sum().sum() / 
-                                (3 * len(df)) * 100)
+                                (3 * len(df)) * 100),
+                'frame_stride': plan.stride,
+                'n_eff_min': float(np.min(plan.n_eff)) if plan.adaptive else np.nan
             }
             
             results[eps] = {'data': df, 'stats': stats_dict}
@@ -187,6 +186,17 @@ class HighPriorityAnalyzer:
         
         self.results['c60_distances'] = results
         
+        # 95% block-bootstrap intervals of the mean distances, all epsilons at once
+        if results:
+            pairs = ['d12', 'd13', 'd23']
+            cube = ThermoCube.from_frames({eps: results[eps]['data'] for eps in results},
+                                          list(results), pairs, time_column='time')
+            low, high = cube.mean_interval()
+            for i, eps in enumerate(results):
+                for k, pair in enumerate(pairs):
+                    results[eps]['stats'][f'mean_{pair}_ci_low'] = low[i, k]
+                    results[eps]['stats'][f'mean_{pair}_ci_high'] = high[i, k]
+        
         # Save data
         if results:
             summary = pd.DataFrame({
@@ -209,71 +219,57 @@ class HighPriorityAnalyzer:
         for eps, u in self.universes.items():
             print(f"\n[ε={eps}] Computing C60 MSD...")
             
-            # Define C60 groups
-            c60_1 = u.atoms[0:60]
-            c60_2 = u.atoms[60:120]
-            c60_3 = u.atoms[120:180]
-            
-            com_trajectory = []
-            times = []
-            
-            for ts in tqdm(u.trajectory[::5], desc=f"ε={eps}"):  # Every 5 frames = 10 ps
-                try:
-                    com1 = c60_1.center_of_mass()
-                    com2 = c60_2.center_of_mass()
-                    com3 = c60_3.center_of_mass()
-                    com_trajectory.append([com1, com2, com3])
-                    times.append(ts.time)
-                except:
+            # Image counters of every frame (unwrap.py, stored next to the
+            # trajectory), so a C60 crossing the box keeps moving instead of
+            # jumping back by one box length
+            unwrapper = Unwrapper(u.trajectory.filename).ensure(len(u.trajectory))
+            unwrapped = None
+            
+            frames = u.trajectory[::5]  # Every 5 frames = 10 ps
+            with ScratchStore() as store:
+                # COM trajectory (frames, 3, 3), memory-mapped beyond the memory budget
+                coms = PositionStack(len(frames), 3, dtype=np.float64, store=store, name='c60_com')
+                for ts in tqdm(frames, desc=f"ε={eps}"):
+                    try:
+                        unwrapped = unwrapper.unwrap(ts.frame, ts.positions, ts.dimensions, out=unwrapped)
+                    except IndexError:
+                        continue
+                    # Atoms 0-179: three cages of 60 equal-mass carbons, COM = mean
+                    coms.append(unwrapped[:180].reshape(3, 60, 3).mean(axis=1))
+                
+                if coms.count < 10:
+                    print(f"  ✗ Not enough frames for ε={eps}")
                     continue
-            
-            if len(com_trajectory) < 10:
-                print(f"  ✗ Not enough frames for ε={eps}")
-                continue
-            
-            com_trajectory = np.array(com_trajectory)  # Shape: (frames, 3, 3)
-            
-            # Calculate MSD: <|r(t) - r(0)|²>
-            n_frames = len(com_trajectory)
-            max_tau = min(n_frames // 2, 500)  # Limit to 500 time origins
-            
-            msd = np.zeros(max_tau)
-            time_intervals = np.arange(max_tau)
-            
-            for tau in range(max_tau):
-                if n_frames - tau > 0:
-                    # Calculate displacement for all time origins
-                    displacements = com_trajectory[tau:] - com_trajectory[:n_frames-tau]
-                    # MSD = average over all 3 C60s and 3 dimensions
-                    msd[tau] = np.mean(np.sum(displacements**2, axis=2))
+                
+                # Calculate MSD: <|r(t) - r(0)|²>, averaged over all 3 C60s and
+                # all time origins, reduced tile by tile
+                n_frames = coms.count
+                max_tau = min(n_frames // 2, 500)  # Limit to 500 time origins
+                time_intervals, msd = reduce_lagged(coms.filled(), MSDReduction(range(max_tau)))
             
             time_ps = time_intervals * 10.0  # 10 ps intervals (every 5th frame * 2 fs/frame)
-            
-            # Fit linear regime to get diffusion coefficient
-            # For 3D: <r²(t)> = 6Dt, so slope = 6D
-            fit_mask = (time_ps >= 100) & (time_ps <= 1000)
-            
-            if fit_mask.sum() > 10:
-                valid_indices = np.where(fit_mask)[0]
-                coeffs = np.polyfit(time_ps[valid_indices], msd[valid_indices], 1)
-                slope = coeffs[0]
-                D_c60 = slope / 6.0  # Å²/ps
-                D_c60_cm2s = D_c60 * 1e-5  # Convert to cm²/s
-            else:
-                D_c60 = np.nan
-                D_c60_cm2s = np.nan
-            
-            results[eps] = {
-                'time_ps': time_ps,
-                'msd': msd,
-                'D_c60_A2ps': D_c60,
-                'D_c60_cm2s': D_c60_cm2s
-            }
-            
-            if not np.isnan(D_c60):
-                print(f"  D_C60 = {D_c60:.4f} Å²/ps = {D_c60_cm2s:.2e} cm²/s")
-            else:
-                print(f"  Could not fit diffusion coefficient")
+            results[eps] = {'time_ps': time_ps, 'msd': msd}
+        
+        # Diffusion coefficients of all epsilons in one GLS fit over the
+        # diffusive windows (diffusion_fit.py); for 3D, <r²(t)> = 6Dt + b
+        if results:
+            fit = fit_diffusion({eps: (r['time_ps'], r['msd']) for eps, r in results.items()},
+                                covariance='averaged')
+            for eps in results:
+                info = fit[eps]
+                D_c60 = info['D'] if info['n_points'] > 10 else np.nan  # Å²/ps
+                results[eps].update({
+                    'D_c60_A2ps': D_c60,
+                    'D_c60_cm2s': D_c60 * 1e-5,  # Convert to cm²/s
+                    'D_c60_error_A2ps': info['D_error'] if np.isfinite(D_c60) else np.nan,
+                    'fit_range_ps': info['window']
+                })
+                
+                if not np.isnan(D_c60):
+                    print(f"  ε={eps}: D_C60 = {D_c60:.4f} ± {info['D_error']:.4f} Å²/ps "
+                          f"= {D_c60 * 1e-5:.2e} cm²/s (fit {info['window'][0]:.0f}-{info['window'][1]:.0f} ps)")
+                else:
+                    print(f"  ε={eps}: Could not fit diffusion coefficient")
         
         self.results['c60_diffusion'] = results
         
@@ -282,7 +278,8 @@ class HighPriorityAnalyzer:
             diffusion_summary = pd.DataFrame({
                 'epsilon': list(results.keys()),
                 'D_C60_A2_per_ps': [results[eps]['D_c60_A2ps'] for eps in results.keys()],
-                'D_C60_cm2_per_s': [results[eps]['D_c60_cm2s'] for eps in results.keys()]
+                'D_C60_cm2_per_s': [results[eps]['D_c60_cm2s'] for eps in results.keys()],
+                'D_C60_error_A2_per_ps': [results[eps]['D_c60_error_A2ps'] for eps in results.keys()]
             })
             diffusion_summary.to_csv(self.plots_dir / 'c60_diffusion_coefficients.csv', index=False)
             print(f"\n✓ Diffusion coefficients saved")
@@ -515,35 +512,12 @@ class HighPriorityAnalyzer:
         print("  ✓ Saved: 22_thermodynamic_response_functions.png")
 
 
-    def export_comprehensive_csv(self):
-        """Export detailed CSV data for module 7"""
-        import pandas as pd
-        
-        # Export time series if available
-        if hasattr(self, 'data') and self.data:
-            timeseries_data = []
-            for eps in self.epsilon_values:
-                if eps in self.data:
-                    df = self.data[eps].copy()
-                    df['Epsilon'] = eps
-                    timeseries_data.append(df)
-            
-            if timeseries_data:
-                combined = pd.concat(timeseries_data, ignore_index=True)
-                csv_file = PLOTS_DIR / f"module07_timeseries_data.csv"
-                combined.to_csv(csv_file, index=False, float_format='%.6f')
-                print(f"  Exported CSV: {csv_file.name}")
-        
-        # Export summary statistics if available
-        if hasattr(self, 'stats_df'):
-            summary_file = PLOTS_DIR / f"module07_summary_stats.csv"
-            self.stats_df.to_csv(summary_file, index=False, float_format='%.6f')
-            print(f"  Exported summary: {summary_file.name}")
-
     def export_comprehensive_csv(self):
         """Export detailed CSV data for Module 07"""
         import pandas as pd
         
+        distance_data, diffusion_data = [], []
+        
         # 1. C60 Distances
         if 'c60_distances' in self.results:
             distance_data = []
@@ -574,13 +548,34 @@ class HighPriorityAnalyzer:
                 csv_file = self.plots_dir / "module07_c60_msd_data.csv"
                 combined_diff.to_csv(csv_file, index=False, float_format='%.6f')
                 print(f"  ✓ Exported: {csv_file.name}")
+        
+        # 3. Indexed results warehouse: series and per-epsilon summaries
+        tables = {}
+        if distance_data:
+            tables['c60_distances'] = combined_dist
+        if 'c60_distances' in self.results and self.results['c60_distances']:
+            summary = pd.DataFrame({eps: data['stats'] for eps, data in self.results['c60_distances'].items()}).T
+            tables['c60_distances_summary'] = summary.rename_axis('Epsilon').reset_index()
+        if 'thermodynamic' in self.results and self.results['thermodynamic']:
+            thermo = pd.DataFrame(self.results['thermodynamic']).T
+            tables['thermodynamic_response'] = thermo.rename_axis('Epsilon').reset_index()
+        store_results('module07', tables, time_column='time')
+        if diffusion_data:
+            store_results('module07', {'c60_msd': combined_diff})
+        if 'c60_diffusion' in self.results and self.results['c60_diffusion']:
+            diffusion = pd.DataFrame({
+                'Epsilon': list(self.results['c60_diffusion']),
+                'D_C60_A2_per_ps': [d['D_c60_A2ps'] for d in self.results['c60_diffusion'].values()],
+                'D_C60_error_A2_per_ps': [d['D_c60_error_A2ps'] for d in self.results['c60_diffusion'].values()]
+            })
+            store_results('module07', {'c60_diffusion': diffusion})
 
 def main():
     print("="*80)
     print("HIGH-PRIORITY ADDITIONAL ANALYSES (FIXED VERSION)")
     print("="*80)
     
-    base_dir = Path('/store/shuvam/learning_solvent_effects')
+    base_dir = base_dir_default()
     
     analyzer = HighPriorityAnalyzer(base_dir)
     
@@ -616,5 +611,11 @@ def main():
         import traceback
         traceback.print_exc()
 
+
+def run(context):
+    """Entry point for the in-process module host (module_host.py)"""
+    main()
+
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -31,6 +31,10 @@ from tqdm import tqdm
 import warnings
 warnings.filterwarnings('ignore')
 
+from epsilon_registry import get_registry, base_dir_default
+from results_warehouse import store_results
+from adaptive_stride import plan_stride
+
 plt.rcParams['figure.dpi'] = 600
 plt.rcParams['savefig.dpi'] = 600
 
@@ -43,23 +47,32 @@ def get_epsilon_colormap(epsilon_values):
 class PPMAnalyzer:
     def __init__(self, base_dir):
         self.base_dir = Path(base_dir)
-        # Full list of 23 epsilon values
-        self.epsilon_values = [
-            0.0, 0.05, 0.10, 0.15, 0.20, 0.25, 0.30, 0.35, 0.40, 0.45, 0.50,
-            0.55, 0.60, 0.65, 0.70, 0.75, 0.80, 0.85, 0.90, 0.95, 1.0, 1.05, 1.10
-        ]
-        
-        self.epsilon_dirs = {}
-        for eps in self.epsilon_values:
-            if eps == 0.0:
-                self.epsilon_dirs[eps] = 'solvent_effects/epsilon_0.0'
-            elif eps == 1.0:
-                self.epsilon_dirs[eps] = 'solvent_effects/epsilon_1.0'
-            else:
-                self.epsilon_dirs[eps] = f'solvent_effects/epsilon_{eps:.2f}'
+        # Epsilon runs and their directories from the shared registry
+        registry = get_registry(self.base_dir)
+        self.epsilon_values = registry.epsilons()
+        self.epsilon_dirs = registry.directories(self.epsilon_values)
                 
         self.plots_dir = self.base_dir / 'analysis' / 'plots'
         self.plots_dir.mkdir(parents=True, exist_ok=True)
+    
+    @staticmethod
+    def image_metrics(ppm_file):
+        """(brightness, contrast): mean and std of the grayscale image"""
+        img = imageio.imread(str(ppm_file))
+        
+        # Convert to grayscale if RGB
+        if len(img.shape) == 3:
+            img_gray = np.dot(img[...,:3], [0.299, 0.587, 0.114])
+        else:
+            img_gray = img
+        return img_gray.mean(), img_gray.std()
+    
+    def safe_metrics(self, ppm_file):
+        """image_metrics(), NaN for unreadable files (pilot pass)"""
+        try:
+            return self.image_metrics(ppm_file)
+        except Exception:
+            return np.nan, np.nan
         
     def analyze_snapshots(self):
         """
@@ -86,20 +99,15 @@ class PPMAnalyzer:
             contrast_list = []
             timestamps = []
             
-            for ppm_file in tqdm(ppm_files[::5], desc=f"ε={eps}"):  # Every 5th image
+            # Snapshot stride from the correlation time of brightness/contrast
+            # (ANALYSIS_TARGET_NEFF=0 keeps every 5th image)
+            plan = plan_stride(lambda idx: [self.safe_metrics(ppm_files[i]) for i in idx],
+                               len(ppm_files), ['brightness', 'contrast'], default_stride=5)
+            print(f"  Snapshot stride: {plan.describe()}")
+            
+            for ppm_file in tqdm(ppm_files[plan.slice()], desc=f"ε={eps}"):
                 try:
-                    # Read PPM file
-                    img = imageio.imread(str(ppm_file))
-                    
-                    # Convert to grayscale if RGB
-                    if len(img.shape) == 3:
-                        img_gray = np.dot(img[...,:3], [0.299, 0.587, 0.114])
-                    else:
-                        img_gray = img
-                    
-                    # Calculate metrics
-                    brightness = img_gray.mean()
-                    contrast = img_gray.std()
+                    brightness, contrast = self.image_metrics(ppm_file)
                     
                     brightness_list.append(brightness)
                     contrast_list.append(contrast)
@@ -123,7 +131,8 @@ class PPMAnalyzer:
                     'data': df,
                     'mean_brightness': np.mean(brightness_list),
                     'mean_contrast': np.mean(contrast_list),
-                    'n_snapshots': len(ppm_files)
+                    'n_snapshots': len(ppm_files),
+                    'snapshot_stride': plan.stride
                 }
                 
                 print(f"  Mean brightness: {results[eps]['mean_brightness']:.1f}")
@@ -137,7 +146,8 @@ class PPMAnalyzer:
                 eps: {
                     'mean_brightness': results[eps]['mean_brightness'],
                     'mean_contrast': results[eps]['mean_contrast'],
-                    'n_snapshots': results[eps]['n_snapshots']
+                    'n_snapshots': results[eps]['n_snapshots'],
+                    'snapshot_stride': results[eps]['snapshot_stride']
                 } for eps in results.keys()
             }).T
             summary.to_csv(self.plots_dir / 'ppm_snapshot_statistics.csv')
@@ -215,9 +225,10 @@ class PPMAnalyzer:
         """Export detailed CSV data for module 8"""
         import pandas as pd
         
+        all_data = []
+        
         # Export detailed metrics for all snapshots
         if hasattr(self, 'results_ppm') and self.results_ppm:
-            all_data = []
             for eps, data in self.results_ppm.items():
                 if 'data' in data:
                     df = data['data'].copy()
@@ -245,13 +256,17 @@ class PPMAnalyzer:
             summary_file = self.plots_dir / "module08_summary_stats.csv"
             summary_df.to_csv(summary_file, index=False, float_format='%.6f')
             print(f"  ✓ Exported summary: {summary_file.name}")
+            store_results('module08', {'summary': summary_df})
+        
+        if all_data:
+            store_results('module08', {'snapshots': combined}, time_column='timestep')
 
 def main():
     print("="*80)
     print("PPM SNAPSHOT ANALYSIS")
     print("="*80)
     
-    base_dir = Path('/store/shuvam/learning_solvent_effects')
+    base_dir = base_dir_default()
     analyzer = PPMAnalyzer(base_dir)
     
     try:
@@ -271,5 +286,11 @@ def main():
         import traceback
         traceback.print_exc()
 
+
+def run(context):
+    """Entry point for the in-process module host (module_host.py)"""
+    main()
+
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
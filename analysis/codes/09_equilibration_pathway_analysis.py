@@ -6,11 +6,15 @@ EQUILIBRATION PATHWAY ANALYSIS
 Analyzes equilibration trajectories (NVT, pre-equilibration, pressure ramp, NPT)
 to understand how the system evolves during equilibration.
 
-Uses DCD files:
-- nvt_thermalization.dcd (NVT - temperature equilibration)
-- pre_equilibration.dcd (Volume equilibration)
-- pressure_ramp.dcd (Pressure control ramp)
-- npt_equilibration.dcd (Final NPT equilibration)
+Uses the stage trajectories of every epsilon, read as one concatenated
+timeline (stage_timeline.py; compressed archives when available, else the
+text dump, else the DCD with atom types taken from a dumped stage):
+- nvt_thermalization.lammpstrj / .dcd (NVT - temperature equilibration)
+- pre_equilibration.dcd (Volume equilibration; DCD only)
+- pressure_ramp.dcd (Pressure control ramp; DCD only)
+- npt_equilibration.lammpstrj / .dcd (Final NPT equilibration)
+A stage without a readable trajectory is reported and kept as a gap of
+its protocol length on the timeline.
 
 Produces:
 - Equilibration pathway visualization
@@ -22,6 +26,7 @@ Author: AI Analysis Suite
 Date: 2024-11-18
 """
 
+import os
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
@@ -29,9 +34,14 @@ import seaborn as sns
 from pathlib import Path
 import matplotlib.cm as cm
 from matplotlib.colors import Normalize
-import MDAnalysis as mda
-from tqdm import tqdm
 import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from module_host import read_table
+from epsilon_registry import get_registry, base_dir_default
+from results_warehouse import store_results
+from stage_timeline import stage_observables, MAX_FRAMES_PER_STAGE
+
 warnings.filterwarnings('ignore')
 
 plt.rcParams['figure.dpi'] = 600
@@ -47,87 +57,101 @@ def get_epsilon_colormap(epsilon_values):
 class EquilibrationAnalyzer:
     def __init__(self, base_dir):
         self.base_dir = Path(base_dir)
-        # Full list of 23 epsilon values
-        self.epsilon_values = [
-            0.0, 0.05, 0.10, 0.15, 0.20, 0.25, 0.30, 0.35, 0.40, 0.45, 0.50,
-            0.55, 0.60, 0.65, 0.70, 0.75, 0.80, 0.85, 0.90, 0.95, 1.0, 1.05, 1.10
-        ]
-        
-        self.epsilon_dirs = {}
-        for eps in self.epsilon_values:
-            if eps == 0.0:
-                self.epsilon_dirs[eps] = 'solvent_effects/epsilon_0.0'
-            elif eps == 1.0:
-                self.epsilon_dirs[eps] = 'solvent_effects/epsilon_1.0'
-            else:
-                self.epsilon_dirs[eps] = f'solvent_effects/epsilon_{eps:.2f}'
+        # Epsilon runs and their directories from the shared registry
+        registry = get_registry(self.base_dir)
+        self.epsilon_values = registry.epsilons()
+        self.epsilon_dirs = registry.directories(self.epsilon_values)
                 
         self.plots_dir = self.base_dir / 'analysis' / 'plots'
         self.plots_dir.mkdir(parents=True, exist_ok=True)
         self.results = {}
         
-    def analyze_equilibration_stages(self):
+    def analyze_equilibration_stages(self, max_frames=MAX_FRAMES_PER_STAGE, workers=None):
         """
-        Analyze each equilibration stage for representative epsilon value (0.0)
+        Structural observables (box, density, C60 separations, O-O RDF) along the
+        concatenated NVT -> pre-equilibration -> pressure ramp -> NPT timeline
+        of every epsilon, one epsilon per worker process (stage_timeline.py)
         """
         print("\n" + "="*80)
         print("EQUILIBRATION PATHWAY ANALYSIS")
         print("="*80)
         
-        eps = 0.0
-        eps_dir = self.base_dir / self.epsilon_dirs[eps]
+        jobs = {eps: self.base_dir / self.epsilon_dirs[eps] for eps in self.epsilon_values}
+        workers = workers or max(1, min(os.cpu_count() or 1, 8, len(jobs)))
+        print(f"\nStage timelines of {len(jobs)} epsilons ({workers} workers, "
+              f"≤{max_frames} frames per stage)...")
         
-        stages = {
-            'NVT Thermalization': ('nvt_thermalization.lammpstrj', eps_dir / 'nvt_thermalization.lammpstrj'),
-            'Pre-equilibration': ('pre_equilibration.lammpstrj', eps_dir / 'pre_equilibration.lammpstrj'),
-            'Pressure Ramp': ('pressure_ramp.lammpstrj', eps_dir / 'pressure_ramp.lammpstrj'),
-            'NPT Equilibration': ('npt_equilibration.lammpstrj', eps_dir / 'npt_equilibration.lammpstrj'),
-        }
+        self.stage_tables = {}
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(stage_observables, eps_dir, max_frames): eps
+                       for eps, eps_dir in jobs.items()}
+            for future in as_completed(futures):
+                eps = futures[future]
+                try:
+                    tables = future.result()
+                except Exception as e:
+                    print(f"  ✗ ε={eps:.2f}: {e}")
+                    continue
+                if tables['timeline'].empty:
+                    print(f"  ⚠ ε={eps:.2f}: no equilibration stage trajectories")
+                    continue
+                self.stage_tables[eps] = tables
+                stages = tables['stages']
+                n_read = int((stages['format'] != 'missing').sum())
+                print(f"  ✓ ε={eps:.2f}: {n_read} stages, {int(stages['n_frames'].sum())} frames "
+                      f"({len(tables['timeline'])} analyzed, {int(stages['box_changes'].sum())} box changes)")
+                if tables['missing']:
+                    print(f"  ⚠ ε={eps:.2f}: MISSING stage(s) {', '.join(tables['missing'])} - "
+                          f"shown as gaps on the timeline, no data for them")
         
-        results = {}
+        if not self.stage_tables:
+            print("  ⚠ No stage trajectories found")
+            return
         
-        for stage_name, (_, traj_file) in stages.items():
-            if not traj_file.exists():
-                print(f"  ⚠ {stage_name}: File not found")
-                continue
-            
-            print(f"\n[{stage_name}] Analyzing trajectory...")
-            
-            try:
-                u = mda.Universe(str(traj_file), format='LAMMPSDUMP')
-                
-                # Extract thermodynamic properties
-                temps = []
-                densities = []
-                energies = []
-                
-                for ts in tqdm(u.trajectory, desc=f"  {stage_name}", leave=False):
-                    # Try to extract from frame attributes
-                    try:
-                        # These would come from LAMMPS dump attributes
-                        temps.append(300.0)  # Would be extracted from dump
-                    except:
-                        pass
-                
-                results[stage_name] = {
-                    'n_frames': len(u.trajectory),
-                    'n_atoms': u.atoms.n_atoms,
-                    'duration_ps': len(u.trajectory) * 2.0  # 2 fs per step
-                }
-                
-                print(f"  Duration: {results[stage_name]['duration_ps']:.0f} ps")
-                print(f"  Frames: {results[stage_name]['n_frames']}")
-            
-            except Exception as e:
-                print(f"  Error: {e}")
-                continue
+        def combined(name):
+            frames = [t[name].assign(Epsilon=eps) for eps, t in sorted(self.stage_tables.items())
+                      if not t[name].empty]
+            return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
         
-        # Save summary
-        summary_df = pd.DataFrame(results).T
-        summary_df.to_csv(self.plots_dir / 'equilibration_stages_summary.csv')
+        self.stage_summary = combined('stages')
+        self.stage_timeline = combined('timeline')
+        self.stage_rdf = combined('rdf')
+        self.stage_summary.to_csv(self.plots_dir / 'equilibration_stages_summary.csv', index=False)
         print(f"\n✓ Equilibration stages summary saved")
-        
-        self.results_eq = results
+        self.plot_stage_timeline()
+    
+    def plot_stage_timeline(self):
+        """Density and mean C60 separation along the concatenated stage timeline"""
+        df = self.stage_timeline
+        separation_cols = [c for c in df.columns if c.startswith('C60_')]
+        colors = get_epsilon_colormap(sorted(self.stage_tables))
+        fig, axes = plt.subplots(2, 1, figsize=(14, 10), sharex=True)
+        for eps, group in df.groupby('Epsilon'):
+            axes[0].plot(group['Time_ps'], group['Density_g_cm3'], color=colors[eps], linewidth=1.0,
+                         label=f'ε={eps:.2f}')
+            if separation_cols:
+                axes[1].plot(group['Time_ps'], group[separation_cols].mean(axis=1), color=colors[eps],
+                             linewidth=1.0)
+        # Stage boundaries of the first epsilon (stage lengths are common to all runs)
+        first = self.stage_summary[self.stage_summary['Epsilon'] == self.stage_summary['Epsilon'].min()]
+        for _, stage_row in first.iterrows():
+            for ax in axes:
+                ax.axvline(stage_row['start_ps'], color='gray', linestyle=':', alpha=0.8)
+                if stage_row['format'] == 'missing':
+                    ax.axvspan(stage_row['start_ps'], stage_row['start_ps'] + stage_row['duration_ps'],
+                               color='gray', alpha=0.15, hatch='//')
+            axes[0].text(stage_row['start_ps'], 1.01, stage_row['Stage'], transform=axes[0].get_xaxis_transform(),
+                         fontsize=9)
+        axes[0].set_ylabel('Density (g/cm³)', fontsize=12, fontweight='bold')
+        axes[1].set_ylabel('Mean C60-C60 separation (Å)', fontsize=12, fontweight='bold')
+        axes[1].set_xlabel('Time along equilibration (ps)', fontsize=12, fontweight='bold')
+        axes[0].legend(ncol=4, fontsize=7)
+        for ax in axes:
+            ax.grid(True, alpha=0.3)
+        plt.tight_layout()
+        plt.savefig(self.plots_dir / 'equilibration_stage_timeline.png', dpi=300, bbox_inches='tight')
+        plt.close()
+        print(f"  ✓ Stage timeline plot saved")
     
     def analyze_thermo_evolution(self):
         """
@@ -145,7 +169,7 @@ class EquilibrationAnalyzer:
                 continue
                 
             try:
-                df = pd.read_csv(thermo_file, sep=r'\s+', comment='#',
+                df = read_table(thermo_file, sep=r'\s+', comment='#',
                                names=['timestep', 'temp', 'press', 'pe', 'ke', 'vol', 'dens'],
                                engine='python')
                 
@@ -201,10 +225,6 @@ class EquilibrationAnalyzer:
         print(f"  ✓ Generated equilibration plots for {len(self.thermo_data)} epsilons")
 
 
-    def export_comprehensive_csv(self):
-        """Export detailed CSV data for module 9"""
-        import pandas as pd
-        
     def export_comprehensive_csv(self):
         """Export detailed CSV data for module 9"""
         import pandas as pd
@@ -222,10 +242,26 @@ class EquilibrationAnalyzer:
                 csv_file = self.plots_dir / "module09_equilibration_thermo.csv"
                 combined.to_csv(csv_file, index=False, float_format='%.6f')
                 print(f"  ✓ Exported CSV: {csv_file.name}")
+                store_results('module09', {'npt_equilibration_thermo': combined}, time_column='timestep')
+        
+        # Stage timeline of every epsilon: per-stage summary, per-frame observables, O-O RDF
+        if getattr(self, 'stage_tables', None):
+            timeline_file = self.plots_dir / "module09_stage_timeline.csv"
+            self.stage_timeline.to_csv(timeline_file, index=False, float_format='%.6f')
+            rdf_file = self.plots_dir / "module09_stage_rdf.csv"
+            self.stage_rdf.to_csv(rdf_file, index=False, float_format='%.6f')
+            print(f"  ✓ Exported CSV: {timeline_file.name}, {rdf_file.name}")
+            # Warehouse stages must not collide: the summary uses the stage names,
+            # the per-frame series one stage, each RDF '<stage> rdf_OO'
+            store_results('module09', {'equilibration_stages': self.stage_summary}, stage_column='Stage')
+            store_results('module09', {'stage_timeline': self.stage_timeline.drop(columns='Stage')},
+                          time_column='Time_ps')
+            rdf = self.stage_rdf.assign(Stage=self.stage_rdf['Stage'] + ' rdf_OO')
+            store_results('module09', {'stage_rdf': rdf}, stage_column='Stage', time_column='r_A')
         
         # Export summary statistics if available
         if hasattr(self, 'stats_df'):
-            summary_file = PLOTS_DIR / f"module09_summary_stats.csv"
+            summary_file = self.plots_dir / "module09_summary_stats.csv"
             self.stats_df.to_csv(summary_file, index=False, float_format='%.6f')
             print(f"  Exported summary: {summary_file.name}")
 
@@ -234,7 +270,7 @@ def main():
     print("EQUILIBRATION PATHWAY ANALYSIS")
     print("="*80)
     
-    base_dir = Path('/store/shuvam/learning_solvent_effects')
+    base_dir = base_dir_default()
     analyzer = EquilibrationAnalyzer(base_dir)
     
     try:
@@ -253,5 +289,11 @@ def main():
         import traceback
         traceback.print_exc()
 
+
+def run(context):
+    """Entry point for the in-process module host (module_host.py)"""
+    main()
+
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
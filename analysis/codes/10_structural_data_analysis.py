@@ -34,6 +34,10 @@ from tqdm import tqdm
 import warnings
 warnings.filterwarnings('ignore')
 
+from proximity import C60Proximity
+from epsilon_registry import get_registry, base_dir_default
+from results_warehouse import store_results
+
 plt.rcParams['figure.dpi'] = 600
 plt.rcParams['savefig.dpi'] = 600
 plt.rcParams['font.size'] = 10
@@ -47,20 +51,10 @@ def get_epsilon_colormap(epsilon_values):
 class StructuralAnalyzer:
     def __init__(self, base_dir):
         self.base_dir = Path(base_dir)
-        # Full list of 23 epsilon values
-        self.epsilon_values = [
-            0.0, 0.05, 0.10, 0.15, 0.20, 0.25, 0.30, 0.35, 0.40, 0.45, 0.50,
-            0.55, 0.60, 0.65, 0.70, 0.75, 0.80, 0.85, 0.90, 0.95, 1.0, 1.05, 1.10
-        ]
-        
-        self.epsilon_dirs = {}
-        for eps in self.epsilon_values:
-            if eps == 0.0:
-                self.epsilon_dirs[eps] = 'solvent_effects/epsilon_0.0'
-            elif eps == 1.0:
-                self.epsilon_dirs[eps] = 'solvent_effects/epsilon_1.0'
-            else:
-                self.epsilon_dirs[eps] = f'solvent_effects/epsilon_{eps:.2f}'
+        # Epsilon runs and their directories from the shared registry
+        registry = get_registry(self.base_dir)
+        self.epsilon_values = registry.epsilons()
+        self.epsilon_dirs = registry.directories(self.epsilon_values)
                 
         self.plots_dir = self.base_dir / 'analysis' / 'plots'
         self.plots_dir.mkdir(parents=True, exist_ok=True)
@@ -321,39 +315,43 @@ class StructuralAnalyzer:
             if atoms_df is None:
                 continue
             
-            # C60 atoms
-            c60_atoms = atoms_df[atoms_df['atom_type'] == 1]
-            c60_com = c60_atoms[['x', 'y', 'z']].mean().values
+            # C60 atoms, 60 consecutive ids per cage
+            c60_atoms = atoms_df[atoms_df['atom_type'] == 1].sort_values(['mol_id', 'atom_id'])
             
             # Water oxygen atoms
             water_o = atoms_df[atoms_df['atom_type'] == 2]
             water_h = atoms_df[atoms_df['atom_type'] == 3]
             
-            # Distances from water O to C60 COM
-            distances = np.linalg.norm(
-                water_o[['x', 'y', 'z']].values - c60_com, axis=1
-            )
-            
-            # Define hydration shell (first 5 Å)
-            shell_mask = distances < 5.0
-            n_water_in_shell = shell_mask.sum()
+            # Periodic distances from water O to the nearest carbon of each C60;
+            # the minimum image needs the full box of the data file
+            try:
+                proximity = C60Proximity(c60_atoms[['x', 'y', 'z']].values, box)
+            except ValueError as e:
+                print(f"    ✗ Skipping ε={eps}: {data_file.name} has {e}")
+                continue
+            o_coords = water_o[['x', 'y', 'z']].values
+            distances, _ = proximity.nearest(o_coords)
             
-            # Per-C60 calculation (assuming 3 C60s)
-            molecules_per_c60 = n_water_in_shell / 3
+            # Hydration shell: within 5 Å of any carbon of a cage
+            per_c60 = proximity.count_within(o_coords, 5.0)
+            n_water_in_shell = int((distances < 5.0).sum())
             
             stats = {
                 'total_waters': len(water_o),
                 'waters_in_shell': n_water_in_shell,
-                'waters_per_c60': molecules_per_c60,
+                'waters_per_c60': per_c60.mean(),
                 'mean_distance': distances.mean(),
                 'shell_radius': 5.0
             }
+            for k, count in enumerate(per_c60):
+                stats[f'waters_c60_{k + 1}'] = int(count)
             
             results[eps] = stats
             
             print(f"    Total water molecules: {stats['total_waters']}")
             print(f"    In first shell (<5Å): {stats['waters_in_shell']} ({stats['waters_per_c60']:.0f} per C60)")
-            print(f"    Mean O-C60 distance: {stats['mean_distance']:.2f} Å")
+            print(f"    Per C60: {', '.join(str(int(c)) for c in per_c60)}")
+            print(f"    Mean O-nearest carbon distance: {stats['mean_distance']:.2f} Å")
         
         self.results_hydration = results
         
@@ -526,6 +524,14 @@ class StructuralAnalyzer:
             df.to_csv(csv_file, index=False, float_format='%.6f')
             print(f"  ✓ Exported: {csv_file.name}")
             
+        # Same per-epsilon tables into the indexed results warehouse
+        tables = {}
+        for stage, results in (('structural_integrity', getattr(self, 'results_integrity', None)),
+                               ('hydration_shell', getattr(self, 'results_hydration', None))):
+            if results:
+                tables[stage] = pd.DataFrame(results).T.rename_axis('Epsilon').reset_index()
+        store_results('module10', tables)
+            
         # 3. Radial Distributions (Summary)
         if hasattr(self, 'results_radial') and self.results_radial:
             # We already export individual files in analyze_radial_distribution
@@ -537,7 +543,7 @@ def main():
     print("MODULE 10: STRUCTURAL DATA ANALYSIS")
     print("="*80)
     
-    base_dir = Path('/store/shuvam/learning_solvent_effects')
+    base_dir = base_dir_default()
     analyzer = StructuralAnalyzer(base_dir)
     
     try:
@@ -563,5 +569,11 @@ def main():
         import traceback
         traceback.print_exc()
 
+
+def run(context):
+    """Entry point for the in-process module host (module_host.py)"""
+    main()
+
+
 if __name__ == '__main__':
     main()
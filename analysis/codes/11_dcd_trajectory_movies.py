@@ -29,6 +29,11 @@ from tqdm import tqdm
 import warnings
 warnings.filterwarnings('ignore')
 
+from epsilon_registry import get_registry, base_dir_default
+from results_warehouse import store_results
+from trajectory_archive import open_universe, archive_for
+from unwrap import Unwrapper
+
 plt.rcParams['figure.dpi'] = 100
 plt.rcParams['font.size'] = 10
 
@@ -41,20 +46,10 @@ def get_epsilon_colormap(epsilon_values):
 class TrajectoryMovieMaker:
     def __init__(self, base_dir):
         self.base_dir = Path(base_dir)
-        # Full list of 23 epsilon values
-        self.epsilon_values = [
-            0.0, 0.05, 0.10, 0.15, 0.20, 0.25, 0.30, 0.35, 0.40, 0.45, 0.50,
-            0.55, 0.60, 0.65, 0.70, 0.75, 0.80, 0.85, 0.90, 0.95, 1.0, 1.05, 1.10
-        ]
-        
-        self.epsilon_dirs = {}
-        for eps in self.epsilon_values:
-            if eps == 0.0:
-                self.epsilon_dirs[eps] = 'solvent_effects/epsilon_0.0'
-            elif eps == 1.0:
-                self.epsilon_dirs[eps] = 'solvent_effects/epsilon_1.0'
-            else:
-                self.epsilon_dirs[eps] = f'solvent_effects/epsilon_{eps:.2f}'
+        # Epsilon runs and their directories from the shared registry
+        registry = get_registry(self.base_dir)
+        self.epsilon_values = registry.epsilons()
+        self.epsilon_dirs = registry.directories(self.epsilon_values)
                 
         self.videos_dir = self.base_dir / 'analysis' / 'videos'
         self.videos_dir.mkdir(parents=True, exist_ok=True)
@@ -70,20 +65,20 @@ class TrajectoryMovieMaker:
             eps_dir = self.base_dir / self.epsilon_dirs[eps]
             lammpstrj = eps_dir / 'production.lammpstrj'
             
-            if not lammpstrj.exists():
+            if not lammpstrj.exists() and archive_for(lammpstrj) is None:
                 print(f"  ⚠ ε={eps}: production.lammpstrj not found")
                 continue
             
             print(f"\n[ε={eps}] Loading trajectory...", end='', flush=True)
             
             try:
-                u = mda.Universe(str(lammpstrj), format='LAMMPSDUMP')
+                u = open_universe(lammpstrj)
                 print(f" ✓ ({len(u.trajectory)} frames)")
                 
-                # Extract C60 center of mass trajectory
-                c60_1 = u.atoms[0:60]
-                c60_2 = u.atoms[60:120]
-                c60_3 = u.atoms[120:180]
+                # Extract C60 center of mass trajectory from unwrapped
+                # positions (image counters shared with modules 04/07)
+                unwrapper = Unwrapper(u.trajectory.filename).ensure(len(u.trajectory))
+                unwrapped = None
                 
                 c60_trajectory = []
                 
@@ -93,9 +88,8 @@ class TrajectoryMovieMaker:
                 traj_data = []
                 
                 for ts in u.trajectory[::10]:  # Every 10 frames
-                    com1 = c60_1.center_of_mass()
-                    com2 = c60_2.center_of_mass()
-                    com3 = c60_3.center_of_mass()
+                    unwrapped = unwrapper.unwrap(ts.frame, ts.positions, ts.dimensions, out=unwrapped)
+                    com1, com2, com3 = unwrapped[:180].reshape(3, 60, 3).mean(axis=1)
                     c60_trajectory.append([com1, com2, com3])
                     
                     traj_data.append({
@@ -158,14 +152,14 @@ class TrajectoryMovieMaker:
         for stage_name, traj_file in stages.items():
             traj_path = eps_dir / traj_file
             
-            if not traj_path.exists():
+            if not traj_path.exists() and archive_for(traj_path) is None:
                 print(f"  ⚠ {stage_name}: {traj_file} not found")
                 continue
             
             print(f"\n[{stage_name}] Loading trajectory...", end='', flush=True)
             
             try:
-                u = mda.Universe(str(traj_path), format='LAMMPSDUMP')
+                u = open_universe(traj_path)
                 print(f" ✓ ({len(u.trajectory)} frames)")
                 
                 # Get system COM trajectory
@@ -212,10 +206,6 @@ class TrajectoryMovieMaker:
                 continue
 
 
-    def export_comprehensive_csv(self):
-        """Export detailed CSV data for module 11"""
-        import pandas as pd
-        
     def export_comprehensive_csv(self):
         """Export detailed CSV data for module 11"""
         import pandas as pd
@@ -233,10 +223,11 @@ class TrajectoryMovieMaker:
                 csv_file = self.videos_dir / "module11_production_trajectories.csv"
                 combined.to_csv(csv_file, index=False, float_format='%.6f')
                 print(f"  ✓ Exported CSV: {csv_file.name}")
+                store_results('module11', {'production_trajectories': combined})
         
         # Export summary statistics if available
         if hasattr(self, 'stats_df'):
-            summary_file = PLOTS_DIR / f"module11_summary_stats.csv"
+            summary_file = self.videos_dir / "module11_summary_stats.csv"
             self.stats_df.to_csv(summary_file, index=False, float_format='%.6f')
             print(f"  Exported summary: {summary_file.name}")
 
@@ -245,7 +236,7 @@ def main():
     print("MODULE 11: DCD TRAJECTORY MOVIE GENERATION")
     print("="*80)
     
-    base_dir = Path('/store/shuvam/learning_solvent_effects')
+    base_dir = base_dir_default()
     maker = TrajectoryMovieMaker(base_dir)
     
     try:
@@ -267,5 +258,11 @@ def main():
         import traceback
         traceback.print_exc()
 
+
+def run(context):
+    """Entry point for the in-process module host (module_host.py)"""
+    main()
+
+
 if __name__ == '__main__':
     main()
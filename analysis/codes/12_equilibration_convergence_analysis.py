@@ -28,6 +28,9 @@ from tqdm import tqdm
 import warnings
 warnings.filterwarnings('ignore')
 
+from epsilon_registry import get_registry, base_dir_default
+from results_warehouse import store_results
+
 plt.rcParams['figure.dpi'] = 100
 plt.rcParams['font.size'] = 10
 
@@ -40,20 +43,10 @@ def get_epsilon_colormap(epsilon_values):
 class EquilibrationConvergenceAnalyzer:
     def __init__(self, base_dir):
         self.base_dir = Path(base_dir)
-        # Full list of 23 epsilon values
-        self.epsilon_values = [
-            0.0, 0.05, 0.10, 0.15, 0.20, 0.25, 0.30, 0.35, 0.40, 0.45, 0.50,
-            0.55, 0.60, 0.65, 0.70, 0.75, 0.80, 0.85, 0.90, 0.95, 1.0, 1.05, 1.10
-        ]
-        
-        self.epsilon_dirs = {}
-        for eps in self.epsilon_values:
-            if eps == 0.0:
-                self.epsilon_dirs[eps] = 'solvent_effects/epsilon_0.0'
-            elif eps == 1.0:
-                self.epsilon_dirs[eps] = 'solvent_effects/epsilon_1.0'
-            else:
-                self.epsilon_dirs[eps] = f'solvent_effects/epsilon_{eps:.2f}'
+        # Epsilon runs and their directories from the shared registry
+        registry = get_registry(self.base_dir)
+        self.epsilon_values = registry.epsilons()
+        self.epsilon_dirs = registry.directories(self.epsilon_values)
                 
         self.plots_dir = self.base_dir / 'analysis' / 'plots'
         self.data_dir = self.base_dir / 'analysis' / 'data'
@@ -515,8 +508,8 @@ class EquilibrationConvergenceAnalyzer:
                 npt_metrics['Epsilon'] = eps
         
         df_metrics = pd.DataFrame(metrics)
-        csv_file = self.data_dir / f'convergence_metrics_eps{eps:.2f}.csv'
-        df_metrics.to_csv(csv_file, index=False)
+        # Per-stage metrics go to the results warehouse (one stage per row)
+        store_results('module12', {'convergence_metrics': df_metrics}, epsilon=eps, stage_column='Stage')
         
         # Accumulate NPT metrics for cross-epsilon summary
         if npt_metrics:
@@ -594,7 +587,7 @@ def main():
     print("MODULE 12: EQUILIBRATION CONVERGENCE ANALYSIS")
     print("="*80)
     
-    base_dir = Path('/store/shuvam/learning_solvent_effects')
+    base_dir = base_dir_default()
     analyzer = EquilibrationConvergenceAnalyzer(base_dir)
     
     try:
@@ -614,5 +607,11 @@ def main():
         import traceback
         traceback.print_exc()
 
+
+def run(context):
+    """Entry point for the in-process module host (module_host.py)"""
+    main()
+
+
 if __name__ == '__main__':
     main()
@@ -6,13 +6,15 @@ MODULE 13: LOG FILE PERFORMANCE ANALYSIS
 Extracts computational performance metrics from LAMMPS log files.
 Analyzes timesteps/second, GPU utilization, and wall time across simulations.
 
-Metrics:
-- Speed of simulation (timesteps/sec)
+Metrics (every run segment of every log, via lammps_log.py):
+- Speed of simulation (timesteps/sec, ns/day)
+- MPI task timing breakdown (Pair/Bond/Kspace/Neigh/Comm/Output/Modify/Other)
+- Neighbor-list statistics and per-rank memory
 - CPU vs GPU time
 - Force evaluations per stage
 - Scalability analysis
 
-Output: 2 plots, 2 CSV files
+Output: up to 4 plots and 3 CSV files (the summary lists those written)
 
 Author: AI Analysis Suite
 Date: 2024-11-19
@@ -24,14 +26,27 @@ import matplotlib.pyplot as plt
 from pathlib import Path
 import matplotlib.cm as cm
 from matplotlib.colors import Normalize
-import re
 from collections import defaultdict
 import warnings
+
+from lammps_log import parse_log_runs, build_performance_table, TIMING_SECTIONS
+from instrumentation import instrumented
+from epsilon_registry import get_registry, base_dir_default
+from results_warehouse import store_results
+
 warnings.filterwarnings('ignore')
 
 plt.rcParams['figure.dpi'] = 100
 plt.rcParams['font.size'] = 10
 
+# Equilibration stages: label -> run-segment stage (stem of the stage's dump file)
+EQUILIBRATION_STAGES = {
+    'NVT': 'nvt_thermalization',
+    'Pre-Eq': 'pre_equilibration',
+    'Pressure': 'pressure_ramp',
+    'NPT': 'npt_equilibration',
+}
+
 
 def get_epsilon_colormap(epsilon_values):
     """Generate perceptually uniform colormap for epsilon values"""
@@ -41,20 +56,10 @@ def get_epsilon_colormap(epsilon_values):
 class LogFilePerformanceAnalyzer:
     def __init__(self, base_dir):
         self.base_dir = Path(base_dir)
-        # Full list of 23 epsilon values
-        self.epsilon_values = [
-            0.0, 0.05, 0.10, 0.15, 0.20, 0.25, 0.30, 0.35, 0.40, 0.45, 0.50,
-            0.55, 0.60, 0.65, 0.70, 0.75, 0.80, 0.85, 0.90, 0.95, 1.0, 1.05, 1.10
-        ]
-        
-        self.epsilon_dirs = {}
-        for eps in self.epsilon_values:
-            if eps == 0.0:
-                self.epsilon_dirs[eps] = 'solvent_effects/epsilon_0.0'
-            elif eps == 1.0:
-                self.epsilon_dirs[eps] = 'solvent_effects/epsilon_1.0'
-            else:
-                self.epsilon_dirs[eps] = f'solvent_effects/epsilon_{eps:.2f}'
+        # Epsilon runs and their directories from the shared registry
+        registry = get_registry(self.base_dir)
+        self.epsilon_values = registry.epsilons()
+        self.epsilon_dirs = registry.directories(self.epsilon_values)
                 
         self.plots_dir = self.base_dir / 'analysis' / 'plots'
         self.data_dir = self.base_dir / 'analysis' / 'data'
@@ -62,95 +67,64 @@ class LogFilePerformanceAnalyzer:
         self.data_dir.mkdir(parents=True, exist_ok=True)
         self.results_production = None
         self.results_equilibration = None
+        self.run_table = None
+        self.saved_plots = []
+        self.saved_data = []
+    
+    def _saved(self, path, plot=False):
+        (self.saved_plots if plot else self.saved_data).append(Path(path).name)
+        print(f"  ✓ Saved: {Path(path).name}")
     
+    @instrumented()
     def parse_log_file(self, log_file):
-        """Extract performance metrics from LAMMPS log file"""
+        """
+        Extract performance metrics from LAMMPS log file
+        
+        Every run segment is tokenized (lammps_log.py); the headline metrics
+        come from the last run that reports timing, totals are summed over
+        all segments.
+        """
         metrics = {
             'timesteps_per_sec': None,
             'total_wall_time': None,
             'cpu_seconds': None,
             'gpu_seconds': None,
-            'performance_notes': []
+            'performance_notes': [],
+            'runs': None
         }
         
         try:
-            with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
+            runs = parse_log_runs(log_file)
+            metrics['runs'] = runs
+            timed = runs[runs['loop_time'].notna() & (runs['steps'].fillna(0) > 0)]
+            if timed.empty:
+                return metrics
             
-            # Look for common timing information formats used by LAMMPS
-            # 1) Performance line, e.g. "Performance: 11.639 ns/day, 2.062 hours/ns, 67.357 timesteps/s"
-            perf_pattern = r'Performance:.*?([\d.]+)\s+timesteps/s'
-            perf_match = re.search(perf_pattern, content, flags=re.IGNORECASE | re.DOTALL)
-            if perf_match:
-                try:
-                    tps = float(perf_match.group(1))
-                    metrics['timesteps_per_sec'] = tps
-                    metrics['performance_notes'].append(f"Performance line: {tps:.3f} timesteps/s")
-                except Exception:
-                    pass
-
-            # 2) Loop time summary: "Loop time of 371.156 on 4 procs for 25000 steps"
-            #    -> compute timesteps/sec = n_steps / loop_time
-            if metrics['timesteps_per_sec'] is None:
-                loop_pattern = r'Loop time of\s*([\d.]+)\s*on.*for\s*(\d+)\s*steps'
-                loop_match = re.search(loop_pattern, content, flags=re.IGNORECASE)
-                if loop_match:
-                    try:
-                        loop_time = float(loop_match.group(1))
-                        n_steps = int(loop_match.group(2))
-                        metrics['timesteps_per_sec'] = n_steps / loop_time
-                        metrics['total_wall_time'] = loop_time
-                        metrics['performance_notes'].append(f"Loop time {loop_time:.3f}s for {n_steps} steps")
-                    except Exception:
-                        pass
-
-            # 3) Fallback: "X timesteps in Y seconds"
-            if metrics['timesteps_per_sec'] is None:
-                ts_pattern = r'(\d+)\s+timesteps\s+in\s+([\d.]+)\s+seconds'
-                ts_match = re.search(ts_pattern, content)
-                if ts_match:
-                    try:
-                        n_steps = int(ts_match.group(1))
-                        wall_time = float(ts_match.group(2))
-                        metrics['timesteps_per_sec'] = n_steps / wall_time
-                        metrics['total_wall_time'] = wall_time
-                        metrics['performance_notes'].append(f"{n_steps} timesteps in {wall_time:.2f} sec")
-                    except Exception:
-                        pass
+            last = timed.iloc[-1]
+            if pd.notna(last['timesteps_per_sec']):
+                metrics['timesteps_per_sec'] = float(last['timesteps_per_sec'])
+                metrics['performance_notes'].append(
+                    f"Run {int(last['run_index'])}: {last['timesteps_per_sec']:.3f} timesteps/s, "
+                    f"{last['ns_per_day']:.3f} ns/day")
+            else:
+                metrics['timesteps_per_sec'] = float(last['steps']) / float(last['loop_time'])
+                metrics['performance_notes'].append(
+                    f"Loop time {last['loop_time']:.3f}s for {int(last['steps'])} steps")
             
-            # Look for simple CPU/GPU time lines (many LAMMPS outputs differ in wording)
-            cpu_pattern = r'([A-Za-z0-9_\- ]+)CPU\s*=\s*([\d.]+)\s*seconds'
-            cpu_match = re.search(cpu_pattern, content)
-            if cpu_match:
-                try:
-                    metrics['cpu_seconds'] = float(cpu_match.group(2))
-                    metrics['performance_notes'].append(f"CPU time: {metrics['cpu_seconds']:.2f} sec")
-                except Exception:
-                    pass
-
-            # Many logs include a Device Time Info block with short per-operation times (s). Sum a few useful fields as an estimate of GPU time.
-            if metrics['gpu_seconds'] is None:
-                dev_block_pattern = r'Device Time Info\s*:\s*(?:\n|\r\n)(.*?)\n\n'
-                dev_match = re.search(dev_block_pattern, content, flags=re.DOTALL)
-                if dev_match:
-                    block = dev_match.group(1)
-                    # find lines like 'Force calc:      0.0062 s.' or 'Data Transfer:   0.0020 s.'
-                    time_vals = re.findall(r'([A-Za-z ]+):\s*([\d.]+)\s*s\.?', block)
-                    if time_vals:
-                        try:
-                            gpu_est = sum(float(t[1]) for t in time_vals)
-                            metrics['gpu_seconds'] = gpu_est
-                            metrics['performance_notes'].append(f"Device time est: {gpu_est:.4f} s (sum of sub-ops)")
-                        except Exception:
-                            pass
+            metrics['total_wall_time'] = float(timed['loop_time'].sum())
+            cpu_use = timed['cpu_use_pct'].fillna(100.0) / 100.0
+            metrics['cpu_seconds'] = float((timed['loop_time'] * cpu_use).sum())
+            if timed['device_seconds'].notna().any():
+                metrics['gpu_seconds'] = float(timed['device_seconds'].sum())
             
-            # Extract memory usage if available
-            mem_pattern = r'(\d+)\s+bytes\s+at\s+largest'
-            mem_match = re.search(mem_pattern, content)
-            if mem_match:
-                mem_bytes = int(mem_match.group(1))
-                mem_mb = mem_bytes / (1024 ** 2)
-                metrics['performance_notes'].append(f"Memory: {mem_mb:.1f} MB")
+            metrics['performance_notes'].append(
+                f"{len(runs)} run segments, {metrics['total_wall_time']:.1f}s total loop time")
+            if pd.notna(last['kspace_pct']):
+                metrics['performance_notes'].append(
+                    f"Last run: Kspace {last['kspace_pct']:.1f}%, Pair {last['pair_pct']:.1f}%, "
+                    f"Comm {last['comm_pct']:.1f}%")
+            if pd.notna(last['memory_max_mb']):
+                metrics['performance_notes'].append(f"Memory: {last['memory_max_mb']:.1f} MB per rank (max)")
             
             return metrics
         
@@ -158,42 +132,85 @@ class LogFilePerformanceAnalyzer:
             metrics['performance_notes'].append(f"Error: {str(e)}")
             return metrics
     
+    def label_stages(self, runs):
+        """
+        Fill the stage of run segments parsed from screen output (no input
+        echo, so no dump commands) from the epsilon's equilibration.log,
+        which has the same run segments, by run index
+        """
+        for eps, index in runs.groupby('epsilon').groups.items():
+            if runs.loc[index, 'stage'].fillna('').ne('').all():
+                continue
+            log_file = self.base_dir / self.epsilon_dirs[eps] / 'equilibration.log'
+            if not log_file.exists():
+                continue
+            labels = parse_log_runs(log_file).set_index('run_index')['stage']
+            runs.loc[index, 'stage'] = runs.loc[index, 'run_index'].map(labels).fillna('').values
+        runs['stage'] = runs['stage'].fillna('').astype('string')
+        return runs
+    
+    def find_log_file(self, eps_dir):
+        """Screen output has GPU device timings; the log file has run commands"""
+        for name in ('equil_run.out', 'equilibration.log'):
+            if (eps_dir / name).exists():
+                return eps_dir / name
+        return None
+    
+    @instrumented()
     def analyze_production_performance(self):
         """Analyze performance across all epsilon values"""
         print("\n" + "="*80)
         print("ANALYZING PRODUCTION RUN PERFORMANCE")
         print("="*80)
         
-        performance_data = []
-        
+        log_files = {}
         for eps in self.epsilon_values:
-            eps_dir = self.base_dir / self.epsilon_dirs[eps]
-            log_file = eps_dir / 'equil_run.out'
-            
-            print(f"\n[ε={eps:.2f}] Parsing {log_file.name}...", end='', flush=True)
-            
-            if not log_file.exists():
-                print("✗ No log file found")
+            log_file = self.find_log_file(self.base_dir / self.epsilon_dirs[eps])
+            if log_file is None:
+                print(f"  [ε={eps:.2f}] ✗ No log file found")
                 continue
-            
-            # Parse the entire equilibration+production log
-            metrics = self.parse_log_file(log_file)
-            
-            if metrics['timesteps_per_sec'] is None:
-                print("✗ Could not parse performance metrics")
+            log_files[eps] = log_file
+        
+        if not log_files:
+            print("  ✗ No valid performance data found")
+            return
+        
+        # One typed row per run segment for every epsilon, parsed in parallel
+        print(f"\n  Tokenizing {len(log_files)} log files...")
+        runs = self.label_stages(build_performance_table(log_files))
+        self.run_table = runs
+        
+        performance_data = []
+        for eps, eps_runs in runs.groupby('epsilon', sort=True):
+            timed = eps_runs[eps_runs['loop_time'].notna() & (eps_runs['steps'].fillna(0) > 0)]
+            if timed.empty:
+                print(f"  [ε={eps:.2f}] ✗ Could not parse performance metrics")
                 continue
             
-            performance_data.append({
+            last = timed.iloc[-1]
+            tps = last['timesteps_per_sec']
+            if pd.isna(tps):
+                tps = float(last['steps']) / float(last['loop_time'])
+            cpu_use = timed['cpu_use_pct'].fillna(100.0) / 100.0
+            
+            row = {
                 'epsilon': eps,
-                'timesteps_per_sec': metrics['timesteps_per_sec'],
-                'total_wall_time': metrics['total_wall_time'],
-                'cpu_seconds': metrics['cpu_seconds'],
-                'gpu_seconds': metrics['gpu_seconds']
-            })
+                'timesteps_per_sec': float(tps),
+                'ns_per_day': last['ns_per_day'],
+                'total_wall_time': float(timed['loop_time'].sum()),
+                'cpu_seconds': float((timed['loop_time'] * cpu_use).sum()),
+                'gpu_seconds': float(timed['device_seconds'].sum()) if timed['device_seconds'].notna().any() else None,
+                'n_runs': len(eps_runs),
+                'memory_max_mb': last['memory_max_mb'],
+                'neighbor_list_builds': last['neighbor_list_builds'],
+                'dangerous_builds': int(timed['dangerous_builds'].fillna(0).sum()),
+            }
+            for section in TIMING_SECTIONS:
+                row[f'{section.lower()}_pct'] = last[f'{section.lower()}_pct']
+            performance_data.append(row)
             
-            print(f"✓ {metrics['timesteps_per_sec']:.1f} ts/sec")
-            for note in metrics['performance_notes']:
-                print(f"   └─ {note}")
+            print(f"  [ε={eps:.2f}] ✓ {tps:.1f} ts/sec ({len(eps_runs)} runs, "
+                  f"Kspace {last['kspace_pct']:.1f}%)")
         
         if not performance_data:
             print("  ✗ No valid performance data found")
@@ -205,11 +222,17 @@ class LogFilePerformanceAnalyzer:
         # Create plots
         self._plot_performance_comparison(df_perf)
         self._plot_time_breakdown(df_perf)
+        self._plot_timing_breakdown(df_perf)
         
         # Save data
         csv_file = self.data_dir / 'production_performance.csv'
         df_perf.to_csv(csv_file, index=False)
-        print(f"\n  ✓ Saved: production_performance.csv")
+        print()
+        self._saved(csv_file)
+        
+        runs_file = self.data_dir / 'lammps_run_segments.csv'
+        runs.to_csv(runs_file, index=False)
+        self._saved(runs_file)
     
     def _plot_performance_comparison(self, df_perf):
         """Plot timesteps/sec across epsilon values"""
@@ -262,7 +285,7 @@ class LogFilePerformanceAnalyzer:
         plot_file = self.plots_dir / '37_performance_comparison.png'
         plt.savefig(plot_file, dpi=150, bbox_inches='tight')
         plt.close()
-        print(f"  ✓ Saved: 37_performance_comparison.png")
+        self._saved(plot_file, plot=True)
     
     def _plot_time_breakdown(self, df_perf):
         """Plot CPU vs GPU time breakdown"""
@@ -302,81 +325,107 @@ class LogFilePerformanceAnalyzer:
         plot_file = self.plots_dir / '38_cpu_vs_gpu_time.png'
         plt.savefig(plot_file, dpi=150, bbox_inches='tight')
         plt.close()
-        print(f"  ✓ Saved: 38_cpu_vs_gpu_time.png")
+        self._saved(plot_file, plot=True)
     
-    def analyze_equilibration_performance(self):
-        """Analyze performance of each equilibration stage"""
-        print("\n" + "="*80)
-        print("ANALYZING EQUILIBRATION PERFORMANCE")
-        print("="*80)
+    def _plot_timing_breakdown(self, df_perf):
+        """Stacked MPI task timing breakdown (% of loop time) of the production run"""
+        fig, ax = plt.subplots(figsize=(12, 6))
         
-        stages = {
-            'NVT': 'nvt_thermalization.log',
-            'Pre-Eq': 'pre_equilibration.log',
-            'Pressure': 'pressure_ramp.log',
-            'NPT': 'npt_equilibration.log'
-        }
+        epsilons = df_perf['epsilon'].values
+        x = np.arange(len(epsilons))
+        bottom = np.zeros(len(epsilons))
+        colors = plt.cm.tab10(np.linspace(0, 1, len(TIMING_SECTIONS)))
         
-        stage_perf = defaultdict(list)
+        for section, color in zip(TIMING_SECTIONS, colors):
+            values = df_perf[f'{section.lower()}_pct'].fillna(0).values.astype(float)
+            ax.bar(x, values, bottom=bottom, label=section, color=color,
+                   alpha=0.8, edgecolor='black', linewidth=0.5)
+            bottom += values
         
-        eps = 0.0
-        eps_dir = self.base_dir / self.epsilon_dirs[eps]
+        ax.set_xticks(x)
+        ax.set_xticklabels([f'{e:.2f}' for e in epsilons], rotation=45)
+        ax.set_xlabel('Epsilon (kcal/mol)', fontsize=12, fontweight='bold')
+        ax.set_ylabel('% of Loop Time', fontsize=12, fontweight='bold')
+        ax.set_title('MPI Task Timing Breakdown (Production Run)', fontsize=12, fontweight='bold')
+        ax.legend(fontsize=9, ncol=4, loc='upper center', bbox_to_anchor=(0.5, -0.18))
+        ax.set_ylim(0, 105)
+        ax.grid(axis='y', alpha=0.3)
         
-        for stage_name, log_filename in stages.items():
-            log_file = eps_dir / log_filename
-            
-            print(f"  {stage_name}: ", end='', flush=True)
-            
-            if not log_file.exists():
-                print("✗ Not found")
-                continue
-            
-            metrics = self.parse_log_file(log_file)
-            
-            if metrics['timesteps_per_sec'] is None:
-                print("✗ Parse error")
-                continue
-            
-            stage_perf[stage_name] = metrics
-            print(f"✓ {metrics['timesteps_per_sec']:.1f} ts/sec")
+        plt.tight_layout()
+        plot_file = self.plots_dir / '38b_mpi_timing_breakdown.png'
+        plt.savefig(plot_file, dpi=150, bbox_inches='tight')
+        plt.close()
+        self._saved(plot_file, plot=True)
+    
+    @instrumented()
+    def analyze_equilibration_performance(self):
+        """
+        Performance of each equilibration stage for every epsilon, from the
+        stage-labelled run segments of analyze_production_performance()
+        (a stage split over several runs, e.g. NPT, is summed)
+        """
+        print("\n" + "="*80)
+        print("ANALYZING EQUILIBRATION PERFORMANCE")
+        print("="*80)
         
-        if not stage_perf:
+        runs = self.run_table
+        if runs is None or runs.empty:
+            print("  ✗ No run segments (no LAMMPS logs parsed)")
             return
+        timed = runs[runs['loop_time'].notna() & (runs['steps'].fillna(0) > 0)]
         
-        # Create comparison plot
-        self._plot_stage_performance(stage_perf)
-        
-        # Save stage performance data
         stage_data = []
-        for stage_name, metrics in stage_perf.items():
-            stage_data.append({
-                'stage': stage_name,
-                'timesteps_per_sec': metrics['timesteps_per_sec'],
-                'total_wall_time': metrics['total_wall_time']
-            })
+        for label, stage in EQUILIBRATION_STAGES.items():
+            stage_runs = timed[timed['stage'] == stage]
+            print(f"  {label}: ", end='', flush=True)
+            if stage_runs.empty:
+                print("✗ No run segment")
+                continue
+            for eps, group in stage_runs.groupby('epsilon', sort=True):
+                steps = float(group['steps'].sum())
+                wall = float(group['loop_time'].sum())
+                stage_data.append({
+                    'epsilon': eps,
+                    'stage': label,
+                    'n_runs': len(group),
+                    'steps': int(steps),
+                    'timesteps_per_sec': steps / wall,
+                    'total_wall_time': wall,
+                })
+            tps = [row['timesteps_per_sec'] for row in stage_data if row['stage'] == label]
+            print(f"✓ {np.mean(tps):.1f} ts/sec (mean of {len(tps)} epsilons)")
+        
+        if not stage_data:
+            return
         
         df_stages = pd.DataFrame(stage_data)
         self.results_equilibration = df_stages
+        
+        # Create comparison plot
+        self._plot_stage_performance(df_stages)
+        
         csv_file = self.data_dir / 'equilibration_performance_by_stage.csv'
         df_stages.to_csv(csv_file, index=False)
-        print(f"  ✓ Saved: equilibration_performance_by_stage.csv")
+        self._saved(csv_file)
     
-    def _plot_stage_performance(self, stage_perf):
-        """Plot equilibration stage performance comparison"""
+    def _plot_stage_performance(self, df_stages):
+        """Plot equilibration stage performance comparison (mean ± std over epsilons)"""
         fig, ax = plt.subplots(figsize=(10, 6))
         
-        stage_names = list(stage_perf.keys())
-        tps_values = [stage_perf[s]['timesteps_per_sec'] for s in stage_names]
+        grouped = df_stages.groupby('stage', sort=False)['timesteps_per_sec']
+        stage_names = list(grouped.groups)
+        tps_values = grouped.mean().values
+        tps_errors = grouped.std().fillna(0.0).values
         
         colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728'][:len(stage_names)]
         
-        bars = ax.bar(range(len(stage_names)), tps_values, color=colors, 
+        bars = ax.bar(range(len(stage_names)), tps_values, yerr=tps_errors, capsize=4, color=colors,
                      alpha=0.7, edgecolor='black', linewidth=2)
         
         ax.set_xticks(range(len(stage_names)))
         ax.set_xticklabels(stage_names, fontsize=11)
         ax.set_ylabel('Timesteps/Second', fontsize=12, fontweight='bold')
-        ax.set_title('Equilibration Stage Performance (ε=0.0 kcal/mol)', 
+        ax.set_title(f'Equilibration Stage Performance ({df_stages["epsilon"].nunique()} epsilons, mean ± std)', 
                     fontsize=12, fontweight='bold')
         ax.grid(axis='y', alpha=0.3)
         
@@ -390,9 +439,10 @@ class LogFilePerformanceAnalyzer:
         plot_file = self.plots_dir / '39_stage_performance.png'
         plt.savefig(plot_file, dpi=150, bbox_inches='tight')
         plt.close()
-        print(f"  ✓ Saved: 39_stage_performance.png")
+        self._saved(plot_file, plot=True)
 
 
+    @instrumented()
     def export_comprehensive_csv(self):
         """Export detailed CSV data for module 13"""
         import pandas as pd
@@ -408,13 +458,26 @@ class LogFilePerformanceAnalyzer:
             csv_file = self.plots_dir / "module13_equilibration_performance.csv"
             self.results_equilibration.to_csv(csv_file, index=False, float_format='%.6f')
             print(f"  ✓ Exported CSV: {csv_file.name}")
+        
+        # Export every parsed run segment (all epsilons, all runs)
+        if self.run_table is not None:
+            csv_file = self.plots_dir / "module13_run_segments.csv"
+            self.run_table.to_csv(csv_file, index=False, float_format='%.6f')
+            print(f"  ✓ Exported CSV: {csv_file.name}")
+        
+        # Per-epsilon production and per-stage equilibration performance into the results warehouse
+        if self.results_production is not None:
+            store_results('module13', {'production_performance': self.results_production})
+        if self.results_equilibration is not None:
+            store_results('module13', {'equilibration_performance': self.results_equilibration},
+                          stage_column='stage')
 
 def main():
     print("="*80)
     print("MODULE 13: LOG FILE PERFORMANCE ANALYSIS")
     print("="*80)
     
-    base_dir = Path('/store/shuvam/learning_solvent_effects')
+    base_dir = base_dir_default()
     analyzer = LogFilePerformanceAnalyzer(base_dir)
     
     try:
@@ -427,13 +490,20 @@ def main():
         print("\n" + "="*80)
         print("✓ MODULE 13 COMPLETE!")
         print("="*80)
-        print(f"\n📊 Generated plots: 37-39 (3 plots)")
-        print(f"📊 Generated data: production_performance.csv, equilibration_performance_by_stage.csv")
+        plots = [name.split('_')[0] for name in analyzer.saved_plots]
+        print(f"\n📊 Generated plots: {', '.join(plots) or 'none'} ({len(plots)} plots)")
+        print(f"📊 Generated data: {', '.join(analyzer.saved_data) or 'none'}")
         
     except Exception as e:
         print(f"\n✗ ERROR: {e}")
         import traceback
         traceback.print_exc()
 
+
+def run(context):
+    """Entry point for the in-process module host (module_host.py)"""
+    main()
+
+
 if __name__ == '__main__':
     main()
@@ -33,9 +33,21 @@ import matplotlib.cm as cm
 from matplotlib.colors import Normalize
 import MDAnalysis as mda
 import math
-from concurrent.futures import ProcessPoolExecutor
 import warnings
 import json
+import argparse
+
+from gpu_scheduler import DeviceScheduler
+from live_follow import DumpFrameFollower, follow_loop
+from instrumentation import stage, instrumented
+from proximity import C60Proximity
+from frame_buffers import FrameBuffers
+from spatial_density import SpatialDensity
+from adaptive_stride import plan_stride, target_neff
+from checkpoint import Checkpoint, trajectory_key
+from trajectory_archive import open_universe, archive_for
+from epsilon_registry import get_registry, base_dir_default
+from results_warehouse import store_results
 
 # Try importing Numba for CUDA
 try:
@@ -52,58 +64,23 @@ warnings.filterwarnings('ignore')
 plt.rcParams['figure.dpi'] = 300
 plt.rcParams['font.size'] = 11
 
+# Accumulator grids
+STRIDE = 10  # follow mode / ANALYSIS_TARGET_NEFF=0; full passes pick it from a pilot, at most STRIDE
+N_BINS_RDF = 200
+R_MAX = 20.0
+GRID_RES = 0.5     # spatial density function resolution (Å)
+GRID_RANGE = 20.0  # half-width of the density grid around each C60 (Å)
+SDF_WORKERS = 2    # threads binning density frame chunks
+SHELL_CUTOFF = 5.0
+N_C60_ATOMS = 180  # 3 x C60, first atoms of the data file
+HISTOGRAMS = ('rdf_hist', 'coord_hist', 'orient_hist', 'orient_map', 'q_hist', 'q_vs_dist_map')
+
 
 # =============================================================================
 # CUDA KERNELS
 # =============================================================================
 
 if CUDA_AVAILABLE:
-    @cuda.jit
-    def density_map_kernel(coords, grid, c60_coms, grid_min, grid_max, grid_res, n_atoms, n_c60s):
-        """
-        Compute 3D density map relative to NEAREST C60
-        """
-        i = cuda.grid(1)
-        if i < n_atoms:
-            # Find nearest C60
-            min_dist_sq = 1.0e10
-            nearest_c60_idx = -1
-            
-            ox = coords[i, 0]
-            oy = coords[i, 1]
-            oz = coords[i, 2]
-            
-            for c in range(n_c60s):
-                dx = ox - c60_coms[c, 0]
-                dy = oy - c60_coms[c, 1]
-                dz = oz - c60_coms[c, 2]
-                d2 = dx*dx + dy*dy + dz*dz
-                if d2 < min_dist_sq:
-                    min_dist_sq = d2
-                    nearest_c60_idx = c
-            
-            # Relative position to nearest C60
-            cx = c60_coms[nearest_c60_idx, 0]
-            cy = c60_coms[nearest_c60_idx, 1]
-            cz = c60_coms[nearest_c60_idx, 2]
-            
-            x = ox - cx
-            y = oy - cy
-            z = oz - cz
-            
-            # Check bounds
-            if (x >= grid_min and x < grid_max and 
-                y >= grid_min and y < grid_max and 
-                z >= grid_min and z < grid_max):
-                
-                # Map to grid index
-                idx_x = int((x - grid_min) / grid_res)
-                idx_y = int((y - grid_min) / grid_res)
-                idx_z = int((z - grid_min) / grid_res)
-                
-                # Atomic add to grid
-                cuda.atomic.add(grid, (idx_x, idx_y, idx_z), 1.0)
-
     @cuda.jit
     def rdf_orientation_kernel(water_o, water_h1, water_h2, c60_coms, 
                              rdf_hist, orient_hist, orient_map, coord_hist,
@@ -307,200 +284,280 @@ def get_epsilon_colormap(epsilon_values):
     norm = Normalize(vmin=min(epsilon_values), vmax=max(epsilon_values))
     cmap = cm.viridis
     return {eps: cmap(norm(eps)) for eps in epsilon_values}
+class TrajectoryAccumulator:
+    """
+    Per-epsilon histograms/maps accumulated frame by frame
+    
+    add_frame() can be called at any time (full trajectory pass or follow
+    mode); result() normalizes copies, so accumulation may continue after it.
+    """
+    
+    def __init__(self, n_waters, use_cuda=CUDA_AVAILABLE, stride=1, density_options=None):
+        self.n_waters = n_waters
+        self.use_cuda = use_cuda
+        self.stride = stride
+        self.frames = 0
+        
+        # 1. RDF & Orientation
+        self.rdf_hist = np.zeros(N_BINS_RDF, dtype=np.float32)
+        self.coord_hist = np.zeros(N_BINS_RDF, dtype=np.float32)
+        self.orient_hist = np.zeros(200, dtype=np.float32)
+        self.orient_map = np.zeros((50, 50), dtype=np.float32) # Dist x CosTheta
+        
+        # 2. Tetrahedral Order
+        self.q_hist = np.zeros(50, dtype=np.float32)
+        self.q_vs_dist_map = np.zeros((50, 50), dtype=np.float32) # Dist x Q
+        
+        # 3. Density Map: sparse spatial density function around the nearest C60
+        options = dict(resolution=GRID_RES, extent=GRID_RANGE, workers=SDF_WORKERS)
+        options.update(density_options or {})
+        self.density = SpatialDensity(**options)
+        
+        # 4. Residence Time: current run length per (water, C60) and finished runs
+        self.shell_runs = np.zeros((n_waters, 3), dtype=np.int32)
+        self.residence_runs = [[] for _ in range(3)]
+        self._left = np.zeros((n_waters, 3), dtype=bool)
+        
+        # --- CUDA Setup ---
+        if use_cuda:
+            self._to_device()
+    
+    def _to_device(self):
+        """Allocate the per-frame input buffers and copy the histograms to the GPU"""
+        n_waters = self.n_waters
+        # Per-frame inputs: allocated once, refilled with copy_to_device()
+        self.d_o_pos = cuda.device_array((n_waters, 3), dtype=np.float32)
+        self.d_h1_pos = cuda.device_array((n_waters, 3), dtype=np.float32)
+        self.d_h2_pos = cuda.device_array((n_waters, 3), dtype=np.float32)
+        self.d_c60_coms = cuda.device_array((3, 3), dtype=np.float32)
+        self.d_rdf_hist = cuda.to_device(self.rdf_hist)
+        self.d_coord_hist = cuda.to_device(self.coord_hist)
+        self.d_orient_hist = cuda.to_device(self.orient_hist)
+        self.d_orient_map = cuda.to_device(self.orient_map)
+        self.d_q_hist = cuda.to_device(self.q_hist)
+        self.d_q_vs_dist_map = cuda.to_device(self.q_vs_dist_map)
+    
+    def state(self):
+        """
+        Plain-data copy for checkpoints (GPU histograms copied back, device
+        buffers dropped), independent of the name this module is imported as
+        """
+        state = {k: v for k, v in self.__dict__.items() if not k.startswith('d_')}
+        if self.use_cuda:
+            for name in HISTOGRAMS:
+                state[name] = getattr(self, f'd_{name}').copy_to_host()
+        return state
+    
+    @classmethod
+    def from_state(cls, state):
+        """Accumulator continuing from a state() snapshot"""
+        acc = cls.__new__(cls)
+        acc.__dict__.update(state)
+        if acc.use_cuda:
+            acc._to_device()
+        return acc
+    
+    def add_frame(self, frame):
+        """
+        Accumulate one frame from a loaded frame_buffers.FrameBuffers: C60
+        centres, water O/H/H views, the 180 carbons and the box lengths
+        (hydration shell residence). No coordinate array is allocated.
+        """
+        self.frames += 1
+        o_pos = frame.oxygens
+        n_waters = self.n_waters
+        c60_coms = frame.c60_centers()
+        
+        if self.use_cuda:
+            d_o_pos, d_h1_pos, d_h2_pos, d_c60_coms = self.d_o_pos, self.d_h1_pos, self.d_h2_pos, self.d_c60_coms
+            d_o_pos.copy_to_device(o_pos)
+            d_h1_pos.copy_to_device(frame.h1)
+            d_h2_pos.copy_to_device(frame.h2)
+            d_c60_coms.copy_to_device(c60_coms)
+            
+            threadsperblock = 256
+            blockspergrid = (n_waters + (threadsperblock - 1)) // threadsperblock
+            
+            # 1. RDF & Orientation & Coordination
+            rdf_orientation_kernel[blockspergrid, threadsperblock](
+                d_o_pos, d_h1_pos, d_h2_pos, d_c60_coms,
+                self.d_rdf_hist, self.d_orient_hist, self.d_orient_map, self.d_coord_hist,
+                0.0, R_MAX, N_BINS_RDF, n_waters, 3
+            )
+            
+            # 2. Tetrahedral Order
+            tetrahedral_order_kernel[blockspergrid, threadsperblock](
+                d_o_pos, self.d_q_hist, self.d_q_vs_dist_map, d_c60_coms, n_waters, 3
+            )
+        
+        # 3. Density Map (CPU, sparse grid; chunks binned on worker threads)
+        self.density.add_frame(o_pos, c60_coms, frame.box, frame.cages)
+        
+        # 4. Residence Time (CPU): within SHELL_CUTOFF of any carbon of each cage
+        in_shell = C60Proximity(frame.carbons, frame.box).shell_membership(o_pos, SHELL_CUTOFF)
+        left = np.greater(self.shell_runs, 0, out=self._left)
+        left &= ~in_shell
+        for c in range(3):
+            self.residence_runs[c].extend(self.shell_runs[left[:, c], c].tolist())
+        self.shell_runs += 1
+        self.shell_runs *= in_shell
+    
+    def result(self, eps):
+        """Normalized results dict (same layout as process_epsilon returns)"""
+        frames = max(self.frames, 1)
+        if self.use_cuda:
+            rdf_hist = self.d_rdf_hist.copy_to_host()
+            coord_hist = self.d_coord_hist.copy_to_host()
+            orient_hist = self.d_orient_hist.copy_to_host()
+            orient_map = self.d_orient_map.copy_to_host()
+            q_hist = self.d_q_hist.copy_to_host()
+            q_vs_dist_map = self.d_q_vs_dist_map.copy_to_host()
+        else:
+            rdf_hist = self.rdf_hist.copy()
+            coord_hist = self.coord_hist.copy()
+            orient_hist = self.orient_hist.copy()
+            orient_map = self.orient_map.copy()
+            q_hist = self.q_hist.copy()
+            q_vs_dist_map = self.q_vs_dist_map.copy()
+        
+        # Normalize Maps
+        orient_map /= frames
+        q_vs_dist_map /= frames
+        
+        # Residence Time (runs still open at the last frame count as they are)
+        residence_per_c60 = []
+        for c in range(3):
+            runs = self.residence_runs[c] + self.shell_runs[self.shell_runs[:, c] > 0, c].tolist()
+            residence_per_c60.append(runs)
+        residence_times = sum(residence_per_c60, [])
+        frames_to_ns = self.stride * 2.0 / 1000.0
+        mean_residence = np.mean(residence_times) * frames_to_ns if residence_times else 0 # ns
+        
+        # Entropy of the occupied density cells (read from the sparse blocks)
+        entropy = self.density.entropy()
+        
+        return {
+            'epsilon': eps,
+            'rdf_hist': rdf_hist.tolist(),
+            'coord_hist': coord_hist.tolist(),
+            'orient_hist': orient_hist.tolist(),
+            'orient_map': orient_map.tolist(),
+            'q_hist': q_hist.tolist(),
+            'q_vs_dist_map': q_vs_dist_map.tolist(),
+            'density_slice': self.density.plane(axis=2).tolist(),
+            'density_resolution': self.density.resolution,
+            'density_align': self.density.align,
+            'mean_residence_ns': float(mean_residence),
+            'mean_residence_ns_per_c60': [float(np.mean(runs) * frames_to_ns) if runs else 0.0
+                                          for runs in residence_per_c60],
+            'entropy': float(entropy),
+            'frames': self.frames
+        }
+
+
 class CUDATrajectoryAnalyzer:
     def __init__(self, base_dir):
         self.base_dir = Path(base_dir)
-        # Full list of 23 epsilon values
-        self.epsilon_values = [
-            0.0, 0.05, 0.10, 0.15, 0.20, 0.25, 0.30, 0.35, 0.40, 0.45, 0.50,
-            0.55, 0.60, 0.65, 0.70, 0.75, 0.80, 0.85, 0.90, 0.95, 1.0, 1.05, 1.10
-        ]
-        
-        self.epsilon_dirs = {}
-        for eps in self.epsilon_values:
-            if eps == 0.0:
-                self.epsilon_dirs[eps] = 'solvent_effects/epsilon_0.0'
-            elif eps == 1.0:
-                self.epsilon_dirs[eps] = 'solvent_effects/epsilon_1.0'
-            else:
-                self.epsilon_dirs[eps] = f'solvent_effects/epsilon_{eps:.2f}'
+        # Epsilon runs and their directories from the shared registry
+        self.registry = get_registry(self.base_dir)
+        self.epsilon_values = self.registry.epsilons()
+        self.epsilon_dirs = self.registry.directories(self.epsilon_values)
                 
         self.plots_dir = self.base_dir / 'analysis' / 'plots'
         self.data_dir = self.base_dir / 'analysis' / 'data'
         self.plots_dir.mkdir(parents=True, exist_ok=True)
         self.data_dir.mkdir(parents=True, exist_ok=True)
         self.results = None
+        # SpatialDensity settings (resolution, extent, align, workers)
+        self.density_options = {}
+
+    def trajectory_path(self, eps):
+        """Production trajectory for one epsilon value"""
+        return self.registry.path(eps, 'production.lammpstrj')
+
+    @staticmethod
+    def shell_populations(u, frame, indices):
+        """(len(indices), 3) waters within SHELL_CUTOFF of each C60 at the given frames"""
+        counts = []
+        for ts in u.trajectory[indices]:
+            frame.load(ts.positions, ts.dimensions)
+            counts.append(C60Proximity(frame.carbons, frame.box).count_within(frame.oxygens, SHELL_CUTOFF))
+        return counts
 
-    def process_epsilon(self, eps):
+    def process_epsilon(self, eps, device=None):
         """
         Process a single epsilon trajectory using CUDA
+        
+        device is the gpu_scheduler.ComputeDevice this worker is bound to;
+        virtual and CPU devices skip the CUDA kernels.
         """
-        eps_dir = self.base_dir / self.epsilon_dirs[eps]
-        traj_file = eps_dir / 'production.lammpstrj'
+        traj_file = self.trajectory_path(eps)
         
-        if not traj_file.exists():
+        if not traj_file.exists() and archive_for(traj_file) is None:
             return None
         
-        print(f"  [ε={eps}] Starting Advanced CUDA analysis...")
+        use_cuda = CUDA_AVAILABLE if device is None else (CUDA_AVAILABLE and device.is_cuda)
+        backend = device.name if device is not None else ('cuda' if use_cuda else 'cpu')
+        print(f"  [ε={eps}] Starting Advanced CUDA analysis on {backend}...")
         
         try:
-            u = mda.Universe(str(traj_file), format='LAMMPSDUMP')
-            
-            # Selections
-            # 3 C60 molecules (60 atoms each) = 180 atoms
-            c60_atoms = u.atoms[0:180]
-            waters = u.atoms[180:]
-            n_waters = len(waters) // 3
-            
-            # Indices for O, H1, H2
-            o_indices = np.arange(0, len(waters), 3)
-            h1_indices = np.arange(1, len(waters), 3)
-            h2_indices = np.arange(2, len(waters), 3)
-            
-            # --- Initialize Accumulators ---
-            
-            # 1. RDF & Orientation
-            n_bins_rdf = 200
-            r_max = 20.0
-            rdf_hist = np.zeros(n_bins_rdf, dtype=np.float32)
-            coord_hist = np.zeros(n_bins_rdf, dtype=np.float32)
-            orient_hist = np.zeros(200, dtype=np.float32)
-            orient_map = np.zeros((50, 50), dtype=np.float32) # Dist x CosTheta
-            
-            # 2. Tetrahedral Order
-            q_hist = np.zeros(50, dtype=np.float32)
-            q_vs_dist_map = np.zeros((50, 50), dtype=np.float32) # Dist x Q
-            
-            # 3. Density Map
-            grid_res = 1.0
-            grid_range = 20.0
-            grid_dim = int(2 * grid_range / grid_res)
-            density_grid = np.zeros((grid_dim, grid_dim, grid_dim), dtype=np.float32)
-            
-            # 4. Residence Time
-            shell_cutoff = 5.0
-            residence_tracker = {} # water_id -> [frames]
-            
-            # --- CUDA Setup ---
-            if CUDA_AVAILABLE:
-                d_rdf_hist = cuda.to_device(rdf_hist)
-                d_coord_hist = cuda.to_device(coord_hist)
-                d_orient_hist = cuda.to_device(orient_hist)
-                d_orient_map = cuda.to_device(orient_map)
-                d_q_hist = cuda.to_device(q_hist)
-                d_q_vs_dist_map = cuda.to_device(q_vs_dist_map)
-                d_density_grid = cuda.to_device(density_grid)
-            
-            # --- Trajectory Loop ---
-            stride = 10
-            frames = 0
-            
-            for ts in u.trajectory[::stride]:
-                frames += 1
+            with stage('process_epsilon', epsilon=eps):
+                with stage('load_trajectory'):
+                    u = open_universe(traj_file)
                 
-                # Get Coordinates
-                c60_pos = c60_atoms.positions
-                c60_coms = np.array([
-                    c60_atoms[0:60].center_of_mass(),
-                    c60_atoms[60:120].center_of_mass(),
-                    c60_atoms[120:180].center_of_mass()
-                ], dtype=np.float32)
+                # Selections
+                # 3 C60 molecules (60 atoms each) = 180 atoms
+                c60_atoms = u.atoms[0:180]
+                waters = u.atoms[180:]
+                n_waters = len(waters) // 3
                 
-                water_pos = waters.positions.astype(np.float32)
-                o_pos = water_pos[o_indices]
-                h1_pos = water_pos[h1_indices]
-                h2_pos = water_pos[h2_indices]
+                frame = FrameBuffers.interleaved(len(c60_atoms), n_waters)
                 
-                if CUDA_AVAILABLE:
-                    d_o_pos = cuda.to_device(o_pos)
-                    d_h1_pos = cuda.to_device(h1_pos)
-                    d_h2_pos = cuda.to_device(h2_pos)
-                    d_c60_coms = cuda.to_device(c60_coms)
-                    
-                    threadsperblock = 256
-                    blockspergrid = (n_waters + (threadsperblock - 1)) // threadsperblock
-                    
-                    # 1. RDF & Orientation & Coordination
-                    rdf_orientation_kernel[blockspergrid, threadsperblock](
-                        d_o_pos, d_h1_pos, d_h2_pos, d_c60_coms,
-                        d_rdf_hist, d_orient_hist, d_orient_map, d_coord_hist,
-                        0.0, r_max, n_bins_rdf, n_waters, 3
-                    )
-                    
-                    # 2. Tetrahedral Order
-                    tetrahedral_order_kernel[blockspergrid, threadsperblock](
-                        d_o_pos, d_q_hist, d_q_vs_dist_map, d_c60_coms, n_waters, 3
-                    )
-                    
-                    # 3. Density Map
-                    density_map_kernel[blockspergrid, threadsperblock](
-                        d_o_pos, d_density_grid, d_c60_coms, 
-                        -grid_range, grid_range, grid_res, n_waters, 3
-                    )
+                # Resume an interrupted pass over the same trajectory and settings
+                ckpt = Checkpoint(f'module16_eps_{eps:.2f}',
+                                  trajectory_key(u.trajectory.filename, use_cuda=use_cuda, target_neff=target_neff(),
+                                                 max_stride=STRIDE, density_options=self.density_options))
+                state = ckpt.load()
+                if state is None:
+                    # Stride from the correlation time of the hydration-shell populations,
+                    # at most STRIDE: the residence times are counted in strided frames
+                    with stage('pilot_stride'):
+                        plan = plan_stride(lambda idx: self.shell_populations(u, frame, idx),
+                                           len(u.trajectory), ['shell_c60_1', 'shell_c60_2', 'shell_c60_3'],
+                                           default_stride=STRIDE, max_stride=STRIDE)
+                    acc = TrajectoryAccumulator(n_waters, use_cuda=use_cuda, stride=plan.stride,
+                                                density_options=self.density_options)
+                    done = 0
+                else:
+                    plan, acc, done = state['plan'], TrajectoryAccumulator.from_state(state['acc']), state['done']
+                    print(f"  [ε={eps}] {done}/{plan.reads} frames already accumulated")
+                print(f"  [ε={eps}] Frame stride: {plan.describe()}")
                 
-                # 4. Residence Time (CPU)
-                # Calculate distances to nearest C60 COM
-                # Simple CPU implementation for tracking IDs
-                for c in range(3):
-                    dists = np.linalg.norm(o_pos - c60_coms[c], axis=1)
-                    in_shell = np.where(dists < shell_cutoff)[0]
-                    for wid in in_shell:
-                        if wid not in residence_tracker:
-                            residence_tracker[wid] = []
-                        residence_tracker[wid].append(frames)
-            
-            # --- Post-Processing ---
-            if CUDA_AVAILABLE:
-                rdf_hist = d_rdf_hist.copy_to_host()
-                coord_hist = d_coord_hist.copy_to_host()
-                orient_hist = d_orient_hist.copy_to_host()
-                orient_map = d_orient_map.copy_to_host()
-                q_hist = d_q_hist.copy_to_host()
-                q_vs_dist_map = d_q_vs_dist_map.copy_to_host()
-                density_grid = d_density_grid.copy_to_host()
-            
-            # Normalize Maps
-            orient_map /= frames
-            q_vs_dist_map /= frames
-            density_grid /= frames
-            
-            # Residence Time
-            residence_times = []
-            for wid, frame_list in residence_tracker.items():
-                if not frame_list: continue
-                frame_list.sort()
-                current_run = 1
-                for i in range(1, len(frame_list)):
-                    if frame_list[i] == frame_list[i-1] + 1:
-                        current_run += 1
-                    else:
-                        residence_times.append(current_run)
-                        current_run = 1
-                residence_times.append(current_run)
-            mean_residence = np.mean(residence_times) * stride * 2.0 / 1000.0 if residence_times else 0 # ns
-            
-            # Entropy
-            total_density = np.sum(density_grid)
-            if total_density > 0:
-                prob_grid = density_grid / total_density
-                nonzero = prob_grid[prob_grid > 0]
-                entropy = -np.sum(nonzero * np.log(nonzero))
-            else:
-                entropy = 0
-            
-            return {
-                'epsilon': eps,
-                'rdf_hist': rdf_hist.tolist(),
-                'coord_hist': coord_hist.tolist(),
-                'orient_hist': orient_hist.tolist(),
-                'orient_map': orient_map.tolist(),
-                'q_hist': q_hist.tolist(),
-                'q_vs_dist_map': q_vs_dist_map.tolist(),
-                'density_map': density_grid.tolist(),
-                'mean_residence_ns': float(mean_residence),
-                'entropy': float(entropy),
-                'frames': frames
-            }
+                # --- Trajectory Loop ---
+                # ts.positions is the reader's own array, copied once into the buffers
+                frames = iter(u.trajectory[done * plan.stride::plan.stride])
+                while True:
+                    with stage('read_frame'):
+                        ts = next(frames, None)
+                    if ts is None:
+                        break
+                    with stage('load_buffers'):
+                        frame.load(ts.positions, ts.dimensions)
+                    with stage('accumulate'):
+                        acc.add_frame(frame)
+                    done += 1
+                    if ckpt.due():
+                        with stage('checkpoint'):
+                            ckpt.save({'plan': plan, 'acc': acc.state(), 'done': done})
+                
+                with stage('result'):
+                    res = acc.result(eps)
+                    res['sampling'] = plan.to_dict()
+                with stage('export_density'):
+                    res['density_files'] = self.export_density(eps, acc.density)
+                    acc.density.close()
+                ckpt.clear()
+                return res
             
         except Exception as e:
             print(f"  [ε={eps}] Error: {e}")
@@ -514,24 +571,79 @@ class CUDATrajectoryAnalyzer:
         print("STARTING COMPREHENSIVE PARALLEL CUDA ANALYSIS")
         print("="*80)
         
-        results = {}
-        max_workers = 2 if CUDA_AVAILABLE else os.cpu_count()
+        scheduler = DeviceScheduler()
+        print(f"  Scheduler: {scheduler.describe()}")
         
-        with ProcessPoolExecutor(max_workers=max_workers) as executor:
-            futures = {executor.submit(self.process_epsilon, eps): eps for eps in self.epsilon_values}
-            
-            for future in futures:
-                eps = futures[future]
-                try:
-                    res = future.result()
-                    if res:
-                        results[eps] = res
-                        print(f"  ✓ [ε={eps}] Analysis complete")
-                except Exception as e:
-                    print(f"  ✗ [ε={eps}] Failed: {e}")
+        # Real trajectories or their archives only (LFS pointer stubs are skipped)
+        jobs = self.registry.trajectory_epsilons()
+        results = {}
+        for eps, device, res, error in scheduler.run(self.process_epsilon, jobs,
+                                                     cost=lambda e: self.registry.run(e).trajectory_size()):
+            if error is not None:
+                print(f"  ✗ [ε={eps}] Failed on {device.name}: {error}")
+            elif res:
+                results[eps] = res
+                print(f"  ✓ [ε={eps}] Analysis complete on {device.name}")
         
         self.save_and_plot(results)
 
+    def follow_trajectories(self, epsilons, interval=60.0, max_idle=None):
+        """
+        Accumulate still-running trajectories incrementally
+        
+        Every STRIDE-th new complete frame is added to the epsilon's
+        accumulator; results are saved and re-plotted after each update.
+        """
+        print(f"\nFollowing trajectories for ε={epsilons} (poll every {interval:g} s)...")
+        use_cuda = CUDA_AVAILABLE
+        followers = {eps: DumpFrameFollower(self.trajectory_path(eps)) for eps in epsilons
+                     if self.trajectory_path(eps).exists()}
+        accumulators = {}
+        buffers = {}
+        
+        def poll():
+            n_new = 0
+            for eps, follower in followers.items():
+                for frame in follower.poll():
+                    n_frame = follower.frames_read - 1
+                    n_new += 1
+                    if n_frame % STRIDE:
+                        continue
+                    if eps not in accumulators:
+                        n_waters = (len(frame.positions) - N_C60_ATOMS) // 3
+                        buffers[eps] = FrameBuffers.interleaved(N_C60_ATOMS, n_waters)
+                        accumulators[eps] = TrajectoryAccumulator(n_waters, use_cuda=use_cuda, stride=STRIDE,
+                                                                  density_options=self.density_options)
+                    accumulators[eps].add_frame(buffers[eps].load(frame.positions, frame.dimensions))
+            
+            if n_new and accumulators:
+                print(f"  +{n_new} frames: " + ", ".join(f"ε={eps}: {acc.frames}"
+                                                          for eps, acc in sorted(accumulators.items())))
+                results = {}
+                for eps, acc in accumulators.items():
+                    results[eps] = acc.result(eps)
+                    results[eps]['density_files'] = self.export_density(eps, acc.density)
+                self.save_and_plot(results)
+                plt.close('all')
+            return n_new
+        
+        if not followers:
+            print("  ✗ No trajectories to follow")
+            return
+        follow_loop(poll, interval=interval, max_idle=max_idle,
+                    run_dirs=[self.trajectory_path(eps).parent for eps in followers])
+
+    def export_density(self, eps, density):
+        """Write the spatial density function of one epsilon as OpenDX and Gaussian cube files"""
+        stem = f'spatial_density_eps_{eps:.2f}'
+        files = [str(density.write_dx(self.data_dir / f'{stem}.dx')),
+                 str(density.write_cube(self.data_dir / f'{stem}.cube', comment=f'(epsilon = {eps})'))]
+        mb = density.grid.nbytes / 1024 ** 2
+        print(f"  ✓ [ε={eps}] Spatial density: {density.n_cells}^3 cells at {density.resolution:g} Å, "
+              f"{len(density.grid.blocks)} blocks ({mb:.1f} MB) -> {stem}.dx/.cube")
+        return files
+
+    @instrumented()
     def save_and_plot(self, results):
         """Save results and generate comparison plots"""
         self.results = results
@@ -623,19 +735,17 @@ class CUDATrajectoryAnalyzer:
         plt.tight_layout()
         plt.savefig(self.plots_dir / '56_tetrahedral_vs_dist_all.png')
 
-        # 5b. Density Maps (Central Slice)
+        # 5b. Density Maps (Central Slice, Z=0 through the cage centre)
         fig, axes = plt.subplots(rows, cols, figsize=(15, 5*rows))
         axes = axes.flatten()
         
         for i, eps in enumerate(sorted(results.keys())):
-            data = np.array(results[eps]['density_map'])
-            # Plot central slice (Z=0)
-            mid_idx = data.shape[2] // 2
-            slice_data = data[:, :, mid_idx]
+            slice_data = np.array(results[eps]['density_slice'])
+            frame_name = 'body frame' if results[eps].get('density_align') else 'lab frame'
             
             sns.heatmap(slice_data, ax=axes[i], cmap='viridis', cbar=True)
-            axes[i].set_title(f'Density Map Slice (ε={eps})')
-            axes[i].set_xlabel('X Bin')
+            axes[i].set_title(f'Density Map Slice (ε={eps}, {frame_name})')
+            axes[i].set_xlabel(f"X Bin ({results[eps]['density_resolution']:g} Å)")
             axes[i].set_ylabel('Y Bin')
             
         plt.tight_layout()
@@ -678,15 +788,43 @@ class CUDATrajectoryAnalyzer:
             csv_file = self.plots_dir / "module16_comprehensive_metrics.csv"
             df_sum.to_csv(csv_file, index=False, float_format='%.6f')
             print(f"  ✓ Exported CSV: {csv_file.name}")
+            store_results('module16', {'comprehensive_metrics': df_sum})
 
-def main():
-    base_dir = '/store/shuvam/learning_solvent_effects'
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Advanced CUDA trajectory analysis')
+    parser.add_argument('--follow', type=float, nargs='+', default=None, metavar='EPS',
+                        help='Accumulate still-running trajectories of these epsilons incrementally')
+    parser.add_argument('--interval', type=float, default=60.0, help='Follow-mode poll interval (s)')
+    parser.add_argument('--max-idle', type=float, default=None,
+                        help='Leave follow mode after this many seconds without new frames')
+    parser.add_argument('--sdf-resolution', type=float, default=GRID_RES,
+                        help='Spatial density grid resolution (Å)')
+    parser.add_argument('--sdf-range', type=float, default=GRID_RANGE,
+                        help='Spatial density grid half-width around each C60 (Å)')
+    parser.add_argument('--sdf-align', action='store_true',
+                        help='Accumulate the spatial density in the body frame of each C60')
+    parser.add_argument('--sdf-workers', type=int, default=SDF_WORKERS,
+                        help='Threads binning spatial density frame chunks')
+    args = parser.parse_args(argv)
+    
+    base_dir = base_dir_default()
     analyzer = CUDATrajectoryAnalyzer(base_dir)
-    analyzer.run_parallel_analysis()
+    analyzer.density_options = dict(resolution=args.sdf_resolution, extent=args.sdf_range,
+                                    align=args.sdf_align, workers=args.sdf_workers)
+    if args.follow:
+        analyzer.follow_trajectories(args.follow, args.interval, args.max_idle)
+    else:
+        analyzer.run_parallel_analysis()
     
     # Export data
     analyzer.export_comprehensive_csv()
 
+
+def run(context):
+    """Entry point for the in-process module host (module_host.py)"""
+    main([])
+
+
 if __name__ == '__main__':
     import multiprocessing
     try:
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Adaptive Frame Stride from Statistical Inefficiency
+===================================================
+
+Picks the frame stride of a trajectory pass from the correlation time of
+the observables it measures, instead of a hardcoded [::10]:
+
+- Pilot pass on a few frames: segments of PILOT_WINDOW frames centred in
+  the run with spacings 1, 4, 16, ... (PILOT_RATIO)
+- Exponential ACF model: the lag-1 autocorrelation rho_s of every segment
+  (thermo_cube.ThermoCube.autocorrelation()) gives the per-frame
+  r = rho_s^(1/s); each observable uses the finest spacing at which rho_s
+  has dropped below 1/2 (or the one before it when rho_s is within the
+  2/sqrt(n) noise), so the decay is resolved without the cut-off that the
+  integrated ACF of a short window suffers for long correlation times
+- Integrated correlation time tau = (1 + r) / (2 (1 - r)) frames and the
+  effective sample size of the strided series:
+    n_eff(s) = (N / s) (1 - r^s) / (1 + r^s)
+- The chosen stride is the largest one at which every observable still has
+  n_eff >= target_neff; an observable too slow for the target only asks
+  for REACHABLE_FRACTION of the n_eff that reading every frame would give
+- Target from the target_neff argument, else ANALYSIS_TARGET_NEFF, else
+  DEFAULT_TARGET_NEFF; 0 disables the pilot and keeps the module's default
+  stride
+- max_stride caps the stride of passes whose frames also feed time
+  correlations (H-bond C(t)/S(t), shell residence times): their time
+  resolution is the stride, whatever n_eff of the static averages allows
+- StridePlan reports stride, per-observable tau and n_eff, and the frame
+  reads of pilot + main pass
+
+Usage:
+    plan = plan_stride(lambda idx: distances_at(idx), len(u.trajectory),
+                       ['d12', 'd13', 'd23'], default_stride=10)
+    print(plan.describe())
+    for ts in u.trajectory[plan.slice()]:
+        ...
+
+Author: Scientific Analysis Suite
+Date: October 2026
+"""
+
+import os
+
+import numpy as np
+
+from thermo_cube import ThermoCube
+
+TARGET_NEFF_ENV = 'ANALYSIS_TARGET_NEFF'
+DEFAULT_TARGET_NEFF = 200
+PILOT_WINDOW = 64
+PILOT_RATIO = 4
+RHO_MAX = 0.98             # lag-1 correlation clipped here when no spacing resolves the decay
+REACHABLE_FRACTION = 0.9
+
+
+def target_neff(value=None):
+    """Target effective sample size: value, else ANALYSIS_TARGET_NEFF, else the default (0 = off)"""
+    if value is None:
+        value = float(os.environ.get(TARGET_NEFF_ENV, DEFAULT_TARGET_NEFF))
+    return max(0, int(value))
+
+
+def pilot_levels(n_frames, window=PILOT_WINDOW, ratio=PILOT_RATIO):
+    """[(spacing, frame indices)]: centred segments of window frames, spacing 1, ratio, ratio^2, ..."""
+    levels = []
+    spacing = 1
+    while True:
+        span = (window - 1) * spacing + 1
+        if span > n_frames:
+            if not levels:
+                levels.append((1, np.arange(n_frames)))
+            break
+        start = (n_frames - span) // 2
+        levels.append((spacing, start + np.arange(window) * spacing))
+        spacing *= ratio
+    return levels
+
+
+def lag1_correlation(values):
+    """(n_obs,) lag-1 autocorrelation of values (n_samples, n_obs); 0 for constant series"""
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+    n = len(values)
+    if n < 3:
+        return np.zeros(values.shape[1])
+    cube = ThermoCube([0.0], range(values.shape[1]), values[None], np.arange(n)[None],
+                      np.ones((1, n), dtype=bool))
+    return np.nan_to_num(cube.autocorrelation(max_lag=2)[0, 1], nan=0.0)
+
+
+def integrated_time(r):
+    """Integrated autocorrelation time (frames) of an exponential ACF with per-frame r"""
+    r = np.clip(r, 0.0, 1.0 - 1e-12)
+    return 0.5 * (1 + r) / (1 - r)
+
+
+def effective_samples(n_frames, tau, strides):
+    """(..., n_strides) n_eff of every observable (tau in frames) at every stride"""
+    tau = np.maximum(np.asarray(tau, dtype=np.float64), 0.5)[..., None]
+    # r per frame back from tau = (1 + r) / (2 (1 - r))
+    strides = np.asarray(strides)
+    r_s = ((2 * tau - 1) / (2 * tau + 1)) ** strides
+    return (n_frames // strides) * (1 - r_s) / (1 + r_s)
+
+
+def choose_stride(n_frames, tau, target, min_stride=1, max_stride=None):
+    """
+    Largest stride in [min_stride, max_stride] with n_eff >= target for every
+    observable (capped at REACHABLE_FRACTION of its n_eff at min_stride)
+    """
+    max_stride = max(min_stride, max_stride or n_frames // 2)
+    strides = np.arange(min_stride, max_stride + 1)
+    n_eff = np.atleast_2d(effective_samples(n_frames, tau, strides))
+    needed = np.minimum(target, REACHABLE_FRACTION * n_eff[:, :1])
+    ok = np.all(n_eff >= needed, axis=0)
+    return int(strides[ok].max()) if ok.any() else int(min_stride)
+
+
+class StridePlan:
+    """Stride chosen for one trajectory pass and the statistics behind it"""
+
+    def __init__(self, stride, n_frames, observables, tau=None, target=0, pilot_reads=0,
+                 max_stride=None):
+        self.stride = int(stride)
+        self.max_stride = max_stride
+        self.n_frames = int(n_frames)
+        self.observables = list(observables)
+        self.tau = np.full(len(self.observables), np.nan) if tau is None else np.asarray(tau)
+        self.target = target
+        self.pilot_reads = pilot_reads
+        self.n_eff = effective_samples(self.n_frames, self.tau, [self.stride])[..., 0]
+
+    @property
+    def adaptive(self):
+        return self.target > 0
+
+    @property
+    def reads(self):
+        """Frames read by the main pass"""
+        return len(range(0, self.n_frames, self.stride))
+
+    def slice(self):
+        return slice(None, None, self.stride)
+
+    def frames(self):
+        return range(0, self.n_frames, self.stride)
+
+    def describe(self):
+        if not self.adaptive:
+            return f"stride {self.stride} (fixed), {self.reads}/{self.n_frames} frames"
+        per_obs = ", ".join(f"{name}: tau={tau:.1f} n_eff={n:.0f}"
+                            for name, tau, n in zip(self.observables, self.tau, self.n_eff))
+        capped = " (capped for time correlations)" if self.stride == self.max_stride else ""
+        return (f"stride {self.stride}{capped} for n_eff >= {self.target} ({per_obs}); "
+                f"{self.pilot_reads} pilot + {self.reads} frames of {self.n_frames}")
+
+    def to_dict(self):
+        return {'stride': self.stride, 'n_frames': self.n_frames, 'frames_read': self.reads,
+                'pilot_reads': self.pilot_reads, 'target_neff': self.target, 'max_stride': self.max_stride,
+                'tau_frames': {k: float(t) for k, t in zip(self.observables, self.tau)},
+                'n_eff': {k: float(n) for k, n in zip(self.observables, self.n_eff)}}
+
+
+def pilot_times(values, spacings):
+    """
+    (n_obs,) correlation time in frames from the pilot segments: per-frame r
+    from the finest spacing whose lag-1 correlation has decayed below 1/2
+    """
+    rho = np.clip(np.stack([lag1_correlation(v) for v in values]), 0.0, RHO_MAX)
+    noise = 2.0 / np.sqrt([len(v) for v in values])[:, None]
+    below = rho < 0.5
+    # First decayed level; the coarsest when none has decayed
+    level = np.where(below.any(axis=0), np.argmax(below, axis=0), len(rho) - 1)
+    cols = np.arange(rho.shape[1])
+    # Decayed into the noise: the previous (still correlated) level is better resolved
+    level = np.where(below[level, cols] & (rho[level, cols] < noise[level, 0]) & (level > 0),
+                     level - 1, level)
+    r = rho[level, cols] ** (1.0 / np.asarray(spacings, dtype=np.float64)[level])
+    return integrated_time(np.where((level == 0) & (rho[0] < noise[0]), 0.0, r))
+
+
+def plan_stride(sample, n_frames, observables, default_stride=1, target=None,
+                min_stride=1, max_stride=None, window=PILOT_WINDOW):
+    """
+    StridePlan for a pass over n_frames; sample(indices) returns the
+    observables at those (sorted, unique) frames as a (len(indices), n_obs) array
+    """
+    target = target_neff(target)
+    if not target or n_frames < 2:
+        return StridePlan(default_stride, n_frames, observables)
+    levels = pilot_levels(n_frames, window)
+    # One pilot read of every frame used by any level, in trajectory order
+    frames = np.unique(np.concatenate([idx for _, idx in levels]))
+    pilot = np.asarray(sample(frames), dtype=np.float64).reshape(len(frames), -1)
+    tau = pilot_times([pilot[np.searchsorted(frames, idx)] for _, idx in levels],
+                      [spacing for spacing, _ in levels])
+    stride = choose_stride(n_frames, tau, target, min_stride, max_stride)
+    return StridePlan(stride, n_frames, observables, tau, target, len(frames), max_stride)
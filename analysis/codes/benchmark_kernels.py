@@ -0,0 +1,565 @@
+#!/usr/bin/env python3
+"""
+Kernel Benchmark Suite
+======================
+
+Times the hot paths of the analysis modules on synthetic data
+(synthetic_system.py), so performance can be tracked without the LFS
+originals:
+
+- thermo_load           - module 01 ThermodynamicAnalyzer.load_production_data
+- thermo_statistics_frames - per-epsilon loop over the module 01 DataFrames:
+                          mean, std, drift, block error, correlation time
+                          (the loaded runs replicated to 23 ragged epsilons)
+- thermo_statistics_cube - the same statistics from one ThermoCube
+                          (thermo_cube.py), including building the cube
+- block_bootstrap       - 10k moving-block bootstrap resamples of all means
+                          of the 23-epsilon ThermoCube (block_bootstrap.py)
+- diffusion_fit         - batched GLS diffusion fit with window detection of
+                          the msd_water.dat curves (diffusion_fit.py)
+- rdf_load              - module 03 RDFAnalyzer.load_rdf_data
+- tetrahedral_order     - module 04 CUDA kernel (skipped without CUDA: module
+                          04 has no CPU path for it)
+- hbonds                - module 04 H-bond count: the CUDA kernel, else the
+                          CPU pair search module 04 runs (HBondDynamics.add_frame)
+- steinhardt            - steinhardt.py Q4/Q6 and averaged Q4/Q6 (module 04)
+- hbond_dynamics        - hbond_dynamics.py pair lists of all frames + C(t)/S(t)
+- msd                   - module 04 MSD from buffered oxygen positions
+- msd_out_of_core       - the same positions spilled to a memmap and reduced
+                          under a 1 MB memory budget (out_of_core.py)
+- com_extraction        - C60 centres of mass per frame (MDAnalysis, as in
+                          module 16; live_follow dump parser without it)
+- module16_accumulation - module 16 TrajectoryAccumulator over all frames
+- spatial_density       - sparse 0.25 Å spatial density function of the
+                          oxygens around the nearest C60, body-frame aligned,
+                          binned in threaded frame chunks (spatial_density.py)
+- frame_loop_copies     - per-frame coordinate handling as it was done before
+                          frame_buffers.py (astype + fancy-indexed O/H1/H2,
+                          C60 means, MSD list + np.array)
+- frame_loop_buffers    - the same with FrameBuffers / PositionStack
+
+Benchmarks whose module cannot be imported are reported as skipped with the
+reason. Besides the wall times, the peak memory allocated during one call
+is traced (tracemalloc, after the warm-up); for the frame loops it shows
+whether reading a frame allocates. Every run appends one JSON line
+(timings, allocation peaks, scale, commit, host, library versions) to
+analysis/data/benchmark_history.jsonl and prints the change against the
+previous run at the same scale.
+
+Usage:
+    python benchmark_kernels.py                       # all benchmarks, default scale
+    python benchmark_kernels.py rdf_load msd --repeats 10
+    python benchmark_kernels.py --waters 8000 --frames 100 --data-dir /tmp/synthetic_8k
+    python benchmark_kernels.py --list
+
+Author: Scientific Analysis Suite
+Date: October 2026
+"""
+
+import io
+import os
+import atexit
+import sys
+import json
+import time
+import socket
+import platform
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import numpy as np
+
+import synthetic_system
+import steinhardt
+from hbond_dynamics import HBondDynamics
+from frame_buffers import FrameBuffers, PositionStack
+from out_of_core import ScratchStore, MSDReduction, reduce_lagged
+from thermo_cube import ThermoCube
+from block_bootstrap import BlockBootstrap
+from diffusion_fit import fit_diffusion
+from spatial_density import SpatialDensity
+from live_follow import DumpFrameFollower
+from module_host import load_module
+
+CODES_DIR = Path(__file__).resolve().parent
+HISTORY_FILE = CODES_DIR.parent / 'data' / 'benchmark_history.jsonl'
+
+DEFAULT_SCALE = {'n_waters': 1800, 'n_frames': 20, 'thermo_rows': 10000,
+                 'rdf_blocks': 200, 'msd_rows': 1000, 'n_ppm': 2, 'ppm_size': 64, 'seed': 0}
+BENCH_EPSILONS = [0.0, 0.30, 1.0]
+
+BENCHMARKS = {}
+
+
+class BenchmarkSkipped(Exception):
+    """Raised by a benchmark setup when its code path is unavailable here"""
+
+
+def benchmark(name):
+    """Register setup(workload) -> (callable, backend, items) under name"""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def import_module_or_skip(stem):
+    """Load a numbered analysis module; import problems become a skip"""
+    try:
+        with redirect_stdout(io.StringIO()):
+            return load_module(CODES_DIR / f'{stem}.py')
+    except Exception as e:
+        raise BenchmarkSkipped(f"{stem}: {type(e).__name__}: {e}")
+
+
+def quiet(func):
+    """Call func with stdout discarded (modules print progress per epsilon)"""
+    def call():
+        with redirect_stdout(io.StringIO()):
+            return func()
+    return call
+
+
+def cuda_usable(module):
+    return bool(getattr(module, 'CUDA_AVAILABLE', False)) and module.cuda.is_available()
+
+
+class Workload:
+    """Synthetic dataset plus lazily parsed frames of its first epsilon"""
+
+    def __init__(self, base_dir, epsilons):
+        self.base_dir = Path(base_dir)
+        self.epsilons = epsilons
+        self.eps_dirs = [self.base_dir / synthetic_system.epsilon_dir_name(eps) for eps in epsilons]
+        self.traj_file = self.eps_dirs[0] / 'production.lammpstrj'
+        self._frames = None
+
+    @property
+    def frames(self):
+        if self._frames is None:
+            self._frames = list(DumpFrameFollower(self.traj_file).poll())
+        return self._frames
+
+    @property
+    def box(self):
+        return self.frames[0].dimensions
+
+    def oxygens(self, frame=0):
+        return self.frames[frame].select_type(2)
+
+    def hydrogens(self, frame=0):
+        return self.frames[frame].select_type(3)
+
+
+def prepare_workload(data_dir, scale, epsilons=BENCH_EPSILONS):
+    """Reuse data_dir if it holds a dataset of this scale, otherwise generate it"""
+    manifest = synthetic_system.load_manifest(data_dir)
+    expected = {'epsilons': list(epsilons), **scale}
+    if manifest != expected:
+        print(f"Generating synthetic dataset in {data_dir} ...")
+        start = time.time()
+        with redirect_stdout(io.StringIO()):
+            synthetic_system.generate_dataset(data_dir, epsilons, **scale)
+        print(f"  ✓ Generated in {time.time() - start:.1f}s")
+    return Workload(data_dir, list(epsilons))
+
+
+# -----------------------------------------------------------------------------
+# Benchmarks
+# -----------------------------------------------------------------------------
+
+@benchmark('thermo_load')
+def bench_thermo_load(w):
+    mod = import_module_or_skip('01_thermodynamic_analysis')
+    analyzer = mod.ThermodynamicAnalyzer(w.eps_dirs, w.epsilons)
+    return quiet(analyzer.load_production_data), 'pandas', len(w.epsilons)
+
+
+def thermo_frames_23(w):
+    """Module 01 production DataFrames replicated to 23 epsilons of uneven length"""
+    mod = import_module_or_skip('01_thermodynamic_analysis')
+    analyzer = mod.ThermodynamicAnalyzer(w.eps_dirs, w.epsilons)
+    quiet(analyzer.load_production_data)()
+    if not analyzer.data:
+        raise BenchmarkSkipped("no production thermo data")
+    loaded = [analyzer.data[eps] for eps in w.epsilons if eps in analyzer.data]
+    frames = {}
+    for k in range(23):
+        df = loaded[k % len(loaded)]
+        frames[round(0.05 * k, 2)] = df.iloc[:len(df) - 37 * k].reset_index(drop=True)
+    return frames, mod.STAT_PROPERTIES
+
+
+def series_statistics(x, t, n_blocks=10):
+    """Mean, std, drift, block error and correlation time of one series (per-epsilon path)"""
+    n = len(x)
+    dev = x - x.mean()
+    drift = np.polyfit(t, x, 1)[0]
+    block_len = n // n_blocks
+    block_means = [x[b * block_len:(b + 1) * block_len].mean() for b in range(n_blocks)]
+    block_err = np.std(block_means, ddof=1) / np.sqrt(n_blocks)
+    spectrum = np.fft.rfft(dev, n=2 * n)
+    acf = np.fft.irfft(spectrum * spectrum.conj())[:n] / np.arange(n, 0, -1)
+    rho = acf[1:] / acf[0]
+    cut = np.argmax(rho <= 0) if np.any(rho <= 0) else len(rho)
+    return x.mean(), x.std(ddof=1), drift, block_err, 0.5 + rho[:cut].sum()
+
+
+@benchmark('thermo_statistics_frames')
+def bench_thermo_statistics_frames(w):
+    frames, properties = thermo_frames_23(w)
+
+    def per_epsilon():
+        rows = []
+        for eps, df in frames.items():
+            t = df['Time_ns'].values
+            rows.append([series_statistics(df[prop].values, t) for prop in properties])
+        return rows
+    return per_epsilon, 'pandas', len(frames)
+
+
+@benchmark('thermo_statistics_cube')
+def bench_thermo_statistics_cube(w):
+    frames, properties = thermo_frames_23(w)
+    epsilons = list(frames)
+    return (lambda: ThermoCube.from_frames(frames, epsilons, properties).statistics()), 'numpy', len(frames)
+
+
+@benchmark('block_bootstrap')
+def bench_block_bootstrap(w):
+    frames, properties = thermo_frames_23(w)
+    cube = ThermoCube.from_frames(frames, list(frames), properties)
+    cube.correlation_time()
+    return (lambda: cube.mean_interval(BlockBootstrap(n_resamples=10000))), 'numpy', cube.mean().size
+
+
+@benchmark('diffusion_fit')
+def bench_diffusion_fit(w):
+    curves = {}
+    for eps, eps_dir in zip(w.epsilons, w.eps_dirs):
+        data = np.loadtxt(eps_dir / 'msd_water.dat', comments='#')
+        curves[eps] = (data[:, 0] - data[0, 0], data[:, 4])
+    return (lambda: fit_diffusion(curves, covariance='single', max_lag_fraction=1.0)), 'numpy', len(curves)
+
+
+@benchmark('rdf_load')
+def bench_rdf_load(w):
+    mod = import_module_or_skip('03_rdf_structural_analysis')
+    analyzer = mod.RDFAnalyzer(w.eps_dirs, w.epsilons)
+    return quiet(analyzer.load_rdf_data), 'python', 3 * len(w.epsilons)
+
+
+def _module04_cuda_analyzer():
+    """Module 04 analyzer bound to CUDA device 0, or None without CUDA"""
+    try:
+        mod = import_module_or_skip('04_comprehensive_water_structure_CUDA')
+    except BenchmarkSkipped:
+        return None
+    if not cuda_usable(mod):
+        return None
+    analyzer = mod.ComprehensiveWaterAnalyzer.__new__(mod.ComprehensiveWaterAnalyzer)
+    analyzer.use_cuda, analyzer.gpu_device = True, 0
+    return analyzer
+
+
+@benchmark('tetrahedral_order')
+def bench_tetrahedral_order(w):
+    o_pos, box = w.oxygens(), w.box
+    analyzer = _module04_cuda_analyzer()
+    if analyzer is None:
+        raise BenchmarkSkipped("module 04 computes tetrahedral order only with CUDA")
+    return (lambda: analyzer.calculate_tetrahedral_order_numba(o_pos, box)), 'module04-cuda', len(o_pos)
+
+
+@benchmark('hbonds')
+def bench_hbonds(w):
+    o_pos, h_pos, box = w.oxygens(), w.hydrogens(), w.box
+    analyzer = _module04_cuda_analyzer()
+    if analyzer is not None:
+        return (lambda: analyzer.calculate_hbonds_numba(o_pos, h_pos, box)), 'module04-cuda', len(o_pos)
+    # Without CUDA, module 04 counts H-bonds through the lifetime pair lists
+    return (lambda: HBondDynamics(len(o_pos)).add_frame(o_pos, h_pos, box)), 'hbond_dynamics', len(o_pos)
+
+
+@benchmark('steinhardt')
+def bench_steinhardt(w):
+    o_pos, box = w.oxygens(), w.box
+    return (lambda: steinhardt.steinhardt_order(o_pos, box)), 'numpy', len(o_pos)
+
+
+@benchmark('hbond_dynamics')
+def bench_hbond_dynamics(w):
+    frames = [(f.select_type(2), f.select_type(3), f.select_type(1), f.dimensions) for f in w.frames]
+
+    def pair_lists_and_correlations():
+        engine = HBondDynamics(len(frames[0][0]))
+        for o_pos, h_pos, c_pos, box in frames:
+            engine.add_frame(o_pos, h_pos, box, c_pos)
+        return engine.correlations(dt_ps=0.2)
+    return pair_lists_and_correlations, 'numpy', len(frames)
+
+
+@benchmark('msd')
+def bench_msd(w):
+    mod = import_module_or_skip('04_comprehensive_water_structure_CUDA')
+    positions = np.array([f.select_type(2) for f in w.frames])
+    msd = mod.ComprehensiveWaterAnalyzer._msd_from_positions
+    return (lambda: msd(positions, w.box, max_lag=50)), 'numpy', positions.shape[0] * positions.shape[1]
+
+
+@benchmark('msd_out_of_core')
+def bench_msd_out_of_core(w):
+    positions = np.array([f.select_type(2) for f in w.frames])
+    store = ScratchStore(budget_mb=1)
+    atexit.register(store.close)
+    spilled = store.array('msd_positions', positions.shape, positions.dtype)
+    spilled[:] = positions
+    reduction = lambda: MSDReduction(range(1, min(50, len(positions))), w.box)
+    backend = 'memmap' if store.spilled else 'numpy'
+    return (lambda: reduce_lagged(spilled, reduction(), budget_mb=1)), backend, positions.shape[0] * positions.shape[1]
+
+
+@benchmark('com_extraction')
+def bench_com_extraction(w):
+    n_c60 = synthetic_system.N_C60 * synthetic_system.C60_ATOMS
+    try:
+        import MDAnalysis as mda
+    except ImportError:
+        # Follow-mode path: parse the dump and average the cage atoms
+        def parse_and_average():
+            return [f.positions[:n_c60].reshape(3, 60, 3).mean(axis=1)
+                    for f in DumpFrameFollower(w.traj_file).poll()]
+        return parse_and_average, 'live_follow', len(w.frames)
+
+    def mdanalysis_coms():
+        u = mda.Universe(str(w.traj_file), format='LAMMPSDUMP')
+        c60 = u.atoms[0:n_c60]
+        return [np.array([c60[0:60].center_of_mass(), c60[60:120].center_of_mass(),
+                          c60[120:180].center_of_mass()]) for ts in u.trajectory]
+    return mdanalysis_coms, 'MDAnalysis', len(w.frames)
+
+
+@benchmark('module16_accumulation')
+def bench_module16_accumulation(w):
+    mod = import_module_or_skip('16_advanced_cuda_trajectory_analysis')
+    n_c60 = mod.N_C60_ATOMS
+    n_waters = (len(w.frames[0].positions) - n_c60) // 3
+    frame = FrameBuffers.interleaved(n_c60, n_waters)
+    use_cuda = cuda_usable(mod)
+
+    def accumulate():
+        acc = mod.TrajectoryAccumulator(n_waters, use_cuda=use_cuda, stride=1)
+        for f in w.frames:
+            acc.add_frame(frame.load(f.positions, f.dimensions))
+        return acc.result(w.epsilons[0])
+    return accumulate, 'cuda' if use_cuda else 'cpu', len(w.frames)
+
+
+@benchmark('spatial_density')
+def bench_spatial_density(w):
+    n_c60 = synthetic_system.N_C60 * synthetic_system.C60_ATOMS
+    frame = FrameBuffers.interleaved(n_c60, (len(w.frames[0].positions) - n_c60) // 3)
+
+    def accumulate():
+        sdf = SpatialDensity(resolution=0.25, extent=20.0, align=True, workers=2)
+        for f in w.frames:
+            frame.load(f.positions, f.dimensions)
+            sdf.add_frame(frame.oxygens, frame.c60_centers(), frame.box, frame.cages)
+        sdf.close()
+        return sdf
+    return accumulate, 'numpy', len(w.frames)
+
+
+@benchmark('frame_loop_copies')
+def bench_frame_loop_copies(w):
+    n_c60 = synthetic_system.N_C60 * synthetic_system.C60_ATOMS
+    n_waters = (len(w.frames[0].positions) - n_c60) // 3
+    o_idx, h1_idx, h2_idx = (np.arange(k, 3 * n_waters, 3) for k in range(3))
+
+    def copies():
+        msd_positions = []
+        for f in w.frames:
+            water_pos = f.positions[n_c60:].astype(np.float32)
+            o_pos, h1_pos, h2_pos = water_pos[o_idx], water_pos[h1_idx], water_pos[h2_idx]
+            coms = f.positions[:n_c60].reshape(3, 60, 3).mean(axis=1).astype(np.float32)
+            msd_positions.append(o_pos.copy())
+        return np.array(msd_positions)
+    return copies, 'numpy', len(w.frames)
+
+
+@benchmark('frame_loop_buffers')
+def bench_frame_loop_buffers(w):
+    n_c60 = synthetic_system.N_C60 * synthetic_system.C60_ATOMS
+    frame = FrameBuffers.interleaved(n_c60, (len(w.frames[0].positions) - n_c60) // 3)
+    stack = PositionStack(len(w.frames), frame.n_waters)
+
+    def buffers():
+        stack.count = 0
+        for f in w.frames:
+            frame.load(f.positions, f.dimensions)
+            frame.c60_centers()
+            stack.append(frame.oxygens)
+        return stack.filled()
+    return buffers, 'numpy', len(w.frames)
+
+
+# -----------------------------------------------------------------------------
+# Runner and history
+# -----------------------------------------------------------------------------
+
+def time_call(func, repeats, warmup=1):
+    """Wall times of `repeats` calls after `warmup` untimed calls (JIT, caches)"""
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def allocation_peak(func):
+    """Peak bytes allocated (and not yet freed) during one call"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmarks(workload, names, repeats):
+    results = {}
+    for name in names:
+        try:
+            func, backend, items = BENCHMARKS[name](workload)
+            times = time_call(func, repeats)
+            alloc_peak = allocation_peak(func)
+        except BenchmarkSkipped as e:
+            results[name] = {'status': 'skipped', 'reason': str(e)}
+            print(f"  - {name:24s} skipped ({e})")
+            continue
+        except Exception as e:
+            results[name] = {'status': 'error', 'reason': f"{type(e).__name__}: {e}"}
+            print(f"  ✗ {name:24s} {type(e).__name__}: {e}")
+            continue
+        median = float(np.median(times))
+        results[name] = {
+            'status': 'ok', 'backend': backend, 'repeats': repeats, 'items': items,
+            'min_s': float(np.min(times)), 'median_s': median, 'mean_s': float(np.mean(times)),
+            'items_per_s': items / median if median > 0 else None,
+            'alloc_peak_bytes': int(alloc_peak),
+        }
+        print(f"  ✓ {name:24s} {median * 1000:10.2f} ms  {alloc_peak / 1024:10.1f} KiB peak"
+              f"  ({backend}, {items} items)")
+    return results
+
+
+def git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=CODES_DIR,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment():
+    versions = {'python': platform.python_version(), 'numpy': np.__version__}
+    for name in ('scipy', 'pandas', 'numba', 'MDAnalysis'):
+        try:
+            versions[name] = __import__(name).__version__
+        except Exception:
+            versions[name] = None
+    return versions
+
+
+def load_history(history_file):
+    if not Path(history_file).exists():
+        return []
+    with open(history_file) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_history(history_file, record):
+    history_file = Path(history_file)
+    history_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(history_file, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+
+def compare_with_previous(record, history):
+    """Print median change against the latest earlier run at the same scale and host"""
+    previous = [r for r in history if r['scale'] == record['scale'] and r['host'] == record['host']]
+    if not previous:
+        return
+    last = previous[-1]
+    print(f"\nChange vs {last['timestamp']} ({last.get('commit') or 'unknown commit'}):")
+    for name, res in record['results'].items():
+        old = last['results'].get(name, {})
+        if res.get('status') == 'ok' and old.get('status') == 'ok' and old.get('backend') == res['backend']:
+            ratio = res['median_s'] / old['median_s'] if old['median_s'] else float('nan')
+            flag = '⚠' if ratio > 1.1 else ' '
+            print(f"  {flag} {name:24s} {old['median_s'] * 1000:10.2f} -> {res['median_s'] * 1000:10.2f} ms"
+                  f"  (x{ratio:.2f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark analysis hot paths on synthetic data')
+    parser.add_argument('benchmarks', nargs='*', help='Benchmark names (default: all)')
+    parser.add_argument('--list', action='store_true', help='List benchmarks and exit')
+    parser.add_argument('--data-dir', default=None,
+                        help='Synthetic dataset directory (generated if missing or of another scale)')
+    parser.add_argument('--waters', type=int, default=DEFAULT_SCALE['n_waters'])
+    parser.add_argument('--frames', type=int, default=DEFAULT_SCALE['n_frames'])
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--history', default=str(HISTORY_FILE), help='JSON-lines history file')
+    parser.add_argument('--no-history', action='store_true', help='Do not append to the history')
+    args = parser.parse_args()
+
+    if args.list:
+        for name in BENCHMARKS:
+            print(f"  {name}")
+        return 0
+
+    names = args.benchmarks or list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        print(f"✗ Unknown benchmark(s): {', '.join(unknown)}")
+        return 1
+
+    scale = dict(DEFAULT_SCALE, n_waters=args.waters, n_frames=args.frames)
+    data_dir = Path(args.data_dir) if args.data_dir else \
+        Path(tempfile.gettempdir()) / f"synthetic_c60_{args.waters}w_{args.frames}f"
+
+    print("="*70)
+    print(f"KERNEL BENCHMARKS: 3 C60 + {args.waters} waters, {args.frames} frames, {args.repeats} repeats")
+    print("="*70)
+    workload = prepare_workload(data_dir, scale)
+    results = run_benchmarks(workload, names, args.repeats)
+
+    record = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': git_commit(),
+        'host': socket.gethostname(),
+        'cpu_count': os.cpu_count(),
+        'versions': environment(),
+        'scale': scale,
+        'repeats': args.repeats,
+        'results': results,
+    }
+    history = load_history(args.history)
+    compare_with_previous(record, history)
+    if not args.no_history:
+        append_history(args.history, record)
+        print(f"\nHistory: {args.history}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Block-Bootstrap Uncertainty Engine
+==================================
+
+Confidence intervals for derived quantities of time-correlated series
+(thermo observables, per-block coordination numbers, C60 distances, MSD fit
+residuals) by moving-block bootstrap:
+
+- Resamples are index matrices: each row draws ceil(n / L) random block
+  starts, block k covers samples start_k .. start_k + L - 1
+- Series of equal length and block length share one index matrix, so all
+  observables and epsilons of a group are resampled from one draw
+- means(): resampled means from block sums (one cumulative sum per
+  series), so a resample costs n / L additions instead of n
+- linear(): any statistic linear in the samples, sum_i w_i x[idx_i]
+  (e.g. a least-squares slope refitted to block-resampled residuals)
+- Resamples are processed in chunks sized from the out_of_core memory
+  budget (ANALYSIS_MEMORY_BUDGET_MB)
+- block_length(n, tau): n^(1/3) (2 tau)^(2/3) samples when the integrated
+  correlation time is known (thermo_cube.ThermoCube.correlation_time()),
+  else n^(1/3)
+- attach_interval() adds <column>_ci_low / <column>_ci_high next to an
+  exported column
+
+Usage:
+    boot = BlockBootstrap(n_resamples=10000)
+    low, high = boot.mean_interval(series, lengths, block_length(lengths, tau))
+    attach_interval(df, 'Temp_mean', low, high)
+
+Author: Scientific Analysis Suite
+Date: October 2026
+"""
+
+import numpy as np
+
+from out_of_core import memory_budget
+
+DEFAULT_RESAMPLES = 10000
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_SEED = 2026
+
+
+def block_length(n, tau=None):
+    """
+    Moving-block length per series: n^(1/3) (2 tau)^(2/3) for a correlation
+    time tau in samples (the optimal-length scaling of Politis & White;
+    blocks of only ~2 tau underestimate the error by ~25 % on AR(1) series),
+    n^(1/3) where tau is unknown; between 1 and n // 2
+    """
+    n = np.asarray(n, dtype=np.int64)
+    length = np.cbrt(n.astype(np.float64))
+    if tau is not None:
+        tau = np.broadcast_to(np.asarray(tau, dtype=np.float64), np.broadcast(n, tau).shape)
+        known = np.isfinite(tau) & (tau > 0)
+        length = np.where(known, length * np.cbrt(2.0 * np.where(known, tau, 0.0)) ** 2, length)
+    length = np.ceil(length)
+    return np.clip(length, 1, np.maximum(n // 2, 1)).astype(np.int64)
+
+
+def block_starts(rng, n, length, n_resamples):
+    """(n_resamples, ceil(n / length)) random block starts"""
+    return rng.integers(0, n - length + 1, size=(n_resamples, -(-n // length)))
+
+
+def resample_indices(rng, n, length, n_resamples):
+    """(n_resamples, n) index matrix of moving-block resamples"""
+    starts = block_starts(rng, n, length, n_resamples)
+    return (starts[:, :, None] + np.arange(length)).reshape(n_resamples, -1)[:, :n]
+
+
+class BlockBootstrap:
+    """Moving-block bootstrap of many series at once"""
+
+    def __init__(self, n_resamples=DEFAULT_RESAMPLES, confidence=DEFAULT_CONFIDENCE,
+                 seed=DEFAULT_SEED, budget_mb=None):
+        self.n_resamples = n_resamples
+        self.confidence = confidence
+        self.seed = seed
+        self.budget = memory_budget(budget_mb)
+
+    def _groups(self, shape, lengths, block_len):
+        """(n, L, flat series indices) for every distinct (length, block length)"""
+        n_time = shape[-1]
+        lengths = np.broadcast_to(n_time if lengths is None else np.asarray(lengths), shape[:-1]).ravel()
+        if block_len is None:
+            block_len = block_length(lengths)
+        block_len = np.broadcast_to(np.asarray(block_len), shape[:-1]).ravel()
+        keys = np.stack([lengths, block_len], axis=1).astype(np.int64)
+        for n, length in np.unique(keys, axis=0):
+            if n < 2:
+                continue
+            yield int(n), int(min(length, n)), np.nonzero((keys[:, 0] == n) & (keys[:, 1] == length))[0]
+
+    def _chunks(self, bytes_per_resample):
+        step = max(1, self.budget // 4 // max(bytes_per_resample, 1))
+        for start in range(0, self.n_resamples, step):
+            yield start, min(start + step, self.n_resamples)
+
+    def means(self, series, lengths=None, block_len=None):
+        """
+        (..., n_resamples) bootstrap means of series (..., n_time); series k
+        uses its first lengths[k] samples and blocks of block_len[k]
+        """
+        series = np.asarray(series, dtype=np.float64)
+        flat = series.reshape(-1, series.shape[-1])
+        out = np.full((len(flat), self.n_resamples), np.nan)
+        rng = np.random.default_rng(self.seed)
+        for n, length, members in self._groups(series.shape, lengths, block_len):
+            x = flat[members, :n]
+            center = x.mean(axis=1)
+            cumulative = np.zeros((len(members), n + 1))
+            np.cumsum(x - center[:, None], axis=1, out=cumulative[:, 1:])
+            block_sums = cumulative[:, length:] - cumulative[:, :-length]
+            n_blocks = -(-n // length)
+            for start, stop in self._chunks(2 * n_blocks * 8):
+                # One index matrix for the whole group, gathered series by series
+                starts = block_starts(rng, n, length, stop - start)
+                for row, k in enumerate(members):
+                    total = np.take(block_sums[row], starts).sum(axis=1)
+                    out[k, start:stop] = total / (n_blocks * length) + center[row]
+        return out.reshape(series.shape[:-1] + (self.n_resamples,))
+
+    def linear(self, series, weights, lengths=None, block_len=None):
+        """
+        (..., n_resamples) bootstrap values of sum_i weights[i] * x[idx_i],
+        with idx a block resample of each series' first lengths[k] samples
+        """
+        series = np.asarray(series, dtype=np.float64)
+        flat = series.reshape(-1, series.shape[-1])
+        w = np.broadcast_to(np.asarray(weights, dtype=np.float64), series.shape).reshape(flat.shape)
+        out = np.full((len(flat), self.n_resamples), np.nan)
+        rng = np.random.default_rng(self.seed)
+        for n, length, members in self._groups(series.shape, lengths, block_len):
+            x, wx = flat[members, :n], w[members, :n]
+            for start, stop in self._chunks(n * len(members) * 8):
+                idx = resample_indices(rng, n, length, stop - start)
+                out[members, start:stop] = np.einsum('srn,sn->sr', x[:, idx], wx)
+        return out.reshape(series.shape[:-1] + (self.n_resamples,))
+
+    def interval(self, samples):
+        """(low, high) percentile interval over the last (resample) axis"""
+        alpha = 0.5 * (1.0 - self.confidence)
+        low, high = np.percentile(samples, [100 * alpha, 100 * (1 - alpha)], axis=-1)
+        return low, high
+
+    def mean_interval(self, series, lengths=None, block_len=None):
+        return self.interval(self.means(series, lengths, block_len))
+
+
+def attach_interval(df, column, low, high):
+    """Insert <column>_ci_low and <column>_ci_high right after column"""
+    position = df.columns.get_loc(column) + 1
+    df.insert(position, f'{column}_ci_low', low)
+    df.insert(position + 1, f'{column}_ci_high', high)
+    return df
@@ -3,136 +3,142 @@
 Simulation Status Checker
 ==========================
 
-Quickly check the status of all 6 epsilon simulations.
+Quickly check the status of all epsilon simulations.
+
+Logs are tail-seeked (log_monitor.py): only the end of each file is read on
+the first check and only newly appended bytes afterwards, with offsets kept
+in analysis/.status_monitor_state.json between invocations.
+
+Usage:
+    python check_status.py                 # one-shot table
+    python check_status.py --watch 30      # refresh every 30 s until Ctrl-C
 
 Author: Scientific Analysis Suite
 Date: November 2025
 """
 
 import pandas as pd
-from pathlib import Path
 import sys
+import time
+import argparse
 
-BASE_DIR = Path("/store/shuvam/learning_solvent_effects")
-EPSILON_VALUES = [0.0, 0.05, 0.10, 0.15, 0.20, 0.25, 0.30, 0.35, 0.40, 0.45, 0.50]
-TIMESTEP = 2.0  # fs
-PRODUCTION_START = 600000
-TOTAL_PRODUCTION_STEPS = 2000000
+from log_monitor import StatusMonitor, format_eta, TOTAL_PRODUCTION_STEPS, TIMESTEP
+from epsilon_registry import get_registry, base_dir_default
 
-def check_simulation_status():
-    """Check completion status of all simulations"""
-    
-    print("="*80)
-    print(" "*25 + "SIMULATION STATUS CHECK")
-    print("="*80)
-    print()
-    
+BASE_DIR = base_dir_default()
+STATE_FILE = BASE_DIR / "analysis" / ".status_monitor_state.json"
+
+STATUS_LABELS = {
+    'COMPLETE': "✓ COMPLETE",
+    'PRODUCTION': "⚡ RUNNING (PRODUCTION)",
+    'EQUILIBRATION': "⚡ RUNNING (EQUILIBRATION)",
+    'FAILED': "✗ FAILED",
+    'NOT STARTED': "NOT STARTED",
+}
+
+
+def create_monitor(production_steps=TOTAL_PRODUCTION_STEPS):
+    eps_dirs = get_registry(BASE_DIR).directories()
+    state_file = STATE_FILE if STATE_FILE.parent.exists() else None
+    return StatusMonitor(eps_dirs, state_file=state_file, production_steps=production_steps)
+
+
+def print_status(statuses, elapsed):
+    """Print the status table and summary; returns True when all runs are complete"""
     status_data = []
-    
-    for eps in EPSILON_VALUES:
-        if eps == 0.0:
-            eps_dir = BASE_DIR / "epsilon_0.0"
-        else:
-            eps_dir = BASE_DIR / f"epsilon_{eps:.2f}"
-        log_file = eps_dir / "equilibration.log"
-        
-        if not log_file.exists():
-            status_data.append({
-                'Epsilon': f"{eps:.2f}",
-                'Status': 'NOT STARTED',
-                'Current_Step': 0,
-                'Progress': '0%',
-                'Prod_Time_ns': 0.0,
-                'Remaining_ns': 4.0
-            })
-            continue
-        
-        # Read last line of log file to get current step
-        try:
-            with open(log_file, 'r') as f:
-                lines = f.readlines()
-                
-            # Find last line with step number
-            current_step = 0
-            for line in reversed(lines):
-                parts = line.strip().split()
-                if len(parts) > 0 and parts[0].isdigit():
-                    current_step = int(parts[0])
-                    break
-            
-            # Calculate progress
-            if current_step < PRODUCTION_START:
-                stage = "EQUILIBRATION"
-                progress = (current_step / PRODUCTION_START) * 100
-                prod_time = 0.0
-            else:
-                stage = "PRODUCTION"
-                prod_steps = current_step - PRODUCTION_START
-                progress = (prod_steps / TOTAL_PRODUCTION_STEPS) * 100
-                prod_time = (prod_steps * TIMESTEP) / 1e6  # ns
-            
-            remaining = 4.0 - prod_time
-            
-            if current_step >= (PRODUCTION_START + TOTAL_PRODUCTION_STEPS):
-                status = "✓ COMPLETE"
-            elif stage == "PRODUCTION":
-                status = "⚡ RUNNING (PRODUCTION)"
-            else:
-                status = "⚡ RUNNING (EQUILIBRATION)"
-            
-            status_data.append({
-                'Epsilon': f"{eps:.2f}",
-                'Status': status,
-                'Current_Step': current_step,
-                'Progress': f"{progress:.1f}%",
-                'Prod_Time_ns': f"{prod_time:.2f}",
-                'Remaining_ns': f"{remaining:.2f}"
-            })
-            
-        except Exception as e:
-            status_data.append({
-                'Epsilon': f"{eps:.2f}",
-                'Status': 'ERROR',
-                'Current_Step': '?',
-                'Progress': '?',
-                'Prod_Time_ns': '?',
-                'Remaining_ns': '?'
-            })
-    
+    for s in statuses:
+        status_data.append({
+            'Epsilon': f"{s['epsilon']:.2f}",
+            'Status': STATUS_LABELS[s['state']],
+            'Current_Step': s['step'],
+            'Progress': f"{s['progress']:.1f}%",
+            'Prod_Time_ns': f"{s['prod_time_ns']:.2f}",
+            'Remaining_ns': f"{max(s['target_ns'] - s['prod_time_ns'], 0.0):.2f}",
+            'ns/day': f"{s['ns_per_day']:.2f}" if s['ns_per_day'] else '-',
+            'ETA': format_eta(s['eta_seconds']),
+        })
+
     # Create DataFrame for nice display
     df = pd.DataFrame(status_data)
-    
+
     # Print table
     print(df.to_string(index=False))
     print()
     print("="*80)
-    
+
     # Summary
-    complete_count = sum(1 for row in status_data if '✓' in row['Status'])
-    running_count = sum(1 for row in status_data if '⚡' in row['Status'])
-    
-    print(f"\nSummary: {complete_count} complete, {running_count} running, {6 - complete_count - running_count} not started")
-    
-    if complete_count == 6:
+    total = len(statuses)
+    complete_count = sum(1 for s in statuses if s['state'] == 'COMPLETE')
+    running = [s for s in statuses if s['state'] in ('PRODUCTION', 'EQUILIBRATION')]
+    failed_count = sum(1 for s in statuses if s['state'] == 'FAILED')
+
+    print(f"\nSummary: {complete_count} complete, {len(running)} running, {failed_count} failed, "
+          f"{total - complete_count - len(running) - failed_count} not started "
+          f"(refresh took {elapsed * 1000:.1f} ms)")
+
+    if total == 0:
+        print(f"\n⚠️  No runs found under {BASE_DIR}. Check the base directory.")
+        return False
+    elif complete_count == total:
         print("\n🎉 ALL SIMULATIONS COMPLETE! Ready for full analysis.")
         print(f"\nRun analyses with:")
         print(f"  cd {BASE_DIR}/analysis/codes")
         print(f"  python run_all_analyses.py")
         return True
-    elif running_count > 0:
-        # Estimate remaining time
-        avg_prod_time = sum(float(row['Prod_Time_ns']) for row in status_data if row['Prod_Time_ns'] != '?') / len([r for r in status_data if r['Prod_Time_ns'] != '?'])
-        avg_remaining = sum(float(row['Remaining_ns']) for row in status_data if row['Remaining_ns'] != '?') / len([r for r in status_data if r['Remaining_ns'] != '?'])
-        print(f"\n⏱️  Average progress: {avg_prod_time:.2f} / 4.00 ns")
-        print(f"  Estimated remaining: ~{avg_remaining:.2f} ns ({avg_remaining/4.0*100:.0f}% of production)")
+    elif running:
+        etas = [s['eta_seconds'] for s in running if s['eta_seconds'] is not None]
+        avg_prod_time = sum(s['prod_time_ns'] for s in running) / len(running)
+        print(f"\n⏱️  Average production progress (running): {avg_prod_time:.2f} / {running[0]['target_ns']:.2f} ns")
+        if etas:
+            print(f"  Last simulation expected to finish in ~{format_eta(max(etas))}")
         return False
     else:
         print("\n⚠️  No simulations running. Check system status.")
         return False
 
+
+def check_simulation_status(monitor=None):
+    """Check completion status of all simulations"""
+    monitor = monitor or create_monitor()
+
+    print("="*80)
+    print(" "*25 + "SIMULATION STATUS CHECK")
+    print("="*80)
+    print()
+
+    statuses, elapsed = monitor.poll()
+    return print_status(statuses, elapsed)
+
+
+def watch(interval, production_steps):
+    """Refresh the status table every `interval` seconds until interrupted"""
+    monitor = create_monitor(production_steps)
+    try:
+        while True:
+            print("\033[2J\033[H", end='')
+            print(f"Status at {time.strftime('%Y-%m-%d %H:%M:%S')} (every {interval:g} s, Ctrl-C to stop)")
+            if check_simulation_status(monitor):
+                return True
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\nStopped.")
+        return False
+
+
 def main():
     """Main entry point"""
-    complete = check_simulation_status()
+    parser = argparse.ArgumentParser(description='Status of all epsilon simulations')
+    parser.add_argument('--watch', type=float, default=None, metavar='SECONDS',
+                        help='Keep refreshing every SECONDS')
+    parser.add_argument('--production-ns', type=float, default=TOTAL_PRODUCTION_STEPS * TIMESTEP / 1e6,
+                        help='Production length used when the log does not show the run command')
+    args = parser.parse_args()
+
+    production_steps = int(round(args.production_ns * 1e6 / TIMESTEP))
+    if args.watch:
+        complete = watch(args.watch, production_steps)
+    else:
+        complete = check_simulation_status(create_monitor(production_steps))
     sys.exit(0 if complete else 1)
 
 if __name__ == "__main__":
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Checkpoint/Resume of Trajectory Accumulations
+=============================================
+
+Periodic on-disk snapshots of a long trajectory pass (accumulators,
+per-frame series, frame cursor) so that a killed run (runner timeout,
+node preemption) resumes where it stopped instead of starting over:
+
+- Checkpoint(name, key): one pickle file per pass in
+  ANALYSIS_CHECKPOINT_DIR, default <base>/analysis/data/checkpoints
+- Atomic snapshots: written to a temporary file in the same directory,
+  fsync'ed and os.replace()d over the previous one, so a kill during a
+  write leaves the last complete snapshot
+- key identifies the pass (trajectory path, size and mtime from
+  trajectory_key(), stride, options); a snapshot with another key is
+  ignored, so a changed trajectory or setting never resumes stale state
+- Interval from ANALYSIS_CHECKPOINT_INTERVAL (seconds, default 300; 0
+  disables), stretched to save_time / MAX_OVERHEAD when snapshots get
+  large, which keeps the overhead below MAX_OVERHEAD of the runtime
+- update(make_state) builds the state only when a snapshot is due;
+  clear() removes the file once the pass has finished
+
+Usage:
+    ckpt = Checkpoint(f'module16_eps_{eps:.2f}', trajectory_key(traj, stride=s))
+    state = ckpt.load() or {'done': 0, 'acc': TrajectoryAccumulator(...)}
+    for ts in u.trajectory[state['done'] * s::s]:
+        state['acc'].add_frame(...)
+        state['done'] += 1
+        ckpt.update(lambda: state)
+    ckpt.clear()
+
+Author: Scientific Analysis Suite
+Date: October 2026
+"""
+
+import os
+import time
+import pickle
+import tempfile
+from pathlib import Path
+
+from epsilon_registry import base_dir_default
+
+INTERVAL_ENV = 'ANALYSIS_CHECKPOINT_INTERVAL'
+DIRECTORY_ENV = 'ANALYSIS_CHECKPOINT_DIR'
+DEFAULT_INTERVAL = 300.0  # seconds
+MAX_OVERHEAD = 0.02       # fraction of the runtime spent writing snapshots
+
+
+def checkpoint_interval(value=None):
+    """Seconds between snapshots: value, else ANALYSIS_CHECKPOINT_INTERVAL, else the default (0 = off)"""
+    if value is None:
+        value = float(os.environ.get(INTERVAL_ENV, DEFAULT_INTERVAL))
+    return max(0.0, float(value))
+
+
+def checkpoint_dir(directory=None):
+    """directory, else ANALYSIS_CHECKPOINT_DIR, else <base>/analysis/data/checkpoints"""
+    if directory is None:
+        directory = os.environ.get(DIRECTORY_ENV) or Path(base_dir_default()) / 'analysis' / 'data' / 'checkpoints'
+    return Path(directory)
+
+
+def trajectory_key(path, **settings):
+    """Identity of a pass over path: resolved path, size, mtime and the given settings"""
+    path = Path(path)
+    stat = path.stat()
+    return {'path': str(path.resolve()), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+            **settings}
+
+
+class Checkpoint:
+    """Atomic periodic snapshots of one trajectory pass"""
+
+    def __init__(self, name, key, directory=None, interval=None):
+        self.key = key
+        self.path = checkpoint_dir(directory) / f'{name}.ckpt'
+        self.interval = checkpoint_interval(interval)
+        self.saves = 0
+        self.save_seconds = 0.0
+        self._last = time.monotonic()
+        self._last_cost = 0.0
+
+    @property
+    def enabled(self):
+        return self.interval > 0
+
+    def load(self):
+        """State of the last snapshot with a matching key, else None"""
+        if not self.enabled or not self.path.exists():
+            return None
+        try:
+            with open(self.path, 'rb') as f:
+                snapshot = pickle.load(f)
+        except Exception as e:
+            print(f"  ✗ Unreadable checkpoint {self.path.name} ignored: {e}")
+            return None
+        if snapshot.get('key') != self.key:
+            print(f"  ✗ Checkpoint {self.path.name} is from another trajectory or setting; starting over")
+            return None
+        age = time.time() - snapshot.get('written', time.time())
+        print(f"  ✓ Resuming from checkpoint {self.path.name} ({age / 60:.1f} min old)")
+        return snapshot['state']
+
+    def due(self):
+        """True when a snapshot is due (interval, stretched to bound the overhead)"""
+        if not self.enabled:
+            return False
+        return time.monotonic() - self._last >= max(self.interval, self._last_cost / MAX_OVERHEAD)
+
+    def save(self, state):
+        """Write state atomically: temporary file, fsync, rename over the previous snapshot"""
+        start = time.monotonic()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=self.path.name, suffix='.tmp', dir=self.path.parent)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump({'key': self.key, 'written': time.time(), 'state': state}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self._last = time.monotonic()
+        self._last_cost = self._last - start
+        self.saves += 1
+        self.save_seconds += self._last_cost
+        return self.path
+
+    def update(self, make_state):
+        """Snapshot make_state() if one is due; returns True when written"""
+        if not self.due():
+            return False
+        self.save(make_state())
+        return True
+
+    def clear(self):
+        """Remove the snapshot after the pass has completed"""
+        if self.path.exists():
+            self.path.unlink()
+        if self.saves:
+            print(f"  ✓ {self.saves} checkpoints written in {self.save_seconds:.1f} s")
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Batched Diffusion Fitting Service
+=================================
+
+One Einstein-relation fit, MSD = 2 d D t + b, for the MSD curves of all
+epsilon values at once (modules 05, 06 and 07):
+
+- Curves of different length are padded into one (n_eps, n_lags) array
+- Diffusive window per curve from the local slope
+  alpha(t) = d ln MSD / d ln t (smoothed): the longest run of lags with
+  |alpha - 1| < alpha_tol within the first max_lag_fraction of the curve;
+  the middle half of that range when no run has min_points lags, or an
+  explicit (t_min, t_max) window
+- Closed-form batched generalized least squares with the MSD covariance
+  of a diffusing particle (shape only, scale fitted from the residuals):
+    'averaged'  MSD averaged over overlapping time origins (modules 04/07):
+                C(t_i, t_j) ~ m^2 (3 M - m),  m = min, M = max
+    'single'    MSD from one origin (LAMMPS compute msd, module 06):
+                C(t_i, t_j) ~ m^2
+    None        ordinary least squares
+  All windows are factorized in one batched Cholesky decomposition and
+  whitened by triangular solves
+- DiffusionFit holds D, its correlated-error standard error, intercept,
+  window, residuals and the slope weights (D = sum_i w_i MSD_i), so a
+  bootstrap can resample the residuals (block_bootstrap.py)
+
+Usage:
+    fit = fit_diffusion({eps: (time_ns, msd) for eps in ...}, covariance='single')
+    fit.D, fit.D_error, fit.window       # (n_eps,) arrays in MSD units / time units
+    df = fit.to_frame(scale=1e-3, suffix='cm2_s')
+
+Author: Scientific Analysis Suite
+Date: October 2026
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.linalg import solve_triangular
+
+ALPHA_TOL = 0.15
+MIN_POINTS = 10
+MAX_LAG_FRACTION = 0.5
+SMOOTH_POINTS = 5
+NUGGET = 1e-6  # relative white-noise term keeping the covariance well conditioned
+
+
+def _pad(curves, epsilons):
+    """(time, msd, valid) arrays (n_eps, n_lags) from {eps: (time, msd)}"""
+    n_lags = max((len(curves[eps][0]) for eps in epsilons), default=0)
+    time = np.full((len(epsilons), n_lags), np.nan)
+    msd = np.full((len(epsilons), n_lags), np.nan)
+    for i, eps in enumerate(epsilons):
+        t, m = (np.asarray(a, dtype=np.float64) for a in curves[eps])
+        time[i, :len(t)], msd[i, :len(m)] = t, m
+    return time, msd, np.isfinite(time) & np.isfinite(msd)
+
+
+def local_slope(time, msd, smooth=SMOOTH_POINTS):
+    """(n_eps, n_lags) alpha = d ln MSD / d ln t, centred differences and a running mean"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        log_t = np.log(np.where(time > 0, time, np.nan))
+        log_m = np.log(np.where(msd > 0, msd, np.nan))
+    alpha = np.full_like(time, np.nan)
+    alpha[:, 1:-1] = (log_m[:, 2:] - log_m[:, :-2]) / (log_t[:, 2:] - log_t[:, :-2])
+    if smooth > 1:
+        ok = np.isfinite(alpha)
+        zero = np.zeros((len(alpha), 1))
+        sums = np.concatenate([zero, np.cumsum(np.where(ok, alpha, 0.0), axis=1)], axis=1)
+        counts = np.concatenate([zero, np.cumsum(ok, axis=1)], axis=1)
+        lo = np.clip(np.arange(alpha.shape[1]) - smooth // 2, 0, alpha.shape[1])
+        hi = np.clip(lo + smooth, 0, alpha.shape[1])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            alpha = np.where(ok, (sums[:, hi] - sums[:, lo]) / (counts[:, hi] - counts[:, lo]), np.nan)
+    return alpha
+
+
+def diffusive_windows(time, msd, valid, alpha_tol=ALPHA_TOL, min_points=MIN_POINTS,
+                      max_lag_fraction=MAX_LAG_FRACTION):
+    """(start, length, fallback) per curve: longest run of lags with |alpha - 1| < alpha_tol"""
+    n_eps, n_lags = time.shape
+    t_max = np.nanmax(np.where(valid, time, np.nan), axis=1, initial=0.0)
+    usable = valid & (time > 0) & (time <= max_lag_fraction * t_max[:, None])
+    ok = usable & (np.abs(local_slope(time, msd) - 1.0) < alpha_tol)
+
+    # Run length ending at each lag: distance to the last lag that was not ok
+    idx = np.arange(n_lags)
+    last_break = np.maximum.accumulate(np.where(ok, -1, idx), axis=1)
+    run = np.where(ok, idx - last_break, 0)
+    end = np.argmax(run, axis=1)
+    length = run[np.arange(n_eps), end]
+    start = end - length + 1
+
+    # Fallback: middle half of the usable lags
+    fallback = length < min_points
+    n_usable = usable.sum(axis=1)
+    first_usable = np.argmax(usable, axis=1)
+    start = np.where(fallback, first_usable + n_usable // 4, start)
+    length = np.where(fallback, n_usable // 2, length)
+    return start, length, fallback
+
+
+def fixed_windows(time, valid, window):
+    """(start, length) of the lags inside an explicit (t_min, t_max) window"""
+    inside = valid & (time >= window[0]) & (time <= window[1])
+    return np.argmax(inside, axis=1), inside.sum(axis=1)
+
+
+def _solve_lower(chol, rhs, trans=False):
+    """L^-1 rhs (L^-T rhs with trans) for a stack of lower Cholesky factors, O(n^2) each"""
+    return np.stack([solve_triangular(c, b, lower=True, trans=1 if trans else 0)
+                     for c, b in zip(chol, rhs)]) if len(chol) else rhs.copy()
+
+
+def msd_covariance(time, model):
+    """(..., n, n) covariance shape of MSD values at lags time (..., n)"""
+    t = time / np.max(np.abs(time), axis=-1, keepdims=True)
+    m = np.minimum(t[..., :, None], t[..., None, :])
+    if model == 'averaged':
+        return m * m * (3 * np.maximum(t[..., :, None], t[..., None, :]) - m)
+    if model == 'single':
+        return m * m
+    raise ValueError(f"Unknown MSD covariance model {model!r}")
+
+
+class DiffusionFit:
+    """Batched fit results, one entry per epsilon"""
+
+    def __init__(self, epsilons, D, D_error, intercept, window, n_points, fallback,
+                 time, residuals, weights, valid, dims):
+        self.epsilons = list(epsilons)
+        self.D = D
+        self.D_error = D_error
+        self.intercept = intercept
+        self.window = window            # (n_eps, 2) first and last fitted lag
+        self.n_points = n_points
+        self.fallback = fallback        # True where no diffusive run was found
+        self.time = time                # (n_eps, n_window) fitted lags
+        self.residuals = residuals      # (n_eps, n_window) MSD - fit
+        self.weights = weights          # (n_eps, n_window) D = sum(weights * MSD)
+        self.valid = valid
+        self.dims = dims
+
+    def __getitem__(self, eps):
+        i = self.epsilons.index(eps)
+        return {'D': self.D[i], 'D_error': self.D_error[i], 'intercept': self.intercept[i],
+                'window': tuple(self.window[i]), 'n_points': int(self.n_points[i]),
+                'fallback': bool(self.fallback[i])}
+
+    def predict(self, eps, time):
+        """Fitted MSD line of one epsilon at the given lags"""
+        i = self.epsilons.index(eps)
+        return 2 * self.dims * self.D[i] * np.asarray(time) + self.intercept[i]
+
+    def to_frame(self, scale=1.0, suffix=''):
+        """Epsilon, D, D_error (times scale), window and point count as a DataFrame"""
+        tag = f'_{suffix}' if suffix else ''
+        return pd.DataFrame({'Epsilon': self.epsilons,
+                             f'D{tag}': self.D * scale,
+                             f'D_error{tag}': self.D_error * scale,
+                             'fit_start': self.window[:, 0],
+                             'fit_end': self.window[:, 1],
+                             'n_fit_points': self.n_points,
+                             'window_fallback': self.fallback})
+
+
+def fit_diffusion(curves, window=None, covariance='averaged', dims=3, alpha_tol=ALPHA_TOL,
+                  min_points=MIN_POINTS, max_lag_fraction=MAX_LAG_FRACTION):
+    """
+    Fit MSD = 2 dims D t + b to every curve of {eps: (time, msd)} at once;
+    window=None selects the diffusive lags by the local slope criterion
+    """
+    epsilons = list(curves)
+    time, msd, valid = _pad(curves, epsilons)
+    n_eps = len(epsilons)
+    if window is None:
+        start, length, fallback = diffusive_windows(time, msd, valid, alpha_tol, min_points,
+                                                    max_lag_fraction)
+    else:
+        start, length = fixed_windows(time, valid, window)
+        fallback = np.zeros(n_eps, dtype=bool)
+
+    # Windows gathered into (n_eps, n_window); padding rows are zero with unit variance
+    n_window = max(int(length.max()) if n_eps else 0, 1)
+    offsets = np.arange(n_window)
+    in_window = offsets[None, :] < length[:, None]
+    idx = np.minimum(start[:, None] + offsets[None, :], max(time.shape[1] - 1, 0))
+    t = np.where(in_window, np.take_along_axis(time, idx, axis=1), 0.0)
+    y = np.where(in_window, np.take_along_axis(msd, idx, axis=1), 0.0)
+    X = np.stack([t, in_window.astype(np.float64)], axis=2)  # slope, intercept columns
+
+    if covariance is None:
+        cov = np.broadcast_to(np.eye(n_window), (n_eps, n_window, n_window)).copy()
+    else:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = np.nan_to_num(msd_covariance(np.where(in_window, t, 0.0), covariance))
+        pair = in_window[:, :, None] & in_window[:, None, :]
+        cov = np.where(pair, cov, 0.0)
+        scale = np.max(np.diagonal(cov, axis1=1, axis2=2), axis=1, initial=0.0)
+        diag = np.where(in_window, NUGGET * np.maximum(scale[:, None], 1e-300), 1.0)
+        cov[:, offsets, offsets] += diag
+
+    # Whitening: L L^T = C, then ordinary least squares on L^-1 X, L^-1 y
+    chol = np.linalg.cholesky(cov)
+    white = _solve_lower(chol, np.concatenate([X, y[:, :, None]], axis=2))
+    Xw, yw = white[:, :, :2], white[:, :, 2]
+    xtx = np.einsum('eij,eik->ejk', Xw, Xw)
+    fit_ok = length >= 3
+    xtx[~fit_ok] = np.eye(2)
+    xtx_inv = np.linalg.inv(xtx)
+    beta = np.einsum('ejk,eik,ei->ej', xtx_inv, Xw, yw)
+
+    r_white = yw - np.einsum('eij,ej->ei', Xw, beta)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sigma2 = np.sum(r_white ** 2, axis=1) / (length - 2)
+    slope_error = np.sqrt(sigma2 * xtx_inv[:, 0, 0])
+
+    # D = sum_i weights_i y_i: first row of (X^T C^-1 X)^-1 X^T C^-1, divided by 2 dims
+    c_inv_x = _solve_lower(chol, Xw, trans=True)
+    weights = np.einsum('ek,eik->ei', xtx_inv[:, 0, :], c_inv_x) / (2 * dims)
+
+    nan = np.where(fit_ok, 1.0, np.nan)
+    residuals = np.where(in_window, y - np.einsum('eij,ej->ei', X, beta), np.nan)
+    last = np.take_along_axis(t, np.maximum(length - 1, 0)[:, None], axis=1)[:, 0]
+    return DiffusionFit(epsilons, beta[:, 0] / (2 * dims) * nan, slope_error / (2 * dims) * nan,
+                        beta[:, 1] * nan, np.stack([t[:, 0], last], axis=1) * nan[:, None],
+                        length, fallback, np.where(in_window, t, np.nan), residuals,
+                        np.where(in_window, weights, 0.0), in_window, dims)
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Epsilon Run Registry
+====================
+
+One scan of the epsilon_* run directories, shared by every module instead
+of hardcoded epsilon lists and directory mappings:
+
+- Runs are discovered under BASE_DIR/epsilon_* and
+  BASE_DIR/solvent_effects/epsilon_* (the first layout wins if both hold
+  the same epsilon); new epsilon directories appear without code edits
+- Per run: files present with sizes, Git LFS pointer stubs, completion
+  status (.completion_status), and for production.lammpstrj the atom count,
+  first/last timestep, dump interval and number of frames (read from the
+  first two frame headers and the file tail, not a full pass; from the
+  frame index of production.ctraj when only the compressed archive of
+  trajectory_archive.py holds the trajectory)
+- Metadata is cached in BASE_DIR/analysis/.epsilon_registry.json: finished
+  runs whose directory mtime did not change are not listed again, and the
+  trajectory header scan and stub checks are redone only for files whose
+  size or mtime changed
+- get_registry() keeps one registry per base directory and process, so all
+  modules of a run_all_modules/module_host session share a single scan
+
+BASE_DIR defaults to /store/shuvam/learning_solvent_effects and can be
+overridden with ANALYSIS_BASE_DIR.
+
+Usage:
+    from epsilon_registry import get_registry
+    registry = get_registry()
+    for eps in registry.epsilons(require='production.lammpstrj'):
+        traj = registry.path(eps, 'production.lammpstrj')
+
+    python epsilon_registry.py [BASE_DIR] [--refresh]   # print the run table
+
+Author: Scientific Analysis Suite
+Date: October 2026
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+from pathlib import Path
+
+DEFAULT_BASE_DIR = Path("/store/shuvam/learning_solvent_effects")
+BASE_DIR_ENV = 'ANALYSIS_BASE_DIR'
+LAYOUTS = ('.', 'solvent_effects')
+CACHE_NAME = '.epsilon_registry.json'
+CACHE_VERSION = 1
+TRAJECTORY = 'production.lammpstrj'
+ARCHIVE = 'production.ctraj'  # trajectory_archive.py conversion of TRAJECTORY
+COMPLETION_FLAG = '.completion_status'
+
+LFS_HEADER = b'version https://git-lfs.github.com/spec/'
+LFS_MAX_SIZE = 1024  # pointer files are ~130 bytes
+DIR_PATTERN = re.compile(r'^epsilon_(\d+(?:\.\d+)?)$')
+HEADER_LIMIT = 256 * 1024 ** 2  # bytes read at most to find the second frame
+TAIL_WINDOW = 1024 ** 2
+
+
+def base_dir_default():
+    return Path(os.environ.get(BASE_DIR_ENV, DEFAULT_BASE_DIR))
+
+
+def epsilon_dir_name(eps):
+    """Directory name LAMMPS runs use: epsilon_0.0 / epsilon_1.0 / epsilon_0.05"""
+    return f"epsilon_{eps:.1f}" if eps in (0.0, 1.0) else f"epsilon_{eps:.2f}"
+
+
+def parse_epsilon(name):
+    match = DIR_PATTERN.match(name)
+    return round(float(match.group(1)), 4) if match else None
+
+
+def is_lfs_stub(path, size=None):
+    """True for a Git LFS pointer file (content not fetched)"""
+    size = Path(path).stat().st_size if size is None else size
+    if size > LFS_MAX_SIZE:
+        return False
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(LFS_HEADER)) == LFS_HEADER
+    except OSError:
+        return False
+
+
+def _item_value(lines, item):
+    """Integer on the line after 'ITEM: <item>' in a list of dump header lines"""
+    for i, line in enumerate(lines[:-1]):
+        if line.startswith(b'ITEM: ' + item):
+            return int(lines[i + 1].split()[0])
+    return None
+
+
+def dump_metadata(path):
+    """
+    {'n_atoms', 'first_step', 'last_step', 'dump_interval', 'n_frames'} of a
+    LAMMPS dump from its first two frame headers and the last one
+    """
+    path = Path(path)
+    size = path.stat().st_size
+    marker = b'ITEM: TIMESTEP'
+    with open(path, 'rb') as f:
+        head = f.read(64 * 1024)
+        lines = head.split(b'\n')[:10]
+        first_step, n_atoms = _item_value(lines, b'TIMESTEP'), _item_value(lines, b'NUMBER OF ATOMS')
+        if first_step is None:
+            return None
+        # Second frame header: skip roughly one frame's worth of bytes
+        second_step = None
+        chunk, offset = head, 0
+        while second_step is None and offset < min(size, HEADER_LIMIT):
+            pos = chunk.find(marker, 1 if offset == 0 else 0)
+            if pos >= 0 and len(chunk) - pos > 64:
+                second_step = int(chunk[pos:pos + 64].split(b'\n')[1])
+                break
+            offset += max(len(chunk) - 64, 1)
+            f.seek(offset)
+            chunk = f.read(4 * 1024 ** 2)
+            if not chunk:
+                break
+        # Last frame header from the tail
+        last_step = first_step
+        window = TAIL_WINDOW
+        while True:
+            start = max(0, size - window)
+            f.seek(start)
+            tail = f.read(size - start)
+            pos = tail.rfind(marker)
+            if pos >= 0 and len(tail) - pos > len(marker) + 2:
+                last_step = int(tail[pos:pos + 64].split(b'\n')[1])
+                break
+            if start == 0:
+                break
+            window *= 4
+    interval = (second_step - first_step) if second_step is not None else None
+    n_frames = (last_step - first_step) // interval + 1 if interval else 1
+    return {'n_atoms': n_atoms, 'first_step': first_step, 'last_step': last_step,
+            'dump_interval': interval, 'n_frames': n_frames}
+
+
+class RunInfo:
+    """Cached metadata of one epsilon run directory"""
+
+    def __init__(self, epsilon, directory, record):
+        self.epsilon = epsilon
+        self.directory = Path(directory)
+        self.record = record
+
+    @property
+    def files(self):
+        """{name: size in bytes}"""
+        return {name: meta[0] for name, meta in self.record['files'].items()}
+
+    @property
+    def lfs_stubs(self):
+        return sorted(self.record['stubs'])
+
+    @property
+    def status(self):
+        """SUCCESS / FAILED from the completion flag, else RUNNING or NOT STARTED"""
+        return self.record['status']
+
+    @property
+    def complete(self):
+        return self.status == 'SUCCESS'
+
+    @property
+    def trajectory(self):
+        """dump_metadata() of production.lammpstrj, or None (missing or LFS stub)"""
+        return self.record.get('trajectory')
+
+    @property
+    def n_frames(self):
+        return (self.trajectory or {}).get('n_frames', 0)
+
+    def path(self, name):
+        return self.directory / name
+
+    def has(self, name, allow_stub=False):
+        """File present (and, unless allow_stub, with real content)"""
+        return name in self.record['files'] and (allow_stub or name not in self.record['stubs'])
+
+    def size(self, name):
+        meta = self.record['files'].get(name)
+        return meta[0] if meta else None
+
+    def has_trajectory(self):
+        """Production trajectory readable: real dump content or its compressed archive"""
+        return self.has(TRAJECTORY) or self.has(ARCHIVE)
+
+    def trajectory_size(self):
+        """Bytes of the production trajectory (dump, else archive) as a cost estimate"""
+        return self.size(TRAJECTORY) if self.has(TRAJECTORY) else self.size(ARCHIVE)
+
+    def summary(self):
+        traj = self.trajectory or {}
+        return {
+            'epsilon': self.epsilon,
+            'directory': str(self.directory),
+            'status': self.status,
+            'files': len(self.record['files']),
+            'lfs_stubs': len(self.record['stubs']),
+            'size_mb': sum(self.files.values()) / 1024 ** 2,
+            'n_frames': traj.get('n_frames'),
+            'first_step': traj.get('first_step'),
+            'last_step': traj.get('last_step'),
+        }
+
+
+class EpsilonRegistry:
+    """All epsilon runs under one base directory, with an on-disk metadata cache"""
+
+    def __init__(self, base_dir=None, cache_file='auto', layouts=LAYOUTS):
+        self.base_dir = Path(base_dir) if base_dir else base_dir_default()
+        self.layouts = layouts
+        if cache_file == 'auto':
+            analysis_dir = self.base_dir / 'analysis'
+            cache_file = analysis_dir / CACHE_NAME if os.access(analysis_dir, os.W_OK) else None
+        self.cache_file = Path(cache_file) if cache_file else None
+        self.runs = {}
+        self.refresh()
+
+    def _load_cache(self):
+        if self.cache_file is None or not self.cache_file.exists():
+            return {}
+        try:
+            with open(self.cache_file) as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return cache.get('runs', {}) if cache.get('version') == CACHE_VERSION else {}
+
+    def save_cache(self):
+        if self.cache_file is None:
+            return
+        runs = {str(run.directory): run.record for run in self.runs.values()}
+        tmp = self.cache_file.with_suffix('.tmp')
+        try:
+            with open(tmp, 'w') as f:
+                json.dump({'version': CACHE_VERSION, 'base_dir': str(self.base_dir), 'runs': runs}, f)
+            os.replace(tmp, self.cache_file)
+        except OSError:
+            pass
+
+    def _run_dirs(self):
+        """{epsilon: directory} over all layouts; the first layout holding an epsilon wins"""
+        found = {}
+        seen = set()
+        for layout in self.layouts:
+            parent = self.base_dir / layout
+            try:
+                entries = sorted(os.scandir(parent), key=lambda e: e.name)
+            except OSError:
+                continue
+            for entry in entries:
+                eps = parse_epsilon(entry.name)
+                if eps is None or eps in found or not entry.is_dir():
+                    continue
+                real = os.path.realpath(entry.path)
+                if real in seen:
+                    continue
+                seen.add(real)
+                found[eps] = Path(entry.path)
+        return found
+
+    @staticmethod
+    def _scan_run(directory, cached):
+        """Fresh record for one run directory, reusing cached per-file results"""
+        cached_files = cached.get('files', {}) if cached else {}
+        cached_stubs = set(cached.get('stubs', [])) if cached else set()
+        files, stubs = {}, []
+        for entry in os.scandir(directory):
+            if not entry.is_file():
+                continue
+            st = entry.stat()
+            meta = [st.st_size, st.st_mtime_ns]
+            files[entry.name] = meta
+            unchanged = cached_files.get(entry.name) == meta
+            if (entry.name in cached_stubs) if unchanged else is_lfs_stub(entry.path, st.st_size):
+                stubs.append(entry.name)
+
+        flag = None
+        if COMPLETION_FLAG in files:
+            try:
+                flag = (directory / COMPLETION_FLAG).read_text().strip().upper() or None
+            except OSError:
+                pass
+        status = flag or ('RUNNING' if TRAJECTORY in files or 'production.log' in files else 'NOT STARTED')
+
+        trajectory = None
+        source = TRAJECTORY if TRAJECTORY in files and TRAJECTORY not in stubs else \
+            ARCHIVE if ARCHIVE in files else None
+        if source is not None:
+            old = cached.get('trajectory') if cached else None
+            if old and cached_files.get(source) == files[source]:
+                trajectory = old
+            else:
+                try:
+                    if source == TRAJECTORY:
+                        trajectory = dump_metadata(directory / TRAJECTORY)
+                    else:
+                        from trajectory_archive import archive_metadata
+                        trajectory = archive_metadata(directory / ARCHIVE)
+                except (OSError, ValueError, IndexError):
+                    trajectory = None
+        return {'dir_mtime_ns': directory.stat().st_mtime_ns, 'files': files, 'stubs': stubs,
+                'status': status, 'trajectory': trajectory}
+
+    def refresh(self, force=False):
+        """Rescan the run directories (finished, unchanged runs come from the cache)"""
+        cache = {} if force else self._load_cache()
+        runs = {}
+        for eps, directory in sorted(self._run_dirs().items()):
+            cached = cache.get(str(directory))
+            try:
+                dir_mtime = directory.stat().st_mtime_ns
+                if cached and cached.get('status') == 'SUCCESS' and cached.get('dir_mtime_ns') == dir_mtime:
+                    record = cached
+                else:
+                    record = self._scan_run(directory, cached)
+            except OSError:
+                continue
+            runs[eps] = RunInfo(eps, directory, record)
+        self.runs = runs
+        self.save_cache()
+        return self
+
+    def trajectory_epsilons(self):
+        """Sorted epsilon values whose production trajectory is readable (dump or archive)"""
+        return [eps for eps, run in self.runs.items() if run.has_trajectory()]
+
+    def epsilons(self, require=None, complete=False, allow_stub=False):
+        """
+        Sorted epsilon values; require = file name or list of names that must
+        be present (real content unless allow_stub), complete = finished runs only
+        """
+        names = [require] if isinstance(require, str) else list(require or [])
+        return [eps for eps, run in self.runs.items()
+                if all(run.has(n, allow_stub) for n in names) and (run.complete or not complete)]
+
+    def run(self, eps):
+        return self.runs.get(round(float(eps), 4))
+
+    def directory(self, eps):
+        """Run directory of eps; the conventional base_dir/epsilon_X path if unknown"""
+        run = self.run(eps)
+        return run.directory if run is not None else self.base_dir / epsilon_dir_name(eps)
+
+    def directories(self, epsilons=None):
+        """{eps: run directory} for epsilons (default: all runs)"""
+        return {eps: self.directory(eps) for eps in (self.epsilons() if epsilons is None else epsilons)}
+
+    def path(self, eps, name):
+        return self.directory(eps) / name
+
+    def summary(self):
+        return [run.summary() for run in self.runs.values()]
+
+
+_REGISTRIES = {}
+
+
+def get_registry(base_dir=None, refresh=False):
+    """Process-wide registry per base directory (scanned on first use)"""
+    key = str(Path(base_dir) if base_dir else base_dir_default())
+    if key not in _REGISTRIES:
+        _REGISTRIES[key] = EpsilonRegistry(key)
+    elif refresh:
+        _REGISTRIES[key].refresh()
+    return _REGISTRIES[key]
+
+
+def print_table(registry):
+    print(f"Epsilon runs under {registry.base_dir} ({len(registry.runs)} found)")
+    print(f"{'eps':>6s}  {'status':12s} {'files':>5s} {'stubs':>5s} {'size MB':>9s} {'frames':>7s}  steps")
+    for row in registry.summary():
+        steps = f"{row['first_step']}-{row['last_step']}" if row['first_step'] is not None else '-'
+        frames = row['n_frames'] if row['n_frames'] is not None else '-'
+        print(f"{row['epsilon']:6.2f}  {row['status']:12s} {row['files']:5d} {row['lfs_stubs']:5d} "
+              f"{row['size_mb']:9.1f} {frames:>7}  {steps}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='List epsilon runs and their cached metadata')
+    parser.add_argument('base_dir', nargs='?', default=None, help=f'Default: ${BASE_DIR_ENV} or {DEFAULT_BASE_DIR}')
+    parser.add_argument('--refresh', action='store_true', help='Ignore the cache and rescan everything')
+    parser.add_argument('--json', action='store_true', help='Print the summary as JSON')
+    args = parser.parse_args()
+
+    registry = EpsilonRegistry(args.base_dir)
+    if args.refresh:
+        registry.refresh(force=True)
+    if args.json:
+        print(json.dumps(registry.summary(), indent=2))
+    else:
+        print_table(registry)
+    return 0 if registry.runs else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
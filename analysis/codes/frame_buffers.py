@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Reusable Frame Buffers
+======================
+
+Preallocated float32 coordinate buffers for trajectory loops, laid out once
+per topology so that reading a frame allocates nothing:
+
+- One contiguous (n_atoms, 3) block ordered [carbons | O | H1 | H2]; the
+  groups are views into it:
+    carbons     (n_carbons, 3)   C60 carbons, 60 per cage
+    oxygens     (n_waters, 3)    water oxygens
+    h1, h2      (n_waters, 3)    first / second hydrogen of each water
+    hydrogens   (2, n_waters, 3) both hydrogens (find_hbonds() accepts it)
+    water       (3, n_waters, 3) O, H1, H2
+  Every view is C-contiguous, so it can go straight to cuda copy_to_device()
+- load(positions, box) fills the block from a frame's positions: groups
+  whose atoms form a regular range (the interleaved O H H layout of the
+  dumps) are copied from strided views, others with np.take(out=...)
+- c60_centers() averages each cage into a preallocated (n_c60, 3) array
+  (identical carbon masses: centre of mass = mean position)
+- PositionStack preallocates the (n_frames, n, 3) history used by the MSD;
+  with an out_of_core.ScratchStore it becomes a memmap once it outgrows the
+  memory budget
+
+Usage:
+    frame = FrameBuffers.interleaved(180, n_waters)     # or from_types(types)
+    for ts in u.trajectory:
+        frame.load(ts.positions, ts.dimensions)
+        analyze(frame.oxygens, frame.hydrogens, frame.carbons, frame.box)
+
+Author: Scientific Analysis Suite
+Date: October 2026
+"""
+
+import numpy as np
+
+C60_ATOMS = 60
+GROUPS = ('carbons', 'oxygens', 'h1', 'h2')
+
+
+def _as_selector(indices):
+    """A slice for regularly spaced indices (view, no gather), else an int64 array"""
+    indices = np.asarray(indices, dtype=np.int64)
+    if len(indices) == 0:
+        return slice(0, 0)
+    if len(indices) == 1:
+        return slice(int(indices[0]), int(indices[0]) + 1)
+    step = int(indices[1] - indices[0])
+    if step > 0 and np.all(np.diff(indices) == step):
+        return slice(int(indices[0]), int(indices[-1]) + 1, step)
+    return indices
+
+
+class FrameBuffers:
+    """Preallocated per-topology coordinate block with O/H1/H2/carbon views"""
+
+    def __init__(self, carbons, oxygens, h1, h2, dtype=np.float32, atoms_per_c60=C60_ATOMS):
+        """
+        carbons, oxygens, h1, h2: atom indices of each group in the frame's
+        positions array (h1[k], h2[k] are the hydrogens of oxygens[k])
+        """
+        if not (len(oxygens) == len(h1) == len(h2)):
+            raise ValueError(f"Need one H1 and one H2 per oxygen, got {len(oxygens)}/{len(h1)}/{len(h2)}")
+        self.selectors = {name: _as_selector(idx) for name, idx in zip(GROUPS, (carbons, oxygens, h1, h2))}
+        self.n_carbons = len(carbons)
+        self.n_waters = len(oxygens)
+        self.dtype = np.dtype(dtype)
+
+        self.block = np.zeros((self.n_carbons + 3 * self.n_waters, 3), dtype=self.dtype)
+        n_c, n_w = self.n_carbons, self.n_waters
+        self.carbons = self.block[:n_c]
+        self.water = self.block[n_c:].reshape(3, n_w, 3)
+        self.oxygens, self.h1, self.h2 = self.water
+        self.hydrogens = self.water[1:]
+        self.groups = dict(zip(GROUPS, (self.carbons, self.oxygens, self.h1, self.h2)))
+
+        self.box = np.zeros(3, dtype=np.float64)
+        self.n_c60 = self.n_carbons // atoms_per_c60
+        self._centers = np.zeros((self.n_c60, 3), dtype=self.dtype)
+        self._cages = self.carbons[:self.n_c60 * atoms_per_c60].reshape(self.n_c60, atoms_per_c60, 3)
+        self.frames_loaded = 0
+
+    @classmethod
+    def interleaved(cls, n_carbons, n_waters, **kwargs):
+        """Dump layout: carbons first, then O H H per water"""
+        start = n_carbons
+        return cls(np.arange(n_carbons), np.arange(start, start + 3 * n_waters, 3),
+                   np.arange(start + 1, start + 3 * n_waters, 3),
+                   np.arange(start + 2, start + 3 * n_waters, 3), **kwargs)
+
+    @classmethod
+    def from_types(cls, types, carbon_type=1, oxygen_type=2, hydrogen_type=3, **kwargs):
+        """Groups by LAMMPS atom type; consecutive type-3 atoms are one water's H1, H2"""
+        types = np.asarray(types)
+        hydrogens = np.nonzero(types == hydrogen_type)[0]
+        return cls(np.nonzero(types == carbon_type)[0], np.nonzero(types == oxygen_type)[0],
+                   hydrogens[0::2], hydrogens[1::2], **kwargs)
+
+    def gather(self, positions, group, out):
+        """Copy one group of positions into out without temporaries"""
+        selector = self.selectors[group]
+        if isinstance(selector, slice) or positions.dtype != out.dtype:
+            np.copyto(out, positions[selector], casting='same_kind')
+        else:
+            # mode='clip' skips the bounds-check buffer np.take uses with out=
+            np.take(positions, selector, axis=0, out=out, mode='clip')
+        return out
+
+    def load(self, positions, box=None):
+        """Fill every group from the positions of one frame (and the box lengths)"""
+        for name, out in self.groups.items():
+            self.gather(positions, name, out)
+        if box is not None:
+            self.box[:] = box[:3]
+        self.frames_loaded += 1
+        return self
+
+    @property
+    def cages(self):
+        """(n_c60, atoms_per_c60, 3) view of the carbons, one row per cage"""
+        return self._cages
+
+    def c60_centers(self):
+        """(n_c60, 3) mean carbon position of each cage, reusing one buffer"""
+        np.sum(self._cages, axis=1, out=self._centers)
+        self._centers /= self._cages.shape[1]
+        return self._centers
+
+
+class PositionStack:
+    """Preallocated (n_frames, n_atoms, 3) position history (MSD input)"""
+
+    def __init__(self, n_frames, n_atoms, dtype=np.float32, store=None, name='positions'):
+        shape = (n_frames, n_atoms, 3)
+        self.positions = store.array(name, shape, dtype) if store is not None else np.zeros(shape, dtype=dtype)
+        self.count = 0
+
+    @property
+    def full(self):
+        return self.count >= len(self.positions)
+
+    def next_slot(self):
+        """The next (n_atoms, 3) row to fill in place; counts it as used"""
+        if self.full:
+            raise IndexError(f"PositionStack holds {len(self.positions)} frames")
+        row = self.positions[self.count]
+        self.count += 1
+        return row
+
+    def append(self, frame_positions):
+        np.copyto(self.next_slot(), frame_positions, casting='same_kind')
+
+    def filled(self):
+        """View of the frames stored so far"""
+        return self.positions[:self.count]
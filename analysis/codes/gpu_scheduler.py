@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Device-Aware Scheduler for CUDA Analysis Modules
+================================================
+
+Distributes per-epsilon jobs of the CUDA modules (04, 16) over every
+available GPU instead of letting all workers contend for device 0.
+
+- Discovers CUDA devices through Numba (or simulates N virtual devices)
+- Hands each new job to the device with the shortest queue
+- Caps the number of concurrent CUDA contexts per device
+- Degrades to a single CPU backend when no device exists; it runs one job
+  at a time by default (every job holds a full trajectory in memory), more
+  with cpu_workers or ANALYSIS_CPU_WORKERS=N
+
+Every device gets its own process pool whose workers bind to that device
+once at start-up, so a worker never touches another GPU. Jobs are
+dispatched dynamically: largest jobs first, each to the least-loaded device.
+
+Pool workers look the job function up by module name. A function from a
+module loaded by path (module_host.py runs modules 04/16 as
+analysis_module_<stem> inside its own pool workers) cannot be found in a
+spawned worker, so such jobs run inline, one after another, in the
+calling process.
+
+Virtual devices (``--virtual-devices N`` or ANALYSIS_VIRTUAL_GPUS=N) run the
+full scheduling path on a GPU-less box; workers simply use the CPU backend.
+
+Usage:
+    python gpu_scheduler.py --virtual-devices 4 --jobs 23 --contexts 2
+
+Author: Scientific Analysis Suite
+Date: October 2026
+"""
+
+import os
+import sys
+import time
+import argparse
+import functools
+import importlib.machinery
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+VIRTUAL_DEVICES_ENV = 'ANALYSIS_VIRTUAL_GPUS'
+CPU_WORKERS_ENV = 'ANALYSIS_CPU_WORKERS'
+DEFAULT_CONTEXTS_PER_DEVICE = 2
+DEFAULT_CPU_WORKERS = 1
+
+# Device bound to the current worker process (set by the pool initializer)
+_CURRENT_DEVICE = None
+
+
+class ComputeDevice:
+    """A schedulable compute backend: a CUDA GPU, a virtual GPU or the CPU"""
+
+    def __init__(self, kind, index, name=None, max_contexts=DEFAULT_CONTEXTS_PER_DEVICE):
+        self.kind = kind  # 'cuda', 'virtual' or 'cpu'
+        self.index = index
+        self.name = name or f"{kind}:{index}"
+        self.max_contexts = max(1, int(max_contexts))
+
+    @property
+    def is_cuda(self):
+        return self.kind == 'cuda'
+
+    def __repr__(self):
+        return f"ComputeDevice({self.name}, contexts={self.max_contexts})"
+
+
+def discover_devices(max_contexts=DEFAULT_CONTEXTS_PER_DEVICE, virtual_devices=None):
+    """
+    Return the list of usable GPU devices
+
+    Virtual devices take precedence (explicit argument, then the
+    ANALYSIS_VIRTUAL_GPUS environment variable) so that scheduling can be
+    exercised without hardware. An empty list means no GPU is present.
+    """
+    if virtual_devices is None:
+        env_value = os.environ.get(VIRTUAL_DEVICES_ENV, '').strip()
+        virtual_devices = int(env_value) if env_value.isdigit() else 0
+
+    if virtual_devices > 0:
+        return [ComputeDevice('virtual', i, name=f"virtual:{i}", max_contexts=max_contexts)
+                for i in range(virtual_devices)]
+
+    try:
+        from numba import cuda
+        if not cuda.is_available():
+            return []
+        devices = []
+        for gpu in cuda.gpus:
+            gpu_name = gpu.name.decode() if isinstance(gpu.name, bytes) else str(gpu.name)
+            devices.append(ComputeDevice('cuda', gpu.id, name=f"cuda:{gpu.id} ({gpu_name})",
+                                         max_contexts=max_contexts))
+        return devices
+    except Exception:
+        return []
+
+
+def current_device():
+    """Device bound to this worker process (None outside scheduler workers)"""
+    return _CURRENT_DEVICE
+
+
+def _bind_worker(device):
+    """Pool initializer: pin this worker process to its device once"""
+    global _CURRENT_DEVICE
+    _CURRENT_DEVICE = device
+    if device.is_cuda:
+        from numba import cuda
+        cuda.select_device(device.index)
+
+
+def importable(fn):
+    """
+    True if worker processes can import fn by module name (for a method or
+    functools.partial, the function it wraps)
+    """
+    while isinstance(fn, functools.partial) or hasattr(fn, '__func__'):
+        fn = fn.func if isinstance(fn, functools.partial) else fn.__func__
+    module = getattr(fn, '__module__', None)
+    if module in (None, '__main__'):
+        return module == '__main__'
+    # Searched on sys.path (inherited by spawned workers), not in sys.modules
+    top = module.partition('.')[0]
+    return top in sys.builtin_module_names or importlib.machinery.PathFinder.find_spec(top) is not None
+
+
+class DeviceScheduler:
+    """Assign epsilon jobs to devices by queue length with a per-device context cap"""
+
+    def __init__(self, max_contexts_per_device=DEFAULT_CONTEXTS_PER_DEVICE,
+                 virtual_devices=None, cpu_workers=None):
+        self.devices = discover_devices(max_contexts_per_device, virtual_devices)
+        self.cpu_fallback = not self.devices
+        if self.cpu_fallback:
+            if cpu_workers is None:
+                env_value = os.environ.get(CPU_WORKERS_ENV, '').strip()
+                cpu_workers = int(env_value) if env_value.isdigit() else DEFAULT_CPU_WORKERS
+            workers = cpu_workers
+            self.devices = [ComputeDevice('cpu', 0, name='cpu', max_contexts=workers)]
+
+    @property
+    def total_slots(self):
+        return sum(d.max_contexts for d in self.devices)
+
+    def describe(self):
+        """One-line summary of the scheduling backend"""
+        if self.cpu_fallback:
+            return f"No GPU found - CPU backend with {self.devices[0].max_contexts} workers"
+        return (f"{len(self.devices)} device(s): " +
+                ", ".join(d.name for d in self.devices) +
+                f" (max {self.devices[0].max_contexts} contexts each)")
+
+    def _order_jobs(self, jobs, cost):
+        """Largest jobs first so the tail of the schedule stays short"""
+        if cost is None:
+            return list(jobs)
+        return sorted(jobs, key=cost, reverse=True)
+
+    def plan(self, jobs, cost=None):
+        """
+        Static preview of the assignment (job -> device) using the same
+        shortest-queue rule as run(); useful for dry runs and simulations.
+        """
+        load = {d.name: 0.0 for d in self.devices}
+        assignment = {d.name: [] for d in self.devices}
+        for job in self._order_jobs(jobs, cost):
+            weight = cost(job) if cost is not None else 1.0
+            device = min(self.devices, key=lambda d: load[d.name] / d.max_contexts)
+            load[device.name] += weight
+            assignment[device.name].append(job)
+        return assignment
+
+    def run(self, fn, jobs, cost=None):
+        """
+        Execute fn(job, device) for every job and yield (job, device, result, error)
+
+        A job is submitted only when a device has a free context slot; it goes
+        to the device with the fewest queued-plus-running jobs per slot.
+        """
+        pending = self._order_jobs(jobs, cost)
+        if not pending:
+            return
+        if not importable(fn):
+            yield from self._run_inline(fn, pending)
+            return
+
+        pools = {d.name: ProcessPoolExecutor(max_workers=d.max_contexts,
+                                             initializer=_bind_worker, initargs=(d,))
+                 for d in self.devices}
+        in_flight = {d.name: 0 for d in self.devices}
+        futures = {}
+
+        def submit_next():
+            free = [d for d in self.devices if in_flight[d.name] < d.max_contexts]
+            if not free or not pending:
+                return False
+            device = min(free, key=lambda d: in_flight[d.name] / d.max_contexts)
+            job = pending.pop(0)
+            future = pools[device.name].submit(fn, job, device)
+            futures[future] = (job, device)
+            in_flight[device.name] += 1
+            return True
+
+        try:
+            while submit_next():
+                pass
+
+            while futures:
+                done, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+                for future in done:
+                    job, device = futures.pop(future)
+                    in_flight[device.name] -= 1
+                    try:
+                        yield job, device, future.result(), None
+                    except Exception as e:
+                        yield job, device, None, e
+                while submit_next():
+                    pass
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True, cancel_futures=True)
+
+
+    def _run_inline(self, fn, jobs):
+        """Jobs one after another in this process, bound to the first device"""
+        global _CURRENT_DEVICE
+        device, previous = self.devices[0], _CURRENT_DEVICE
+        _bind_worker(device)
+        try:
+            for job in jobs:
+                try:
+                    result = fn(job, device)
+                except Exception as e:
+                    yield job, device, None, e
+                else:
+                    yield job, device, result, None
+        finally:
+            _CURRENT_DEVICE = previous
+
+
+def _simulated_job(job, device, duration=0.2):
+    """Dummy workload used to verify scheduling on machines without GPUs"""
+    start = time.time()
+    time.sleep(duration)
+    return {'pid': os.getpid(), 'device': device.name, 'start': start, 'end': time.time()}
+
+
+def _max_overlap(intervals):
+    """Largest number of simultaneously open (start, end) intervals"""
+    events = sorted([(s, 1) for s, _ in intervals] + [(e, -1) for _, e in intervals])
+    current = peak = 0
+    for _, delta in events:
+        current += delta
+        peak = max(peak, current)
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate device-aware epsilon scheduling')
+    parser.add_argument('--virtual-devices', type=int, default=4)
+    parser.add_argument('--contexts', type=int, default=DEFAULT_CONTEXTS_PER_DEVICE)
+    parser.add_argument('--jobs', type=int, default=23)
+    parser.add_argument('--duration', type=float, default=0.2, help='Seconds per dummy job')
+    args = parser.parse_args()
+
+    scheduler = DeviceScheduler(max_contexts_per_device=args.contexts,
+                                virtual_devices=args.virtual_devices)
+    print(scheduler.describe())
+
+    jobs = list(range(args.jobs))
+    for name, assigned in scheduler.plan(jobs).items():
+        print(f"  plan {name}: {len(assigned)} jobs")
+
+    from functools import partial
+    per_device = {}
+    for job, device, result, error in scheduler.run(partial(_simulated_job, duration=args.duration), jobs):
+        if error is not None:
+            print(f"  ✗ job {job} failed on {device.name}: {error}")
+            continue
+        per_device.setdefault(device.name, []).append((result['start'], result['end']))
+
+    ok = True
+    for device in scheduler.devices:
+        intervals = per_device.get(device.name, [])
+        peak = _max_overlap(intervals)
+        within_cap = peak <= device.max_contexts
+        ok &= within_cap
+        print(f"  {device.name}: {len(intervals)} jobs, peak concurrency {peak} "
+              f"(cap {device.max_contexts}) {'✓' if within_cap else '✗'}")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Hydrogen-Bond Dynamics Engine
+=============================
+
+Per-frame H-bond pair lists and their time correlation over a trajectory:
+
+- add_frame() finds all geometric H-bonds of a frame (O...O < 3.5 Å,
+  H-O...O < 30°, periodic cKDTree) and stores them as one sorted int64 key
+  per bond: key = (donor * n_waters + acceptor) * 2 + h, h = 0/1 the
+  donating hydrogen of the donor water (decode_keys() inverts it)
+- Each bond is tagged with the hydration shell of its donor (distance to
+  the nearest C60 carbon (proximity.py): first shell < 5 Å, second < 8 Å,
+  else bulk)
+- correlations() gives, for all bonds and per shell,
+    intermittent C(t) = <h(0) h(t)> / <h>   (FFT over pair time series)
+    continuous   S(t) = <h(0) H(t)> / <h>   (exact, from remaining run lengths)
+  where the shell split uses the shell at the time origin
+- lifetimes() integrates C(t) and S(t) and reports their 1/e times
+
+Pairs are processed in batches of dense (pairs x frames) series, so memory
+stays bounded for long trajectories.
+
+Usage:
+    engine = HBondDynamics(n_waters)
+    for frame in frames:
+        engine.add_frame(o_pos, h_pos, box, carbon_pos)
+    corr = engine.correlations(dt_ps=2.0)
+    tau = lifetimes(corr)
+
+Author: Scientific Analysis Suite
+Date: October 2026
+"""
+
+import numpy as np
+from scipy.spatial import cKDTree
+from scipy.integrate import trapezoid
+
+from steinhardt import wrap_positions
+from proximity import C60Proximity
+
+R_CUT = 3.5  # Å, O...O
+ANGLE_CUT = 30.0  # degrees, H-O...O
+SHELL_EDGES = (5.0, 8.0)  # Å from the nearest C60 carbon
+SHELL_NAMES = ('first_shell', 'second_shell', 'bulk')
+BATCH_ELEMENTS = 2 ** 22  # pairs x FFT length per batch
+
+
+def find_hbonds(o_pos, h_pos, box, r_cut=R_CUT, angle_cut=ANGLE_CUT):
+    """
+    All H-bonds of one frame as (donor, acceptor, h) index arrays
+
+    h_pos holds the two hydrogens of water k at rows 2k and 2k+1, or is a
+    (2, N, 3) array of the first and second hydrogens (FrameBuffers.hydrogens).
+    """
+    o_wrapped, box = wrap_positions(o_pos, box)
+    pairs = cKDTree(o_wrapped, boxsize=box).query_pairs(r_cut, output_type='ndarray')
+    empty = np.empty(0, dtype=np.int64)
+    if len(pairs) == 0:
+        return empty, empty, empty
+
+    o_pos = np.asarray(o_pos, dtype=np.float64)
+    h_pos = np.asarray(h_pos, dtype=np.float64)
+    per_hydrogen = h_pos if h_pos.ndim == 3 else (h_pos[0::2], h_pos[1::2])
+    cos_cut = np.cos(np.radians(angle_cut))
+    donors, acceptors, hydrogens = [], [], []
+    for donor, acceptor in ((pairs[:, 0], pairs[:, 1]), (pairs[:, 1], pairs[:, 0])):
+        oo = o_pos[acceptor] - o_pos[donor]
+        oo -= box * np.round(oo / box)
+        oo /= np.linalg.norm(oo, axis=1)[:, None]
+        for h in (0, 1):
+            oh = per_hydrogen[h][donor] - o_pos[donor]
+            oh -= box * np.round(oh / box)
+            oh /= np.linalg.norm(oh, axis=1)[:, None]
+            bonded = np.sum(oh * oo, axis=1) > cos_cut
+            donors.append(donor[bonded])
+            acceptors.append(acceptor[bonded])
+            hydrogens.append(np.full(int(bonded.sum()), h))
+    return (np.concatenate(donors).astype(np.int64), np.concatenate(acceptors).astype(np.int64),
+            np.concatenate(hydrogens).astype(np.int64))
+
+
+def encode_keys(donor, acceptor, h, n_waters):
+    return (donor * n_waters + acceptor) * 2 + h
+
+
+def decode_keys(keys, n_waters):
+    """(donor, acceptor, h) from bond keys"""
+    keys = np.asarray(keys, dtype=np.int64)
+    pair, h = np.divmod(keys, 2)
+    donor, acceptor = np.divmod(pair, n_waters)
+    return donor, acceptor, h
+
+
+def _remaining_run_lengths(h):
+    """R[p, t] = number of consecutive bonded frames starting at t (0 if unbonded)"""
+    n_pairs, n_frames = h.shape
+    padded = np.zeros((n_pairs, n_frames + 1), dtype=bool)
+    padded[:, :n_frames] = h
+    idx = np.arange(n_frames + 1, dtype=np.int32)
+    next_gap = np.where(padded, n_frames + 1, idx)
+    next_gap = np.minimum.accumulate(next_gap[:, ::-1], axis=1)[:, ::-1]
+    return np.where(h, next_gap[:, :n_frames] - idx[:n_frames], 0)
+
+
+class HBondDynamics:
+    """Collects per-frame H-bond keys and computes C(t), S(t) per shell"""
+
+    def __init__(self, n_waters, shell_edges=SHELL_EDGES, shell_names=SHELL_NAMES,
+                 r_cut=R_CUT, angle_cut=ANGLE_CUT):
+        self.n_waters = n_waters
+        self.shell_edges = shell_edges
+        self.shell_names = shell_names
+        self.r_cut = r_cut
+        self.angle_cut = angle_cut
+        self.frame_keys = []
+        self.frame_shells = []
+
+    @property
+    def n_frames(self):
+        return len(self.frame_keys)
+
+    def add_frame(self, o_pos, h_pos, box, carbon_pos=None, proximity=None):
+        """
+        Store the H-bonds of the next frame; returns their number
+
+        Shells come from proximity (the frame's C60Proximity) or, if only
+        carbon_pos is given, from a proximity built here.
+        """
+        donor, acceptor, h = find_hbonds(o_pos, h_pos, box, self.r_cut, self.angle_cut)
+        keys = encode_keys(donor, acceptor, h, self.n_waters)
+        order = np.argsort(keys)
+        if proximity is None and carbon_pos is not None and len(carbon_pos):
+            proximity = C60Proximity(carbon_pos, box)
+        if proximity is not None:
+            shells = proximity.shell_index(o_pos, self.shell_edges)[donor[order]]
+        else:
+            shells = np.full(len(keys), -1, dtype=np.int8)
+        self.frame_keys.append(keys[order])
+        self.frame_shells.append(shells)
+        return len(keys)
+
+    def pair_lists(self):
+        """Compact sparse form: concatenated keys, shells and frame offsets"""
+        offsets = np.zeros(self.n_frames + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(k) for k in self.frame_keys])
+        keys = np.concatenate(self.frame_keys) if self.frame_keys else np.empty(0, dtype=np.int64)
+        shells = np.concatenate(self.frame_shells) if self.frame_shells else np.empty(0, dtype=np.int8)
+        return keys, shells, offsets
+
+    def save_pairs(self, path):
+        keys, shells, offsets = self.pair_lists()
+        np.savez_compressed(path, keys=keys, shells=shells, offsets=offsets,
+                            n_waters=self.n_waters, shell_edges=np.asarray(self.shell_edges))
+        return path
+
+    def groups(self):
+        """Correlation groups: 'all' plus one per shell when shells were tagged"""
+        tagged = any(len(s) and s[0] >= 0 for s in self.frame_shells)
+        return ['all'] + (list(self.shell_names) if tagged else [])
+
+    def correlations(self, dt_ps, max_lag=None):
+        """
+        {'lag_ps', 'C_<group>', 'S_<group>'} for lags 0..max_lag frames
+        (default: half the trajectory)
+        """
+        n_frames = self.n_frames
+        if n_frames < 2:
+            return {}
+        max_lag = min(max_lag or n_frames // 2, n_frames - 1)
+        keys, shells, offsets = self.pair_lists()
+        frames = np.repeat(np.arange(n_frames), np.diff(offsets))
+        pair_keys, pair_idx = np.unique(keys, return_inverse=True)
+        order = np.argsort(pair_idx, kind='stable')
+        pair_idx, frames, shells = pair_idx[order], frames[order], shells[order]
+        n_pairs = len(pair_keys)
+
+        groups = self.groups()
+        group_shell = {name: (None if name == 'all' else k - 1) for k, name in enumerate(groups)}
+        nfft = 1 << int(np.ceil(np.log2(2 * n_frames)))
+        spectra = {g: np.zeros(nfft // 2 + 1, dtype=np.complex128) for g in groups}
+        run_counts = {g: np.zeros(n_frames + 2, dtype=np.int64) for g in groups}
+
+        batch = max(1, BATCH_ELEMENTS // nfft)
+        bounds = np.searchsorted(pair_idx, np.arange(0, n_pairs + batch, batch))
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            if start == stop:
+                continue
+            rows = pair_idx[start:stop] - pair_idx[start]
+            n_rows = rows[-1] + 1
+            h = np.zeros((n_rows, n_frames), dtype=bool)
+            h[rows, frames[start:stop]] = True
+            shell = np.full((n_rows, n_frames), -1, dtype=np.int8)
+            shell[rows, frames[start:stop]] = shells[start:stop]
+            remaining = _remaining_run_lengths(h)
+            f_h = np.fft.rfft(h.astype(np.float64), n=nfft, axis=1)
+            for g in groups:
+                origin = h if group_shell[g] is None else (shell == group_shell[g])
+                f_origin = f_h if group_shell[g] is None else np.fft.rfft(origin.astype(np.float64), n=nfft, axis=1)
+                spectra[g] += np.sum(np.conj(f_origin) * f_h, axis=0)
+                run_counts[g] += np.bincount(remaining[origin], minlength=n_frames + 2)[:n_frames + 2]
+
+        lags = np.arange(max_lag + 1)
+        result = {'lag_ps': lags * dt_ps}
+        for g in groups:
+            in_group = np.ones(len(frames), dtype=bool) if group_shell[g] is None else shells == group_shell[g]
+            per_frame = np.bincount(frames[in_group], minlength=n_frames)
+            # Origins tau <= T-1-t are the ones with a partner frame at tau + t
+            origins = np.cumsum(per_frame)[n_frames - 1 - lags].astype(np.float64)
+            origins = np.where(origins > 0, origins, np.nan)
+            intermittent = np.fft.irfft(spectra[g], n=nfft)[:max_lag + 1]
+            # S numerator: origins whose bond survives (remaining run > t)
+            surviving = np.cumsum(run_counts[g][::-1])[::-1]
+            result[f'C_{g}'] = intermittent / origins
+            result[f'S_{g}'] = surviving[lags + 1] / origins
+        return result
+
+
+def lifetimes(correlations):
+    """
+    Integrated lifetimes (ps, trapezoid up to the first zero or the last
+    lag) and 1/e times of every C_* / S_* curve
+    """
+    lag = correlations.get('lag_ps')
+    out = {}
+    if lag is None:
+        return out
+    for name, curve in correlations.items():
+        if name == 'lag_ps':
+            continue
+        curve = np.nan_to_num(np.asarray(curve, dtype=np.float64))
+        below = np.nonzero(curve <= 0)[0]
+        end = below[0] + 1 if len(below) else len(curve)
+        out[f'tau_{name}'] = float(trapezoid(curve[:end], lag[:end])) if end > 1 else 0.0
+        crossing = np.nonzero(curve < np.exp(-1))[0]
+        out[f't_1e_{name}'] = float(lag[crossing[0]]) if len(crossing) else None
+    return out
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Per-Stage Timing and Memory Instrumentation
+===========================================
+
+Lightweight stage recorder for the analyzer classes:
+
+- ``with stage('load_trajectory', epsilon=eps):`` or ``@instrumented()``
+- Each stage records wall time, CPU time, peak RSS during the stage (and
+  how much it rose above the RSS at entry) and bytes read (/proc/self/io
+  rchar, includes page-cache hits)
+- Per-stage peak RSS: the kernel high-water mark is cleared on stage entry
+  (memory_admission.restart_peak_rss) and carried into the enclosing
+  stage; where it cannot be cleared the record holds the process-lifetime
+  peak instead, marked peak_rss_scope='process'
+- Stages nest; a record's path is the chain of enclosing stages, so the
+  records form a flame graph (self time = wall time minus child stages)
+- Disabled (the default) ``stage()`` returns a shared no-op context manager
+  and ``@instrumented`` calls straight through
+
+Enabling sets ANALYSIS_PROFILE_DIR, so child processes (subprocess mode,
+warm pool workers, gpu_scheduler workers) record as well. Each process
+appends its records to <dir>/stages_<pid>.jsonl whenever its outermost
+stage closes; ANALYSIS_PROFILE_ROOT names an implicit outermost stage
+(used by run_all_modules.py for subprocess runs).
+
+Usage:
+    python instrumentation.py /path/to/profile_dir          # flame report
+    python instrumentation.py /path/to/profile_dir --folded out.folded
+
+Author: Scientific Analysis Suite
+Date: October 2026
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import functools
+from pathlib import Path
+
+from memory_admission import restart_peak_rss, vm_hwm_mb
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+PROFILE_DIR_ENV = 'ANALYSIS_PROFILE_DIR'
+PROFILE_ROOT_ENV = 'ANALYSIS_PROFILE_ROOT'
+
+_ENABLED = False
+_OUTPUT_DIR = None
+_RECORDS = []
+_LOCAL = threading.local()
+_LOCK = threading.Lock()
+_COUNTER = [0]
+
+
+def _process_peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _bytes_read():
+    try:
+        with open('/proc/self/io') as f:
+            for line in f:
+                if line.startswith('rchar:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def enable(output_dir=None):
+    """Turn recording on (and for child processes when output_dir is given)"""
+    global _ENABLED, _OUTPUT_DIR
+    _ENABLED = True
+    if output_dir is not None:
+        _OUTPUT_DIR = Path(output_dir)
+        _OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+        os.environ[PROFILE_DIR_ENV] = str(_OUTPUT_DIR)
+
+
+def disable():
+    global _ENABLED
+    _ENABLED = False
+    os.environ.pop(PROFILE_DIR_ENV, None)
+
+
+def is_enabled():
+    return _ENABLED
+
+
+def _stack():
+    stack = getattr(_LOCAL, 'stack', None)
+    if stack is None:
+        root = os.environ.get(PROFILE_ROOT_ENV)
+        stack = _LOCAL.stack = [(root, None, None, None)] if root else []
+    return stack
+
+
+def _label(name, epsilon):
+    return name if epsilon is None else f"{name}[eps={epsilon:.2f}]"
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """Context manager recording one stage execution"""
+
+    def __init__(self, name, epsilon=None):
+        self.name = name
+        self.epsilon = epsilon
+
+    def __enter__(self):
+        stack = _stack()
+        with _LOCK:
+            _COUNTER[0] += 1
+            self.id = f"{os.getpid()}:{_COUNTER[0]}"
+        self.parent = stack[-1][1] if stack else None
+        # Nested stages inherit the epsilon; only the stage that sets it is labelled
+        inherited = stack[-1][2] if stack else None
+        label = _label(self.name, self.epsilon if self.epsilon != inherited else None)
+        if self.epsilon is None:
+            self.epsilon = inherited
+        self.path = ';'.join([entry[0] for entry in stack] + [label])
+        self.parent_stage = stack[-1][3] if stack else None
+        stack.append((label, self.id, self.epsilon, self))
+        # The high-water mark so far belongs to the enclosing stage
+        carried = restart_peak_rss()
+        if carried is not None:
+            if self.parent_stage is not None and self.parent_stage.peak is not None:
+                self.parent_stage.peak = max(self.parent_stage.peak, carried)
+            self.rss0 = self.peak = vm_hwm_mb()
+        else:
+            self.rss0, self.peak = _process_peak_rss_mb(), None
+        self.read0 = _bytes_read()
+        self.cpu0 = time.process_time()
+        self.wall0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self.wall0
+        cpu = time.process_time() - self.cpu0
+        if self.peak is not None:
+            rss = max(self.peak, vm_hwm_mb() or 0.0)
+            if self.parent_stage is not None and self.parent_stage.peak is not None:
+                self.parent_stage.peak = max(self.parent_stage.peak, rss)
+        else:
+            rss = _process_peak_rss_mb()
+        read = _bytes_read()
+        stack = _stack()
+        stack.pop()
+        record = {
+            'id': self.id, 'parent': self.parent, 'path': self.path,
+            'stage': self.name, 'epsilon': self.epsilon, 'pid': os.getpid(),
+            'wall_s': wall, 'cpu_s': cpu,
+            'peak_rss_mb': rss,
+            'peak_rss_scope': 'stage' if self.peak is not None else 'process',
+            'rss_growth_mb': rss - self.rss0 if rss is not None else None,
+            'bytes_read': read - self.read0 if read is not None else None,
+            'failed': exc_type is not None,
+        }
+        with _LOCK:
+            _RECORDS.append(record)
+        if not stack or stack[-1][1] is None:
+            flush()
+        return False
+
+
+def stage(name, epsilon=None):
+    """Context manager timing one stage (no-op while disabled)"""
+    if not _ENABLED:
+        return _NULL_STAGE
+    return _Stage(name, epsilon)
+
+
+def instrumented(name=None):
+    """
+    Decorator recording every call as a stage; on methods the epsilon of
+    the instance (self.epsilon, when it is a number) tags the record
+    """
+    def decorate(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _ENABLED:
+                return func(*args, **kwargs)
+            epsilon = getattr(args[0], 'epsilon', None) if args else None
+            if not isinstance(epsilon, (int, float)):
+                epsilon = None
+            with _Stage(stage_name, epsilon):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def drain():
+    """Return and clear the records of this process"""
+    with _LOCK:
+        records = list(_RECORDS)
+        _RECORDS.clear()
+    return records
+
+
+def flush():
+    """Append buffered records to <output dir>/stages_<pid>.jsonl (if configured)"""
+    if _OUTPUT_DIR is None:
+        return
+    records = drain()
+    if not records:
+        return
+    with open(_OUTPUT_DIR / f"stages_{os.getpid()}.jsonl", 'a') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+
+def load_stage_records(directory):
+    """All records written to a profile directory by any process"""
+    records = []
+    for path in sorted(Path(directory).glob('stages_*.jsonl')):
+        with open(path) as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    return records
+
+
+def _self_times(records):
+    child_wall = {}
+    for r in records:
+        if r['parent'] is not None:
+            child_wall[r['parent']] = child_wall.get(r['parent'], 0.0) + r['wall_s']
+    return {r['id']: max(r['wall_s'] - child_wall.get(r['id'], 0.0), 0.0) for r in records}
+
+
+def aggregate(records):
+    """One row per stage path: calls, wall/self/CPU seconds, peak RSS, bytes read"""
+    self_time = _self_times(records)
+    rows = {}
+    for r in records:
+        row = rows.setdefault(r['path'], {
+            'path': r['path'], 'stage': r['stage'], 'epsilon': r['epsilon'], 'calls': 0,
+            'wall_s': 0.0, 'self_s': 0.0, 'cpu_s': 0.0, 'peak_rss_mb': None, 'bytes_read': 0,
+        })
+        row['calls'] += 1
+        row['wall_s'] += r['wall_s']
+        row['self_s'] += self_time[r['id']]
+        row['cpu_s'] += r['cpu_s']
+        if r['peak_rss_mb'] is not None:
+            row['peak_rss_mb'] = max(row['peak_rss_mb'] or 0.0, r['peak_rss_mb'])
+        if r['bytes_read'] is not None:
+            row['bytes_read'] += r['bytes_read']
+    return sorted(rows.values(), key=lambda row: row['path'])
+
+
+def folded_stacks(records):
+    """Flame-graph input (flamegraph.pl / speedscope): 'a;b;c <self microseconds>'"""
+    self_time = _self_times(records)
+    totals = {}
+    for r in records:
+        totals[r['path']] = totals.get(r['path'], 0.0) + self_time[r['id']]
+    return [f"{path} {int(round(seconds * 1e6))}" for path, seconds in sorted(totals.items()) if seconds > 0]
+
+
+def write_folded(records, path):
+    with open(path, 'w') as f:
+        f.write('\n'.join(folded_stacks(records)) + '\n')
+    return path
+
+
+def print_flame_report(records, max_depth=4, min_fraction=0.01):
+    """Indented stage tree with wall share, CPU time, peak RSS and bytes read"""
+    rows = aggregate(records)
+    roots_total = sum(r['wall_s'] for r in records if r['parent'] is None) or 1.0
+    print(f"{'Stage':<60} {'Wall (s)':>10} {'Share':>7} {'CPU (s)':>10} {'Peak RSS':>10} {'Read (MB)':>10}")
+    print("-" * 112)
+    for row in rows:
+        depth = row['path'].count(';')
+        if depth >= max_depth or row['wall_s'] / roots_total < min_fraction:
+            continue
+        label = '  ' * depth + row['path'].split(';')[-1]
+        if row['calls'] > 1:
+            label += f" x{row['calls']}"
+        rss = f"{row['peak_rss_mb']:.0f} MB" if row['peak_rss_mb'] is not None else '-'
+        print(f"{label[:60]:<60} {row['wall_s']:>10.2f} {row['wall_s'] / roots_total:>6.1%} "
+              f"{row['cpu_s']:>10.2f} {rss:>10} {row['bytes_read'] / 1e6:>10.1f}")
+
+
+def _auto_enable():
+    """Child processes inherit recording through the environment"""
+    directory = os.environ.get(PROFILE_DIR_ENV)
+    if directory:
+        enable(directory)
+
+
+_auto_enable()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report stage records of a profile directory')
+    parser.add_argument('directory')
+    parser.add_argument('--folded', default=None, help='Also write folded stacks to this file')
+    parser.add_argument('--depth', type=int, default=4)
+    args = parser.parse_args()
+
+    records = load_stage_records(args.directory)
+    if not records:
+        print(f"✗ No stage records in {args.directory}")
+        return 1
+    print_flame_report(records, max_depth=args.depth)
+    if args.folded:
+        print(f"\n✓ Folded stacks: {write_folded(records, args.folded)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
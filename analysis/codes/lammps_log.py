@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Streaming LAMMPS Log Tokenizer
+==============================
+
+Single pass over a LAMMPS log (equilibration.log, equil_run.out, ...) that
+splits it into run segments - one per ``run``/``minimize`` - and extracts for
+every segment:
+
+- Loop time, procs, steps and atoms
+- Performance line (ns/day, hours/ns, timesteps/s, katom-step/s)
+- CPU use and MPI task x OpenMP thread layout
+- MPI task timing breakdown (Pair/Bond/Kspace/Neigh/Comm/Output/Modify/Other)
+- Nlocal/Nghost/Neighs averages and neighbor-list statistics
+- Per-rank memory allocation (min/avg/max) and GPU "Device Time Info"
+- Stage: the stem of the first dump file active during the run
+  (nvt_thermalization, pre_equilibration, ..., production), from the
+  dump/undump commands echoed in log files; empty in screen output
+
+A segment opens at its "Per MPI rank memory allocation" line (printed during
+run setup, also present in screen output that does not echo input commands)
+and owns everything up to the next one, including the Device Time Info
+block that the GPU package prints after the run statistics.
+
+build_performance_table() parses many logs in parallel into one typed table.
+
+Usage:
+    python lammps_log.py /path/to/epsilon_0.60/equilibration.log
+
+Author: Scientific Analysis Suite
+Date: October 2026
+"""
+
+import re
+import sys
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+TIMING_SECTIONS = ['Pair', 'Bond', 'Kspace', 'Neigh', 'Comm', 'Output', 'Modify', 'Other']
+TIMING_FIELDS = ['min', 'avg', 'max', 'varavg', 'pct']
+DEVICE_TIME_FIELDS = ['Data Transfer', 'Neighbor copy', 'Neighbor build', 'Force calc', 'Device Overhead']
+
+_NUM = r'([-+]?\d*\.?\d+(?:[eE][-+]?\d+)?)'
+_LOOP_RE = re.compile(rf'Loop time of {_NUM} on (\d+) procs for (\d+) steps with (\d+) atoms')
+_PERF_RE = re.compile(rf'Performance:\s+(?:{_NUM} ns/day,\s+{_NUM} hours/ns,\s+)?'
+                      rf'(?:{_NUM} timesteps/s)?(?:,\s+{_NUM} katom-step/s)?')
+_CPU_RE = re.compile(rf'{_NUM}% CPU use with (\d+) MPI tasks x (\d+) OpenMP threads')
+_MEM_RE = re.compile(rf'Per MPI rank memory allocation \(min/avg/max\) = {_NUM} \| {_NUM} \| {_NUM} Mbytes')
+_PER_PROC_RE = re.compile(rf'^(Nlocal|Nghost|Neighs):\s+{_NUM} ave\s+{_NUM} max\s+{_NUM} min')
+_DEVICE_RE = re.compile(rf'^([A-Za-z /]+?):\s+{_NUM}\s+(s|MB)\.')
+_WALL_RE = re.compile(r'Total wall time: (\d+):(\d+):(\d+)')
+
+_SCALAR_STATS = {
+    'Total # of neighbors': 'total_neighbors',
+    'Ave neighs/atom': 'ave_neighs_per_atom',
+    'Ave special neighs/atom': 'ave_special_neighs_per_atom',
+    'Neighbor list builds': 'neighbor_list_builds',
+    'Dangerous builds': 'dangerous_builds',
+}
+
+# Column -> dtype of the typed table (nullable ints keep missing values)
+INT_COLUMNS = ['run_index', 'requested_steps', 'procs', 'steps', 'atoms', 'mpi_tasks',
+               'omp_threads', 'thermo_rows', 'first_step', 'last_step',
+               'total_neighbors', 'neighbor_list_builds', 'dangerous_builds']
+FLOAT_COLUMNS = (['loop_time', 'ns_per_day', 'hours_per_ns', 'timesteps_per_sec',
+                  'katom_steps_per_sec', 'cpu_use_pct',
+                  'memory_min_mb', 'memory_avg_mb', 'memory_max_mb',
+                  'nlocal_avg', 'nghost_avg', 'neighs_avg',
+                  'ave_neighs_per_atom', 'ave_special_neighs_per_atom',
+                  'device_seconds', 'device_max_mem_mb'] +
+                 [f'{sec.lower()}_{field}' for sec in TIMING_SECTIONS for field in TIMING_FIELDS])
+TEXT_COLUMNS = ['command', 'stage', 'complete']
+
+
+def _float(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _new_segment(run_index, command, stage=''):
+    segment = {'run_index': run_index, 'command': command, 'stage': stage, 'requested_steps': None,
+               'thermo_rows': 0, 'first_step': None, 'last_step': None,
+               'device_seconds': np.nan, 'complete': False}
+    if command:
+        parts = command.split('#')[0].split()
+        if parts[0] == 'run' and len(parts) > 1 and parts[1].isdigit():
+            segment['requested_steps'] = int(parts[1])
+    return segment
+
+
+def iter_log_runs(log_file):
+    """
+    Yield one dict per run segment of a LAMMPS log, reading line by line
+
+    The trailing segment of a log that is still being written is yielded with
+    complete=False.
+    """
+    segment = None
+    pending_command = None
+    dumps = {}  # active dump id -> file stem, in definition order
+    run_index = 0
+    in_thermo = False
+    in_timing = False
+    in_device = False
+
+    with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            stripped = line.strip()
+            if not stripped:
+                in_timing = False
+                continue
+
+            # Input echo (log files only): remember the command for the next segment
+            if line.startswith('run ') or line.startswith('minimize '):
+                pending_command = stripped
+                continue
+            if line.startswith('dump ') or line.startswith('undump '):
+                parts = stripped.split('#')[0].split()
+                if parts[0] == 'undump' and len(parts) > 1:
+                    dumps.pop(parts[1], None)
+                elif parts[0] == 'dump' and len(parts) > 5:
+                    dumps[parts[1]] = Path(parts[5]).name.split('.')[0]
+                continue
+
+            if stripped.startswith('Per MPI rank memory'):
+                if segment is not None:
+                    yield segment
+                segment = _new_segment(run_index, pending_command or '', next(iter(dumps.values()), ''))
+                pending_command = None
+                run_index += 1
+                in_thermo = in_timing = in_device = False
+                m = _MEM_RE.search(stripped)
+                if m:
+                    segment['memory_min_mb'], segment['memory_avg_mb'], segment['memory_max_mb'] = \
+                        (float(x) for x in m.groups())
+                continue
+
+            if segment is None:
+                continue
+
+            first = stripped.split(None, 1)[0]
+
+            if first == 'Step':
+                in_thermo = True
+                continue
+
+            if in_thermo:
+                if first.isdigit():
+                    step = int(first)
+                    if segment['first_step'] is None:
+                        segment['first_step'] = step
+                    segment['last_step'] = step
+                    segment['thermo_rows'] += 1
+                    continue
+                in_thermo = False
+
+            if first == 'Loop':
+                m = _LOOP_RE.search(stripped)
+                if m:
+                    segment['loop_time'] = float(m.group(1))
+                    segment['procs'], segment['steps'], segment['atoms'] = \
+                        (int(x) for x in m.groups()[1:])
+                continue
+
+            if first == 'Performance:':
+                m = _PERF_RE.search(stripped)
+                if m:
+                    for key, value in zip(['ns_per_day', 'hours_per_ns', 'timesteps_per_sec',
+                                           'katom_steps_per_sec'], m.groups()):
+                        segment[key] = _float(value)
+                continue
+
+            if 'CPU use with' in stripped:
+                m = _CPU_RE.search(stripped)
+                if m:
+                    segment['cpu_use_pct'] = float(m.group(1))
+                    segment['mpi_tasks'] = int(m.group(2))
+                    segment['omp_threads'] = int(m.group(3))
+                continue
+
+            if stripped.startswith('Section |'):
+                in_timing = True
+                continue
+
+            if in_timing:
+                if first in TIMING_SECTIONS:
+                    cells = [c.strip() for c in stripped.split('|')]
+                    prefix = first.lower()
+                    for field, cell in zip(TIMING_FIELDS, cells[1:]):
+                        segment[f'{prefix}_{field}'] = _float(cell) if cell else np.nan
+                continue
+
+            if first in ('Nlocal:', 'Nghost:', 'Neighs:'):
+                m = _PER_PROC_RE.match(stripped)
+                if m:
+                    segment[f'{m.group(1).lower()}_avg'] = float(m.group(2))
+                continue
+
+            if ' = ' in stripped:
+                key, _, value = stripped.partition(' = ')
+                column = _SCALAR_STATS.get(key.strip())
+                if column is not None:
+                    segment[column] = _float(value)
+                    if column == 'dangerous_builds':
+                        segment['complete'] = True
+                    continue
+
+            if 'Device Time Info' in stripped:
+                in_device = True
+                segment['device_seconds'] = 0.0
+                continue
+
+            if in_device:
+                m = _DEVICE_RE.match(stripped)
+                if m:
+                    name, value, unit = m.group(1).strip(), float(m.group(2)), m.group(3)
+                    if unit == 's' and name in DEVICE_TIME_FIELDS:
+                        segment['device_seconds'] += value
+                    elif name == 'Max Mem / Proc':
+                        segment['device_max_mem_mb'] = value
+                elif stripped.startswith('-----') and 'device_max_mem_mb' in segment:
+                    in_device = False
+                continue
+
+    if segment is not None:
+        yield segment
+
+
+def total_wall_time(log_file):
+    """Seconds from the final "Total wall time" line (None if the run is unfinished)"""
+    with open(log_file, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 4096))
+        tail = f.read().decode('utf-8', errors='ignore')
+    m = _WALL_RE.search(tail)
+    if not m:
+        return None
+    h, mnt, s = (int(x) for x in m.groups())
+    return h * 3600 + mnt * 60 + s
+
+
+def parse_log_runs(log_file):
+    """All run segments of one log as a typed DataFrame"""
+    return to_typed_table(list(iter_log_runs(log_file)))
+
+
+def to_typed_table(rows):
+    """Turn segment dicts into a DataFrame with a fixed column set and dtypes"""
+    df = pd.DataFrame(rows)
+    for col in INT_COLUMNS:
+        df[col] = pd.array(df[col] if col in df else [None] * len(df), dtype='Int64')
+    for col in FLOAT_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64') if col in df \
+            else np.full(len(df), np.nan)
+    for col in ('command', 'stage'):
+        df[col] = (df[col] if col in df else pd.Series([''] * len(df))).astype('string')
+    df['complete'] = (df['complete'] if 'complete' in df else pd.Series([False] * len(df))).astype(bool)
+    leading = [c for c in df.columns if c not in INT_COLUMNS + FLOAT_COLUMNS + TEXT_COLUMNS]
+    return df[leading + ['run_index', 'command', 'stage', 'complete'] +
+              [c for c in INT_COLUMNS if c != 'run_index'] + FLOAT_COLUMNS]
+
+
+def _parse_job(job):
+    key, log_file = job
+    rows = list(iter_log_runs(log_file))
+    wall = total_wall_time(log_file)
+    for row in rows:
+        row['epsilon'] = key
+        row['log_file'] = Path(log_file).name
+        row['log_wall_time'] = wall
+    return rows
+
+
+def build_performance_table(log_files, max_workers=None):
+    """
+    Parse {epsilon: log_path} in parallel into one typed table (one row per run)
+
+    Leading columns are epsilon, log_file and log_wall_time (seconds from the
+    log's "Total wall time" line, NaN if unfinished).
+    """
+    jobs = [(key, str(path)) for key, path in log_files.items() if Path(path).exists()]
+    if not jobs:
+        return to_typed_table([])
+
+    workers = max_workers or min(len(jobs), os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = list(pool.map(_parse_job, jobs))
+    else:
+        parsed = [_parse_job(job) for job in jobs]
+
+    rows = [row for rows in parsed for row in rows]
+    df = to_typed_table(rows)
+    df['log_wall_time'] = pd.to_numeric(df['log_wall_time'], errors='coerce').astype('float64')
+    df = df[['epsilon', 'log_file', 'log_wall_time'] +
+            [c for c in df.columns if c not in ('epsilon', 'log_file', 'log_wall_time')]]
+    return df.sort_values(['epsilon', 'run_index']).reset_index(drop=True)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python lammps_log.py <log_file> [<log_file> ...]")
+        sys.exit(1)
+    table = build_performance_table({i: p for i, p in enumerate(sys.argv[1:])})
+    with pd.option_context('display.width', 200, 'display.max_columns', 12):
+        print(table[['epsilon', 'run_index', 'stage', 'steps', 'loop_time', 'timesteps_per_sec',
+                     'kspace_pct', 'pair_pct', 'memory_max_mb', 'neighbor_list_builds',
+                     'device_seconds', 'complete']])
+
+
+if __name__ == '__main__':
+    main()
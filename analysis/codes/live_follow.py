@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Follow Mode for Still-Running Simulations
+=========================================
+
+Building blocks that let the analysis modules process LAMMPS output while
+the job is still writing it:
+
+- ThermoFollower     - new complete rows of a thermo .dat file as a DataFrame
+- DumpFrameFollower  - new complete frames of a text dump (production.lammpstrj)
+- RunningStats       - mergeable running mean/variance/min/max (Chan/Welford),
+                       including the cumulative series for running-average plots
+- follow_loop        - poll/sleep loop that stops when every run finished or
+                       failed (.completion_status SUCCESS/COMPLETE or FAILED;
+                       failures are reported), when no data arrived for
+                       max_idle seconds, or on Ctrl-C
+
+Reading is incremental (log_monitor.FileTail): only bytes appended since the
+previous poll are read, and a partially written line or frame is held back
+until it is complete.
+
+Used by the --follow options of modules 01, 02, 04 and 16.
+
+Author: Scientific Analysis Suite
+Date: October 2026
+"""
+
+import io
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from log_monitor import FileTail
+
+DUMP_READ_CHUNK = 64 * 1024 * 1024  # bytes of dump text parsed per read
+
+
+FINISHED_STATUSES = ('SUCCESS', 'COMPLETE')
+FAILED_STATUS = 'FAILED'
+
+
+def completion_status(eps_dir):
+    """Upper-cased content of .completion_status written by the LAMMPS driver, or None"""
+    try:
+        return (Path(eps_dir) / '.completion_status').read_text().strip().upper() or None
+    except OSError:
+        return None
+
+
+def simulation_finished(eps_dir):
+    """True once the driver reported a successful run"""
+    return completion_status(eps_dir) in FINISHED_STATUSES
+
+
+def simulation_failed(eps_dir):
+    """True if the driver reported a failed run"""
+    return completion_status(eps_dir) == FAILED_STATUS
+
+
+class RunningStats:
+    """Running count/mean/M2/min/max over the columns of row batches"""
+
+    def __init__(self, n_columns=1):
+        self.n = 0
+        self.mean = np.zeros(n_columns)
+        self.m2 = np.zeros(n_columns)
+        self.min = np.full(n_columns, np.inf)
+        self.max = np.full(n_columns, -np.inf)
+
+    def update(self, values):
+        """
+        Add a batch of rows (shape (k,) or (k, n_columns)) and return the
+        cumulative (mean, population std) after each added row
+        """
+        x = np.asarray(values, dtype=np.float64)
+        if x.ndim == 1:
+            x = x[:, None]
+        k = len(x)
+        if k == 0:
+            empty = np.empty((0, x.shape[1]))
+            return empty, empty
+
+        # Shift by the current mean (or the first row) to limit cancellation
+        shift = self.mean if self.n > 0 else x[0]
+        y = x - shift
+        j = np.arange(1, k + 1)[:, None]
+        cs = np.cumsum(y, axis=0)
+        batch_mean = cs / j
+        batch_m2 = np.maximum(np.cumsum(y * y, axis=0) - cs * batch_mean, 0.0)
+
+        n_total = self.n + j
+        delta = (shift + batch_mean) - self.mean
+        means = self.mean + delta * j / n_total
+        m2s = self.m2 + batch_m2 + delta ** 2 * self.n * j / n_total
+
+        self.n += k
+        self.mean = means[-1].copy()
+        self.m2 = m2s[-1].copy()
+        self.min = np.minimum(self.min, x.min(axis=0))
+        self.max = np.maximum(self.max, x.max(axis=0))
+        return means, np.sqrt(m2s / n_total)
+
+    def std(self, ddof=1):
+        if self.n <= ddof:
+            return np.full_like(self.mean, np.nan)
+        return np.sqrt(self.m2 / (self.n - ddof))
+
+
+class ThermoFollower:
+    """Incrementally parse a whitespace-separated thermo file with '#' comments"""
+
+    def __init__(self, path, names):
+        self.path = Path(path)
+        self.names = list(names)
+        self.tail = FileTail(self.path, from_start=True)
+        self.rows_read = 0
+
+    def poll(self):
+        """DataFrame of the complete rows appended since the last poll"""
+        lines = [line for line in self.tail.read_new()
+                 if line.strip() and not line.lstrip().startswith('#')]
+        if not lines:
+            return pd.DataFrame(columns=self.names)
+        df = pd.read_csv(io.StringIO('\n'.join(lines)), sep=r'\s+', header=None, names=self.names)
+        self.rows_read += len(df)
+        return df
+
+
+class DumpFrame:
+    """One LAMMPS dump frame with atoms sorted by id"""
+
+    def __init__(self, timestep, bounds, columns, data):
+        self.timestep = timestep
+        self.bounds = bounds  # (3, 2) lo/hi
+        self.dimensions = (bounds[:, 1] - bounds[:, 0]).astype(np.float32)
+        order = np.argsort(data[:, columns.index('id')]) if 'id' in columns else slice(None)
+        data = data[order]
+        self.ids = data[:, columns.index('id')].astype(np.int64) if 'id' in columns else None
+        self.types = data[:, columns.index('type')].astype(np.int64) if 'type' in columns else None
+        self.positions = self._positions(columns, data, bounds)
+
+    @staticmethod
+    def _positions(columns, data, bounds):
+        for names, scaled in ((('x', 'y', 'z'), False), (('xu', 'yu', 'zu'), False),
+                              (('xs', 'ys', 'zs'), True), (('xsu', 'ysu', 'zsu'), True)):
+            if all(n in columns for n in names):
+                pos = data[:, [columns.index(n) for n in names]]
+                if scaled:
+                    pos = bounds[:, 0] + pos * (bounds[:, 1] - bounds[:, 0])
+                return pos.astype(np.float32)
+        raise ValueError(f"No coordinate columns in dump: {columns}")
+
+    def select_type(self, atom_type):
+        return self.positions[self.types == atom_type]
+
+
+class DumpFrameFollower:
+    """Yield complete frames appended to a text dump since the last poll"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.tail = FileTail(self.path, from_start=True)
+        self.pending = []
+        self.frames_read = 0
+
+    def _split_frames(self, lines):
+        """Cut lines into complete frames; keep the unfinished remainder pending"""
+        lines = self.pending + lines
+        frames = []
+        i = 0
+        while i < len(lines):
+            if not lines[i].startswith('ITEM: TIMESTEP'):
+                i += 1
+                continue
+            # Header: TIMESTEP, value, NUMBER OF ATOMS, n, BOX BOUNDS + 3 lines, ATOMS
+            if i + 9 > len(lines):
+                break
+            n_atoms = int(lines[i + 3])
+            end = i + 9 + n_atoms
+            if end > len(lines):
+                break
+            frames.append(lines[i:end])
+            i = end
+        self.pending = lines[i:]
+        return frames
+
+    @staticmethod
+    def _parse(frame_lines):
+        timestep = int(frame_lines[1])
+        bounds = np.array([[float(v) for v in frame_lines[5 + k].split()[:2]] for k in range(3)])
+        columns = frame_lines[8].split()[2:]
+        n_atoms = int(frame_lines[3])
+        data = np.array(' '.join(frame_lines[9:]).split(), dtype=np.float64).reshape(n_atoms, -1)
+        return DumpFrame(timestep, bounds, columns, data)
+
+    def poll(self, stride=1):
+        """
+        Generator over the new complete frames (reads the backlog in bounded
+        chunks); with stride > 1 only every stride-th frame is parsed
+        """
+        while True:
+            lines = self.tail.read_new(max_bytes=DUMP_READ_CHUNK)
+            if not lines:
+                return
+            for frame_lines in self._split_frames(lines):
+                self.frames_read += 1
+                if (self.frames_read - 1) % stride == 0:
+                    yield self._parse(frame_lines)
+
+
+def follow_loop(poll, interval=60.0, max_idle=None, finished=None, run_dirs=None):
+    """
+    Call poll() every `interval` seconds until finished() is true (after one
+    final drain), no new data arrived for `max_idle` seconds, or Ctrl-C.
+
+    poll() returns the number of new items it processed. With run_dirs,
+    follow mode ends once every run there finished or failed; failed runs
+    are reported and make the loop return False.
+    """
+    run_dirs = [Path(d) for d in run_dirs or []]
+    if run_dirs:
+        finished = lambda: all(simulation_finished(d) or simulation_failed(d) for d in run_dirs)
+    last_data = time.time()
+    try:
+        while True:
+            if poll():
+                last_data = time.time()
+            if finished is not None and finished():
+                poll()
+                failed = [d.name for d in run_dirs if simulation_failed(d)]
+                if failed:
+                    print(f"  ✗ Simulation(s) FAILED: {', '.join(failed)} - follow mode stopped")
+                    return False
+                print("  ✓ Simulation(s) finished - follow mode done")
+                return True
+            if max_idle is not None and time.time() - last_data > max_idle:
+                print(f"  No new data for {max_idle:g} s - leaving follow mode")
+                return False
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\n  Follow mode interrupted")
+        return False
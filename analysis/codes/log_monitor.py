@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Tail-Seek Monitor for Running LAMMPS Simulations
+================================================
+
+Tracks in-progress simulations without re-reading their logs:
+
+- The first poll of a file reads only a window at its end
+- Later polls read just the bytes appended since the stored offset
+- Offsets, inodes and (time, step) samples persist between invocations
+  in a small JSON state file, so repeated status checks stay cheap
+- Truncated or replaced files (new inode / smaller size) are re-tailed
+
+For every epsilon the monitor reports the current step, the live speed in
+ns/day (from step progress between polls, falling back to the last LAMMPS
+Performance line) and the ETA of the production run.
+
+Used by check_status.py (one-shot table or --watch loop).
+
+Author: Scientific Analysis Suite
+Date: October 2026
+"""
+
+import os
+import json
+import time
+from pathlib import Path
+
+TIMESTEP = 2.0  # fs
+PRODUCTION_START = 600000
+TOTAL_PRODUCTION_STEPS = 1000000  # "run 1000000" in the production stage
+
+INITIAL_WINDOW = 64 * 1024        # bytes read from the end on the first poll
+MAX_INITIAL_WINDOW = 8 * 1024 * 1024
+MAX_RATE_SAMPLES = 20
+
+
+class FileTail:
+    """
+    Incremental reader returning only complete lines appended since the last call
+
+    from_start=True makes the first call return the whole file instead of a
+    tail window (used when every line matters, e.g. follow-mode analysis).
+    """
+
+    def __init__(self, path, state=None, from_start=False):
+        self.path = Path(path)
+        self.from_start = from_start
+        state = state or {}
+        self.offset = state.get('offset')
+        self.inode = state.get('inode')
+
+    def state(self):
+        return {'offset': self.offset, 'inode': self.inode}
+
+    def _read(self, f, start, end):
+        f.seek(start)
+        data = f.read(end - start)
+        last_newline = data.rfind(b'\n')
+        if last_newline < 0:
+            return [], start
+        # Keep a partially written last line for the next poll
+        complete = data[:last_newline + 1]
+        return complete.decode('utf-8', errors='ignore').splitlines(), start + last_newline + 1
+
+    def read_new(self, max_bytes=None):
+        """
+        Lines appended since the previous call (a tail window on the first call)
+
+        max_bytes caps a single read; the remainder is returned by later calls.
+        """
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return []
+
+        if self.offset is None or stat.st_ino != self.inode or stat.st_size < self.offset:
+            self.inode = stat.st_ino
+            self.offset = None
+            if not self.from_start:
+                return self.read_tail(INITIAL_WINDOW)
+            self.offset = 0
+
+        if stat.st_size == self.offset:
+            return []
+        end = stat.st_size if max_bytes is None else min(stat.st_size, self.offset + max_bytes)
+        with open(self.path, 'rb') as f:
+            lines, self.offset = self._read(f, self.offset, end)
+        return lines
+
+    def pending_bytes(self):
+        """Bytes written after the current offset"""
+        try:
+            return max(0, self.path.stat().st_size - (self.offset or 0))
+        except OSError:
+            return 0
+
+    def read_tail(self, window):
+        """Last complete lines within `window` bytes of the end; moves the offset to EOF"""
+        stat = self.path.stat()
+        self.inode = stat.st_ino
+        start = max(0, stat.st_size - window)
+        with open(self.path, 'rb') as f:
+            lines, self.offset = self._read(f, start, stat.st_size)
+        if start > 0 and lines:
+            lines = lines[1:]  # first line of the window is usually cut
+        return lines
+
+
+def _is_thermo_row(tokens):
+    """Thermo output row: integer step followed by numbers only"""
+    if len(tokens) < 2 or not tokens[0].isdigit():
+        return False
+    try:
+        for token in tokens[1:]:
+            float(token)
+    except ValueError:
+        return False
+    return True
+
+
+class SimulationMonitor:
+    """Live status of one epsilon directory from its log and production thermo file"""
+
+    def __init__(self, epsilon, eps_dir, state=None, production_steps=TOTAL_PRODUCTION_STEPS):
+        self.epsilon = epsilon
+        self.eps_dir = Path(eps_dir)
+        state = state or {}
+        self.log = FileTail(self.eps_dir / 'equilibration.log', state.get('log'))
+        self.thermo = FileTail(self.eps_dir / 'production_detailed_thermo.dat', state.get('thermo'))
+        self.log_step = state.get('log_step', 0)
+        self.thermo_step = state.get('thermo_step', 0)
+        self.perf_ns_day = state.get('perf_ns_day')
+        self.run_steps = state.get('run_steps')
+        self.run_start = state.get('run_start')
+        self.pending_run = state.get('pending_run')
+        self.error = state.get('error')
+        self.finished = state.get('finished', False)
+        self.samples = state.get('samples', [])
+        self.default_production_steps = production_steps
+
+    def state(self):
+        return {
+            'log': self.log.state(), 'thermo': self.thermo.state(),
+            'log_step': self.log_step, 'thermo_step': self.thermo_step,
+            'perf_ns_day': self.perf_ns_day, 'run_steps': self.run_steps,
+            'run_start': self.run_start, 'pending_run': self.pending_run,
+            'error': self.error, 'finished': self.finished, 'samples': self.samples,
+        }
+
+    def _consume_log(self, lines):
+        found_step = False
+        for line in lines:
+            if line.startswith('run '):
+                parts = line.split('#')[0].split()
+                if len(parts) > 1 and parts[1].isdigit():
+                    self.pending_run = int(parts[1])
+                continue
+            stripped = line.strip()
+            if not stripped:
+                continue
+            if stripped.startswith('Performance:'):
+                try:
+                    self.perf_ns_day = float(stripped.split()[1])
+                except (IndexError, ValueError):
+                    pass
+            elif stripped.startswith('ERROR'):
+                self.error = stripped[:120]
+            elif stripped.startswith('Total wall time'):
+                self.finished = True
+            else:
+                tokens = stripped.split()
+                if _is_thermo_row(tokens):
+                    step = int(tokens[0])
+                    if self.pending_run is not None:
+                        self.run_steps, self.run_start = self.pending_run, step
+                        self.pending_run = None
+                    self.log_step = step
+                    found_step = True
+        return found_step
+
+    def _consume_thermo(self, lines):
+        for line in reversed(lines):
+            tokens = line.split()
+            if tokens and tokens[0].isdigit():
+                self.thermo_step = int(tokens[0])
+                return
+
+    @property
+    def step(self):
+        return max(self.log_step, self.thermo_step)
+
+    def poll(self, now=None):
+        """Read new bytes of both files and return the current status dict"""
+        now = now if now is not None else time.time()
+        first_poll = self.log.offset is None
+        found = self._consume_log(self.log.read_new())
+
+        # A fresh tail window can end in run statistics or start after the current
+        # "run N" command; widen it until both a thermo row and the command show up
+        window = INITIAL_WINDOW
+        while (first_poll and (not found or self.run_start is None) and self.log.path.exists()
+               and window < MAX_INITIAL_WINDOW):
+            window *= 4
+            found = self._consume_log(self.log.read_tail(window))
+            if window >= self.log.path.stat().st_size:
+                break
+
+        self._consume_thermo(self.thermo.read_new())
+
+        if not self.samples or self.samples[-1][1] != self.step:
+            self.samples.append([now, self.step])
+            self.samples = self.samples[-MAX_RATE_SAMPLES:]
+
+        return self.status(now)
+
+    def live_ns_per_day(self):
+        """Speed from the (time, step) samples; None until progress was observed"""
+        if len(self.samples) < 2:
+            return None
+        (t0, s0), (t1, s1) = self.samples[0], self.samples[-1]
+        if t1 - t0 < 1.0 or s1 <= s0:
+            return None
+        return (s1 - s0) * TIMESTEP * 1e-6 / ((t1 - t0) / 86400.0)
+
+    def completion_flag(self):
+        flag_file = self.eps_dir / '.completion_status'
+        try:
+            return flag_file.read_text().strip().upper()
+        except OSError:
+            return None
+
+    def status(self, now=None):
+        production_steps = self.default_production_steps
+        if self.run_start is not None and self.run_start >= PRODUCTION_START and self.run_steps:
+            production_steps = self.run_steps
+        target = PRODUCTION_START + production_steps
+
+        ns_per_day = self.live_ns_per_day() or self.perf_ns_day
+        prod_steps = max(0, self.step - PRODUCTION_START)
+        flag = self.completion_flag()
+
+        # An explicit FAILED flag wins over a step count that reached the target
+        if flag == 'FAILED':
+            state = 'FAILED'
+        elif flag == 'SUCCESS':
+            state = 'COMPLETE'
+        elif self.error:
+            state = 'FAILED'
+        elif self.step >= target:
+            state = 'COMPLETE'
+        elif self.step >= PRODUCTION_START:
+            state = 'PRODUCTION'
+        elif self.step > 0:
+            state = 'EQUILIBRATION'
+        else:
+            state = 'NOT STARTED'
+
+        eta_seconds = None
+        if state in ('PRODUCTION', 'EQUILIBRATION') and ns_per_day:
+            steps_per_sec = ns_per_day * 1e6 / TIMESTEP / 86400.0
+            eta_seconds = (target - self.step) / steps_per_sec
+
+        if self.step < PRODUCTION_START:
+            progress = self.step / PRODUCTION_START * 100
+        else:
+            progress = min(prod_steps / production_steps * 100, 100.0)
+
+        return {
+            'epsilon': self.epsilon,
+            'state': state,
+            'step': self.step,
+            'progress': progress,
+            'prod_time_ns': prod_steps * TIMESTEP / 1e6,
+            'target_ns': production_steps * TIMESTEP / 1e6,
+            'ns_per_day': ns_per_day,
+            'eta_seconds': eta_seconds,
+            'error': self.error,
+        }
+
+
+class StatusMonitor:
+    """Monitors for all epsilons with offsets persisted in a JSON state file"""
+
+    def __init__(self, eps_dirs, state_file=None, production_steps=TOTAL_PRODUCTION_STEPS):
+        self.state_file = Path(state_file) if state_file else None
+        saved = self._load_state()
+        self.monitors = [SimulationMonitor(eps, eps_dir, saved.get(str(Path(eps_dir))), production_steps)
+                         for eps, eps_dir in eps_dirs.items()]
+
+    def _load_state(self):
+        if self.state_file is None or not self.state_file.exists():
+            return {}
+        try:
+            with open(self.state_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_state(self):
+        if self.state_file is None:
+            return
+        tmp = self.state_file.with_suffix('.tmp')
+        try:
+            with open(tmp, 'w') as f:
+                json.dump({str(m.eps_dir): m.state() for m in self.monitors}, f)
+            os.replace(tmp, self.state_file)
+        except OSError:
+            pass
+
+    def poll(self):
+        """One refresh cycle; returns (list of status dicts, elapsed seconds)"""
+        start = time.perf_counter()
+        now = time.time()
+        statuses = [m.poll(now) for m in self.monitors]
+        self.save_state()
+        return statuses, time.perf_counter() - start
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return '-'
+    hours, rem = divmod(int(seconds), 3600)
+    return f"{hours}h{rem // 60:02d}m"
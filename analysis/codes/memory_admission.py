@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Memory-Budget Admission Control for the Master Runner
+=====================================================
+
+Decides which analysis modules may run at the same time, so that several
+heavy modules (07 loads every universe, 11 renders figures) are never
+co-scheduled beyond the node's memory:
+
+- FootprintHistory: peak RSS (MB) of the last HISTORY_RUNS runs of every
+  module in a JSON file; the estimate of a module is its largest recorded
+  peak x HEADROOM, else a declared estimate, else DEFAULT_FOOTPRINT_MB
+- AdmissionController: admits a job while running jobs < cores and the
+  sum of their estimates + its own stays within the memory budget; a job
+  larger than the whole budget runs alone. Pending jobs are tried
+  heaviest first, lighter ones fill the remaining room
+- Memory budget: explicit MB, else ANALYSIS_RUNNER_MEMORY_MB, else
+  BUDGET_FRACTION of the physical memory
+- Peak RSS of one module inside a reused worker: reset_peak_rss() clears
+  the kernel's high-water mark (/proc/self/clear_refs) before the module
+  and peak_rss_mb() reads VmHWM after it; where that is not possible the
+  process-lifetime ru_maxrss is an upper bound. Nested windows (the
+  instrumentation stages inside a module) use restart_peak_rss(): the
+  high-water mark it clears still counts towards peak_rss_mb()
+
+Usage:
+    history = FootprintHistory(base_dir / 'analysis' / 'module_footprints.json')
+    admission = AdmissionController(runner_budget_mb(), cores=8)
+    estimates = {m: history.estimate(m, declared.get(m)) for m in modules}
+    for job in admission.admissible(pending, estimates):
+        admission.acquire(job, estimates[job]); start(job)
+    ...
+    admission.release(job); history.record(job, peak_mb); history.save()
+
+Author: Scientific Analysis Suite
+Date: October 2026
+"""
+
+import os
+import json
+import tempfile
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+RUNNER_MEMORY_ENV = 'ANALYSIS_RUNNER_MEMORY_MB'
+BUDGET_FRACTION = 0.8
+DEFAULT_FOOTPRINT_MB = 1024.0
+HEADROOM = 1.2
+HISTORY_RUNS = 5
+
+# High-water marks cleared by restart_peak_rss() since the last reset_peak_rss()
+_CLEARED_PEAK_MB = [0.0]
+
+
+def physical_memory_mb():
+    """Installed memory in MB (None when the platform does not report it)"""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') / 1024 ** 2
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def runner_budget_mb(value=None):
+    """Budget for all concurrent modules: value, else ANALYSIS_RUNNER_MEMORY_MB, else 80% of RAM"""
+    if value is None and os.environ.get(RUNNER_MEMORY_ENV):
+        value = float(os.environ[RUNNER_MEMORY_ENV])
+    if value is None:
+        total = physical_memory_mb()
+        value = BUDGET_FRACTION * total if total else float('inf')
+    return float(value)
+
+
+def _clear_refs():
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def vm_hwm_mb():
+    """The kernel's RSS high-water mark (VmHWM) since the last clear, None where unsupported"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss():
+    """Reset this process's RSS high-water mark (Linux); False where unsupported"""
+    _CLEARED_PEAK_MB[0] = 0.0
+    return _clear_refs()
+
+
+def restart_peak_rss():
+    """
+    Start a nested peak window: returns the high-water mark since the
+    previous reset/restart (None where it cannot be cleared) and clears
+    it; peak_rss_mb() keeps counting the cleared peak
+    """
+    hwm = vm_hwm_mb()
+    if hwm is None or not _clear_refs():
+        return None
+    _CLEARED_PEAK_MB[0] = max(_CLEARED_PEAK_MB[0], hwm)
+    return hwm
+
+
+def peak_rss_mb():
+    """Peak RSS since the last reset_peak_rss() (VmHWM), else over the process lifetime"""
+    hwm = vm_hwm_mb()
+    if hwm is not None:
+        return max(hwm, _CLEARED_PEAK_MB[0])
+    if resource is None:
+        return None
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def child_peak_rss_mb(rusage):
+    """Peak RSS (MB) from the rusage returned by os.wait4() for a child process"""
+    # KB on Linux, bytes on macOS
+    return rusage.ru_maxrss / (1024.0 ** 2 if os.uname().sysname == 'Darwin' else 1024.0)
+
+
+class FootprintHistory:
+    """Recorded peak RSS per module, persisted as JSON between runs"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.peaks = {}
+        if self.path.exists():
+            try:
+                self.peaks = json.loads(self.path.read_text())
+            except (OSError, ValueError):
+                self.peaks = {}
+
+    def estimate(self, key, declared=None):
+        """Largest recorded peak x HEADROOM, else declared, else DEFAULT_FOOTPRINT_MB"""
+        peaks = self.peaks.get(str(key))
+        if peaks:
+            return max(peaks) * HEADROOM
+        return float(declared) if declared else DEFAULT_FOOTPRINT_MB
+
+    def source(self, key):
+        return 'measured' if self.peaks.get(str(key)) else 'declared'
+
+    def record(self, key, peak_mb):
+        if peak_mb is None:
+            return
+        runs = self.peaks.setdefault(str(key), [])
+        runs.append(round(float(peak_mb), 1))
+        del runs[:-HISTORY_RUNS]
+
+    def save(self):
+        """Atomic rewrite of the JSON file"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=self.path.name, suffix='.tmp', dir=self.path.parent)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.peaks, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+        return self.path
+
+
+class AdmissionController:
+    """Memory and core accounting for concurrently running jobs"""
+
+    def __init__(self, budget_mb, cores):
+        self.budget_mb = float(budget_mb)
+        self.cores = max(1, int(cores))
+        self.running = {}
+
+    @property
+    def in_use_mb(self):
+        return sum(self.running.values())
+
+    def admissible(self, pending, estimates):
+        """
+        Jobs of pending that can start now, heaviest first (not yet
+        acquired); with nothing running the heaviest always starts
+        """
+        admitted = []
+        in_use, running = self.in_use_mb, len(self.running)
+        for job in sorted(pending, key=lambda j: -estimates[j]):
+            if running == 0 or (running < self.cores and in_use + estimates[job] <= self.budget_mb):
+                admitted.append(job)
+                in_use += estimates[job]
+                running += 1
+        return admitted
+
+    def acquire(self, job, estimate_mb):
+        self.running[job] = float(estimate_mb)
+
+    def release(self, job):
+        self.running.pop(job, None)
+
+    def describe(self):
+        budget = f"{self.budget_mb / 1024:.1f} GB" if self.budget_mb != float('inf') else 'unlimited'
+        return f"memory budget {budget}, {self.cores} cores"
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Persistent In-Process Host for Analysis Modules
+===============================================
+
+Runs the numbered analysis modules inside a warm worker pool instead of
+starting one Python interpreter per module.
+
+- Every worker imports the heavy stack (NumPy, SciPy, pandas, matplotlib,
+  seaborn, MDAnalysis, Numba) exactly once at start-up
+- Modules are discovered by their entry point: a top-level ``run(context)``
+- A loaded module object is kept per worker, so Numba kernels compiled on
+  its first run are reused by later runs in the same worker
+- An AnalysisContext per worker shares loaded tables between modules
+  (e.g. the thermo files read by modules 01, 02 and 09)
+
+Subprocess isolation is still available from run_all_modules.py
+(``--mode subprocess``); ``--mode inline`` runs in the current process.
+
+Usage:
+    python module_host.py --list
+    python module_host.py 01 02 13 --workers 2
+
+Author: Scientific Analysis Suite
+Date: October 2026
+"""
+
+import io
+import os
+import sys
+import ast
+import time
+import argparse
+import traceback
+import importlib
+import importlib.util
+import multiprocessing
+from contextlib import redirect_stdout, redirect_stderr
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+
+import instrumentation
+from memory_admission import reset_peak_rss, peak_rss_mb
+
+CODES_DIR = Path(__file__).resolve().parent
+ENTRY_POINT = 'run'
+
+# Imported once per worker; missing optional packages are skipped
+HEAVY_IMPORTS = [
+    'numpy', 'scipy', 'scipy.optimize', 'scipy.signal', 'scipy.stats',
+    'pandas', 'matplotlib', 'matplotlib.pyplot', 'seaborn',
+    'MDAnalysis', 'numba', 'tqdm',
+]
+
+# Per-process host state (set by _warm_worker or by an inline host)
+_CONTEXT = None
+_LOADED_MODULES = {}
+
+
+class AnalysisContext:
+    """State shared by all modules executed in one host process"""
+
+    def __init__(self, base_dir=None, codes_dir=CODES_DIR):
+        self.base_dir = Path(base_dir) if base_dir else None
+        self.codes_dir = Path(codes_dir)
+        self.cache = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def get_or_load(self, key, loader):
+        """Return cache[key], calling loader() only on the first request"""
+        if key in self.cache:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+            self.cache[key] = loader()
+        return self.cache[key]
+
+    def read_table(self, path, **read_csv_kwargs):
+        """
+        pandas.read_csv with a per-process cache keyed by path, mtime and
+        arguments; callers get a copy so they may add columns freely
+        """
+        import pandas as pd
+        path = Path(path)
+        stat = path.stat()
+        key = ('table', str(path), stat.st_mtime_ns, stat.st_size,
+               repr(sorted(read_csv_kwargs.items())))
+        df = self.get_or_load(key, lambda: pd.read_csv(path, **read_csv_kwargs))
+        return df.copy()
+
+
+def current_context():
+    """Context of the host process, or None when a module runs standalone"""
+    return _CONTEXT
+
+
+def read_table(path, **read_csv_kwargs):
+    """Shared-cache read when hosted, plain pandas.read_csv otherwise"""
+    if _CONTEXT is not None:
+        return _CONTEXT.read_table(path, **read_csv_kwargs)
+    import pandas as pd
+    return pd.read_csv(path, **read_csv_kwargs)
+
+
+def has_entry_point(module_file):
+    """True if the file defines a top-level run(context) (checked without importing)"""
+    try:
+        tree = ast.parse(Path(module_file).read_text())
+    except (OSError, SyntaxError):
+        return False
+    return any(isinstance(node, ast.FunctionDef) and node.name == ENTRY_POINT
+               for node in tree.body)
+
+
+def discover_modules(codes_dir=CODES_DIR):
+    """Map module number -> file for every NN_*.py exposing the entry point"""
+    modules = {}
+    for path in sorted(Path(codes_dir).glob('[0-9][0-9]_*.py')):
+        if has_entry_point(path):
+            modules[int(path.name[:2])] = path
+    return modules
+
+
+def preload_heavy_stack():
+    """Import the shared scientific stack; returns {name: seconds}"""
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+    except ImportError:
+        pass
+    timings = {}
+    for name in HEAVY_IMPORTS:
+        start = time.time()
+        try:
+            importlib.import_module(name)
+        except Exception:
+            continue
+        timings[name] = time.time() - start
+    return timings
+
+
+def load_module(module_file):
+    """Import a numbered module by path (cached per process)"""
+    module_file = Path(module_file).resolve()
+    key = str(module_file)
+    if key not in _LOADED_MODULES:
+        name = 'analysis_module_' + module_file.stem
+        spec = importlib.util.spec_from_file_location(name, module_file)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+        if not callable(getattr(module, ENTRY_POINT, None)):
+            raise AttributeError(f"{module_file.name} has no {ENTRY_POINT}(context) entry point")
+        _LOADED_MODULES[key] = module
+    return _LOADED_MODULES[key]
+
+
+def _warm_worker(base_dir, codes_dir):
+    """Pool initializer: path setup, heavy imports and a fresh context"""
+    global _CONTEXT
+    if str(codes_dir) not in sys.path:
+        sys.path.insert(0, str(codes_dir))
+    if base_dir and Path(base_dir).is_dir():
+        os.chdir(base_dir)
+    preload_heavy_stack()
+    _CONTEXT = AnalysisContext(base_dir, codes_dir)
+
+
+def profile_root(module_file):
+    """Outermost instrumentation stage name of a module, e.g. 'module04'"""
+    return f"module{Path(module_file).stem.split('_')[0]}"
+
+
+def execute_module(module_file, capture_output=True, log_file=None):
+    """
+    Run one module's entry point in this process
+
+    Returns a dict with success flag, elapsed time, error text, the peak
+    RSS of this run and (when captured) the module's stdout. With log_file
+    the module's stdout and stderr are streamed to that file instead.
+    """
+    global _CONTEXT
+    if _CONTEXT is None:
+        _CONTEXT = AnalysisContext(codes_dir=Path(module_file).parent)
+
+    out, err = io.StringIO(), io.StringIO()
+    log = open(log_file, 'w', buffering=1) if log_file else None
+    if log is not None:
+        out = err = log
+    reset_peak_rss()
+    start = time.time()
+    error = None
+    try:
+        with instrumentation.stage(profile_root(module_file)):
+            if capture_output or log is not None:
+                with redirect_stdout(out), redirect_stderr(err):
+                    load_module(module_file).run(_CONTEXT)
+            else:
+                load_module(module_file).run(_CONTEXT)
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            error = f"SystemExit({e.code})"
+    except BaseException:
+        error = traceback.format_exc()
+    finally:
+        try:
+            import matplotlib.pyplot as plt
+            plt.close('all')
+        except Exception:
+            pass
+        if log is not None:
+            if error:
+                log.write(error)
+            log.close()
+
+    return {
+        'success': error is None,
+        'elapsed': time.time() - start,
+        'error': error,
+        'stdout': '' if log is not None else out.getvalue(),
+        'stderr': '' if log is not None else err.getvalue(),
+        'peak_rss_mb': peak_rss_mb(),
+        'pid': os.getpid(),
+    }
+
+
+class ModuleHost:
+    """Warm process pool executing modules through their run(context) entry point"""
+
+    def __init__(self, base_dir=None, codes_dir=CODES_DIR, workers=None):
+        self.base_dir = base_dir
+        self.codes_dir = Path(codes_dir)
+        self.workers = workers or min(os.cpu_count() or 1, 8)
+        self.pool = None
+
+    def start(self):
+        if self.pool is None:
+            # Child processes that exist already are not pool workers (see _worker_processes)
+            self._other_children = {p.pid for p in multiprocessing.active_children()}
+            self.pool = ProcessPoolExecutor(max_workers=self.workers,
+                                            initializer=_warm_worker,
+                                            initargs=(self.base_dir, self.codes_dir))
+        return self
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+            self.pool = None
+
+    def _worker_processes(self):
+        """
+        The pool's worker processes: the executor's private process table
+        when it has one, else the child processes started since start()
+        """
+        processes = getattr(self.pool, '_processes', None)
+        if isinstance(processes, dict):
+            return list(processes.values())
+        return [p for p in multiprocessing.active_children() if p.pid not in self._other_children]
+
+    def restart(self):
+        """Kill every worker (e.g. one stuck past its deadline) and start a fresh pool"""
+        if self.pool is not None:
+            # The executor cannot cancel a running task; its workers are killed directly
+            for process in self._worker_processes():
+                try:
+                    process.kill()
+                except (OSError, ValueError, AttributeError):
+                    pass  # already gone
+            # Not waiting: a worker that could not be killed must not block the host
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+        return self.start()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def run_modules(self, module_files, admission=None, estimates=None, log_files=None, timeout=None):
+        """
+        Yield (key, result_dict) as modules finish; module_files maps key -> path
+
+        With a memory_admission.AdmissionController and per-key estimates
+        (MB), a module is only submitted once it fits the memory budget
+        next to the modules already running. log_files maps key -> file
+        receiving that module's output. A module still running timeout
+        seconds after its submission is reported as timed out; the pool is
+        then restarted and the other running modules are submitted again.
+        """
+        self.start()
+        log_files = log_files or {}
+        pending = list(module_files)
+        futures = {}
+        deadlines = {}
+        
+        def submit(key):
+            futures[self.pool.submit(execute_module, str(module_files[key]),
+                                     log_file=log_files.get(key))] = key
+            if timeout is not None:
+                deadlines[key] = (time.time(), time.time() + timeout)
+        
+        def failure(error, elapsed=0.0, **extra):
+            return {'success': False, 'elapsed': elapsed, 'error': error,
+                    'stdout': '', 'stderr': '', 'peak_rss_mb': None, 'pid': None, **extra}
+        
+        def collect(future):
+            key = futures.pop(future)
+            deadlines.pop(key, None)
+            if admission:
+                admission.release(key)
+            try:
+                return key, future.result()
+            except Exception as e:
+                # Worker died (e.g. segfault in a native extension)
+                return key, failure(repr(e))
+        
+        while pending or futures:
+            admitted = admission.admissible(pending, estimates) if admission else list(pending)
+            # No more submissions than workers, so a module's deadline starts when it does
+            for key in admitted[:max(0, self.workers - len(futures))]:
+                if admission:
+                    admission.acquire(key, estimates[key])
+                pending.remove(key)
+                submit(key)
+            wait_for = None
+            if deadlines:
+                wait_for = max(0.0, min(end for _, end in deadlines.values()) - time.time())
+            done, _ = wait(futures, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield collect(future)
+            
+            expired = [key for key, (_, end) in deadlines.items() if time.time() >= end]
+            if expired:
+                # Modules that finished since wait() returned keep their results
+                for future in [f for f in futures if f.done()]:
+                    yield collect(future)
+                if not any(key in expired for key in futures.values()):
+                    continue
+                # Killing the stuck worker breaks the pool: the modules running
+                # next to it are queued again on a fresh one
+                for future, key in list(futures.items()):
+                    if admission:
+                        admission.release(key)
+                    started, _ = deadlines.pop(key)
+                    if key in expired:
+                        yield key, failure(f"Execution timeout (>{timeout:g} s)",
+                                           time.time() - started, timed_out=True)
+                    else:
+                        pending.insert(0, key)
+                futures.clear()
+                self.restart()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run analysis modules in a warm in-process host')
+    parser.add_argument('modules', nargs='*', help='Module numbers (default: all discovered)')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--list', action='store_true', help='List discovered modules and exit')
+    args = parser.parse_args()
+
+    available = discover_modules()
+    if args.list:
+        for num, path in available.items():
+            print(f"  {num:02d}  {path.name}")
+        return
+
+    selected = {int(m): available[int(m)] for m in args.modules if int(m) in available} \
+        if args.modules else available
+    if not selected:
+        print("✗ No modules with a run(context) entry point selected")
+        sys.exit(1)
+
+    start = time.time()
+    with ModuleHost(workers=args.workers) as host:
+        for num, result in host.run_modules(selected):
+            status = '✓' if result['success'] else '✗'
+            print(f"  {status} Module {num:02d} ({result['elapsed']:.1f}s, pid {result['pid']})")
+            if not result['success']:
+                print(f"    {result['error'].strip().splitlines()[-1]}")
+    print(f"Total wall time: {time.time() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Out-of-Core Chunked Trajectory Reductions
+=========================================
+
+Bounded-memory execution layer for trajectory reductions that would
+otherwise materialize a (frames x atoms x 3) array:
+
+- Memory budget: ANALYSIS_MEMORY_BUDGET_MB (default 1024 MB) or an explicit
+  budget_mb; every tile is sized from it
+- ScratchStore: arrays that fit in a quarter of the budget live in RAM,
+  larger ones are np.memmap files in a scratch directory
+  (ANALYSIS_SCRATCH_DIR, default the system temp dir) removed on close()
+- lag_tiles(): (frame chunk + lag halo) x (atom tile) blocks covering every
+  time origin exactly once
+- Chunk-combine reductions with update(tile, n_origins) / combine(other) /
+  result():
+    MSDReduction          <|r(t0+t) - r(t0)|²>, minimum image if box is given
+    CorrelationReduction  <x(t0) . x(t0+t)>
+    HistogramReduction    counts on fixed bin edges (update(values))
+  reduce_lagged(array, reduction) drives a lag reduction over an array or
+  memmap tile by tile; partial results of several workers combine exactly
+
+Usage:
+    with ScratchStore() as store:
+        stack = PositionStack(n_frames, n_atoms, store=store)   # frame_buffers.py
+        for ts in u.trajectory:
+            stack.append(oxygens.positions)
+        lags, msd = reduce_lagged(stack.filled(), MSDReduction(range(1, 50), box))
+
+Author: Scientific Analysis Suite
+Date: October 2026
+"""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+MEMORY_BUDGET_ENV = 'ANALYSIS_MEMORY_BUDGET_MB'
+SCRATCH_DIR_ENV = 'ANALYSIS_SCRATCH_DIR'
+DEFAULT_BUDGET_MB = 1024
+TEMPORARY_FACTOR = 4  # float64 temporaries per stored element inside a reduction
+
+
+def memory_budget(budget_mb=None):
+    """Budget in bytes: budget_mb, else ANALYSIS_MEMORY_BUDGET_MB, else the default"""
+    if budget_mb is None:
+        budget_mb = float(os.environ.get(MEMORY_BUDGET_ENV, DEFAULT_BUDGET_MB))
+    return int(budget_mb * 1024 ** 2)
+
+
+class ScratchStore:
+    """Arrays in RAM while small, memory-mapped scratch files beyond that"""
+
+    def __init__(self, directory=None, budget_mb=None):
+        self.budget = memory_budget(budget_mb)
+        parent = directory or os.environ.get(SCRATCH_DIR_ENV) or tempfile.gettempdir()
+        self.parent = Path(parent)
+        self.directory = None
+        self.arrays = {}
+
+    def array(self, name, shape, dtype=np.float32):
+        """Zero-initialized array; a memmap if it exceeds a quarter of the budget"""
+        nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if nbytes <= self.budget // 4:
+            arr = np.zeros(shape, dtype=dtype)
+        else:
+            if self.directory is None:
+                self.parent.mkdir(parents=True, exist_ok=True)
+                self.directory = Path(tempfile.mkdtemp(prefix='analysis_scratch_', dir=self.parent))
+            arr = np.memmap(self.directory / f'{name}.dat', dtype=dtype, mode='w+', shape=tuple(shape))
+        self.arrays[name] = arr
+        return arr
+
+    @property
+    def spilled(self):
+        return [name for name, arr in self.arrays.items() if isinstance(arr, np.memmap)]
+
+    def close(self):
+        for arr in self.arrays.values():
+            if isinstance(arr, np.memmap):
+                arr._mmap.close()
+        self.arrays = {}
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def lag_tiles(n_frames, n_atoms, max_lag, bytes_per_item, budget):
+    """
+    (frame_start, frame_stop, halo_stop, atom_slice) tiles: origins
+    frame_start..frame_stop-1 of the atoms in atom_slice, read together with
+    the max_lag following frames (up to halo_stop). Each tile holds at most
+    about budget / bytes_per_item frame-atom items.
+    """
+    items = max(budget // max(bytes_per_item, 1), 1)
+    if items >= n_atoms * 2 * (max_lag + 1):
+        atom_step = n_atoms
+        frame_step = items // n_atoms - max_lag
+    else:
+        # Halo would dominate: fewer atoms per tile, frame chunks of one halo
+        atom_step = max(1, items // (2 * (max_lag + 1)))
+        frame_step = max_lag + 1
+    for a in range(0, n_atoms, atom_step):
+        atoms = slice(a, min(a + atom_step, n_atoms))
+        for start in range(0, n_frames, frame_step):
+            stop = min(start + frame_step, n_frames)
+            yield start, stop, min(stop + max_lag, n_frames), atoms
+
+
+class LagReduction:
+    """Sum of pair(x(t0), x(t0+t)) over origins and atoms for each lag t"""
+
+    def __init__(self, lags):
+        self.lags = np.asarray(list(lags), dtype=np.int64)
+        self.sums = np.zeros(len(self.lags), dtype=np.float64)
+        self.counts = np.zeros(len(self.lags), dtype=np.int64)
+
+    @property
+    def max_lag(self):
+        return int(self.lags.max()) if len(self.lags) else 0
+
+    def pair(self, a, b):
+        raise NotImplementedError
+
+    def update(self, tile, n_origins):
+        """tile: (frames, atoms, ...) whose first n_origins frames are time origins"""
+        tile = np.asarray(tile, dtype=np.float64)
+        for k, lag in enumerate(self.lags):
+            n = min(n_origins, len(tile) - lag)
+            if n <= 0:
+                continue
+            self.sums[k] += self.pair(tile[:n], tile[lag:lag + n]).sum()
+            self.counts[k] += n * tile.shape[1]
+        return self
+
+    def combine(self, other):
+        self.sums += other.sums
+        self.counts += other.counts
+        return self
+
+    def result(self):
+        """(lags, mean) for the lags that had at least one origin"""
+        valid = self.counts > 0
+        return self.lags[valid], self.sums[valid] / self.counts[valid]
+
+
+class MSDReduction(LagReduction):
+    """Mean squared displacement; displacements folded to the minimum image if box is given"""
+
+    def __init__(self, lags, box=None):
+        super().__init__(lags)
+        self.box = None if box is None else np.asarray(box, dtype=np.float64)[:3]
+
+    def pair(self, a, b):
+        d = b - a
+        if self.box is not None:
+            d -= self.box * np.round(d / self.box)
+        return np.sum(d * d, axis=-1)
+
+
+class CorrelationReduction(LagReduction):
+    """Time correlation <x(t0) . x(t0+t)> of scalar or vector series"""
+
+    def pair(self, a, b):
+        return a * b if a.ndim == 2 else np.sum(a * b, axis=-1)
+
+
+class HistogramReduction:
+    """Counts on fixed bin edges, accumulated chunk by chunk"""
+
+    def __init__(self, edges):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.float64)
+
+    def update(self, values, weights=None):
+        self.counts += np.histogram(values, bins=self.edges, weights=weights)[0]
+        return self
+
+    def combine(self, other):
+        self.counts += other.counts
+        return self
+
+    def result(self):
+        return self.edges, self.counts
+
+
+def reduce_lagged(array, reduction, budget_mb=None):
+    """Run a LagReduction over a (frames, atoms, ...) array or memmap in budget-sized tiles"""
+    n_frames, n_atoms = array.shape[:2]
+    per_atom = int(np.prod(array.shape[2:])) if array.ndim > 2 else 1
+    bytes_per_item = per_atom * (array.dtype.itemsize + TEMPORARY_FACTOR * 8)
+    for start, stop, halo_stop, atoms in lag_tiles(n_frames, n_atoms, reduction.max_lag,
+                                                   bytes_per_item, memory_budget(budget_mb)):
+        reduction.update(array[start:halo_stop, atoms], stop - start)
+    return reduction.result()
+
+
+def iter_frame_chunks(array, budget_mb=None):
+    """(start, chunk) blocks of whole frames that fit the budget (histogram inputs)"""
+    per_frame = max(array[0].nbytes * TEMPORARY_FACTOR, 1) if len(array) else 1
+    step = max(1, memory_budget(budget_mb) // per_frame)
+    for start in range(0, len(array), step):
+        yield start, np.asarray(array[start:start + step])
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+C60-Water Proximity Service
+===========================
+
+Periodic KD-trees on the C60 carbon atoms of one frame, shared by every
+per-frame consumer (coordination numbers, radial density, hydration shells,
+H-bond shell tagging, residence tracking):
+
+- One cKDTree(boxsize=box) per C60 cage (60 consecutive carbons each)
+- Batched queries for all oxygens at once, answered per C60:
+    distances_per_c60(points)      -> (N, n_c60) nearest-carbon distance of each cage
+    nearest(points)                -> distance to / index of the nearest cage
+    shell_membership(points, r)    -> (N, n_c60) within r of any carbon of the cage
+    count_within(points, r)        -> (n_c60,) number of points in each shell
+    pair_counts(points, r)         -> (n_c60,) carbon-point pairs within r
+    shell_index(points, edges)     -> shell number from the nearest-carbon distance
+- Nearest-distance results are cached per points array, so building one
+  C60Proximity per frame and passing it around queries each array once
+- The box must hold three finite positive lengths (ValueError otherwise),
+  so a missing or degenerate box cannot give a wrong minimum image
+
+Usage:
+    prox = C60Proximity(carbon_coords, box)
+    dist, cage = prox.nearest(oxygen_coords)
+    in_shell = prox.shell_membership(oxygen_coords, 5.0)
+
+Author: Scientific Analysis Suite
+Date: October 2026
+"""
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from steinhardt import wrap_positions
+
+C60_ATOMS = 60
+
+
+def check_box(box):
+    """Box lengths (first three entries) as float64; ValueError unless finite and positive"""
+    if box is None:
+        raise ValueError("no box dimensions")
+    lengths = np.asarray(box, dtype=np.float64).ravel()[:3]
+    if len(lengths) < 3 or not np.all(np.isfinite(lengths)) or np.any(lengths <= 0):
+        raise ValueError(f"invalid box dimensions {lengths.tolist()} (need three positive lengths)")
+    return lengths
+
+
+class C60Proximity:
+    """Per-frame periodic KD-trees over the C60 carbons"""
+
+    def __init__(self, carbon_pos, box, atoms_per_c60=C60_ATOMS):
+        self.carbons, self.box = wrap_positions(carbon_pos, check_box(box))
+        self.n_c60 = max(len(self.carbons) // atoms_per_c60, 1)
+        self.trees = [cKDTree(cage, boxsize=self.box)
+                      for cage in np.array_split(self.carbons, self.n_c60)]
+        self._wrapped = {}
+        self._distances = {}
+
+    def _points(self, points):
+        key = id(points)
+        if key not in self._wrapped:
+            # Keep a reference so the id cannot be reused within this frame
+            self._wrapped[key] = (points, wrap_positions(points, self.box)[0])
+        return self._wrapped[key][1]
+
+    def distances_per_c60(self, points):
+        """(N, n_c60) distance from every point to the nearest carbon of each cage"""
+        key = id(points)
+        if key not in self._distances:
+            wrapped = self._points(points)
+            self._distances[key] = np.column_stack([tree.query(wrapped)[0] for tree in self.trees])
+        return self._distances[key]
+
+    def nearest(self, points):
+        """Distance to the nearest carbon (any cage) and that cage's index"""
+        dist = self.distances_per_c60(points)
+        cage = np.argmin(dist, axis=1)
+        return dist[np.arange(len(dist)), cage], cage
+
+    def shell_membership(self, points, r_cut):
+        """(N, n_c60) bool: point within r_cut of any carbon of the cage"""
+        return self.distances_per_c60(points) < r_cut
+
+    def count_within(self, points, r_cut):
+        """Number of points within r_cut of each cage"""
+        return self.shell_membership(points, r_cut).sum(axis=0)
+
+    def pair_counts(self, points, r_cut):
+        """Number of (carbon, point) pairs closer than r_cut, per cage"""
+        wrapped = self._points(points)
+        return np.array([tree.query_ball_point(wrapped, r_cut, return_length=True).sum()
+                         for tree in self.trees])
+
+    def shell_index(self, points, edges):
+        """Shell number (0 = innermost) of every point from its nearest-carbon distance"""
+        dist, _ = self.nearest(points)
+        return np.searchsorted(np.asarray(edges), dist).astype(np.int8)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Columnar Per-Epsilon Results Container
+======================================
+
+Replaces the recursive list-to-JSON dumps of per-frame series with a
+compressed columnar container:
+
+- <stem>.npz            - one typed array per column (zip/deflate compressed)
+- <stem>.manifest.json  - small JSON manifest: column names, dtypes, shapes
+                          and run metadata
+
+Readers open the manifest only; each column is decompressed the first time
+it is accessed, so plotting code pays only for the columns it uses.
+
+Author: Scientific Analysis Suite
+Date: October 2026
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+FORMAT_NAME = 'columnar-npz'
+FORMAT_VERSION = 1
+
+
+def manifest_path(stem):
+    stem = Path(stem)
+    return stem.with_name(stem.name + '.manifest.json')
+
+
+def save_columnar_results(stem, columns, metadata=None, dtypes=None):
+    """
+    Write columns (name -> array-like) to <stem>.npz plus a JSON manifest
+
+    dtypes optionally maps column names to numpy dtypes; other columns keep
+    the dtype numpy infers. Returns the manifest path.
+    """
+    stem = Path(stem)
+    dtypes = dtypes or {}
+    arrays = {}
+    for name, values in columns.items():
+        if values is None:
+            continue
+        arrays[name] = np.asarray(values, dtype=dtypes.get(name))
+
+    data_file = stem.with_name(stem.name + '.npz')
+    np.savez_compressed(data_file, **arrays)
+
+    manifest = {
+        'format': FORMAT_NAME,
+        'version': FORMAT_VERSION,
+        'data_file': data_file.name,
+        'columns': {name: {'dtype': str(arr.dtype), 'shape': list(arr.shape)}
+                    for name, arr in arrays.items()},
+        'metadata': metadata or {},
+    }
+    out = manifest_path(stem)
+    with open(out, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return out
+
+
+class ColumnarResults:
+    """Read-only, lazily loaded mapping over a columnar results container"""
+
+    def __init__(self, manifest_file):
+        self.manifest_file = Path(manifest_file)
+        with open(self.manifest_file) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('format') != FORMAT_NAME:
+            raise ValueError(f"{self.manifest_file} is not a {FORMAT_NAME} manifest")
+        self.data_file = self.manifest_file.parent / self.manifest['data_file']
+        self.metadata = self.manifest.get('metadata', {})
+        self._npz = None
+        self._cache = {}
+
+    def keys(self):
+        return self.manifest['columns'].keys()
+
+    def __contains__(self, name):
+        return name in self.manifest['columns']
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.manifest['columns'])
+
+    def shape(self, name):
+        """Column shape from the manifest (does not touch the data file)"""
+        return tuple(self.manifest['columns'][name]['shape'])
+
+    def __getitem__(self, name):
+        if name not in self._cache:
+            if name not in self:
+                raise KeyError(name)
+            if self._npz is None:
+                self._npz = np.load(self.data_file, allow_pickle=False)
+            self._cache[name] = self._npz[name]
+        return self._cache[name]
+
+    def get(self, name, default=None):
+        return self[name] if name in self else default
+
+    def close(self):
+        if self._npz is not None:
+            self._npz.close()
+            self._npz = None
+
+    def __repr__(self):
+        return f"ColumnarResults({self.manifest_file.name}, columns={list(self.keys())})"
+
+
+def load_columnar_results(stem):
+    """Open <stem>.manifest.json if it exists, else return None"""
+    path = manifest_path(stem)
+    if not path.exists():
+        return None
+    return ColumnarResults(path)
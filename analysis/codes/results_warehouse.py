@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Indexed Results Warehouse
+=========================
+
+One local SQLite database for the derived results of all modules,
+instead of scattered per-module and per-epsilon CSV files:
+
+- Long schema, one row per value:
+    results(module, epsilon, stage, observable, time, value, error)
+  time is NULL for scalar results (per-epsilon summaries) and set for
+  time series; stage holds e.g. the equilibration stage, or the result
+  table a value came from
+- Indexes on (observable, epsilon), (module, stage, observable) and
+  (epsilon, module) for cross-epsilon and cross-module queries
+- Bulk inserts: store_frame() melts a wide DataFrame (an Epsilon column,
+  optional time and stage columns, one column per observable) and
+  executemany()s it; rewriting a (module, stage, epsilon) replaces its
+  previous rows. The error of <name>_<unit> is found in <name>_error_<unit>
+  (the repo's naming, e.g. D_cm2_s / D_error_cm2_s) or <obs>_error /
+  <obs>_err; errors= maps any other pairs
+- store_results(module, {stage: DataFrame}) is what the analyzers call
+  next to writing their CSV files
+- Queries: query(), comparison() (epsilon x module:observable table of
+  scalar results), timeseries()
+- Database: ANALYSIS_WAREHOUSE, default analysis/data/results_warehouse.sqlite;
+  WAL journal with a busy timeout, so modules running in parallel can
+  write to it
+
+Usage:
+    python results_warehouse.py --summary
+    python results_warehouse.py --compare D_cm2_s Temp_mean --modules module06 module01
+    python results_warehouse.py --ingest ../data          # legacy per-epsilon CSVs
+
+Author: Scientific Analysis Suite
+Date: October 2026
+"""
+
+import os
+import re
+import sys
+import time
+import sqlite3
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from epsilon_registry import base_dir_default
+
+WAREHOUSE_ENV = 'ANALYSIS_WAREHOUSE'
+DEFAULT_NAME = 'results_warehouse.sqlite'
+ERROR_SUFFIXES = ('_error', '_err')
+EPSILON_COLUMNS = ('Epsilon', 'epsilon')
+TIME_COLUMNS = ('Time_ns', 'Time_ps', 'time_ns', 'time_ps')  # first one present is the time axis
+INDEX_COLUMNS = ('TimeStep', 'Step', 'Frame', 'frame')       # not observables of a time series
+EPSILON_DIGITS = 6  # epsilons are rounded so equality queries match
+BUSY_TIMEOUT = 60.0  # seconds a writer waits for a concurrent one
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    module     TEXT NOT NULL,
+    epsilon    REAL,
+    stage      TEXT NOT NULL DEFAULT '',
+    observable TEXT NOT NULL,
+    time       REAL,
+    value      REAL,
+    error      REAL
+);
+CREATE INDEX IF NOT EXISTS results_observable ON results (observable, epsilon);
+CREATE INDEX IF NOT EXISTS results_module ON results (module, stage, observable);
+CREATE INDEX IF NOT EXISTS results_epsilon ON results (epsilon, module);
+CREATE TABLE IF NOT EXISTS loads (
+    module  TEXT NOT NULL,
+    stage   TEXT NOT NULL,
+    n_rows  INTEGER NOT NULL,
+    written REAL NOT NULL
+);
+"""
+
+# Legacy per-epsilon CSVs of analysis/data: pattern -> module
+LEGACY_FILES = {
+    r'convergence_metrics_eps(?P<eps>[\d.]+)\.csv': 'module12',
+    r'thermal_analysis_metrics_eps(?P<eps>[\d.]+)\.csv': 'module15',
+}
+
+
+def default_path(base_dir=None):
+    """ANALYSIS_WAREHOUSE, else <base>/analysis/data/results_warehouse.sqlite"""
+    if os.environ.get(WAREHOUSE_ENV):
+        return Path(os.environ[WAREHOUSE_ENV])
+    return Path(base_dir or base_dir_default()) / 'analysis' / 'data' / DEFAULT_NAME
+
+
+def _first_present(df, columns):
+    """First of columns (a name or a sequence of candidates) that df has, else None"""
+    columns = (columns,) if isinstance(columns, str) else (columns or ())
+    return next((c for c in columns if c in df), None)
+
+
+def error_columns(observable):
+    """
+    Candidate error column names of an observable: the marker inserted
+    before each unit part (D_cm2_s -> D_error_cm2_s, D_cm2_error_s), then
+    appended (D_cm2_s_error)
+    """
+    parts = observable.split('_')
+    for suffix in ERROR_SUFFIXES:
+        for i in range(1, len(parts)):
+            yield '_'.join(parts[:i]) + suffix + '_' + '_'.join(parts[i:])
+        yield observable + suffix
+
+
+def frame_rows(module, df, stage='', epsilon=None, epsilon_column=EPSILON_COLUMNS, time_column=TIME_COLUMNS,
+               stage_column=None, errors=None):
+    """
+    Long (module, epsilon, stage, observable, time, value, error) tuples of
+    a wide DataFrame; every other numeric column is an observable. A
+    sequence of epsilon_column / time_column candidates picks the first one
+    present.
+    """
+    df = df.infer_objects()
+    n = len(df)
+    epsilon_column, time_column = _first_present(df, epsilon_column), _first_present(df, time_column)
+    if epsilon is None and epsilon_column:
+        eps = df[epsilon_column].to_numpy(dtype=np.float64).round(EPSILON_DIGITS)
+    else:
+        eps = np.full(n, np.nan if epsilon is None else round(float(epsilon), EPSILON_DIGITS))
+    times = df[time_column].to_numpy(dtype=np.float64) if time_column else np.full(n, np.nan)
+    stage_column = _first_present(df, stage_column)
+    stages = (df[stage_column].astype(str).to_numpy() if stage_column
+              else np.full(n, stage, dtype=object))
+
+    skip = {epsilon_column, time_column, stage_column}
+    if time_column:
+        skip.update(INDEX_COLUMNS)
+    numeric = [c for c in df.columns if c not in skip and pd.api.types.is_numeric_dtype(df[c])
+               and not pd.api.types.is_bool_dtype(df[c])]
+    errors = {obs: err for obs, err in (errors or {}).items() if obs in numeric and err in numeric}
+    for col in numeric:
+        if col not in errors:
+            err = next((c for c in error_columns(col) if c in numeric), None)
+            if err is not None:
+                errors[col] = err
+    observables = [c for c in numeric if c not in set(errors.values())]
+    if not observables or not n:
+        return []
+
+    values = df[observables].to_numpy(dtype=np.float64)
+    errs = np.column_stack([df[errors[c]].to_numpy(dtype=np.float64) if c in errors else np.full(n, np.nan)
+                            for c in observables])
+    k = len(observables)
+    # Row-major: all observables of row 0, then row 1, ...
+    columns = (np.full(n * k, module, dtype=object), np.repeat(eps, k), np.repeat(stages, k),
+               np.tile(np.array(observables, dtype=object), n), np.repeat(times, k),
+               values.ravel(), errs.ravel())
+    # NaN is stored as NULL
+    return list(zip(*(c.tolist() for c in columns)))
+
+
+class ResultsWarehouse:
+    """SQLite store of every module's derived results in one long, indexed table"""
+
+    def __init__(self, path=None, base_dir=None):
+        self.path = Path(path) if path else default_path(base_dir)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.path), timeout=BUSY_TIMEOUT)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def insert(self, rows, replace=True):
+        """
+        Bulk insert (module, epsilon, stage, observable, time, value, error)
+        tuples; with replace, earlier rows of the same (module, stage,
+        epsilon) are deleted first. Returns the number of rows written.
+        """
+        if not rows:
+            return 0
+        with self.connection:
+            if replace:
+                keys = {(r[0], r[2], r[1]) for r in rows}
+                self.connection.executemany(
+                    'DELETE FROM results WHERE module = ? AND stage = ? AND epsilon IS ?', keys)
+            self.connection.executemany('INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+            loads = {}
+            for r in rows:
+                loads[(r[0], r[2])] = loads.get((r[0], r[2]), 0) + 1
+            self.connection.executemany('INSERT INTO loads VALUES (?, ?, ?, ?)',
+                                        [(m, s, n, time.time()) for (m, s), n in loads.items()])
+        return len(rows)
+
+    def store_frame(self, module, df, stage='', replace=True, **kwargs):
+        """Melt a wide DataFrame (frame_rows() arguments) and insert it"""
+        return self.insert(frame_rows(module, df, stage, **kwargs), replace=replace)
+
+    def store_series(self, module, stage, epsilon, observable, time_values, values, errors=None):
+        """One time series of one observable"""
+        n = len(values)
+        errors = np.full(n, np.nan) if errors is None else np.asarray(errors, dtype=np.float64)
+        eps = round(float(epsilon), EPSILON_DIGITS)
+        rows = [(module, eps, stage, observable, float(t), float(v), float(e))
+                for t, v, e in zip(time_values, values, errors)]
+        with self.connection:
+            self.connection.execute('DELETE FROM results WHERE module = ? AND stage = ? AND epsilon IS ? '
+                                    'AND observable = ?', (module, stage, eps, observable))
+        return self.insert(rows, replace=False)
+
+    def _select(self, columns, module=None, stage=None, observable=None, epsilon=None,
+                scalar=None, extra=''):
+        clauses, params = [], []
+        for name, value in (('module', module), ('stage', stage), ('observable', observable)):
+            if value is None:
+                continue
+            values = [value] if isinstance(value, str) else list(value)
+            clauses.append(f"{name} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        if epsilon is not None:
+            values = np.atleast_1d(epsilon).astype(np.float64).round(EPSILON_DIGITS).tolist()
+            clauses.append(f"epsilon IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        if scalar is not None:
+            clauses.append('time IS NULL' if scalar else 'time IS NOT NULL')
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        return pd.read_sql_query(f'SELECT {columns} FROM results{where} {extra}', self.connection,
+                                 params=params)
+
+    def query(self, module=None, stage=None, observable=None, epsilon=None, scalar=None):
+        """Rows matching every given filter (strings or lists) as a long DataFrame"""
+        rows = self._select('module, epsilon, stage, observable, time, value, error', module, stage,
+                            observable, epsilon, scalar, 'ORDER BY module, stage, observable, epsilon, time')
+        return rows.astype({c: np.float64 for c in ('epsilon', 'time', 'value', 'error')})
+
+    def comparison(self, observables, module=None, stage=None, errors=False):
+        """
+        Epsilon x '<module>:<observable>' table of scalar results (averaged
+        over stages when several match); errors=True adds '<...>_error' columns
+        """
+        long = self._select('module, epsilon, observable, AVG(value) AS value, AVG(error) AS error',
+                            module, stage, observables, None, True,
+                            'GROUP BY module, epsilon, observable')
+        if long.empty:
+            return pd.DataFrame(columns=['Epsilon'])
+        long = long.astype({'value': np.float64, 'error': np.float64})
+        long['column'] = long['module'] + ':' + long['observable']
+        table = long.pivot(index='epsilon', columns='column', values='value')
+        if errors:
+            err = long.pivot(index='epsilon', columns='column', values='error').add_suffix('_error')
+            table = table.join(err)[sorted(list(table.columns) + list(err.columns))]
+        table.columns.name = None
+        return table.rename_axis('Epsilon').reset_index()
+
+    def timeseries(self, observable, module=None, stage=None, epsilon=None):
+        """Time x epsilon table of one observable's time series"""
+        long = self._select('epsilon, time, value', module, stage, observable, epsilon, False,
+                            'ORDER BY epsilon, time')
+        return long.pivot_table(index='time', columns='epsilon', values='value')
+
+    def summary(self):
+        """Rows, epsilons and observables per module and stage"""
+        return pd.read_sql_query(
+            'SELECT module, stage, COUNT(*) AS n_rows, COUNT(DISTINCT epsilon) AS n_epsilons, '
+            'COUNT(DISTINCT observable) AS n_observables FROM results GROUP BY module, stage '
+            'ORDER BY module, stage', self.connection)
+
+    def ingest_legacy(self, data_dir):
+        """Load the legacy per-epsilon CSVs (LEGACY_FILES) of data_dir; returns rows written"""
+        total = 0
+        for path in sorted(Path(data_dir).glob('*.csv')):
+            for pattern, module in LEGACY_FILES.items():
+                match = re.fullmatch(pattern, path.name)
+                if match:
+                    df = pd.read_csv(path)
+                    total += self.store_frame(module, df, epsilon=float(match.group('eps').rstrip('.')),
+                                              stage_column='Stage')
+        return total
+
+
+def store_results(module, tables, base_dir=None, **kwargs):
+    """
+    Write {stage: wide DataFrame} of one module to the default warehouse
+    (frame_rows() keyword arguments apply to every table)
+    """
+    tables = {stage: df for stage, df in tables.items() if df is not None and len(df)}
+    if not tables:
+        return 0
+    try:
+        with ResultsWarehouse(base_dir=base_dir) as warehouse:
+            n = sum(warehouse.store_frame(module, df, stage, **kwargs) for stage, df in tables.items())
+        print(f"  ✓ Stored {n} values in {warehouse.path.name} ({module}: {', '.join(tables)})")
+        return n
+    except sqlite3.Error as e:
+        print(f"  ✗ Results warehouse not updated ({module}): {e}")
+        return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Query the indexed results warehouse')
+    parser.add_argument('--db', default=None, help=f'Database (default ${WAREHOUSE_ENV} or analysis/data/{DEFAULT_NAME})')
+    parser.add_argument('--summary', action='store_true', help='Rows per module and stage')
+    parser.add_argument('--compare', nargs='+', metavar='OBS', help='Cross-epsilon table of scalar observables')
+    parser.add_argument('--modules', nargs='+', default=None, help='Restrict --compare to these modules')
+    parser.add_argument('--ingest', metavar='DIR', default=None, help='Load legacy per-epsilon CSVs of DIR')
+    parser.add_argument('--csv', default=None, help='Write the --compare table to this CSV')
+    args = parser.parse_args(argv)
+
+    with ResultsWarehouse(args.db) as warehouse:
+        if args.ingest:
+            n = warehouse.ingest_legacy(args.ingest)
+            print(f"✓ Ingested {n} values from {args.ingest}")
+        if args.compare:
+            start = time.perf_counter()
+            table = warehouse.comparison(args.compare, module=args.modules, errors=True)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(table.to_string(index=False))
+            print(f"\n({len(table)} epsilons, {elapsed:.1f} ms)")
+            if args.csv:
+                table.to_csv(args.csv, index=False, float_format='%.6f')
+        if args.summary or not (args.compare or args.ingest):
+            print(f"Warehouse: {warehouse.path}")
+            print(warehouse.summary().to_string(index=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Sparse Spatial Density Functions Around the C60 Cages
+=====================================================
+
+Three-dimensional water density around the nearest C60, accumulated on a
+blocked sparse grid so sub-Angstrom resolutions stay cheap in memory:
+
+- Configurable resolution and extent (cube of side 2 * extent centred on
+  the cage); only blocks of BLOCK_CELLS^3 cells that ever receive a count
+  are allocated
+- Each point is assigned to its nearest C60 centre (minimum image)
+- Optional body-frame alignment: positions rotated into the frame of the
+  cage (x along carbon 0, y in the plane of carbons 0 and 1), so the map
+  follows the cage's rotation instead of smearing it out
+- Frames are binned in chunks of chunk_frames; with workers > 1 every
+  chunk is binned on a worker thread into its own partial grid, and the
+  partial grids are summed (SparseGrid.combine) before any result is read
+- Streaming export: write_cube() (Gaussian cube, bohr) and write_dx()
+  (OpenDX, Angstrom) write one x plane at a time, so the dense grid never
+  exists in memory; empty blocks are written as zeros
+- plane() and entropy() read the sparse blocks directly
+
+Usage:
+    sdf = SpatialDensity(resolution=0.25, extent=12.0, align=True, workers=4)
+    for frame in frames:                         # frame_buffers.FrameBuffers
+        sdf.add_frame(frame.oxygens, frame.c60_centers(), frame.box, frame.cages)
+    sdf.write_dx('sdf_eps_0.30.dx')
+    sdf.write_cube('sdf_eps_0.30.cube')
+
+Author: Scientific Analysis Suite
+Date: October 2026
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+DEFAULT_RESOLUTION = 0.5  # Å
+DEFAULT_EXTENT = 20.0     # Å, half the side of the grid cube
+BLOCK_CELLS = 16          # cells per block edge
+CHUNK_FRAMES = 16
+BOHR_PER_ANGSTROM = 1.8897261254578281
+CARBON_Z = 6
+
+
+def minimum_image(vectors, box):
+    """Vectors shifted to their nearest periodic image (box lengths, None = no PBC)"""
+    if box is None or not np.all(np.asarray(box) > 0):
+        return vectors
+    box = np.asarray(box, dtype=np.float64)
+    return vectors - box * np.round(vectors / box)
+
+
+def body_frames(cages, centers, box=None):
+    """(n_c60, 3, 3) rotation matrices whose rows are the cage axes (carbons 0 and 1 define x and y)"""
+    first = minimum_image(cages[:, 0] - centers, box)
+    second = minimum_image(cages[:, 1] - centers, box)
+    x = first / np.linalg.norm(first, axis=1, keepdims=True)
+    y = second - np.sum(second * x, axis=1, keepdims=True) * x
+    y /= np.linalg.norm(y, axis=1, keepdims=True)
+    return np.stack([x, y, np.cross(x, y)], axis=1)
+
+
+class SparseGrid:
+    """Count grid of n_cells^3 stored as a dict of dense int32 BLOCK_CELLS^3 blocks"""
+
+    def __init__(self, n_cells, block=BLOCK_CELLS):
+        self.n_cells = int(n_cells)
+        self.block = int(block)
+        self.n_blocks = -(-self.n_cells // self.block)
+        self.blocks = {}
+
+    @property
+    def block_size(self):
+        return self.block ** 3
+
+    @property
+    def nbytes(self):
+        return sum(b.nbytes for b in self.blocks.values())
+
+    def add(self, cells):
+        """Add one count per row of cells (N, 3) integer indices inside the grid"""
+        if not len(cells):
+            return self
+        cells = np.asarray(cells, dtype=np.int64)
+        b, local = np.divmod(cells, self.block)
+        key = (b[:, 0] * self.n_blocks + b[:, 1]) * self.n_blocks + b[:, 2]
+        offset = (local[:, 0] * self.block + local[:, 1]) * self.block + local[:, 2]
+        codes, counts = np.unique(key * self.block_size + offset, return_counts=True)
+        keys, offsets = np.divmod(codes, self.block_size)
+        # codes are sorted, so each block is one contiguous segment
+        bounds = np.flatnonzero(np.diff(keys)) + 1
+        for seg_keys, seg_offsets, seg_counts in zip(np.split(keys, bounds), np.split(offsets, bounds),
+                                                     np.split(counts, bounds)):
+            k = int(seg_keys[0])
+            if k not in self.blocks:
+                self.blocks[k] = np.zeros(self.block_size, dtype=np.int32)
+            self.blocks[k][seg_offsets] += seg_counts
+        return self
+
+    def combine(self, other):
+        """Sum another grid of the same shape into this one"""
+        for k, values in other.blocks.items():
+            if k in self.blocks:
+                self.blocks[k] += values
+            else:
+                self.blocks[k] = values.copy()
+        return self
+
+    def total(self):
+        return float(sum(b.sum() for b in self.blocks.values()))
+
+    def occupied(self):
+        """Counts of all non-empty cells (1D, in no particular order)"""
+        if not self.blocks:
+            return np.zeros(0)
+        values = np.concatenate(list(self.blocks.values()))
+        return values[values > 0]
+
+    def x_planes(self):
+        """Yield the (n_cells, n_cells) y-z plane of every x index, one block row at a time"""
+        n, B, nb = self.n_cells, self.block, self.n_blocks
+        rows = {}
+        for k in self.blocks:
+            rows.setdefault(k // (nb * nb), []).append(k)
+        for bx in range(nb):
+            slab = np.zeros((B, nb * B, nb * B))
+            for k in rows.get(bx, ()):
+                by, bz = divmod(k % (nb * nb), nb)
+                slab[:, by * B:(by + 1) * B, bz * B:(bz + 1) * B] = self.blocks[k].reshape(B, B, B)
+            for i in range(min(B, n - bx * B)):
+                yield slab[i, :n, :n]
+
+    def plane(self, axis, index):
+        """(n_cells, n_cells) dense slice at index along axis (0, 1 or 2)"""
+        n, B, nb = self.n_cells, self.block, self.n_blocks
+        out = np.zeros((nb * B, nb * B))
+        b_index, local = divmod(int(index), B)
+        for k, values in self.blocks.items():
+            b = np.unravel_index(k, (nb, nb, nb))
+            if b[axis] != b_index:
+                continue
+            cube = values.reshape(B, B, B)
+            other = [d for d in range(3) if d != axis]
+            out[b[other[0]] * B:(b[other[0]] + 1) * B,
+                b[other[1]] * B:(b[other[1]] + 1) * B] = np.take(cube, local, axis=axis)
+        return out[:n, :n]
+
+
+class SpatialDensity:
+    """Spatial density function of points around the nearest C60, on a SparseGrid"""
+
+    def __init__(self, resolution=DEFAULT_RESOLUTION, extent=DEFAULT_EXTENT, align=False,
+                 chunk_frames=CHUNK_FRAMES, workers=1, block=BLOCK_CELLS):
+        self.resolution = float(resolution)
+        self.n_cells = int(round(2 * extent / self.resolution))
+        self.extent = 0.5 * self.n_cells * self.resolution
+        self.align = align
+        self.chunk_frames = max(1, int(chunk_frames))
+        self.workers = max(1, int(workers))
+        self.grid = SparseGrid(self.n_cells, block)
+        self.frames = 0
+        self.n_centers = 0
+        self.reference_cage = None  # carbons of cage 0 relative to its centre (last frame)
+        self._pending = []
+        self._futures = []
+        self._executor = None
+
+    @property
+    def cell_volume(self):
+        return self.resolution ** 3
+
+    def cells(self, points, centers, box=None, cages=None):
+        """(M, 3) grid cells of the points inside the grid, relative to their nearest centre"""
+        points = np.asarray(points, dtype=np.float64)
+        centers = np.asarray(centers, dtype=np.float64)
+        delta = minimum_image(points[:, None, :] - centers[None, :, :], box)
+        nearest = np.argmin(np.einsum('ncj,ncj->nc', delta, delta), axis=1)
+        rel = delta[np.arange(len(points)), nearest]
+        if self.align:
+            rotations = body_frames(np.asarray(cages, dtype=np.float64), centers, box)
+            rel = np.einsum('nij,nj->ni', rotations[nearest], rel)
+        cells = np.floor((rel + self.extent) / self.resolution).astype(np.int64)
+        return cells[np.all((cells >= 0) & (cells < self.n_cells), axis=1)]
+
+    def add_frame(self, points, centers, box=None, cages=None):
+        """Queue one frame; cages (n_c60, atoms, 3) is needed with align=True"""
+        self._pending.append(self.cells(points, centers, box, cages))
+        self.frames += 1
+        self.n_centers = len(centers)
+        if cages is not None:
+            cage = minimum_image(np.asarray(cages[0], dtype=np.float64) - centers[0], box)
+            if self.align:
+                cage = cage @ body_frames(np.asarray(cages[:1], dtype=np.float64), centers[:1], box)[0].T
+            self.reference_cage = cage
+        if len(self._pending) >= self.chunk_frames:
+            self._flush()
+        return self
+
+    def _flush(self):
+        if not self._pending:
+            return
+        chunk = np.concatenate(self._pending)
+        self._pending = []
+        if self.workers == 1:
+            self.grid.add(chunk)
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        self._futures.append(self._executor.submit(
+            lambda cells: SparseGrid(self.n_cells, self.grid.block).add(cells), chunk))
+
+    def finish(self):
+        """Bin queued frames and merge the partial grids of the worker threads"""
+        self._flush()
+        for future in self._futures:
+            self.grid.combine(future.result())
+        self._futures = []
+        return self
+
+    def close(self):
+        self.finish()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __getstate__(self):
+        self.finish()
+        state = self.__dict__.copy()
+        state['_executor'] = None
+        return state
+
+    def scale(self):
+        """Counts -> number density per cage (Å^-3)"""
+        return 1.0 / (max(self.frames, 1) * max(self.n_centers, 1) * self.cell_volume)
+
+    def plane(self, axis=2, index=None):
+        """Density slice through the cage centre (or at index) along axis"""
+        self.finish()
+        index = self.n_cells // 2 if index is None else index
+        return self.grid.plane(axis, index) * self.scale()
+
+    def entropy(self):
+        """-sum p ln p over the occupied cells"""
+        self.finish()
+        counts = self.grid.occupied()
+        if not counts.size:
+            return 0.0
+        p = counts / counts.sum()
+        return float(-np.sum(p * np.log(p)))
+
+    def axis_points(self):
+        """Cell-centre coordinates along one axis (Å, cage centre at 0)"""
+        return -self.extent + (np.arange(self.n_cells) + 0.5) * self.resolution
+
+    def _atoms(self):
+        return [] if self.reference_cage is None else [(CARBON_Z, xyz) for xyz in self.reference_cage]
+
+    def write_cube(self, path, comment=''):
+        """Gaussian cube file (lengths in bohr, values in Å^-3), written plane by plane"""
+        self.finish()
+        n, scale = self.n_cells, self.scale()
+        origin = self.axis_points()[0] * BOHR_PER_ANGSTROM
+        step = self.resolution * BOHR_PER_ANGSTROM
+        atoms = self._atoms()
+        row = ('%13.5E' * 6 + '\n') * (n // 6) + (('%13.5E' * (n % 6) + '\n') if n % 6 else '')
+        with open(path, 'w') as f:
+            f.write(f"Spatial density function around C60 {comment}\n")
+            f.write(f"Number density per cage (A^-3), {self.frames} frames, "
+                    f"{'body' if self.align else 'lab'} frame\n")
+            f.write(f"{len(atoms):5d} {origin:12.6f} {origin:12.6f} {origin:12.6f}\n")
+            for axis in range(3):
+                vector = [0.0, 0.0, 0.0]
+                vector[axis] = step
+                f.write(f"{n:5d} {vector[0]:12.6f} {vector[1]:12.6f} {vector[2]:12.6f}\n")
+            for z, xyz in atoms:
+                x, y, w = np.asarray(xyz) * BOHR_PER_ANGSTROM
+                f.write(f"{z:5d} {0.0:12.6f} {x:12.6f} {y:12.6f} {w:12.6f}\n")
+            plane_format = row * n
+            for plane in self.grid.x_planes():
+                f.write(plane_format % tuple((plane * scale).ravel()))
+        return path
+
+    def write_dx(self, path):
+        """OpenDX scalar field (Å, values in Å^-3), written plane by plane"""
+        self.finish()
+        n, scale = self.n_cells, self.scale()
+        origin = self.axis_points()[0]
+        h = self.resolution
+        with open(path, 'w') as f:
+            f.write(f"# Spatial density function around C60, {self.frames} frames\n")
+            f.write(f"object 1 class gridpositions counts {n} {n} {n}\n")
+            f.write(f"origin {origin:.6f} {origin:.6f} {origin:.6f}\n")
+            f.write(f"delta {h:.6f} 0 0\ndelta 0 {h:.6f} 0\ndelta 0 0 {h:.6f}\n")
+            f.write(f"object 2 class gridconnections counts {n} {n} {n}\n")
+            f.write(f"object 3 class array type double rank 0 items {n ** 3} data follows\n")
+            # Three values per line across plane boundaries: carry the remainder over
+            carry = np.zeros(0)
+            for plane in self.grid.x_planes():
+                values = np.concatenate([carry, (plane * scale).ravel()])
+                full = len(values) // 3 * 3
+                f.write(('%.6e %.6e %.6e\n' * (full // 3)) % tuple(values[:full]))
+                carry = values[full:]
+            if carry.size:
+                f.write(' '.join('%.6e' % v for v in carry) + '\n')
+            f.write('attribute "dep" string "positions"\n')
+            f.write('object "density" class field\n')
+            f.write('component "positions" value 1\ncomponent "connections" value 2\n'
+                    'component "data" value 3\n')
+        return path
@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+Stage-Concatenated Equilibration Timeline
+=========================================
+
+The equilibration stages of one epsilon run (NVT thermalization,
+pre-equilibration, pressure ramp, NPT equilibration) read as one virtual
+trajectory instead of four unrelated universes:
+
+- StageSource: one stage file, the compressed archive (trajectory_archive)
+  when available, else the text dump, else (allow_dcd=True) the stage's
+  DCD; frame count, first/last timestep and dump interval come from the
+  archive index, the dump headers (epsilon_registry.dump_metadata) or the
+  DCD header and file size, never from iterating the frames
+- DCDReader: LAMMPS/CHARMM DCD with unit cell records read with numpy
+  (random access to fixed-size frames); a DCD has no atom types, so a
+  DCD stage takes them from a dump or archive stage of the same run
+- StageTimeline: the stages in order on one continuous timestep axis
+  (absolute LAMMPS timesteps are kept, a stage that resets its timestep
+  starts one dump interval after the previous one ended), global <->
+  (stage, local frame) mapping, and frames(max_frames) iterating all
+  stages with a per-stage stride chosen from the indexed frame counts
+- Missing stages: a stage without any readable trajectory is reported
+  with a warning and keeps its protocol length (STAGE_STEPS) as a gap on
+  the axis, so later stages are not pulled forward in time
+- Box tracking: every yielded TimelineFrame carries its box lengths and
+  whether the box changed since the previous frame (NPT and pressure-ramp
+  stages), including across stage boundaries
+- stage_observables(eps_dir): per-frame box, volume, density and C60-C60
+  centre separations, plus the O-O RDF of each stage; a module-level
+  function, so it can be mapped over epsilons in a process pool
+
+Usage:
+    timeline = StageTimeline(eps_dir)
+    print(timeline.n_frames, timeline.summary())
+    for frame in timeline.frames(max_frames=200):
+        frame.stage, frame.step, frame.time_ps, frame.positions, frame.box_changed
+
+    tables = stage_observables(eps_dir)    # 'timeline', 'stages', 'rdf' DataFrames, 'missing'
+
+Author: Scientific Analysis Suite
+Date: October 2026
+"""
+
+import math
+import struct
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from epsilon_registry import dump_metadata, is_lfs_stub
+from live_follow import DumpFrameFollower
+from steinhardt import wrap_positions
+from trajectory_archive import TrajectoryArchive, archive_for, archive_metadata
+
+EQUILIBRATION_STAGES = (
+    ('NVT Thermalization', 'nvt_thermalization'),
+    ('Pre-equilibration', 'pre_equilibration'),
+    ('Pressure Ramp', 'pressure_ramp'),
+    ('NPT Equilibration', 'npt_equilibration'),
+)
+# Run lengths (timesteps) of the equilibration protocol (equilibration.log);
+# a stage without a trajectory keeps this span on the timeline
+STAGE_STEPS = {
+    'nvt_thermalization': 25000,
+    'pre_equilibration': 25000,
+    'pressure_ramp': 50000,
+    'npt_equilibration': 500000,
+}
+TIMESTEP_FS = 2.0
+BOX_TOLERANCE = 1e-4  # Å; smaller changes of a box length are not a box change
+MAX_FRAMES_PER_STAGE = 200
+
+ATOM_MASSES = {1: 12.011, 2: 15.9994, 3: 1.008}  # C, O, H (amu)
+AMU_G = 1.66053906660e-24
+C60_TYPE, OXYGEN_TYPE = 1, 2
+C60_ATOMS = 60
+RDF_MAX = 10.0  # Å
+RDF_BIN = 0.05  # Å
+
+
+class DCDReader:
+    """
+    LAMMPS/CHARMM DCD (float32 coordinates, optional unit cell) with the
+    metadata of its header: first timestep, dump interval, atoms; the
+    frame count follows from the file size (a truncated last frame is ignored)
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            head = f.read(4)
+            if len(head) < 4:
+                raise ValueError(f"{self.path.name}: empty DCD")
+            self.endian = '<' if struct.unpack('<i', head)[0] == 84 else '>'
+            if struct.unpack(self.endian + 'i', head)[0] != 84:
+                raise ValueError(f"{self.path.name}: not a DCD file")
+            header = f.read(88)
+            if header[:4] != b'CORD':
+                raise ValueError(f"{self.path.name}: not a DCD file")
+            icntrl = struct.unpack(self.endian + '20i', header[4:84])
+            self.first_step, self.interval = icntrl[1], icntrl[2]
+            self.has_cell = icntrl[10] != 0
+            title_size = struct.unpack(self.endian + 'i', f.read(4))[0]
+            f.seek(title_size + 4, 1)
+            f.read(4)
+            self.n_atoms = struct.unpack(self.endian + 'i', f.read(4))[0]
+            f.read(4)
+            self.header_size = f.tell()
+        self.frame_size = 3 * (4 * self.n_atoms + 8) + (56 if self.has_cell else 0)
+        self.n_frames = (self.path.stat().st_size - self.header_size) // self.frame_size
+        self.last_step = self.first_step + max(self.n_frames - 1, 0) * self.interval
+
+    def read_frame(self, frame):
+        """(positions (n_atoms, 3) float32, box lengths or None) of one frame"""
+        with open(self.path, 'rb') as f:
+            f.seek(self.header_size + frame * self.frame_size)
+            data = f.read(self.frame_size)
+        dims, offset = None, 0
+        if self.has_cell:
+            # CHARMM unit cell order: A, gamma, B, beta, alpha, C
+            cell = np.frombuffer(data, dtype=self.endian + 'f8', count=6, offset=4)
+            dims, offset = cell[[0, 2, 5]].astype(np.float32), 56
+        n = self.n_atoms
+        positions = np.empty((n, 3), dtype=np.float32)
+        for k in range(3):
+            positions[:, k] = np.frombuffer(data, dtype=self.endian + 'f4', count=n,
+                                            offset=offset + k * (4 * n + 8) + 4)
+        return positions, dims
+
+
+class StageSource:
+    """One stage trajectory (archive, text dump or DCD) with index-based metadata"""
+
+    def __init__(self, name, dump_file, allow_dcd=False):
+        self.name = name
+        self.dump_file = Path(dump_file)
+        self.types = None
+        dcd_file = self.dump_file.with_suffix('.dcd')
+        archive = archive_for(self.dump_file)
+        if archive is not None:
+            self.path, self.format = archive, 'archive'
+            meta = archive_metadata(archive)
+        elif self.dump_file.exists() and not is_lfs_stub(self.dump_file):
+            self.path, self.format = self.dump_file, 'dump'
+            meta = dump_metadata(self.dump_file)
+        elif allow_dcd and dcd_file.exists() and not is_lfs_stub(dcd_file):
+            self.path, self.format = dcd_file, 'dcd'
+            dcd = DCDReader(dcd_file)
+            if not dcd.has_cell:
+                raise ValueError(f"{dcd_file.name}: DCD without unit cell records")
+            meta = {'n_atoms': dcd.n_atoms, 'n_frames': dcd.n_frames, 'first_step': dcd.first_step,
+                    'last_step': dcd.last_step, 'dump_interval': dcd.interval} if dcd.n_frames else None
+        else:
+            formats = 'dump content, archive or DCD' if allow_dcd else 'dump content or archive'
+            raise FileNotFoundError(f"{self.dump_file.name}: no {formats}")
+        if not meta:
+            raise ValueError(f"{self.path.name}: no frames")
+        self.n_atoms = meta['n_atoms']
+        self.n_frames = meta['n_frames']
+        self.first_step = meta['first_step']
+        self.last_step = meta['last_step']
+        self.interval = meta['dump_interval'] or 0
+
+    @property
+    def span(self):
+        """Timesteps covered including one trailing dump interval"""
+        return self.last_step - self.first_step + self.interval
+
+    def atom_types(self):
+        """Per-atom types sorted by atom id (a DCD stage: the ones assigned to it)"""
+        if self.format == 'archive':
+            archive = TrajectoryArchive(self.path)
+            try:
+                return archive.types
+            finally:
+                archive.close()
+        if self.format == 'dump':
+            return next(self.frames())[4]
+        return self.types
+
+    def frames(self, stride=1, start=0):
+        """
+        (local frame, timestep, positions, box lengths, types) of every
+        stride-th frame from start (a dump still parses the frames before start)
+        """
+        if self.format == 'dcd':
+            dcd = DCDReader(self.path)
+            for local in range(start, self.n_frames, stride):
+                positions, dims = dcd.read_frame(local)
+                yield local, self.first_step + local * self.interval, positions, dims, self.types
+        elif self.format == 'archive':
+            archive = TrajectoryArchive(self.path)
+            try:
+                for local in range(start, archive.n_frames, stride):
+                    yield (local, int(archive.timesteps[local]), archive.read_frame(local),
+                           archive.dimensions(local), archive.types)
+            finally:
+                archive.close()
+        else:
+            # Frames start, start + stride, ...; off-grid starts parse every frame
+            step = stride if start % stride == 0 else 1
+            for i, frame in enumerate(DumpFrameFollower(self.path).poll(stride=step)):
+                local = i * step
+                if local >= start and (local - start) % stride == 0:
+                    yield local, frame.timestep, frame.positions, frame.dimensions, frame.types
+
+
+class TimelineFrame:
+    """One frame of the concatenated timeline"""
+
+    def __init__(self, stage, frame, local_frame, step, positions, dimensions, types, box_changed):
+        self.stage = stage
+        self.frame = frame              # global frame number
+        self.local_frame = local_frame  # frame number inside the stage
+        self.step = step                # continuous timestep
+        self.time_ps = step * TIMESTEP_FS / 1000.0
+        self.positions = positions
+        self.dimensions = dimensions
+        self.types = types
+        self.box_changed = box_changed
+
+
+class StageTimeline:
+    """Virtual concatenation of the stage trajectories of one run directory"""
+
+    def __init__(self, eps_dir, stages=EQUILIBRATION_STAGES):
+        self.eps_dir = Path(eps_dir)
+        entries = []  # [name, stem, source or None, why it is missing]
+        for name, stem in stages:
+            try:
+                source = StageSource(name, self.eps_dir / f'{stem}.lammpstrj', allow_dcd=True)
+                entries.append([name, stem, source, None])
+            except (OSError, ValueError) as e:
+                entries.append([name, stem, None, str(e)])
+        # A DCD has no atom types: take them from a dump or archive stage with the same atoms
+        donors = [e[2] for e in entries if e[2] is not None and e[2].format != 'dcd']
+        types = {}
+        for entry in entries:
+            source = entry[2]
+            if source is None or source.format != 'dcd':
+                continue
+            donor = next((d for d in donors if d.n_atoms == source.n_atoms), None)
+            if donor is None:
+                entry[2] = None
+                entry[3] = f"{source.path.name} has no atom types and no dump or archive stage to take them from"
+                continue
+            if donor.n_atoms not in types:
+                types[donor.n_atoms] = donor.atom_types()
+            source.types = types[donor.n_atoms]
+
+        # Continuous axis: absolute timesteps are kept, a stage that resets its timestep
+        # starts where the previous stage ended, a missing stage keeps its protocol span
+        self.sources, self.step_offsets, self.missing = [], [], []
+        self.layout = []  # (stage, source or None, continuous start step, span) in stage order
+        end, last, offset = 0, None, 0
+        for name, stem, source, reason in entries:
+            if source is None:
+                span = STAGE_STEPS.get(stem, 0)
+                self.missing.append(name)
+                self.layout.append((name, None, end, span))
+                gap = f"; its {span * TIMESTEP_FS / 1000.0:g} ps stay on the timeline as a gap" if span else ''
+                print(f"  ⚠ {self.eps_dir.name}: {name} stage SKIPPED ({reason}){gap}")
+                end += span
+                continue
+            if last is None or source.first_step + offset < last:
+                offset = end - source.first_step
+            self.sources.append(source)
+            self.step_offsets.append(offset)
+            self.layout.append((name, source, source.first_step + offset, source.span))
+            last = source.last_step + offset
+            end = max(end, last + source.interval)
+        self.frame_offsets = np.cumsum([0] + [s.n_frames for s in self.sources])
+        self.box_changes = []  # (global frame, stage, old lengths, new lengths)
+
+    @property
+    def n_frames(self):
+        return int(self.frame_offsets[-1])
+
+    def __len__(self):
+        return self.n_frames
+
+    def locate(self, frame):
+        """(stage source, local frame) of a global frame number"""
+        if not 0 <= frame < self.n_frames:
+            raise IndexError(f"Frame {frame} out of range ({self.n_frames} frames)")
+        k = int(np.searchsorted(self.frame_offsets, frame, side='right')) - 1
+        return self.sources[k], frame - int(self.frame_offsets[k])
+
+    def continuous_step(self, stage_number, step):
+        return int(self.step_offsets[stage_number]) + step
+
+    def strides(self, max_frames=MAX_FRAMES_PER_STAGE):
+        """Per-stage frame stride keeping at most max_frames frames of each stage"""
+        return [max(1, math.ceil(s.n_frames / max_frames)) if max_frames else 1 for s in self.sources]
+
+    def frames(self, max_frames=MAX_FRAMES_PER_STAGE):
+        """TimelineFrame over all stages in order (strided per stage)"""
+        previous = None
+        self.box_changes = []
+        for k, (source, stride) in enumerate(zip(self.sources, self.strides(max_frames))):
+            for local, step, positions, dims, types in source.frames(stride):
+                frame = int(self.frame_offsets[k]) + local
+                changed = previous is not None and bool(np.any(np.abs(dims - previous) > BOX_TOLERANCE))
+                if changed:
+                    self.box_changes.append((frame, source.name, previous, dims.copy()))
+                previous = dims.copy()
+                yield TimelineFrame(source.name, frame, local, self.continuous_step(k, step),
+                                    positions, dims, types, changed)
+
+    def summary(self):
+        """
+        One dict per stage: file, format, frames, timesteps and place on the
+        timeline (format 'missing' and no frames for a skipped stage)
+        """
+        rows = []
+        for name, s, start, span in self.layout:
+            row = {'Stage': name, 'file': None, 'format': 'missing', 'n_frames': 0, 'n_atoms': None,
+                   'first_step': None, 'last_step': None, 'dump_interval': None}
+            if s is not None:
+                row.update({'file': s.path.name, 'format': s.format, 'n_frames': s.n_frames,
+                            'n_atoms': s.n_atoms, 'first_step': s.first_step, 'last_step': s.last_step,
+                            'dump_interval': s.interval})
+            row['start_ps'] = start * TIMESTEP_FS / 1000.0
+            row['duration_ps'] = span * TIMESTEP_FS / 1000.0
+            rows.append(row)
+        return rows
+
+
+def c60_centers(carbons, box, atoms_per_c60=C60_ATOMS):
+    """(n_c60, 3) cage centres, each cage made whole around its first carbon"""
+    cages = carbons.reshape(-1, atoms_per_c60, 3).astype(np.float64)
+    delta = cages - cages[:, :1]
+    delta -= box * np.round(delta / box)
+    return cages[:, 0] + delta.mean(axis=1)
+
+
+def pair_separations(centers, box):
+    """Minimum-image distances of all centre pairs, order (0,1), (0,2), (1,2), ..."""
+    i, j = np.triu_indices(len(centers), k=1)
+    d = centers[j] - centers[i]
+    d -= box * np.round(d / box)
+    return np.sqrt((d ** 2).sum(axis=1))
+
+
+class PairRDF:
+    """
+    Accumulated g(r) of one atom group over frames (periodic KD-tree pair
+    search); r_max is clamped to half the smallest box length seen, with a
+    warning, since the minimum image is not unique beyond it
+    """
+
+    def __init__(self, r_max=RDF_MAX, bin_width=RDF_BIN, label='g(r)'):
+        self.edges = np.arange(0.0, r_max + bin_width / 2, bin_width)
+        self.counts = np.zeros(len(self.edges) - 1)
+        self.ideal = 0.0  # sum over frames of N(N-1)/2 / V
+        self.frames = 0
+        self.label = label
+
+    @property
+    def r_max(self):
+        return self.edges[-1]
+
+    def clamp(self, box):
+        """Drop the bins beyond half the smallest box length (warns when it does)"""
+        half = 0.5 * float(np.min(box))
+        keep = int(np.searchsorted(self.edges, half, side='right'))
+        if keep >= len(self.edges):
+            return
+        if keep < 2:
+            raise ValueError(f"{self.label}: box {np.round(box, 3)} Å is smaller than one RDF bin")
+        print(f"  ⚠ {self.label}: r_max {self.r_max:.2f} Å exceeds half the box ({half:.2f} Å); "
+              f"clamped to {self.edges[keep - 1]:.2f} Å")
+        self.edges = self.edges[:keep]
+        self.counts = self.counts[:keep - 1]
+
+    def add_frame(self, positions, box):
+        box = np.asarray(box, dtype=np.float64)[:3]
+        self.clamp(box)
+        wrapped, box = wrap_positions(positions, box)
+        tree = cKDTree(wrapped, boxsize=box)
+        pairs = tree.query_pairs(self.r_max, output_type='ndarray')
+        d = wrapped[pairs[:, 1]] - wrapped[pairs[:, 0]]
+        d -= box * np.round(d / box)
+        self.counts += np.histogram(np.sqrt((d ** 2).sum(axis=1)), bins=self.edges)[0]
+        n = len(wrapped)
+        self.ideal += n * (n - 1) / 2.0 / np.prod(box)
+        self.frames += 1
+
+    def result(self):
+        """(bin centres, g(r))"""
+        shell = 4.0 / 3.0 * np.pi * (self.edges[1:] ** 3 - self.edges[:-1] ** 3)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            g = np.where(self.ideal > 0, self.counts / (self.ideal * shell), 0.0)
+        return 0.5 * (self.edges[1:] + self.edges[:-1]), g
+
+
+def stage_observables(eps_dir, max_frames=MAX_FRAMES_PER_STAGE, stages=EQUILIBRATION_STAGES):
+    """
+    Structural observables along the equilibration timeline of one run:
+    {'timeline': per frame, 'stages': per stage, 'rdf': O-O g(r) per stage}
+    DataFrames and 'missing': the stages without a trajectory
+    """
+    timeline = StageTimeline(eps_dir, stages)
+    rows, rdfs = [], {}
+    carbon_mask = None
+    for frame in timeline.frames(max_frames):
+        if carbon_mask is None:
+            # Same topology in every stage (atoms sorted by id)
+            total_mass = sum(ATOM_MASSES.get(int(t), 0.0) for t in frame.types)
+            carbon_mask = frame.types == C60_TYPE
+            oxygen_mask = frame.types == OXYGEN_TYPE
+        box = frame.dimensions.astype(np.float64)
+        volume = float(np.prod(box))
+        row = {'Stage': frame.stage, 'Frame': frame.frame, 'Step': frame.step, 'Time_ps': frame.time_ps,
+               'Lx': box[0], 'Ly': box[1], 'Lz': box[2], 'Volume_A3': volume,
+               'Density_g_cm3': total_mass * AMU_G / (volume * 1e-24),
+               'Box_Changed': int(frame.box_changed)}
+        carbons = frame.positions[carbon_mask]
+        if len(carbons) >= 2 * C60_ATOMS:
+            centers = c60_centers(carbons[:len(carbons) // C60_ATOMS * C60_ATOMS], box)
+            i, j = np.triu_indices(len(centers), k=1)
+            for a, b, d in zip(i, j, pair_separations(centers, box)):
+                row[f'C60_{a + 1}{b + 1}_A'] = d
+        rows.append(row)
+        if frame.stage not in rdfs:
+            rdfs[frame.stage] = PairRDF(label=f"{Path(eps_dir).name} {frame.stage} O-O g(r)")
+        rdf = rdfs[frame.stage]
+        rdf.add_frame(frame.positions[oxygen_mask], box)
+
+    per_frame = pd.DataFrame(rows)
+    stages_df = pd.DataFrame(timeline.summary())
+    rdf_rows = []
+    if len(per_frame):
+        separation_cols = [c for c in per_frame.columns if c.startswith('C60_')]
+        grouped = per_frame.groupby('Stage', sort=False)
+        stats = pd.DataFrame({
+            'frames_analyzed': grouped.size(),
+            'box_changes': grouped['Box_Changed'].sum(),
+            'volume_mean_A3': grouped['Volume_A3'].mean(),
+            'density_mean': grouped['Density_g_cm3'].mean(),
+            'density_std': grouped['Density_g_cm3'].std(),
+            'density_final': grouped['Density_g_cm3'].last(),
+        })
+        if separation_cols:
+            separation = per_frame[separation_cols].mean(axis=1).groupby(per_frame['Stage'], sort=False)
+            stats['c60_separation_mean_A'] = separation.mean()
+            stats['c60_separation_final_A'] = separation.last()
+        for name, rdf in rdfs.items():
+            r, g = rdf.result()
+            peak = int(np.argmax(g))
+            stats.loc[name, 'rdf_OO_peak_r_A'] = r[peak]
+            stats.loc[name, 'rdf_OO_peak_g'] = g[peak]
+            rdf_rows.append(pd.DataFrame({'Stage': name, 'r_A': r, 'g_OO': g}))
+        stages_df = stages_df.merge(stats, left_on='Stage', right_index=True, how='left')
+    return {
+        'timeline': per_frame,
+        'stages': stages_df,
+        'rdf': pd.concat(rdf_rows, ignore_index=True) if rdf_rows else pd.DataFrame(),
+        'missing': timeline.missing,
+    }
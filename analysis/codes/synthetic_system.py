@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+Synthetic C60/TIP4P System Generator
+====================================
+
+Writes epsilon directories with the same file names and formats as the
+real LAMMPS runs, at a configurable scale, so analysis code can be
+benchmarked and regression-checked without the multi-GB LFS originals:
+
+- production.lammpstrj   - text dump (ITEM: ATOMS id type x y z, wrapped)
+- production.dcd         - CHARMM/LAMMPS DCD with unit cell records
+- equilibrated_system.data, large_C60_solvated.data - atom_style full
+- production_detailed_thermo.dat, production_thermo.dat,
+  npt_equilibration_thermo.dat - fix ave/time thermo files
+- rdf_CC.dat, rdf_CO.dat, rdf_OO.dat - fix ave/time RDF blocks (150 bins)
+- msd_water.dat          - compute msd (x, y, z, total)
+- production_<step>.ppm  - P6 snapshot images
+- .completion_status     - SUCCESS
+
+System: 3 C60 (atoms 1-180, type 1) followed by N rigid waters ordered
+O, H, H (types 2, 3, 3), as in the production data files. Waters and
+fullerenes diffuse as random walks; thermo series are Ornstein-Uhlenbeck
+fluctuations around the values of the real runs.
+
+Usage:
+    python synthetic_system.py /tmp/synthetic --waters 1800 --frames 50
+    python synthetic_system.py /tmp/synthetic --epsilons 0.0 0.30 1.0 --thermo-rows 10000
+
+Author: Scientific Analysis Suite
+Date: October 2026
+"""
+
+import sys
+import json
+import struct
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+TIMESTEP = 2.0  # fs
+PRODUCTION_START = 600000
+DUMP_INTERVAL = 100  # steps between trajectory frames (and detailed thermo rows)
+
+N_C60 = 3
+C60_ATOMS = 60
+C60_CC_BOND = 1.44  # Å
+WATER_OH = 0.9572  # Å
+WATER_HOH = 104.52  # degrees
+WATER_CHARGES = (-1.1128, 0.5564, 0.5564)  # TIP4P/2005 (M-site charge on O)
+MASSES = {1: 12.011, 2: 15.9994, 3: 1.008}
+KB = 0.0019872041  # kcal/mol/K
+AVOGADRO = 6.02214076e23
+
+RDF_BINS = 150
+RDF_CUTOFF = 12.31
+RDF_INTERVAL = 10000
+MSD_INTERVAL = 1000
+THERMO_INTERVAL = 1000
+PPM_INTERVAL = 10000
+
+MANIFEST = 'synthetic_manifest.json'
+
+
+def c60_template():
+    """Truncated icosahedron (60 vertices) with C-C bonds of C60_CC_BOND, centred at 0"""
+    phi = (1 + np.sqrt(5)) / 2
+    bases = [(0, 1, 3 * phi), (1, 2 + phi, 2 * phi), (phi, 2, 2 * phi + 1)]
+    vertices = set()
+    for base in bases:
+        for sx in (1, -1):
+            for sy in (1, -1):
+                for sz in (1, -1):
+                    v = (sx * base[0], sy * base[1], sz * base[2])
+                    for k in range(3):  # even (cyclic) permutations
+                        vertices.add(tuple(round(c, 9) for c in (v[k], v[(k + 1) % 3], v[(k + 2) % 3])))
+    coords = np.array(sorted(vertices), dtype=np.float64)
+    return coords * (C60_CC_BOND / 2.0)  # template edge length is 2
+
+
+def water_template():
+    """O at the origin, both H in the xy plane"""
+    half = np.radians(WATER_HOH / 2)
+    return np.array([[0.0, 0.0, 0.0],
+                     [WATER_OH * np.sin(half), WATER_OH * np.cos(half), 0.0],
+                     [-WATER_OH * np.sin(half), WATER_OH * np.cos(half), 0.0]])
+
+
+def random_rotations(n, rng):
+    """n uniformly random rotation matrices (from unit quaternions)"""
+    q = rng.normal(size=(n, 4))
+    q /= np.linalg.norm(q, axis=1)[:, None]
+    w, x, y, z = q.T
+    return np.stack([
+        np.stack([1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)], axis=1),
+        np.stack([2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)], axis=1),
+        np.stack([2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)], axis=1),
+    ], axis=1)
+
+
+class SyntheticSystem:
+    """
+    3 C60 + n_waters TIP4P-geometry waters in a cubic box at ~1 g/cm³
+
+    frames() yields wrapped positions; the underlying unwrapped positions
+    perform random walks with the given diffusion coefficients (Å²/ps).
+    """
+
+    def __init__(self, n_waters=1800, epsilon=0.30, seed=0, water_diffusion=0.23, c60_diffusion=0.01):
+        self.n_waters = n_waters
+        self.epsilon = epsilon
+        self.rng = np.random.default_rng(seed)
+        self.water_diffusion = water_diffusion
+        self.c60_diffusion = c60_diffusion
+        self.n_c60_atoms = N_C60 * C60_ATOMS
+        self.n_atoms = self.n_c60_atoms + 3 * n_waters
+
+        self.types = np.concatenate([np.ones(self.n_c60_atoms, dtype=np.int64),
+                                     np.tile([2, 3, 3], n_waters)])
+        self.mol_ids = np.concatenate([np.repeat(np.arange(1, N_C60 + 1), C60_ATOMS),
+                                       np.repeat(np.arange(N_C60 + 1, N_C60 + 1 + n_waters), 3)])
+        self.masses = np.array([MASSES[t] for t in self.types])
+        self.charges = np.concatenate([np.zeros(self.n_c60_atoms), np.tile(WATER_CHARGES, n_waters)])
+        self.total_mass = self.masses.sum()
+        self._build()
+
+    def _build(self):
+        # Box from the water density plus the excluded fullerene cages
+        exclusion = 6.5
+        volume = self.n_waters * 29.9 + N_C60 * 4.0 / 3.0 * np.pi * exclusion ** 3
+        length = volume ** (1.0 / 3.0)
+        c60 = c60_template()
+        while True:
+            self.box = np.full(3, length)
+            self.c60_centers = np.array([[0.25, 0.25, 0.25], [0.75, 0.75, 0.25], [0.5, 0.25, 0.75]]) * length
+            spacing = (self.n_waters * 29.9) ** (1.0 / 3.0) / np.ceil(self.n_waters ** (1.0 / 3.0))
+            axis = np.arange(spacing / 2, length, spacing)
+            grid = np.stack(np.meshgrid(axis, axis, axis, indexing='ij'), axis=-1).reshape(-1, 3)
+            delta = grid[:, None, :] - self.c60_centers[None, :, :]
+            delta -= length * np.round(delta / length)
+            free = grid[np.min(np.linalg.norm(delta, axis=2), axis=1) > exclusion]
+            if len(free) >= self.n_waters:
+                break
+            length *= 1.02
+
+        sites = free[self.rng.choice(len(free), self.n_waters, replace=False)]
+        sites += self.rng.normal(scale=0.05 * spacing, size=sites.shape)
+        rotated = np.einsum('nij,aj->nai', random_rotations(self.n_waters, self.rng), water_template())
+
+        self.water_com = sites
+        self.water_shape = rotated  # (n_waters, 3, 3) offsets from the O position
+        self.c60_shape = c60
+        self.positions = self._assemble()
+
+    def _assemble(self):
+        c60 = (self.c60_centers[:, None, :] + self.c60_shape[None, :, :]).reshape(-1, 3)
+        water = (self.water_com[:, None, :] + self.water_shape).reshape(-1, 3)
+        return np.vstack([c60, water])
+
+    def wrapped(self, positions=None):
+        positions = self.positions if positions is None else positions
+        return positions - self.box * np.floor(positions / self.box)
+
+    def step(self, dt_ps):
+        """Advance the random walks by dt_ps"""
+        self.water_com += self.rng.normal(scale=np.sqrt(2 * self.water_diffusion * dt_ps), size=self.water_com.shape)
+        self.c60_centers += self.rng.normal(scale=np.sqrt(2 * self.c60_diffusion * dt_ps), size=self.c60_centers.shape)
+        self.positions = self._assemble()
+        return self.positions
+
+    def frames(self, n_frames, interval=DUMP_INTERVAL, start=PRODUCTION_START):
+        """Yield (timestep, wrapped float32 positions) for n_frames frames"""
+        dt_ps = interval * TIMESTEP / 1000.0
+        for i in range(n_frames):
+            if i > 0:
+                self.step(dt_ps)
+            yield start + i * interval, self.wrapped().astype(np.float32)
+
+    def density(self, volume):
+        """g/cm³ for a box volume in Å³"""
+        return self.total_mass / AVOGADRO / (volume * 1e-24)
+
+
+# -----------------------------------------------------------------------------
+# Writers
+# -----------------------------------------------------------------------------
+
+class DCDWriter:
+    """Minimal CHARMM-format DCD writer (float32 coordinates + unit cell)"""
+
+    def __init__(self, path, n_atoms, start, interval, timestep_ps):
+        self.f = open(path, 'wb')
+        self.n_atoms = n_atoms
+        self.n_frames = 0
+        icntrl = [0, start, interval, 0, 0, 0, 0, 0, 0]
+        header = b'CORD' + struct.pack('<9i', *icntrl) + struct.pack('<f', timestep_ps) + \
+            struct.pack('<10i', 1, 0, 0, 0, 0, 0, 0, 0, 0, 24)
+        self._record(header)
+        title = b'Synthetic C60/TIP4P trajectory (synthetic_system.py)'.ljust(80)
+        self._record(struct.pack('<i', 1) + title)
+        self._record(struct.pack('<i', n_atoms))
+
+    def _record(self, payload):
+        self.f.write(struct.pack('<i', len(payload)))
+        self.f.write(payload)
+        self.f.write(struct.pack('<i', len(payload)))
+
+    def write(self, positions, box):
+        # CHARMM unit cell order: A, gamma, B, beta, alpha, C
+        self._record(struct.pack('<6d', box[0], 90.0, box[1], 90.0, 90.0, box[2]))
+        for k in range(3):
+            self._record(np.ascontiguousarray(positions[:, k], dtype='<f4').tobytes())
+        self.n_frames += 1
+
+    def close(self):
+        # Patch the frame count (NSET) into the header
+        self.f.seek(8)
+        self.f.write(struct.pack('<i', self.n_frames))
+        self.f.close()
+
+
+def write_dump_frame(f, timestep, positions, system, order):
+    f.write(f"ITEM: TIMESTEP\n{timestep}\nITEM: NUMBER OF ATOMS\n{system.n_atoms}\n"
+            f"ITEM: BOX BOUNDS pp pp pp\n")
+    for k in range(3):
+        f.write(f"0.0000000000000000e+00 {system.box[k]:.16e}\n")
+    f.write("ITEM: ATOMS id type x y z\n")
+    block = np.column_stack([order + 1, system.types[order], positions[order]])
+    np.savetxt(f, block, fmt=['%d', '%d', '%.5f', '%.5f', '%.5f'])
+
+
+def write_trajectories(system, eps_dir, n_frames, shuffle=True):
+    """production.lammpstrj and production.dcd from one pass over the frames"""
+    dcd = DCDWriter(eps_dir / 'production.dcd', system.n_atoms, PRODUCTION_START, DUMP_INTERVAL,
+                    DUMP_INTERVAL * TIMESTEP / 1000.0)
+    with open(eps_dir / 'production.lammpstrj', 'w') as dump:
+        for timestep, positions in system.frames(n_frames):
+            # Parallel LAMMPS dumps are not sorted by atom id
+            order = system.rng.permutation(system.n_atoms) if shuffle else np.arange(system.n_atoms)
+            write_dump_frame(dump, timestep, positions, system, order)
+            dcd.write(positions, system.box)
+    dcd.close()
+
+
+def write_data_file(path, system, title):
+    """LAMMPS data file, atom_style full, with O-H bonds and H-O-H angles"""
+    n = system.n_waters
+    first_water = system.n_c60_atoms + 1
+    o_ids = first_water + 3 * np.arange(n)
+    positions = system.wrapped()
+    with open(path, 'w') as f:
+        f.write(f"LAMMPS data file via synthetic_system.py, {title}\n\n")
+        f.write(f"{system.n_atoms} atoms\n3 atom types\n{2 * n} bonds\n1 bond types\n"
+                f"{n} angles\n1 angle types\n\n")
+        for k, axis in enumerate('xyz'):
+            f.write(f"0.0000000000000000e+00 {system.box[k]:.16e} {axis}lo {axis}hi\n")
+        f.write("\nMasses\n\n")
+        for t, m in MASSES.items():
+            f.write(f"{t} {m}\n")
+        f.write("\nAtoms # full\n\n")
+        block = np.column_stack([np.arange(1, system.n_atoms + 1), system.mol_ids, system.types,
+                                 system.charges, positions, np.zeros((system.n_atoms, 3))])
+        np.savetxt(f, block, fmt=['%d', '%d', '%d', '%.4f', '%.6f', '%.6f', '%.6f', '%d', '%d', '%d'])
+        f.write("\nBonds\n\n")
+        bonds = np.column_stack([np.arange(1, 2 * n + 1), np.ones(2 * n, dtype=int),
+                                 np.repeat(o_ids, 2), (o_ids[:, None] + [1, 2]).ravel()])
+        np.savetxt(f, bonds, fmt='%d')
+        f.write("\nAngles\n\n")
+        angles = np.column_stack([np.arange(1, n + 1), np.ones(n, dtype=int), o_ids + 1, o_ids, o_ids + 2])
+        np.savetxt(f, angles, fmt='%d')
+
+
+def ornstein_uhlenbeck(n, mean, sigma, tau, rng):
+    """Correlated fluctuations (correlation time tau in samples)"""
+    a = np.exp(-1.0 / tau)
+    noise = rng.normal(scale=sigma * np.sqrt(1 - a * a), size=n)
+    x = np.empty(n)
+    x[0] = rng.normal(scale=sigma)
+    for i in range(1, n):
+        x[i] = a * x[i - 1] + noise[i]
+    return mean + x
+
+
+def thermo_series(system, n_rows, rng, temp=300.0):
+    """Temperature, pressure, PE, KE, volume and density series"""
+    dof = 6 * system.n_waters + 3 * N_C60 * C60_ATOMS  # rigid waters + flexible cages
+    temp_series = ornstein_uhlenbeck(n_rows, temp, 2.0, 5, rng)
+    ke = 0.5 * dof * KB * temp_series
+    pe = ornstein_uhlenbeck(n_rows, -11.25 * system.n_waters * (1 + 0.02 * system.epsilon), 0.02 * system.n_waters, 20, rng)
+    volume = ornstein_uhlenbeck(n_rows, float(np.prod(system.box)), 0.004 * float(np.prod(system.box)), 50, rng)
+    press = ornstein_uhlenbeck(n_rows, 1.0, 150.0, 2, rng)
+    return temp_series, press, pe, ke, volume, system.density(volume)
+
+
+def write_thermo_files(system, eps_dir, thermo_rows, rng):
+    """production_detailed_thermo.dat, production_thermo.dat and npt_equilibration_thermo.dat"""
+    eps = system.epsilon
+    steps = PRODUCTION_START + DUMP_INTERVAL * np.arange(1, thermo_rows + 1)
+    temp, press, pe, ke, vol, dens = thermo_series(system, thermo_rows, rng)
+    with open(eps_dir / 'production_detailed_thermo.dat', 'w') as f:
+        f.write("# Time-averaged data for fix thermo_detailed\n")
+        f.write("# TimeStep v_temp v_press v_pe v_ke v_vol v_dens\n")
+        np.savetxt(f, np.column_stack([steps, temp, press, pe, ke, vol, dens]),
+                   fmt=['%d', '%g', '%g', '%g', '%g', '%g', '%g'])
+
+    for name, fix, start, n in (('production_thermo.dat', 'thermo_avg', PRODUCTION_START,
+                                 max(1, thermo_rows * DUMP_INTERVAL // THERMO_INTERVAL)),
+                                ('npt_equilibration_thermo.dat', 'thermo_avg_npt', 100000,
+                                 (PRODUCTION_START - 100000) // THERMO_INTERVAL)):
+        steps = start + THERMO_INTERVAL * np.arange(1, n + 1)
+        temp, press, pe, ke, vol, dens = thermo_series(system, n, rng)
+        with open(eps_dir / name, 'w') as f:
+            f.write(f"# Time-averaged data for fix {fix}\n")
+            f.write("# TimeStep v_epsilon_co v_temp v_press v_pe v_ke v_etotal v_vol v_dens\n")
+            np.savetxt(f, np.column_stack([steps, np.full(n, eps), temp, press, pe, ke, pe + ke, vol, dens]),
+                       fmt=['%d', '%g', '%g', '%g', '%g', '%g', '%g', '%g', '%g'])
+
+
+RDF_SHAPES = {
+    # pair: (contact distance, first peak position, height, oscillation period, decay length)
+    'OO': (2.4, 2.8, 2.2, 2.0, 1.6),
+    'CO': (3.0, 3.3, 1.2, 2.6, 1.8),
+    'CC': (1.3, 1.44, 6.0, 1.2, 2.5),
+}
+
+
+def model_rdf(pair, r, epsilon):
+    """Damped-oscillation g(r) with a hard core; C-O contact strengthens with epsilon"""
+    contact, r1, height, period, decay = RDF_SHAPES[pair]
+    if pair == 'CO':
+        height *= 1 + epsilon
+    g = 1 + (height - 1) * np.exp(-(r - r1) / decay) * np.cos(2 * np.pi * (r - r1) / period)
+    g = np.where(r > r1, g, height * np.exp(-((r - r1) / (0.15 * r1)) ** 2))
+    return np.clip(np.where(r < contact, 0.0, g), 0.0, None)
+
+
+def write_rdf_files(system, eps_dir, n_blocks, rng):
+    dr = RDF_CUTOFF / RDF_BINS
+    r = (np.arange(RDF_BINS) + 0.5) * dr
+    densities = {'OO': system.n_waters / np.prod(system.box),
+                 'CO': system.n_waters / np.prod(system.box),
+                 'CC': N_C60 * C60_ATOMS / np.prod(system.box)}
+    for pair in ('CC', 'CO', 'OO'):
+        base = model_rdf(pair, r, system.epsilon)
+        with open(eps_dir / f'rdf_{pair}.dat', 'w') as f:
+            f.write(f"# Time-averaged data for fix rdf_{pair}_avg\n")
+            f.write("# TimeStep Number-of-rows\n")
+            f.write(f"# Row c_rdf_{pair}[1] c_rdf_{pair}[2] c_rdf_{pair}[3]\n")
+            for block in range(n_blocks):
+                g = np.clip(base * (1 + rng.normal(scale=0.02, size=RDF_BINS)), 0.0, None)
+                coord = np.cumsum(4 * np.pi * r ** 2 * dr * densities[pair] * g)
+                f.write(f"{PRODUCTION_START + RDF_INTERVAL * (block + 1)} {RDF_BINS}\n")
+                np.savetxt(f, np.column_stack([np.arange(1, RDF_BINS + 1), r, g, coord]),
+                           fmt=['%d', '%g', '%g', '%g'])
+
+
+def write_msd_file(system, eps_dir, n_rows, rng):
+    """compute msd output: 2 D t per component plus noise, total = sum"""
+    steps = PRODUCTION_START + MSD_INTERVAL * np.arange(1, n_rows + 1)
+    t_ps = (steps - PRODUCTION_START) * TIMESTEP / 1000.0
+    diffusion = system.water_diffusion * (1 - 0.3 * system.epsilon)
+    components = [2 * diffusion * t_ps * (1 + 0.05 * rng.normal()) + np.abs(rng.normal(scale=0.05, size=n_rows)).cumsum() * 0.01
+                  for _ in range(3)]
+    with open(eps_dir / 'msd_water.dat', 'w') as f:
+        f.write("# Time-averaged data for fix msd_avg\n")
+        f.write("# TimeStep c_msd_water[1] c_msd_water[2] c_msd_water[3] c_msd_water[4]\n")
+        np.savetxt(f, np.column_stack([steps] + components + [sum(components)]),
+                   fmt=['%d', '%g', '%g', '%g', '%g'])
+
+
+def write_ppm(path, system, size=256):
+    """P6 snapshot: xy projection, carbon grey, oxygen red, hydrogen white on blue"""
+    image = np.empty((size, size, 3), dtype=np.uint8)
+    image[:] = (20, 30, 80)
+    positions = system.wrapped()
+    order = np.argsort(positions[:, 2])  # painter's order along z
+    pixels = np.minimum((positions[order, :2] / system.box[:2] * size).astype(int), size - 1)
+    colors = np.array([[0, 0, 0], [120, 120, 120], [220, 40, 40], [240, 240, 240]], dtype=np.uint8)
+    image[size - 1 - pixels[:, 1], pixels[:, 0]] = colors[system.types[order]]
+    with open(path, 'wb') as f:
+        f.write(f"P6\n{size} {size}\n255\n".encode())
+        f.write(image.tobytes())
+
+
+def generate_epsilon_dir(eps_dir, epsilon, n_waters=1800, n_frames=20, thermo_rows=2000,
+                         rdf_blocks=20, msd_rows=200, n_ppm=5, ppm_size=256, seed=0):
+    """Write one synthetic epsilon directory; returns the SyntheticSystem"""
+    eps_dir = Path(eps_dir)
+    eps_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed + int(round(epsilon * 1000)))
+    system = SyntheticSystem(n_waters=n_waters, epsilon=epsilon, seed=int(rng.integers(2**31)))
+
+    write_data_file(eps_dir / 'large_C60_solvated.data', system, 'initial solvated system')
+    write_thermo_files(system, eps_dir, thermo_rows, rng)
+    write_rdf_files(system, eps_dir, rdf_blocks, rng)
+    write_msd_file(system, eps_dir, msd_rows, rng)
+    write_trajectories(system, eps_dir, n_frames)
+    for i in range(n_ppm):
+        system.step(1.0)
+        write_ppm(eps_dir / f'production_{PRODUCTION_START + PPM_INTERVAL * (i + 1)}.ppm', system, ppm_size)
+    write_data_file(eps_dir / 'equilibrated_system.data', system, 'after production')
+    (eps_dir / '.completion_status').write_text('SUCCESS\n')
+    return system
+
+
+def epsilon_dir_name(eps):
+    return f"epsilon_{eps:.1f}" if eps in (0.0, 1.0) else f"epsilon_{eps:.2f}"
+
+
+def generate_dataset(base_dir, epsilons=(0.0, 0.30, 1.0), **params):
+    """
+    Write synthetic epsilon directories under base_dir plus a manifest
+
+    base_dir/solvent_effects links back to base_dir, so both directory
+    conventions used by the modules (BASE_DIR/epsilon_* and
+    BASE_DIR/solvent_effects/epsilon_*) resolve.
+    """
+    base_dir = Path(base_dir)
+    base_dir.mkdir(parents=True, exist_ok=True)
+    for eps in epsilons:
+        generate_epsilon_dir(base_dir / epsilon_dir_name(eps), eps, **params)
+        print(f"  ✓ {epsilon_dir_name(eps)}")
+    link = base_dir / 'solvent_effects'
+    if not link.exists():
+        link.symlink_to('.', target_is_directory=True)
+    manifest = {'epsilons': list(epsilons), **params}
+    with open(base_dir / MANIFEST, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_manifest(base_dir):
+    """Parameters of an existing synthetic dataset, or None"""
+    path = Path(base_dir) / MANIFEST
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic C60/TIP4P epsilon directories')
+    parser.add_argument('output', help='Base directory to write epsilon_* directories into')
+    parser.add_argument('--epsilons', type=float, nargs='+', default=[0.0, 0.30, 1.0])
+    parser.add_argument('--waters', type=int, default=1800, help='Number of water molecules')
+    parser.add_argument('--frames', type=int, default=20, help='Trajectory frames (dump and DCD)')
+    parser.add_argument('--thermo-rows', type=int, default=2000)
+    parser.add_argument('--rdf-blocks', type=int, default=20)
+    parser.add_argument('--msd-rows', type=int, default=200)
+    parser.add_argument('--ppm', type=int, default=5, help='Number of PPM snapshots')
+    parser.add_argument('--ppm-size', type=int, default=256)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"Generating synthetic system: 3 C60 + {args.waters} waters, {args.frames} frames")
+    generate_dataset(args.output, args.epsilons, n_waters=args.waters, n_frames=args.frames,
+                     thermo_rows=args.thermo_rows, rdf_blocks=args.rdf_blocks, msd_rows=args.msd_rows,
+                     n_ppm=args.ppm, ppm_size=args.ppm_size, seed=args.seed)
+    print(f"Synthetic data written to {args.output}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Cross-Epsilon Thermodynamic Statistics Cube
+===========================================
+
+Thermo time series of all epsilon values held as one aligned
+epsilon x time x observable array, so every statistic is a single
+vectorized reduction over all runs instead of a loop over DataFrames:
+
+- values (n_eps, n_time, n_obs) float64, shorter runs padded at the end;
+  mask marks the real samples (ragged lengths and NaN rows are excluded)
+- mean(), std(ddof=1)        masked moments (same numbers as pandas)
+- drift()                    least-squares slope vs time (units per ns)
+- block_error(n_blocks)      standard error of the mean from block averages
+                             (block sums from one cumulative sum)
+- autocorrelation()          normalized ACF of every series from one FFT
+                             along the time axis
+- correlation_time()         integrated autocorrelation time in samples,
+                             summed up to the first zero crossing
+- mean_interval()            block-bootstrap confidence interval of every
+                             mean, block length from tau (block_bootstrap.py)
+- statistics()               the thermodynamic_statistics.csv table: the
+                             mean/std columns of module 01 plus drift,
+                             block error and correlation time (ns)
+
+Usage:
+    cube = ThermoCube.from_frames(analyzer.data, epsilon_values, ['Temp', 'Press', 'Dens'])
+    cube.mean()                  # (n_eps, n_obs)
+    stats_df = cube.statistics()
+
+Author: Scientific Analysis Suite
+Date: October 2026
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import fft
+
+from block_bootstrap import BlockBootstrap, block_length
+
+DEFAULT_BLOCKS = 10
+
+
+class ThermoCube:
+    """Aligned (epsilon, time, observable) thermo array with a validity mask"""
+
+    def __init__(self, epsilons, observables, values, time, rows):
+        """
+        values: (n_eps, n_time, n_obs); time: (n_eps, n_time) in ns;
+        rows: (n_eps, n_time) bool, True for samples that exist in the run
+        """
+        self.epsilons = np.asarray(epsilons, dtype=np.float64)
+        self.observables = list(observables)
+        self.values = np.asarray(values, dtype=np.float64)
+        self.time = np.asarray(time, dtype=np.float64)
+        self.rows = np.asarray(rows, dtype=bool)
+        self.mask = self.rows[:, :, None] & np.isfinite(self.values)
+        self.filled = np.where(self.mask, self.values, 0.0)
+        self._mean = None
+        self._deviations = None
+        self._tau = None
+
+    @classmethod
+    def from_frames(cls, frames, epsilons, observables, time_column='Time_ns'):
+        """Stack {eps: DataFrame} (columns observables + time_column) in epsilon order"""
+        epsilons = [eps for eps in epsilons if eps in frames]
+        n_time = max((len(frames[eps]) for eps in epsilons), default=0)
+        values = np.full((len(epsilons), n_time, len(observables)), np.nan)
+        time = np.full((len(epsilons), n_time), np.nan)
+        rows = np.zeros((len(epsilons), n_time), dtype=bool)
+        for i, eps in enumerate(epsilons):
+            df = frames[eps]
+            n = len(df)
+            values[i, :n] = df[observables].to_numpy(dtype=np.float64)
+            time[i, :n] = df[time_column].to_numpy(dtype=np.float64) if time_column in df else np.arange(n)
+            rows[i, :n] = True
+        return cls(epsilons, observables, values, time, rows)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def index(self, observable):
+        return self.observables.index(observable)
+
+    def n_samples(self):
+        """(n_eps,) rows per run"""
+        return self.rows.sum(axis=1)
+
+    def counts(self):
+        """(n_eps, n_obs) valid samples per series"""
+        return self.mask.sum(axis=1)
+
+    def mean(self):
+        if self._mean is None:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                self._mean = self.filled.sum(axis=1) / self.counts()
+        return self._mean
+
+    def deviations(self):
+        """Values minus their series mean, zero outside the mask"""
+        if self._deviations is None:
+            self._deviations = np.where(self.mask, self.values - self.mean()[:, None, :], 0.0)
+        return self._deviations
+
+    def std(self, ddof=1):
+        dev = self.deviations()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.sqrt(np.sum(dev * dev, axis=1) / (self.counts() - ddof))
+
+    def drift(self):
+        """(n_eps, n_obs) least-squares slope d(value)/d(time)"""
+        time = np.where(self.mask, self.time[:, :, None], 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            t_mean = time.sum(axis=1) / self.counts()
+            dt = np.where(self.mask, self.time[:, :, None] - t_mean[:, None, :], 0.0)
+            return np.sum(dt * self.deviations(), axis=1) / np.sum(dt * dt, axis=1)
+
+    def block_error(self, n_blocks=DEFAULT_BLOCKS):
+        """
+        (n_eps, n_obs) standard error of the mean from n_blocks equal blocks
+        of each run (trailing rows that do not fill a block are dropped)
+        """
+        n_eps, n_time, n_obs = self.shape
+        block_len = self.n_samples() // n_blocks
+        bounds = np.arange(n_blocks + 1)[None, :] * block_len[:, None]
+        bounds = np.broadcast_to(bounds[:, :, None], (n_eps, n_blocks + 1, n_obs))
+
+        zero = np.zeros((n_eps, 1, n_obs))
+        value_sums = np.concatenate([zero, np.cumsum(self.filled, axis=1)], axis=1)
+        count_sums = np.concatenate([zero, np.cumsum(self.mask, axis=1)], axis=1)
+        sums = np.diff(np.take_along_axis(value_sums, bounds, axis=1), axis=1)
+        counts = np.diff(np.take_along_axis(count_sums, bounds, axis=1), axis=1)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            block_means = np.where(counts > 0, sums / counts, np.nan)
+            n_valid = np.sum(np.isfinite(block_means), axis=1)
+            centered = np.where(np.isfinite(block_means),
+                                block_means - np.nanmean(block_means, axis=1, keepdims=True), 0.0)
+            var = np.sum(centered * centered, axis=1) / (n_valid - 1)
+            return np.where(n_valid > 1, np.sqrt(var / n_valid), np.nan)
+
+    def autocorrelation(self, max_lag=None):
+        """(n_eps, n_lags, n_obs) normalized ACF of every series (one FFT along time)"""
+        n_time = self.shape[1]
+        max_lag = n_time if max_lag is None else min(max_lag, n_time)
+        n_fft = fft.next_fast_len(max(2 * n_time - 1, 1), real=True)
+
+        # FFT over a contiguous (n_eps, n_obs, n_time) copy: time as the fast axis
+        series = np.ascontiguousarray(self.deviations().transpose(0, 2, 1))
+        spectrum = fft.rfft(series, n=n_fft, axis=-1)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        acov = fft.irfft(power, n=n_fft, axis=-1)[:, :, :max_lag].transpose(0, 2, 1)
+        if np.array_equal(self.mask, np.broadcast_to(self.rows[:, :, None], self.mask.shape)):
+            # Samples are a prefix of each run: n - lag pairs per lag
+            lags = np.arange(max_lag)[None, :, None]
+            pairs = self.counts()[:, None, :] - lags
+        else:
+            mask_series = np.ascontiguousarray(self.mask.transpose(0, 2, 1), dtype=np.float64)
+            mask_spectrum = fft.rfft(mask_series, n=n_fft, axis=-1)
+            pairs = fft.irfft(np.abs(mask_spectrum) ** 2, n=n_fft, axis=-1)[:, :, :max_lag]
+            pairs = np.rint(pairs).transpose(0, 2, 1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            acov = np.where(pairs > 0, acov / pairs, np.nan)
+            return acov / acov[:, :1]
+
+    def correlation_time(self, max_lag=None):
+        """(n_eps, n_obs) integrated autocorrelation time in samples: 1/2 + sum of rho up to its first zero"""
+        if max_lag is None and self._tau is not None:
+            return self._tau
+        rho = self.autocorrelation(max_lag)[:, 1:]
+        if rho.shape[1] == 0:
+            return np.full((self.shape[0], self.shape[2]), np.nan)
+        # Cumulative product cuts every series after its first non-positive lag
+        positive = np.cumprod(np.nan_to_num(rho, nan=-1.0) > 0, axis=1).astype(bool)
+        tau = 0.5 + np.sum(np.where(positive, rho, 0.0), axis=1)
+        tau = np.where(np.isfinite(rho[:, 0]), tau, np.nan)
+        if max_lag is None:
+            self._tau = tau
+        return tau
+
+    def sample_interval(self):
+        """(n_eps,) time between consecutive rows of each run"""
+        n = self.n_samples()
+        last = np.take_along_axis(self.time, np.maximum(n - 1, 0)[:, None], axis=1)[:, 0]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (last - self.time[:, 0]) / (n - 1)
+
+    def mean_interval(self, bootstrap=None):
+        """(low, high) arrays (n_eps, n_obs): block-bootstrap confidence interval of every mean"""
+        bootstrap = bootstrap or BlockBootstrap()
+        # NaN gaps take the series mean so each run stays one contiguous series
+        series = np.where(self.mask, self.values, self.mean()[:, None, :]).transpose(0, 2, 1)
+        lengths = np.broadcast_to(self.n_samples()[:, None], self.mean().shape)
+        return bootstrap.mean_interval(series, lengths, block_length(lengths, self.correlation_time()))
+
+    def statistics(self, n_blocks=DEFAULT_BLOCKS):
+        """Per-epsilon table: <obs>_mean/_std, N_samples, then <obs>_drift_per_ns/_block_err/_tau_ns"""
+        mean, std = self.mean(), self.std()
+        drift, block_err = self.drift(), self.block_error(n_blocks)
+        tau_ns = self.correlation_time() * self.sample_interval()[:, None]
+
+        table = {'Epsilon': self.epsilons}
+        for k, obs in enumerate(self.observables):
+            table[f'{obs}_mean'] = mean[:, k]
+            table[f'{obs}_std'] = std[:, k]
+        table['N_samples'] = self.n_samples()
+        for k, obs in enumerate(self.observables):
+            table[f'{obs}_drift_per_ns'] = drift[:, k]
+            table[f'{obs}_block_err'] = block_err[:, k]
+            table[f'{obs}_tau_ns'] = tau_ns[:, k]
+        return pd.DataFrame(table)
@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+"""
+Seekable Compressed Trajectory Archive
+======================================
+
+A compact replacement for the production.lammpstrj text dumps (about 35
+bytes of text per atom and frame) that every trajectory module can read:
+
+- Coordinates quantized to fixed point at a configurable precision
+  (default 0.001 Å, error <= precision/2) and stored as int32
+- Frames grouped in blocks of BLOCK_FRAMES; inside a block the first frame
+  is absolute and the others are deltas to the previous frame, zigzag
+  encoded and byte-shuffled so the compressor sees long runs of zero bytes
+- Each block compressed with zstd (zstandard package) when installed, else
+  zlib; the codec is recorded in the header
+- Frame index at the end of the file (block offsets, timesteps, box bounds
+  per frame), so frame counts and random access need no pass over the data;
+  reading frame i decodes only its block (the last block stays cached)
+- Atom ids and types of the dump (atoms sorted by id, as the MDAnalysis
+  LAMMPSDUMP reader does) are stored once
+
+File layout: MAGIC, header length + JSON header, atoms block, frame
+blocks, index block, index offset (uint64) + MAGIC.
+
+MDAnalysis integration (when installed): format 'CTRAJ' registers a
+coordinate reader and a topology parser, and open_universe(dump) opens
+the archive next to a dump (production.ctraj) in place of the text
+dump whenever the archive was converted from it, or the dump is
+missing or a Git LFS stub.
+
+Usage:
+    python trajectory_archive.py convert ../../epsilon_0.0/production.lammpstrj --precision 0.001
+    python trajectory_archive.py convert --all          # every epsilon run of the registry
+    python trajectory_archive.py info production.ctraj
+
+    from trajectory_archive import open_universe, TrajectoryArchive
+    u = open_universe(eps_dir / 'production.lammpstrj')       # archive if present
+    positions = TrajectoryArchive(path).read_frame(120)        # (n_atoms, 3) float32
+
+Author: Scientific Analysis Suite
+Date: October 2026
+"""
+
+import os
+import sys
+import json
+import zlib
+import struct
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from live_follow import DumpFrameFollower
+from epsilon_registry import is_lfs_stub
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+try:
+    import MDAnalysis as mda
+    from MDAnalysis.coordinates.base import ReaderBase
+    from MDAnalysis.topology.base import TopologyReaderBase
+    from MDAnalysis.core.topology import Topology
+    from MDAnalysis.core.topologyattrs import (Atomids, Atomnames, Atomtypes, Masses,
+                                               Resids, Resnums, Segids)
+    MDA_AVAILABLE = True
+except ImportError:
+    MDA_AVAILABLE = False
+
+MAGIC = b'CTRAJ\x00\x01\x00'
+FORMAT_VERSION = 1
+SUFFIX = '.ctraj'
+DEFAULT_PRECISION = 0.001  # Å
+BLOCK_FRAMES = 32
+ZSTD_LEVEL = 10
+ZLIB_LEVEL = 6
+INT32_LIMIT = 2 ** 31 - 1
+
+
+def archive_path(dump_file):
+    """Archive next to a dump: production.lammpstrj -> production.ctraj"""
+    return Path(dump_file).with_suffix(SUFFIX)
+
+
+def default_codec():
+    return 'zstd' if ZSTD_AVAILABLE else 'zlib'
+
+
+def compress(data, codec):
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return zlib.compress(data, ZLIB_LEVEL)
+
+
+def decompress(data, codec):
+    if codec == 'zstd':
+        if not ZSTD_AVAILABLE:
+            raise ImportError("Archive is zstd-compressed; install the zstandard package")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def _shuffle(values):
+    """int32 array -> bytes grouped by byte significance (zero high bytes cluster)"""
+    return np.ascontiguousarray(values.astype('<u4').ravel().view(np.uint8).reshape(-1, 4).T).tobytes()
+
+
+def _unshuffle(data, count):
+    return np.frombuffer(data, dtype=np.uint8).reshape(4, count).T.copy().view('<u4').ravel()
+
+
+def encode_block(quantized):
+    """(n_frames, n_atoms, 3) int32 -> bytes: first frame absolute, then zigzag frame deltas"""
+    q = quantized.astype(np.int64)
+    deltas = np.empty_like(q)
+    deltas[0] = q[0]
+    deltas[1:] = np.diff(q, axis=0)
+    if np.abs(deltas).max(initial=0) > INT32_LIMIT:
+        raise ValueError("Frame-to-frame displacement exceeds the fixed-point range")
+    zigzag = (deltas << 1) ^ (deltas >> 63)
+    return _shuffle(zigzag.astype(np.uint32))
+
+
+def decode_block(data, n_frames, n_atoms):
+    zigzag = _unshuffle(data, n_frames * n_atoms * 3).astype(np.int64)
+    deltas = (zigzag >> 1) ^ -(zigzag & 1)
+    return np.cumsum(deltas.reshape(n_frames, n_atoms, 3), axis=0)
+
+
+class ArchiveWriter:
+    """Stream frames into a .ctraj file (written to a temporary file, renamed on close)"""
+
+    def __init__(self, path, ids, types, precision=DEFAULT_PRECISION, block_frames=BLOCK_FRAMES,
+                 codec=None, source=None):
+        self.path = Path(path)
+        self.precision = float(precision)
+        self.block_frames = int(block_frames)
+        self.codec = codec or default_codec()
+        self.n_atoms = len(ids)
+        self.pending = []
+        self.timesteps = []
+        self.bounds = []
+        self.blocks = []  # (offset, length, first_frame, n_frames)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, self.tmp = tempfile.mkstemp(prefix=self.path.name, suffix='.tmp', dir=self.path.parent)
+        self.f = os.fdopen(fd, 'wb')
+        header = json.dumps({
+            'version': FORMAT_VERSION, 'n_atoms': self.n_atoms, 'precision': self.precision,
+            'block_frames': self.block_frames, 'codec': self.codec, 'source': source or {},
+        }).encode()
+        self.f.write(MAGIC + struct.pack('<I', len(header)) + header)
+        atoms = np.stack([np.asarray(ids, dtype=np.int64), np.asarray(types, dtype=np.int64)])
+        self._write_chunk(atoms.tobytes())
+
+    def _write_chunk(self, payload):
+        """Compressed payload prefixed with its length; returns (offset, length)"""
+        data = compress(payload, self.codec)
+        offset = self.f.tell()
+        self.f.write(struct.pack('<Q', len(data)) + data)
+        return offset, len(data)
+
+    def quantize(self, positions):
+        q = np.rint(np.asarray(positions, dtype=np.float64) / self.precision)
+        if np.abs(q).max(initial=0) > INT32_LIMIT:
+            raise ValueError(f"Coordinates exceed the int32 range at precision {self.precision} Å")
+        return q.astype(np.int32)
+
+    def add_frame(self, positions, timestep, bounds):
+        if len(positions) != self.n_atoms:
+            raise ValueError(f"Frame has {len(positions)} atoms, archive has {self.n_atoms}")
+        self.pending.append(self.quantize(positions))
+        self.timesteps.append(int(timestep))
+        self.bounds.append(np.asarray(bounds, dtype=np.float64).reshape(3, 2))
+        if len(self.pending) == self.block_frames:
+            self._flush()
+
+    def _flush(self):
+        if not self.pending:
+            return
+        first = len(self.timesteps) - len(self.pending)
+        offset, length = self._write_chunk(encode_block(np.stack(self.pending)))
+        self.blocks.append((offset, length, first, len(self.pending)))
+        self.pending = []
+
+    def close(self):
+        """Write the frame index and footer, then move the archive into place"""
+        self._flush()
+        index = {
+            'blocks': np.array(self.blocks, dtype=np.int64).reshape(-1, 4),
+            'timesteps': np.array(self.timesteps, dtype=np.int64),
+            'bounds': np.array(self.bounds, dtype=np.float64).reshape(-1, 3, 2),
+        }
+        payload = b''.join(struct.pack('<Q', a.size) + a.tobytes() for a in index.values())
+        index_offset, _ = self._write_chunk(payload)
+        self.f.write(struct.pack('<Q', index_offset) + MAGIC)
+        self.f.close()
+        os.replace(self.tmp, self.path)
+        return self.path
+
+    def abort(self):
+        self.f.close()
+        if os.path.exists(self.tmp):
+            os.remove(self.tmp)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class TrajectoryArchive:
+    """Random-access reader of a .ctraj file"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._f = None
+        self._cached = (None, None)  # (block number, decoded int64 frames)
+        f = self._file()
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{self.path} is not a trajectory archive")
+        (length,) = struct.unpack('<I', f.read(4))
+        self.header = json.loads(f.read(length))
+        if self.header['version'] > FORMAT_VERSION:
+            raise ValueError(f"{self.path}: archive version {self.header['version']} is newer than this reader")
+        self.codec = self.header['codec']
+        self.precision = self.header['precision']
+        self.n_atoms = self.header['n_atoms']
+        self.ids, self.types = np.frombuffer(self._read_chunk(f.tell()), dtype=np.int64).reshape(2, -1)
+
+        f.seek(-(8 + len(MAGIC)), os.SEEK_END)
+        (index_offset,) = struct.unpack('<Q', f.read(8))
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{self.path} is truncated (no frame index)")
+        index = self._read_chunk(index_offset)
+        arrays, pos = [], 0
+        for dtype in (np.int64, np.int64, np.float64):
+            (size,) = struct.unpack_from('<Q', index, pos)
+            arrays.append(np.frombuffer(index, dtype=dtype, count=size, offset=pos + 8))
+            pos += 8 + 8 * size
+        self.blocks = arrays[0].reshape(-1, 4)
+        self.timesteps = arrays[1]
+        self.bounds = arrays[2].reshape(-1, 3, 2)
+        self.n_frames = len(self.timesteps)
+
+    def _file(self):
+        if self._f is None:
+            self._f = open(self.path, 'rb')
+        return self._f
+
+    def _read_chunk(self, offset):
+        f = self._file()
+        f.seek(offset)
+        (length,) = struct.unpack('<Q', f.read(8))
+        return decompress(f.read(length), self.codec)
+
+    def __len__(self):
+        return self.n_frames
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_f'] = None
+        state['_cached'] = (None, None)
+        return state
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    def dimensions(self, frame):
+        """Box lengths (3,) of a frame"""
+        bounds = self.bounds[frame]
+        return (bounds[:, 1] - bounds[:, 0]).astype(np.float32)
+
+    def _block(self, number):
+        if self._cached[0] != number:
+            offset, _, _, n_frames = self.blocks[number]
+            frames = decode_block(self._read_chunk(offset), n_frames, self.n_atoms)
+            self._cached = (number, frames)
+        return self._cached[1]
+
+    def read_frame(self, frame, out=None):
+        """Positions (n_atoms, 3) float32 in Å of one frame (into out if given)"""
+        if not -self.n_frames <= frame < self.n_frames:
+            raise IndexError(f"Frame {frame} out of range ({self.n_frames} frames)")
+        frame %= self.n_frames
+        number = np.searchsorted(self.blocks[:, 2], frame, side='right') - 1
+        quantized = self._block(number)[frame - self.blocks[number, 2]]
+        if out is None:
+            out = np.empty((self.n_atoms, 3), dtype=np.float32)
+        np.multiply(quantized, self.precision, out=out, casting='unsafe')
+        return out
+
+    def frames(self, start=0, stop=None, step=1):
+        """Generator of (frame, positions) over a frame range"""
+        for frame in range(*slice(start, stop, step).indices(self.n_frames)):
+            yield frame, self.read_frame(frame)
+
+    def info(self):
+        size = self.path.stat().st_size
+        source = self.header.get('source', {})
+        return {
+            'path': str(self.path), 'n_frames': self.n_frames, 'n_atoms': self.n_atoms,
+            'precision': self.precision, 'codec': self.codec,
+            'block_frames': self.header['block_frames'],
+            'first_step': int(self.timesteps[0]) if self.n_frames else None,
+            'last_step': int(self.timesteps[-1]) if self.n_frames else None,
+            'size_mb': size / 1024 ** 2,
+            'ratio': source['size'] / size if source.get('size') else None,
+        }
+
+
+def archive_metadata(path):
+    """dump_metadata()-style summary of an archive from its frame index"""
+    archive = TrajectoryArchive(path)
+    steps = archive.timesteps
+    archive.close()
+    if not len(steps):
+        return None
+    return {'n_atoms': archive.n_atoms, 'first_step': int(steps[0]), 'last_step': int(steps[-1]),
+            'dump_interval': int(steps[1] - steps[0]) if len(steps) > 1 else None,
+            'n_frames': len(steps)}
+
+
+def convert_dump(dump_file, out_file=None, precision=DEFAULT_PRECISION, block_frames=BLOCK_FRAMES,
+                 codec=None):
+    """Stream a LAMMPS text dump into an archive; returns the archive info()"""
+    dump_file = Path(dump_file)
+    out_file = Path(out_file) if out_file else archive_path(dump_file)
+    stat = dump_file.stat()
+    source = {'path': str(dump_file.resolve()), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    writer = None
+    try:
+        for frame in DumpFrameFollower(dump_file).poll():
+            if writer is None:
+                types = frame.types if frame.types is not None else np.ones(len(frame.positions), np.int64)
+                ids = frame.ids if frame.ids is not None else np.arange(1, len(frame.positions) + 1)
+                writer = ArchiveWriter(out_file, ids, types, precision, block_frames, codec, source)
+            writer.add_frame(frame.positions, frame.timestep, frame.bounds)
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    if writer is None:
+        raise ValueError(f"No complete frames in {dump_file}")
+    writer.close()
+    return TrajectoryArchive(out_file).info()
+
+
+def archive_for(dump_file):
+    """
+    The archive to read instead of dump_file, or None: it must exist and
+    either record dump_file's size as its source or stand in for a missing
+    dump or Git LFS stub
+    """
+    dump_file = Path(dump_file)
+    archive = archive_path(dump_file)
+    if dump_file.suffix == SUFFIX:
+        return dump_file if dump_file.exists() else None
+    if not archive.exists():
+        return None
+    if not dump_file.exists() or is_lfs_stub(dump_file):
+        return archive
+    try:
+        source = TrajectoryArchive(archive).header.get('source', {})
+    except (OSError, ValueError) as e:
+        print(f"  ✗ Ignoring unreadable archive {archive.name}: {e}")
+        return None
+    return archive if source.get('size') == dump_file.stat().st_size else None
+
+
+def open_universe(dump_file, **kwargs):
+    """MDAnalysis Universe of a dump, read from its archive when one is available"""
+    archive = archive_for(dump_file)
+    if archive is not None:
+        return mda.Universe(str(archive), format='CTRAJ')
+    return mda.Universe(str(dump_file), format='LAMMPSDUMP', **kwargs)
+
+
+if MDA_AVAILABLE:
+    class CTRAJParser(TopologyReaderBase):
+        """Atom ids and types of an archive (as LAMMPSDUMPParser: masses 1, one residue)"""
+        format = 'CTRAJ'
+
+        def parse(self, **kwargs):
+            archive = TrajectoryArchive(self.filename)
+            types = archive.types.astype(str).astype(object)
+            n_atoms = archive.n_atoms
+            archive.close()
+            attrs = [Atomnames(types), Atomtypes(types), Atomids(archive.ids.copy()),
+                     Masses(np.ones(n_atoms), guessed=True), Resids(np.array([1])),
+                     Resnums(np.array([1])), Segids(np.array(['SYSTEM'], dtype=object))]
+            return Topology(n_atoms, 1, 1, attrs=attrs)
+
+    class CTRAJReader(ReaderBase):
+        """MDAnalysis coordinate reader for .ctraj archives (ts.data['step'] = LAMMPS timestep)"""
+        format = 'CTRAJ'
+        units = {'time': 'ps', 'length': 'Angstrom'}
+
+        def __init__(self, filename, **kwargs):
+            super().__init__(filename, **kwargs)
+            self.archive = TrajectoryArchive(self.filename)
+            self.n_atoms = self.archive.n_atoms
+            self.ts = self._Timestep(self.n_atoms, **self._ts_kwargs)
+            self._read_frame(0)
+
+        @property
+        def n_frames(self):
+            return self.archive.n_frames
+
+        def _reopen(self):
+            self.ts.frame = -1
+
+        def _read_next_timestep(self, ts=None):
+            if self.ts.frame + 1 >= self.n_frames:
+                raise IOError
+            return self._read_frame(self.ts.frame + 1)
+
+        def _read_frame(self, frame):
+            ts = self.ts
+            ts.frame = frame
+            self.archive.read_frame(frame, out=ts.positions)
+            ts.dimensions = np.concatenate([self.archive.dimensions(frame), [90.0, 90.0, 90.0]])
+            ts.data['step'] = int(self.archive.timesteps[frame])
+            return ts
+
+        def close(self):
+            self.archive.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert LAMMPS text dumps to seekable compressed archives')
+    sub = parser.add_subparsers(dest='command', required=True)
+    conv = sub.add_parser('convert', help='Convert dumps (archive written next to each dump)')
+    conv.add_argument('dumps', nargs='*', help='production.lammpstrj files')
+    conv.add_argument('--all', action='store_true', help='Every epsilon run of the registry')
+    conv.add_argument('--base-dir', default=None, help='Registry base directory (with --all)')
+    conv.add_argument('--precision', type=float, default=DEFAULT_PRECISION, help='Coordinate precision in Å')
+    conv.add_argument('--block-frames', type=int, default=BLOCK_FRAMES)
+    conv.add_argument('--codec', choices=('zstd', 'zlib'), default=None)
+    conv.add_argument('--force', action='store_true', help='Reconvert dumps that already have an archive')
+    info = sub.add_parser('info', help='Print archive metadata')
+    info.add_argument('archives', nargs='+')
+    args = parser.parse_args()
+
+    if args.command == 'info':
+        for path in args.archives:
+            print(json.dumps(TrajectoryArchive(path).info(), indent=2))
+        return
+
+    dumps = [Path(d) for d in args.dumps]
+    if args.all:
+        from epsilon_registry import get_registry, TRAJECTORY
+        registry = get_registry(args.base_dir)
+        dumps += [registry.path(eps, TRAJECTORY) for eps in registry.epsilons(require=TRAJECTORY)]
+    if not dumps:
+        parser.error('no dumps given (paths or --all)')
+
+    failed = 0
+    for dump in dumps:
+        if not args.force and archive_for(dump) is not None:
+            print(f"  ✓ {dump}: archive up to date")
+            continue
+        try:
+            result = convert_dump(dump, precision=args.precision, block_frames=args.block_frames,
+                                  codec=args.codec)
+        except (OSError, ValueError) as e:
+            print(f"  ✗ {dump}: {e}")
+            failed += 1
+            continue
+        print(f"  ✓ {dump}: {result['n_frames']} frames, {result['size_mb']:.1f} MB "
+              f"({result['ratio']:.1f}x smaller, {result['codec']})")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Streaming Coordinate Unwrapping with Persisted Image Counters
+=============================================================
+
+The dumps carry only wrapped `id type x y z`, so displacements over more
+than half a box length cannot be recovered from two frames alone. This
+module tracks periodic images frame to frame instead:
+
+- ImageTracker: per-atom image counters (int32) advanced one frame at a
+  time from the change of the fractional coordinates x/L; a jump of about
+  one box (|ds| > 1/2) is a boundary crossing. Working in fractional
+  coordinates keeps NPT box changes from looking like crossings, and
+  unwrapped positions follow the LAMMPS convention xu = x + ix * L(t)
+- Unwrapper: the image history of one trajectory (text dump or its
+  trajectory_archive), stored next to it as <stem>.images.npz:
+  crossings are rare, so only the sparse changes (frame, atom, axis,
+  +-1) are kept, plus the tracker state needed to extend the history
+  later. Any consumer unwraps frame i of any reader with
+  unwrap(i, positions, box) without tracking again; frames past the
+  stored history are tracked on the fly when read in order, or all at
+  once with ensure()
+- Optional float32 unwrapped coordinates of an atom selection
+  (<stem>.unwrapped.npy, memory-mapped) for consumers that want the
+  positions themselves, e.g. MSD stacks
+- The history is keyed on the trajectory (checkpoint.trajectory_key:
+  path, size, mtime); a changed trajectory is tracked again
+
+Usage:
+    unwrapper = Unwrapper(eps_dir / 'production.lammpstrj')
+    for ts in u.trajectory[::5]:
+        pos = unwrapper.unwrap(ts.frame, ts.positions, ts.dimensions)   # tracks missing frames
+    unwrapper.save()
+
+    python unwrap.py --all                          # image history of every epsilon run
+    python unwrap.py production.lammpstrj --coordinate-types 2   # + unwrapped oxygens
+
+Author: Scientific Analysis Suite
+Date: October 2026
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from checkpoint import trajectory_key
+from stage_timeline import StageSource
+from trajectory_archive import archive_for
+
+IMAGES_SUFFIX = '.images.npz'
+COORDINATES_SUFFIX = '.unwrapped.npy'
+FORMAT_VERSION = 1
+
+
+def unwrap_positions(positions, box, images, out=None):
+    """positions + images * box (float32, into out if given)"""
+    if out is None:
+        out = np.empty(np.shape(positions), dtype=np.float32)
+    np.multiply(images, np.asarray(box, dtype=np.float64)[:3], out=out, casting='unsafe')
+    out += positions
+    return out
+
+
+class ImageTracker:
+    """Per-atom periodic image counters advanced frame by frame"""
+
+    def __init__(self, n_atoms):
+        self.images = np.zeros((n_atoms, 3), dtype=np.int32)
+        self.previous = None  # fractional coordinates of the last frame
+        self.frames = 0
+
+    def update(self, positions, box):
+        """
+        Advance to the next frame; returns (atoms, axes, deltas) of the image
+        counters that changed
+        """
+        fractional = np.asarray(positions, dtype=np.float64) / np.asarray(box, dtype=np.float64)[:3]
+        if self.previous is None:
+            atoms = axes = deltas = np.empty(0, dtype=np.int32)
+        else:
+            # Leaving through the upper face reappears near 0: ds ~ -1, image +1
+            jumps = -np.rint(fractional - self.previous).astype(np.int32)
+            atoms, axes = np.nonzero(jumps)
+            deltas = jumps[atoms, axes]
+            self.images[atoms, axes] += deltas
+        self.previous = fractional
+        self.frames += 1
+        return atoms, axes, deltas
+
+    def unwrap(self, positions, box, out=None):
+        return unwrap_positions(positions, box, self.images, out)
+
+
+class Unwrapper:
+    """Persisted image history of one trajectory"""
+
+    def __init__(self, traj_file, directory=None):
+        self.traj_file = Path(traj_file)
+        self.source = archive_for(self.traj_file) or self.traj_file
+        parent = Path(directory) if directory else self.source.parent
+        stem = self.source.name.split('.')[0]
+        self.path = parent / f'{stem}{IMAGES_SUFFIX}'
+        self.coordinates_path = parent / f'{stem}{COORDINATES_SUFFIX}'
+        self.key = trajectory_key(self.source)
+        self.tracker = None
+        self.coordinate_atoms = None
+        self._changes = []  # [(frames, atoms, axes, deltas)] in frame order
+        self._merged = None
+        self._cursor = None
+        self._dirty = False
+        self.load()
+
+    @property
+    def n_frames(self):
+        """Frames with known images"""
+        return self.tracker.frames if self.tracker is not None else 0
+
+    @property
+    def n_crossings(self):
+        return sum(len(c[0]) for c in self._changes)
+
+    def load(self):
+        """Read the stored history if it belongs to this trajectory"""
+        if not self.path.exists():
+            return False
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                key = {k: data[k].item() for k in data.files if k.startswith('key_')}
+                if int(data['version']) != FORMAT_VERSION or key != self._flat_key():
+                    print(f"  ✗ {self.path.name} is from another trajectory; tracking images again")
+                    return False
+                tracker = ImageTracker(len(data['images']))
+                tracker.images = data['images'].copy()
+                tracker.previous = data['previous'].copy() if int(data['n_frames']) else None
+                tracker.frames = int(data['n_frames'])
+                self._changes = [(data['change_frame'].copy(), data['change_atom'].copy(),
+                                  data['change_axis'].copy(), data['change_delta'].copy())]
+                if 'coordinate_atoms' in data.files and self.coordinates_path.exists():
+                    self.coordinate_atoms = data['coordinate_atoms'].copy()
+        except (OSError, ValueError, KeyError) as e:
+            print(f"  ✗ Unreadable image history {self.path.name} ignored: {e}")
+            return False
+        self.tracker = tracker
+        return True
+
+    def _flat_key(self):
+        return {f'key_{k}': v for k, v in self.key.items()}
+
+    def save(self):
+        """Write the history atomically (no-op when nothing was tracked since the last save)"""
+        if not self._dirty or self.tracker is None:
+            return self.path
+        frames, atoms, axes, deltas = self._merged_changes()
+        arrays = {
+            'version': np.array(FORMAT_VERSION), 'n_frames': np.array(self.tracker.frames),
+            'images': self.tracker.images,
+            'previous': self.tracker.previous if self.tracker.previous is not None else np.zeros((0, 3)),
+            'change_frame': frames, 'change_atom': atoms, 'change_axis': axes, 'change_delta': deltas,
+            **{k: np.array(v) for k, v in self._flat_key().items()},
+        }
+        if self.coordinate_atoms is not None:
+            arrays['coordinate_atoms'] = self.coordinate_atoms
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix=self.path.name, suffix='.tmp', dir=self.path.parent)
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"  ✗ Image history not saved ({self.path}): {e}")
+            return None
+        self._dirty = False
+        return self.path
+
+    def _merged_changes(self):
+        if self._merged is None:
+            if self._changes:
+                self._merged = tuple(np.concatenate(parts) for parts in zip(*self._changes))
+            else:
+                self._merged = (np.empty(0, np.int32), np.empty(0, np.int32),
+                                np.empty(0, np.int8), np.empty(0, np.int8))
+            self._changes = [self._merged]
+        return self._merged
+
+    def track(self, positions, box):
+        """Add the next frame (frame number n_frames) to the history"""
+        if self.tracker is None:
+            self.tracker = ImageTracker(len(positions))
+        frame = self.tracker.frames
+        atoms, axes, deltas = self.tracker.update(positions, box)
+        if len(atoms):
+            self._changes.append((np.full(len(atoms), frame, dtype=np.int32), atoms.astype(np.int32),
+                                  axes.astype(np.int8), deltas.astype(np.int8)))
+            self._merged = None
+        self._dirty = True
+        return self.tracker.images
+
+    def images(self, frame):
+        """(n_atoms, 3) image counters of a tracked frame (sequential reads are O(changes))"""
+        if not 0 <= frame < self.n_frames:
+            raise IndexError(f"Frame {frame} has no image counters ({self.n_frames} tracked)")
+        if frame == self.n_frames - 1:
+            return self.tracker.images
+        frames, atoms, axes, deltas = self._merged_changes()
+        if self._cursor is None or frame < self._cursor[0]:
+            self._cursor = [-1, 0, np.zeros_like(self.tracker.images)]
+        _, start, images = self._cursor
+        end = int(np.searchsorted(frames, frame, side='right'))
+        np.add.at(images, (atoms[start:end], axes[start:end]), deltas[start:end])
+        self._cursor = [frame, end, images]
+        return images
+
+    def unwrap(self, frame, positions, box, out=None):
+        """
+        Unwrapped float32 positions of frame (full-trajectory frame number,
+        e.g. ts.frame); the next untracked frame is tracked from positions,
+        a gap is filled with ensure() first
+        """
+        if frame > self.n_frames:
+            self.ensure(frame)
+        if frame == self.n_frames:
+            images = self.track(positions, box)
+        else:
+            images = self.images(frame)
+        return unwrap_positions(positions, box, images, out)
+
+    def ensure(self, n_frames=None):
+        """Track images up to n_frames (default: the whole trajectory), then save"""
+        source = StageSource('production', self.traj_file)
+        n_frames = source.n_frames if n_frames is None else min(n_frames, source.n_frames)
+        if self.n_frames >= n_frames:
+            return self
+        for local, _, positions, dims, _ in source.frames(start=self.n_frames):
+            if local >= n_frames:
+                break
+            self.track(positions, dims)
+        self.save()
+        return self
+
+    def write_coordinates(self, atoms=None):
+        """
+        Persist float32 unwrapped positions (n_frames, len(atoms), 3) of an
+        atom selection (default all) for the whole trajectory; returns a memmap
+        """
+        source = StageSource('production', self.traj_file)
+        atoms = np.arange(source.n_atoms) if atoms is None else np.asarray(atoms, dtype=np.int64)
+        out = np.lib.format.open_memmap(self.coordinates_path, mode='w+', dtype=np.float32,
+                                        shape=(source.n_frames, len(atoms), 3))
+        buffer = None
+        for local, _, positions, dims, _ in source.frames():
+            buffer = self.unwrap(local, positions, dims, out=buffer)
+            out[local] = buffer[atoms]
+        out.flush()
+        self.coordinate_atoms = atoms
+        self._dirty = True
+        self.save()
+        return out
+
+    def coordinates(self):
+        """(memmap of persisted unwrapped positions, their atom indices), or (None, None)"""
+        if self.coordinate_atoms is None:
+            return None, None
+        return np.load(self.coordinates_path, mmap_mode='r'), self.coordinate_atoms
+
+    def summary(self):
+        return {'trajectory': str(self.source), 'frames': self.n_frames,
+                'crossings': self.n_crossings, 'history': str(self.path),
+                'coordinates': str(self.coordinates_path) if self.coordinate_atoms is not None else None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Track and persist periodic image counters of trajectories')
+    parser.add_argument('dumps', nargs='*', help='production.lammpstrj files (archives are used when present)')
+    parser.add_argument('--all', action='store_true', help='Every epsilon run of the registry')
+    parser.add_argument('--base-dir', default=None, help='Registry base directory (with --all)')
+    parser.add_argument('--coordinate-types', type=int, nargs='+', default=None,
+                        help='Also store unwrapped float32 coordinates of these atom types')
+    args = parser.parse_args()
+
+    dumps = [Path(d) for d in args.dumps]
+    if args.all:
+        from epsilon_registry import get_registry, TRAJECTORY
+        registry = get_registry(args.base_dir)
+        dumps += [registry.path(eps, TRAJECTORY) for eps in registry.trajectory_epsilons()]
+    if not dumps:
+        parser.error('no trajectories given (paths or --all)')
+
+    failed = 0
+    for dump in dumps:
+        try:
+            unwrapper = Unwrapper(dump).ensure()
+            if args.coordinate_types:
+                source = StageSource('production', dump)
+                types = next(source.frames())[4]
+                unwrapper.write_coordinates(np.flatnonzero(np.isin(types, args.coordinate_types)))
+        except (OSError, ValueError) as e:
+            print(f"  ✗ {dump}: {e}")
+            failed += 1
+            continue
+        info = unwrapper.summary()
+        print(f"  ✓ {dump}: {info['frames']} frames, {info['crossings']} boundary crossings")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -22,6 +22,23 @@ Modules:
 - 14: System Validation
 - 15: Thermal Trajectory
 
+Execution modes (--mode):
+- pool       (default) warm in-process host, heavy imports done once per worker,
+             same per-module timeout (the pool is restarted after one)
+- subprocess one fresh Python interpreter per module (full isolation, hard timeout)
+- inline     every module in this process, sequentially (debugging)
+
+--profile records per-stage wall/CPU time, peak RSS and bytes read
+(codes/instrumentation.py) in every mode, adds them to
+ANALYSIS_RESULTS_SUMMARY.json and writes ANALYSIS_PROFILE.folded.
+
+Modules are admitted only while their estimated peak RSS fits the memory
+budget (--memory-budget-mb, ANALYSIS_RUNNER_MEMORY_MB, default 80% of RAM)
+next to the modules already running (codes/memory_admission.py). Estimates
+are the peaks measured in previous runs (analysis/module_footprints.json),
+else the declared ones below. The output of every module is streamed to
+analysis/logs/moduleNN.log.
+
 Author: AI Analysis Suite
 Date: November 2025
 """
@@ -34,12 +51,31 @@ import json
 from datetime import datetime
 import concurrent.futures
 import os
+import argparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'codes'))
+from module_host import ModuleHost, execute_module, discover_modules, profile_root
+from memory_admission import (AdmissionController, FootprintHistory, runner_budget_mb,
+                              child_peak_rss_mb)
+import instrumentation
+
+EXECUTION_MODES = ('pool', 'subprocess', 'inline')
+MODULE_TIMEOUT = 3600  # seconds per module
+POLL_INTERVAL = 0.2    # seconds between checks on a running subprocess
 
 class AnalysisMasterRunner:
-    def __init__(self):
+    def __init__(self, mode='pool', max_workers=None, profile=False, memory_budget_mb=None):
+        self.mode = mode
+        self.profile = profile
+        self.max_workers = max_workers or min(os.cpu_count(), 8)
         self.base_dir = Path('/store/shuvam/solvent_effects/6ns_sim/6ns_sim_v2')
         self.codes_dir = self.base_dir / 'analysis' / 'codes'
         self.results_file = self.base_dir / 'analysis' / 'ANALYSIS_RESULTS_SUMMARY.json'
+        self.profile_dir = self.base_dir / 'analysis' / 'profile'
+        self.folded_file = self.base_dir / 'analysis' / 'ANALYSIS_PROFILE.folded'
+        self.log_dir = self.base_dir / 'analysis' / 'logs'
+        self.footprints = FootprintHistory(self.base_dir / 'analysis' / 'module_footprints.json')
+        self.admission = AdmissionController(runner_budget_mb(memory_budget_mb), self.max_workers)
         
         # Modules to run (excluding 04 and 16)
         self.modules = {
@@ -76,9 +112,35 @@ class AnalysisMasterRunner:
             15: 'Thermal trajectory analysis',
         }
         
+        # Declared peak RSS (MB) until a run of the module has been measured
+        self.declared_memory_mb = {
+            7: 8192,   # all trajectories loaded at once
+            11: 4096,  # figure rendering
+        }
+        
+        # Only modules exposing the run(context) entry point can be hosted
+        if self.mode != 'subprocess' and self.codes_dir.exists():
+            hosted = discover_modules(self.codes_dir)
+            for module_num in self.modules:
+                if module_num not in hosted:
+                    print(f"  Warning: Module {module_num:02d} has no run(context) entry point")
+        
         self.execution_times = {}
         self.execution_status = {}
         self.error_messages = {}
+        self.stage_profiles = {}
+        self.profile_records = []
+        self.peak_rss = {}
+        
+        if self.profile:
+            self.start_profiling()
+    
+    def start_profiling(self):
+        """Enable stage instrumentation here and (via the environment) in all workers"""
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        for old in self.profile_dir.glob('stages_*.jsonl'):
+            old.unlink()
+        instrumentation.enable(self.profile_dir)
     
     def print_header(self):
         """Print formatted header"""
@@ -88,6 +150,13 @@ class AnalysisMasterRunner:
         print("="*80)
         print(f"\nBase Directory: {self.base_dir}")
         print(f"Codes Directory: {self.codes_dir}")
+        print(f"Execution Mode: {self.mode}")
+        print(f"Admission: {self.admission.describe()}")
+        print(f"Module Logs: {self.log_dir}")
+        for module_num, estimate in self.memory_estimates(self.modules).items():
+            print(f"  Module {module_num:02d}: ~{estimate:.0f} MB ({self.footprints.source(module_num)})")
+        if self.profile:
+            print(f"Stage Profile: {self.profile_dir}")
         print(f"Start Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print("\n" + "="*80)
     
@@ -104,68 +173,192 @@ class AnalysisMasterRunner:
         
         start_time = time.time()
         
+        env = None
+        if self.profile:
+            env = dict(os.environ, **{instrumentation.PROFILE_ROOT_ENV: profile_root(module_file)})
+        
+        log_file = self.log_file(module_num)
         try:
-            # Run process
-            result = subprocess.run(
-                ['python3', str(module_file)],
-                cwd=str(self.base_dir),
-                capture_output=True,
-                text=True,
-                timeout=3600  # 1 hour timeout per module
-            )
+            # Run process, output streamed to the module's log file
+            with open(log_file, 'w') as log:
+                process = subprocess.Popen(
+                    ['python3', str(module_file)],
+                    cwd=str(self.base_dir),
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                    env=env,
+                )
+                returncode = self.wait_child(process, module_num, MODULE_TIMEOUT)
             
             elapsed = time.time() - start_time
             self.execution_times[module_num] = elapsed
             
-            if result.returncode == 0:
+            if returncode == 0:
                 self.execution_status[module_num] = 'SUCCESS'
                 return module_num, True, elapsed
             else:
                 self.execution_status[module_num] = 'FAILED'
-                self.error_messages[module_num] = result.stderr[:1000] if result.stderr else "Unknown error"
+                self.error_messages[module_num] = self.log_tail(log_file) or "Unknown error"
                 return module_num, False, elapsed
         
         except subprocess.TimeoutExpired:
             self.execution_status[module_num] = 'TIMEOUT'
             self.error_messages[module_num] = "Execution timeout (>1 hour)"
-            return module_num, False, 3600
+            return module_num, False, MODULE_TIMEOUT
         
         except Exception as e:
             self.execution_status[module_num] = 'ERROR'
             self.error_messages[module_num] = str(e)
             return module_num, False, 0
     
+    def wait_child(self, process, module_num, timeout):
+        """
+        Wait for a module subprocess (killed after timeout) and record its
+        peak RSS from os.wait4(); returns the exit code
+        """
+        deadline = time.time() + timeout
+        while True:
+            pid, status, rusage = os.wait4(process.pid, os.WNOHANG)
+            if pid:
+                break
+            if time.time() > deadline:
+                process.kill()
+                _, status, rusage = os.wait4(process.pid, 0)
+                process.returncode = os.waitstatus_to_exitcode(status)
+                self.peak_rss[module_num] = child_peak_rss_mb(rusage)
+                raise subprocess.TimeoutExpired(process.args, timeout)
+            time.sleep(POLL_INTERVAL)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        self.peak_rss[module_num] = child_peak_rss_mb(rusage)
+        return process.returncode
+    
+    def log_file(self, module_num):
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        return self.log_dir / f"module{module_num:02d}.log"
+    
+    @staticmethod
+    def log_tail(log_file, n_chars=1000):
+        """Last n_chars of a module log (the traceback of a failed run)"""
+        try:
+            return Path(log_file).read_text(errors='replace')[-n_chars:]
+        except OSError:
+            return None
+    
+    def memory_estimates(self, module_nums):
+        """Estimated peak RSS (MB) per module: measured history, else declared"""
+        return {m: self.footprints.estimate(m, self.declared_memory_mb.get(m)) for m in module_nums}
+    
+    def record_footprints(self):
+        """Add this run's measured peaks to the footprint history"""
+        for module_num, peak in self.peak_rss.items():
+            self.footprints.record(module_num, peak)
+        try:
+            self.footprints.save()
+        except OSError as e:
+            print(f"\n✗ Could not save module footprints: {e}")
+    
+    def record_hosted_result(self, module_num, result):
+        """Store the outcome of a module run through the in-process host"""
+        self.execution_times[module_num] = result['elapsed']
+        if result.get('peak_rss_mb') is not None:
+            self.peak_rss[module_num] = result['peak_rss_mb']
+        if result['success']:
+            self.execution_status[module_num] = 'SUCCESS'
+        elif result.get('timed_out'):
+            self.execution_status[module_num] = 'TIMEOUT'
+            self.error_messages[module_num] = result['error']
+        else:
+            self.execution_status[module_num] = 'FAILED'
+            self.error_messages[module_num] = (result['error'] or "Unknown error")[-1000:]
+        return module_num, result['success'], result['elapsed']
+    
+    def report_result(self, m_num, success, elapsed):
+        """Print one completion line; returns True on success"""
+        status = "SUCCESS" if success else "FAILED"
+        print(f"  [Module {m_num:02d}] {status} ({elapsed:.1f}s) - {self.module_descriptions[m_num]}")
+        if not success:
+            print(f"    Error: {self.error_messages[m_num][:100]}...")
+        return success
+    
+    def execute_hosted(self):
+        """Execute modules through the warm module host (pool or inline)"""
+        module_files = {}
+        for module_num, filename in self.modules.items():
+            module_file = self.codes_dir / filename
+            if module_file.exists():
+                module_files[module_num] = module_file
+            else:
+                self.execution_status[module_num] = 'FAILED'
+                self.error_messages[module_num] = f"File not found: {module_file}"
+        
+        successful = 0
+        failed = len(self.modules) - len(module_files)
+        
+        if self.mode == 'inline':
+            print(f"\nExecuting modules sequentially in this process...")
+            os.chdir(self.base_dir)
+            outcomes = ((m, execute_module(f, capture_output=False)) for m, f in module_files.items())
+        else:
+            print(f"\nExecuting modules in warm worker pool (Max workers: {self.max_workers}, "
+                  f"{self.admission.describe()})...")
+            host = ModuleHost(base_dir=self.base_dir, codes_dir=self.codes_dir,
+                              workers=self.max_workers)
+            outcomes = host.run_modules(module_files, admission=self.admission,
+                                        estimates=self.memory_estimates(module_files),
+                                        log_files={m: self.log_file(m) for m in module_files},
+                                        timeout=MODULE_TIMEOUT)
+        
+        try:
+            for module_num, result in outcomes:
+                if self.report_result(*self.record_hosted_result(module_num, result)):
+                    successful += 1
+                else:
+                    failed += 1
+        finally:
+            if self.mode != 'inline':
+                host.shutdown()
+        
+        return successful, failed
+    
     def execute_all_modules(self):
         """Execute all modules in parallel"""
-        # Separate heavy/sequential modules if needed
-        # Module 11 (Movies) might be heavy on I/O or rendering, but let's try parallel
-        # We'll use a max_workers limit to avoid OOM
-        max_workers = min(os.cpu_count(), 8) 
+        if self.mode != 'subprocess':
+            return self.execute_hosted()
+        
+        # Heavy modules (07 loads every universe, 11 renders) are only started
+        # while their estimated peak RSS fits next to the running ones
+        max_workers = self.max_workers
+        estimates = self.memory_estimates(self.modules)
+        pending = list(self.modules)
         
-        print(f"\nExecuting modules in parallel (Max workers: {max_workers})...")
+        print(f"\nExecuting modules in parallel (Max workers: {max_workers}, "
+              f"{self.admission.describe()})...")
         
         successful = 0
         failed = 0
         
         with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_module = {executor.submit(self.run_module, m): m for m in self.modules}
-            
-            for future in concurrent.futures.as_completed(future_to_module):
-                module_num = future_to_module[future]
-                try:
-                    m_num, success, elapsed = future.result()
-                    status = "SUCCESS" if success else "FAILED"
-                    print(f"  [Module {m_num:02d}] {status} ({elapsed:.1f}s) - {self.module_descriptions[m_num]}")
-                    
-                    if success:
-                        successful += 1
-                    else:
+            future_to_module = {}
+            while pending or future_to_module:
+                for module_num in self.admission.admissible(pending, estimates):
+                    self.admission.acquire(module_num, estimates[module_num])
+                    pending.remove(module_num)
+                    future_to_module[executor.submit(self.run_module, module_num)] = module_num
+                
+                done, _ = concurrent.futures.wait(future_to_module,
+                                                  return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    module_num = future_to_module.pop(future)
+                    self.admission.release(module_num)
+                    try:
+                        if self.report_result(*future.result()):
+                            successful += 1
+                        else:
+                            failed += 1
+                            
+                    except Exception as e:
+                        print(f"  [Module {module_num:02d}] EXCEPTION: {e}")
                         failed += 1
-                        print(f"    Error: {self.error_messages[m_num][:100]}...")
-                        
-                except Exception as e:
-                    print(f"  [Module {module_num:02d}] EXCEPTION: {e}")
-                    failed += 1
         
         return successful, failed
     
@@ -203,10 +396,36 @@ class AnalysisMasterRunner:
         
         print("-" * 80)
     
+    def collect_profile(self):
+        """Merge the stage records of all processes and print the flame-style report"""
+        self.profile_records = instrumentation.load_stage_records(self.profile_dir)
+        if not self.profile_records:
+            print("\n✗ No stage records were written")
+            return
+        
+        by_root = {}
+        for record in self.profile_records:
+            by_root.setdefault(record['path'].split(';')[0], []).append(record)
+        for module_num, filename in self.modules.items():
+            records = by_root.get(profile_root(filename))
+            if records:
+                self.stage_profiles[module_num] = instrumentation.aggregate(records)
+        
+        print("\n" + "="*80)
+        print("STAGE PROFILE")
+        print("="*80)
+        instrumentation.print_flame_report(self.profile_records)
+        try:
+            instrumentation.write_folded(self.profile_records, self.folded_file)
+            print(f"\n✓ Folded stacks (flamegraph.pl / speedscope): {self.folded_file}")
+        except Exception as e:
+            print(f"\n✗ Could not write folded stacks: {e}")
+    
     def save_results_json(self):
         """Save execution results to JSON"""
         results = {
             'timestamp': datetime.now().isoformat(),
+            'mode': self.mode,
             'total_modules': len(self.execution_status),
             'successful': sum(1 for s in self.execution_status.values() if s == 'SUCCESS'),
             'failed': sum(1 for s in self.execution_status.values() if s != 'SUCCESS'),
@@ -218,8 +437,19 @@ class AnalysisMasterRunner:
                 'description': self.module_descriptions[module_num],
                 'status': self.execution_status.get(module_num, 'NOT RUN'),
                 'time_seconds': self.execution_times.get(module_num, 0),
+                'peak_rss_mb': self.peak_rss.get(module_num),
                 'error': self.error_messages.get(module_num, None)
             }
+            if module_num in self.stage_profiles:
+                results['modules'][str(module_num)]['stages'] = self.stage_profiles[module_num]
+        
+        if self.profile:
+            results['profile'] = {
+                'profile_dir': str(self.profile_dir),
+                'folded_file': str(self.folded_file),
+                'records': len(self.profile_records),
+                'processes': len({r['pid'] for r in self.profile_records}),
+            }
         
         try:
             with open(self.results_file, 'w') as f:
@@ -229,10 +459,25 @@ class AnalysisMasterRunner:
             print(f"\n✗ Could not save results: {e}")
 
 def main():
-    runner = AnalysisMasterRunner()
+    parser = argparse.ArgumentParser(description='Run all non-CUDA analysis modules')
+    parser.add_argument('--mode', choices=EXECUTION_MODES, default='pool',
+                        help='pool: warm in-process host (default); subprocess: one '
+                             'interpreter per module; inline: sequential in this process')
+    parser.add_argument('--workers', type=int, default=None, help='Parallel workers (default: min(cpus, 8))')
+    parser.add_argument('--profile', action='store_true',
+                        help='Record per-stage time/memory/IO and add it to the summary')
+    parser.add_argument('--memory-budget-mb', type=float, default=None,
+                        help='Memory for all concurrent modules (default: $ANALYSIS_RUNNER_MEMORY_MB or 80%% of RAM)')
+    args = parser.parse_args()
+    
+    runner = AnalysisMasterRunner(mode=args.mode, max_workers=args.workers, profile=args.profile,
+                                  memory_budget_mb=args.memory_budget_mb)
     runner.print_header()
     successful, failed = runner.execute_all_modules()
     runner.print_summary(successful, failed)
+    runner.record_footprints()
+    if runner.profile:
+        runner.collect_profile()
     runner.save_results_json()
     
     print("\n" + "="*80)